@@ -1,27 +1,47 @@
 import os
+import atexit
+import functools
+import hashlib
+import json
 import time
 import threading
-import shutil
 import logging
+import socket
+import stat
 import sys
+import tarfile
+import tempfile
+import uuid
+import zipfile
+from contextlib import contextmanager
 from datetime import datetime
-import mt940
-import paramiko
-from flask import Flask, request, jsonify, render_template, redirect, url_for, send_from_directory
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt
+from flask import Blueprint, Flask, Response, stream_with_context, request, jsonify, render_template, redirect, url_for, send_from_directory
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt, get_jwt_identity
 from flask_restx import Api, Resource, fields, Namespace
 from file_processors import FileProcessorFactory
 from dashboard import dashboard_data
-from routing import HelixRoutingEngine, RoutingCode, FileJob, ProcessingStatus
-
-# Configure Python logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [Helix] %(levelname)s: %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from dashboard_feed import DashboardFeed
+from routing import HelixRoutingEngine, RoutingCode, FileJob, ProcessingStatus, Priority, AuditAction
+from scheduler import DEFAULT_DEPARTMENT, PriorityScheduler
+from tracing import OTLPFileExporter, Tracer
+from job_store import store_from_url
+from audit_log import AuditJournal
+from archive import ArchiveStore
+from job_events import JobEventBus
+from lazy_state import Lazy, resolve
+from leader_election import LeaderElector, lock_from_url
+from memory_budget import MB, MemoryBudget
+from pipeline_metrics import PipelineMetrics
+from profiling import ProfilerBusy, capture_allocations, collapsed, profile_call, sample_stacks
+from rollups import RESOLUTIONS, amounts_by_currency
+from routing_rules import RoutingRulesEngine
+from structured_logging import configure_logging, shutdown_logging
+from uploads import UploadError, UploadSessionStore, copy_stream, is_archive, iter_archive_entries
+from user_store import HashingPool, HashingPoolBusy, UserStore, password_hasher_from_env, permissions_json
+from work_queue import SCOPES, DepartmentLimit, NewTask, queue_from_url
+
+# Python logging is queued and written to stdout by a background thread, configured by
+# open_shared_state() - importing app starts no threads
 logger = logging.getLogger(__name__)
 
 # ---- Mock SAP pyrfc for demo ----
@@ -32,20 +52,23 @@ class MockSAPConnection:
         logger.info(f"Mock SAP RFC Call: {function_name} with params: {list(params.keys())}")
         return {"status": "success", "message": "Mock RFC processed"}
 
-try:
-    from pyrfc import Connection
-    logger.info("Using real SAP pyrfc library")
-except ImportError:
-    Connection = MockSAPConnection
-    logger.info("Using Mock SAP connection (pyrfc not available)")
+@functools.lru_cache(maxsize=None)
+def sap_connection_class():
+    """pyrfc's Connection if it is installed, else the mock - resolved on the first SAP call"""
+    try:
+        from pyrfc import Connection
+        logger.info("Using real SAP pyrfc library")
+        return Connection
+    except ImportError:
+        logger.info("Using Mock SAP connection (pyrfc not available)")
+        return MockSAPConnection
 
 # ---- Flask Setup ----
-app = Flask(__name__)
-app.config["JWT_SECRET_KEY"] = os.getenv("SECRET_KEY", "changeme")
+# Routes and resources are declared on the blueprint / API below; create_app() binds them to an app
+web = Blueprint('helix', __name__)
 
 # ---- Swagger API Documentation Setup ----
 api = Api(
-    app, 
     version='1.0', 
     title='Helix Bank File Processing API',
     description='🏦 Swiss-precision bank file processing with multi-format support\n\n'
@@ -64,8 +87,97 @@ ns_dashboard = api.namespace('dashboard', description='📊 Dashboard and monito
 ns_system = api.namespace('system', description='🔧 System health and info')
 
 # ---- Enterprise Routing Engine Setup ----
-routing_engine = HelixRoutingEngine()
-logger.info("🇨🇭 SwissLife-inspired Routing Engine initialized - Ready for precision!")
+# The state every process shares is opened on first use, and by open_shared_state() at
+# the latest (create_app() and the background services): importing app creates no files.
+# Jobs are shared by all workers through SQLite (WAL); set JOB_STORE_PATH="" for in-memory only.
+# JOB_STORE_URL=redis://... shares them with every host instead (needed by a Redis work queue)
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "/tmp/helix_state/jobs.db")
+JOB_STORE_URL = os.getenv("JOB_STORE_URL") or ("sqlite:" + JOB_STORE_PATH if JOB_STORE_PATH else "memory")
+job_store = Lazy(lambda: store_from_url(JOB_STORE_URL), 'job_store')
+# Durable audit journal (group-committed by a background writer); AUDIT_JOURNAL_DIR="" disables it
+AUDIT_JOURNAL_DIR = os.getenv("AUDIT_JOURNAL_DIR", "/tmp/helix_state/audit")
+
+def open_audit_journal():
+    journal = AuditJournal(AUDIT_JOURNAL_DIR)
+    atexit.register(journal.close)
+    return journal
+
+audit_journal = Lazy(open_audit_journal) if AUDIT_JOURNAL_DIR else None
+# Job status transitions are pushed to SSE / long-poll clients instead of being polled for;
+# transitions made by other processes are read from the shared job store while clients wait
+job_events = JobEventBus(
+    history=int(os.getenv("JOB_EVENTS_HISTORY", "10000")),
+    changes=(lambda since: job_store.changed_since(since)) if JOB_STORE_URL != "memory" else None,
+    poll_interval=float(os.getenv("JOB_EVENTS_POLL_SECONDS", "0.5"))
+)
+routing_engine = HelixRoutingEngine(job_store=job_store, audit_journal=audit_journal, event_bus=job_events)
+
+# Priority scheduler feeding the processing workers (aging + cut-offs). Department quotas
+# hold across every node, so the work queue enforces them when tasks are leased - a node
+# only ever holds tasks its workers may start
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", "2"))
+processing_scheduler = PriorityScheduler(
+    aging_seconds=float(os.getenv("SCHEDULER_AGING_SECONDS", "30")),
+    deadline_lead_seconds=float(os.getenv("SCHEDULER_DEADLINE_LEAD_SECONDS", "300")),
+    cutoffs={dept: info['cutoff'] for dept, info in routing_engine.departments.items() if info.get('cutoff')}
+)
+department_limits = {dept: DepartmentLimit(**info['quota'])
+                     for dept, info in routing_engine.departments.items() if info.get('quota')}
+
+# Work queue shared by every node running the background services: the local workers
+# lease tasks from it, so adding nodes adds throughput. SQLite serves one host; a Redis
+# queue spreads tasks over several, which needs a job store every host can reach
+# (JOB_STORE_URL=redis://...) and LOCAL_STAGING / UPLOAD_DIR on a shared volume - a queue
+# reaching further than the job store is refused. Failed SFTP files are retried with
+# back-off and dead-lettered after WORK_QUEUE_MAX_ATTEMPTS.
+WORK_QUEUE_URL = os.getenv("WORK_QUEUE_URL", "memory" if JOB_STORE_URL == "memory" else "sqlite:/tmp/helix_state/queue.db")
+WORK_QUEUE_POLL_SECONDS = float(os.getenv("WORK_QUEUE_POLL_SECONDS", "0.5"))
+WORK_QUEUE_RETRY_SECONDS = float(os.getenv("WORK_QUEUE_RETRY_SECONDS", "15"))
+
+def open_work_queue():
+    queue = queue_from_url(
+        WORK_QUEUE_URL,
+        visibility_timeout=float(os.getenv("WORK_QUEUE_VISIBILITY_SECONDS", "120")),
+        max_attempts=int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "5")),
+        on_dead_letter=lambda task_id, payload, error: dead_lettered_task(task_id, payload, error)
+    )
+    if SCOPES.index(queue.scope) > SCOPES.index(job_store.scope):
+        raise RuntimeError(
+            f"WORK_QUEUE_URL hands tasks to any {queue.scope} but the job store is only readable "
+            f"within one {job_store.scope} - workers elsewhere would not find the jobs of their tasks"
+        )
+    return queue
+
+work_queue = Lazy(open_work_queue)
+
+# Prometheus metrics for the pipeline stages, shared by all gunicorn workers (scraped at /metrics)
+pipeline_metrics = Lazy(lambda: PipelineMetrics(
+    os.getenv("PIPELINE_METRICS_PATH") or None,
+    shards=int(os.getenv("METRICS_SHARDS", "16"))
+), 'pipeline_metrics')
+
+# Per-file memory budget: files too big to parse in process are streamed or parsed in an isolated child
+memory_budget = MemoryBudget(
+    budget_bytes=int(float(os.getenv("PARSE_MEMORY_BUDGET_MB", "256")) * MB),
+    isolated_limit_bytes=int(float(os.getenv("PARSE_ISOLATED_LIMIT_MB", "1024")) * MB),
+    isolated_timeout=float(os.getenv("PARSE_ISOLATED_TIMEOUT_SECONDS", "600")),
+    trace_allocations=os.getenv("PARSE_TRACEMALLOC", "0") == "1"
+)
+
+# Per-file stage traces kept in a ring for /api/debug/traces (optionally exported as OTLP JSON)
+TRACE_EXPORT_DIR = os.getenv("TRACE_EXPORT_DIR", "")
+tracer = Tracer(
+    capacity=int(os.getenv("TRACE_BUFFER_SIZE", "1000")),
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+    exporter=OTLPFileExporter(TRACE_EXPORT_DIR) if TRACE_EXPORT_DIR else None
+)
+
+# Versioned delta log behind the live dashboard stream (one refresher per process)
+dashboard_feed = DashboardFeed(
+    dashboard_data,
+    history=int(os.getenv("DASHBOARD_FEED_HISTORY", "512")),
+    poll_interval=float(os.getenv("DASHBOARD_FEED_POLL_SECONDS", "0.5"))
+)
 
 # API Models for documentation
 login_model = api.model('Login', {
@@ -74,7 +186,8 @@ login_model = api.model('Login', {
 })
 
 token_response = api.model('TokenResponse', {
-    'access_token': fields.String(description='JWT access token')
+    'access_token': fields.String(description='JWT access token'),
+    'user_info': fields.Raw(description='Profile and role permissions of the logged-in user')
 })
 
 stats_model = api.model('Stats', {
@@ -105,7 +218,16 @@ routing_code_model = api.model('RoutingCode', {
 
 file_upload_model = api.model('FileUpload', {
     'routing_code': fields.Nested(routing_code_model, required=True, description='3-part routing identifier'),
-    'priority': fields.String(description='Processing priority', enum=['LOW', 'NORMAL', 'HIGH', 'URGENT'], default='NORMAL'),
+    'priority': fields.String(description='Processing priority', enum=['LOW', 'NORMAL', 'HIGH', 'URGENT', 'CRITICAL'], default='NORMAL'),
+    'notes': fields.String(description='Optional processing notes')
+})
+
+upload_session_model = api.model('UploadSession', {
+    'filename': fields.String(required=True, description='Original file name', example='statement.xml'),
+    'routing_code': fields.Nested(routing_code_model, required=True, description='3-part routing identifier'),
+    'total_size': fields.Integer(required=True, description='File size in bytes'),
+    'sha256': fields.String(description='Optional SHA-256 of the whole file, checked on finalize'),
+    'priority': fields.String(description='Processing priority', enum=['LOW', 'NORMAL', 'HIGH', 'URGENT', 'CRITICAL'], default='NORMAL'),
     'notes': fields.String(description='Optional processing notes')
 })
 
@@ -121,112 +243,20 @@ job_status_model = api.model('JobStatus', {
     'audit_trail': fields.List(fields.String(), description='Processing audit log')
 })
 
-# Enable Flask logging
-if os.getenv("FLASK_ENV") != "production":
-    app.config["DEBUG"] = True
-    logger.info("Flask running in DEBUG mode")
-else:
-    logger.info("Flask running in PRODUCTION mode")
-
-jwt = JWTManager(app)
-
-# ---- Enhanced RBAC Users with Profiles ----
-from datetime import datetime, timezone
-
-class UserProfile:
-    def __init__(self, username, password, role, full_name, email=None):
-        self.username = username
-        self.password = password
-        self.role = role
-        self.full_name = full_name
-        self.email = email or f"{username}@helix.bank"
-        self.created_at = datetime.now(timezone.utc)
-        self.last_login = None
-        self.login_count = 0
-        self.permissions = self._get_role_permissions()
-        
-    def _get_role_permissions(self):
-        """Define role-based permissions"""
-        permissions = {
-            "admin": {
-                "emoji": "👑",
-                "color": "#dc2626",  # Red
-                "can_manage_users": True,
-                "can_upload_files": True,
-                "can_delete_files": True,
-                "can_view_logs": True,
-                "can_modify_settings": True,
-                "can_export_data": True,
-                "dashboard_sections": ["all"]
-            },
-            "dev": {
-                "emoji": "💻", 
-                "color": "#2563eb",  # Blue
-                "can_manage_users": False,
-                "can_upload_files": True,
-                "can_delete_files": False,
-                "can_view_logs": True,
-                "can_modify_settings": False,
-                "can_export_data": True,
-                "dashboard_sections": ["upload", "processing", "api_tools", "logs"]
-            },
-            "auditor": {
-                "emoji": "📋",
-                "color": "#059669",  # Green
-                "can_manage_users": False,
-                "can_upload_files": False,
-                "can_delete_files": False,
-                "can_view_logs": True,
-                "can_modify_settings": False,
-                "can_export_data": True,
-                "dashboard_sections": ["stats", "logs", "reports", "audit_trail"]
-            }
-        }
-        return permissions.get(self.role, permissions["auditor"])
-    
-    def record_login(self):
-        """Record successful login with precise timestamp"""
-        self.last_login = datetime.now(timezone.utc)
-        self.login_count += 1
-        logger.info(f"🔐 User login: {self.username} ({self.role}) at {self.last_login.isoformat()}")
-    
-    def to_dict(self):
-        """Convert to dictionary for JSON responses"""
-        return {
-            "username": self.username,
-            "full_name": self.full_name,
-            "email": self.email,
-            "role": self.role,
-            "permissions": self.permissions,
-            "created_at": self.created_at.isoformat(),
-            "last_login": self.last_login.isoformat() if self.last_login else None,
-            "login_count": self.login_count
-        }
+jwt = JWTManager()
 
-# Enhanced user database with full profiles
-USERS = {
-    "admin": UserProfile(
-        username="admin",
-        password="adminpass", 
-        role="admin",
-        full_name="Admin Swiss",
-        email="admin@helix.bank"
-    ),
-    "dev": UserProfile(
-        username="dev",
-        password="devpass",
-        role="dev", 
-        full_name="Dev Engineer",
-        email="dev@helix.bank"
-    ),
-    "auditor": UserProfile(
-        username="auditor",
-        password="auditpass",
-        role="auditor",
-        full_name="Audit Manager", 
-        email="auditor@helix.bank"
-    )
-}
+# ---- Users & Password Hashing ----
+# Every hashing thread needs ARGON2_MEMORY_KIB of RAM, so LOGIN_HASH_WORKERS bounds both
+# CPU and memory spent on logins
+password_hasher = password_hasher_from_env()
+login_hashing = HashingPool(
+    password_hasher,
+    workers=int(os.getenv("LOGIN_HASH_WORKERS", "2")),
+    queue_depth=int(os.getenv("LOGIN_HASH_QUEUE", "16")),
+    wait_seconds=float(os.getenv("LOGIN_HASH_WAIT_SECONDS", "1"))
+)
+USERS_FILE = os.getenv("USERS_FILE", "")  # written by create_users.py; empty = demo accounts
+user_store = UserStore(login_hashing, USERS_FILE)
 
 # ---- SFTP & SAP Config ----
 SFTP_HOST = os.getenv("SFTP_HOST", "sftp-demo")
@@ -234,8 +264,11 @@ SFTP_PORT = int(os.getenv("SFTP_PORT", "22"))
 SFTP_USER = os.getenv("SFTP_USER", "bank")
 SFTP_PASS = os.getenv("SFTP_PASS", "password")
 SFTP_REMOTE_DIR = "/incoming"
-LOCAL_STAGING = "/tmp/helix_staging"
-ARCHIVE_DIR = "/tmp/helix_archive"
+LOCAL_STAGING = os.getenv("LOCAL_STAGING", "/tmp/helix_staging")  # shared volume when several hosts process files
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(LOCAL_STAGING, "uploads"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "/tmp/helix_archive")
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "0")) or None
+ARCHIVE_MAX_ENTRIES = int(os.getenv("ARCHIVE_MAX_ENTRIES", "0")) or None
 
 SAP_CONFIG = {
     "ashost": os.getenv("SAP_HOST", "sap.local"),
@@ -245,23 +278,59 @@ SAP_CONFIG = {
     "passwd": os.getenv("SAP_PASS", "HELIX_PASS")
 }
 SAP_FUNCTION = os.getenv("SAP_FUNCTION", "Z_PROCESS_MT940")
+ROUTING_RULES_PATH = os.getenv("ROUTING_RULES_PATH", "/app/config/routing_rules.json")
+ROUTING_RULES_CHECK_SECONDS = float(os.getenv("ROUTING_RULES_CHECK_SECONDS", "5"))
 
-os.makedirs(LOCAL_STAGING, exist_ok=True)
-os.makedirs(ARCHIVE_DIR, exist_ok=True)
+# Content-addressed archive: deduplicated, compressed, retention-managed
+archive_store = Lazy(lambda: ArchiveStore(
+    ARCHIVE_DIR,
+    retention_days=ARCHIVE_RETENTION_DAYS,
+    max_entries=ARCHIVE_MAX_ENTRIES
+), 'archive_store')
 
-# Initialize file processor factory
+# Content routing rules for SFTP files that arrive without a routing code
+routing_rules = RoutingRulesEngine(
+    routing_engine,
+    rules_path=ROUTING_RULES_PATH,
+    check_interval=ROUTING_RULES_CHECK_SECONDS
+)
+
+# Resumable chunked uploads stream into their own staging area until finalized
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", "/tmp/helix_uploads")
+upload_sessions = Lazy(lambda: UploadSessionStore(
+    UPLOAD_STAGING_DIR,
+    max_file_bytes=int(os.getenv("UPLOAD_MAX_BYTES", str(512 * 1024 * 1024))),
+    max_chunk_bytes=int(os.getenv("UPLOAD_MAX_CHUNK_BYTES", str(16 * 1024 * 1024))),
+    session_ttl=float(os.getenv("UPLOAD_SESSION_TTL_SECONDS", "86400"))
+), 'upload_sessions')
+BULK_UPLOAD_MAX_FILES = int(os.getenv("BULK_UPLOAD_MAX_FILES", "1000"))
+
+# File processor factory (format libraries such as mt940 load on the first parse)
 file_processor_factory = FileProcessorFactory()
-supported_formats = file_processor_factory.get_supported_formats()
-logger.info(f"🎯 Initialized file processors. Supported formats: {supported_formats}")
+
+# ---- Cached Responses ----
+def cached_json_response(payload):
+    """Serve a pre-serialized JSON payload with a strong ETag (304 when unchanged)"""
+    if payload.gzipped is not None and 'gzip' in request.accept_encodings:
+        # The compressed bytes are a different representation, so they get their own ETag
+        response = Response(payload.gzipped, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(f"{payload.etag}-gz")
+    else:
+        response = Response(payload.body, mimetype='application/json')
+        response.set_etag(payload.etag)
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
 
 # ---- Role Decorator ----
 def require_role(roles):
     def wrapper(fn):
+        @functools.wraps(fn)
         @jwt_required()
         def decorator(*args, **kwargs):
             claims = get_jwt()
             if claims.get("role") not in roles:
-                return jsonify({"error": "forbidden"}), 403
+                return {"error": "forbidden"}, 403
             return fn(*args, **kwargs)
         return decorator
     return wrapper
@@ -271,78 +340,87 @@ def require_role(roles):
 class Login(Resource):
     @api.doc('login', security=None)
     @api.expect(login_model)
-    @api.marshal_with(token_response)
-    @api.response(200, 'Login successful')
+    @api.response(200, 'Login successful', token_response)
     @api.response(401, 'Invalid credentials')
+    @api.response(503, 'Login hashing pool saturated (Retry-After)')
     def post(self):
-        """🔐 Authenticate user and get JWT token with enhanced user info"""
+        """🔐 Authenticate user and get a JWT carrying their role"""
         username = request.json.get("username")
         password = request.json.get("password")
-        
-        user = USERS.get(username)
-        if not user or user.password != password:
+
+        try:
+            user = user_store.authenticate(username, password)
+        except HashingPoolBusy as e:
+            logger.warning(f"🚦 Login for {username} turned away: {e}", extra={'log_rate': 0.1})
+            return {"message": "Too many logins in progress, retry shortly"}, 503, {"Retry-After": "1"}
+        if not user:
             logger.warning(f"🚨 Failed login attempt for user: {username}")
             api.abort(401, "Invalid credentials")
-        
+
         # Record successful login
         user.record_login()
-        
-        # Create JWT with enhanced claims
-        token = create_access_token(
-            identity=username, 
-            additional_claims={
-                "role": user.role,
-                "full_name": user.full_name,
-                "permissions": user.permissions,
-                "login_time": user.last_login.isoformat()
-            }
-        )
-        
+
+        # Only the role travels with every request; permissions come from role_permissions()
+        token = create_access_token(identity=username, additional_claims={"role": user.role})
+
         # Log successful authentication
         dashboard_data.add_activity(
-            'auth', 
+            'auth',
             f"🔐 User {user.full_name} ({user.role}) logged in",
             'info',
             user.permissions['emoji']
         )
-        
+
         return {
             "access_token": token,
             "user_info": {
                 "username": user.username,
                 "full_name": user.full_name,
                 "role": user.role,
-                "permissions": user.permissions,
+                "permissions": permissions_json(user.role),
                 "last_login": user.last_login.isoformat()
             }
         }
 
-@app.route("/")
+@ns_auth.route('/me')
+class CurrentUser(Resource):
+    @api.doc('current_user', security='apikey')
+    @jwt_required()
+    def get(self):
+        """👤 Profile and permissions of the token's user"""
+        user = user_store.get(get_jwt_identity())
+        if user:
+            return user.to_dict()
+        # Users removed since the token was issued keep their token's role until it expires
+        role = get_jwt().get("role")
+        return {"username": get_jwt_identity(), "role": role, "permissions": permissions_json(role)}
+
+@web.route("/")
 def landing_page():
     """FaaF Academy Landing Page - Career Coaching Platform"""
     return send_from_directory('static', 'faaf-landing-page.html')
 
-@app.route("/demo")  
+@web.route("/demo")  
 def demo_page():
     """FaaF Academy Live Demo - Template Testing Interface"""
     return send_from_directory('static', 'faaf-local-viewer.html')
 
-@app.route("/enterprise")
+@web.route("/enterprise")
 def enterprise_dashboard():
     """Helix Hub Enterprise Dashboard - Infrastructure Overview"""
     return send_from_directory('static', 'enterprise-dashboard.html')
 
-@app.route("/coffee")
+@web.route("/coffee")
 def coffee_packages():
     """Swiss Coffee Package Store - Premium Demo Access"""
     return send_from_directory('static', 'coffee-packages.html')
 
-@app.route("/dashboard")
+@web.route("/dashboard")
 def dashboard():
     """Helix Dashboard - Real-time monitoring interface"""
-    return redirect(url_for('helix_dashboard'))
+    return redirect(url_for('.helix_dashboard'))
 
-@app.route("/helix")
+@web.route("/helix")
 def helix_dashboard():
     """Helix Dashboard - Real-time monitoring interface"""
     try:
@@ -391,20 +469,20 @@ def helix_dashboard():
         </html>
         """
 
-@app.route("/api/stats")
+@web.route("/api/stats")
 def api_stats():
     """API endpoint for dashboard statistics"""
-    return jsonify(dashboard_data.get_stats())
+    return cached_json_response(dashboard_data.view('stats'))
 
-@app.route("/api/logs")
+@web.route("/api/logs")
 def api_logs():
     """API endpoint for recent logs"""
-    return jsonify({"logs": dashboard_data.get_logs()})
+    return cached_json_response(dashboard_data.view('logs'))
 
-@app.route("/api/dashboard-data")
+@web.route("/api/dashboard-data")
 def dashboard_data_api():
     """API endpoint for dashboard data"""
-    return jsonify(dashboard_data.get_dashboard_data())
+    return cached_json_response(dashboard_data.view('dashboard'))
 
 # ---- Swagger API Endpoints ----
 @ns_dashboard.route('/stats')
@@ -416,6 +494,22 @@ class Stats(Resource):
         """📊 Get processing statistics"""
         return dashboard_data.get_stats()
 
+@ns_dashboard.route('/timeseries')
+class TimeSeries(Resource):
+    @api.doc('get_timeseries', params={
+        'resolution': 'minute, hour or day (default hour)',
+        'limit': 'Most recent buckets only'
+    })
+    @api.response(200, 'Rollup buckets, oldest first')
+    @api.response(400, 'Unknown resolution')
+    def get(self):
+        """⏱️ Files, outcomes, amounts per currency and latency percentiles per time bucket"""
+        resolution = request.args.get('resolution', 'hour')
+        if resolution not in RESOLUTIONS:
+            return {'error': f"resolution must be one of {', '.join(RESOLUTIONS)}"}, 400
+        limit = request.args.get('limit', type=int)
+        return {'resolution': resolution, 'buckets': dashboard_data.get_timeseries(resolution, limit)}
+
 @ns_system.route('/health')
 class Health(Resource):
     @api.doc('health_check')
@@ -429,33 +523,210 @@ class Health(Resource):
         return {"status": "healthy"}
 
 # Backwards compatibility route
-@app.route("/health")
+@web.route("/health")
 def health_legacy():
     """🏥 Legacy health check endpoint"""
     return jsonify({"status": "healthy"})
 
-@app.route("/api/debug/dashboard")
+@web.route("/metrics")
+def prometheus_metrics():
+    """📈 Prometheus scrape endpoint (all gunicorn workers aggregated)"""
+    return Response(pipeline_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@web.route("/api/debug/dashboard")
 def debug_dashboard():
-    """🔍 Debug endpoint to check dashboard state"""
-    # Properly serialize deque objects for JSON
-    processing_stats = dict(dashboard_data.processing_stats)
-    processing_stats['processing_times'] = list(processing_stats['processing_times'])
-    processing_stats['files_by_type'] = dict(processing_stats['files_by_type'])
-    processing_stats['hourly_stats'] = dict(processing_stats['hourly_stats'])
-    
-    sftp_status = dict(dashboard_data.sftp_status)
-    sftp_status['errors'] = list(sftp_status['errors'])
-    if sftp_status['last_poll'] and hasattr(sftp_status['last_poll'], 'isoformat'):
-        sftp_status['last_poll'] = sftp_status['last_poll'].isoformat()
-    
+    """🔍 Debug endpoint to check dashboard state (same view as /api/dashboard-data)"""
+    return cached_json_response(dashboard_data.view('dashboard'))
+
+@web.route("/api/debug/traces")
+def debug_traces():
+    """🔬 Slowest recent traces (?limit=&name=&min_ms=&file=&errors=1), or one trace by ?trace_id="""
+    trace_id = request.args.get('trace_id')
+    if trace_id:
+        trace = tracer.get(trace_id)
+        if trace is None:
+            return jsonify({"error": f"Trace {trace_id} not in the buffer"}), 404
+        return jsonify(trace.to_dict())
+
+    traces = tracer.slowest(
+        limit=min(request.args.get('limit', 20, type=int), 200),
+        name=request.args.get('name'),
+        min_ms=request.args.get('min_ms', 0.0, type=float),
+        file_name=request.args.get('file'),
+        errors_only=request.args.get('errors') in ('1', 'true')
+    )
     return jsonify({
-        "processing_stats": processing_stats,
-        "recent_activities": list(dashboard_data.recent_activities),
-        "sftp_status": sftp_status,
-        "current_processing": dashboard_data.current_processing
+        "sample_rate": tracer.sample_rate,
+        "traces": [trace.to_dict() for trace in traces]
     })
 
-@app.route("/supported-formats")
+# ---- Admin Profiling (idle unless a request asks for a bounded profile) ----
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+def profile_window(default=5.0):
+    """Requested profiling window in seconds, clamped to PROFILE_MAX_SECONDS"""
+    seconds = request.args.get('seconds', default, type=float)
+    return min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+
+def job_source_file(job):
+    """Path of the job's file: the staged copy, else the newest archived delivery (temp copy)"""
+    if job.file_path and os.path.exists(job.file_path):
+        return job.file_path, False
+    entries = archive_store.lookup(job.original_filename, limit=1)
+    if not entries:
+        return None, False
+    suffix = os.path.splitext(job.original_filename)[1]
+    with archive_store.open(entries[0].digest) as blob, tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as out:
+        while True:
+            block = blob.read(1024 * 1024)
+            if not block:
+                break
+            out.write(block)
+    return out.name, True
+
+@ns_system.route('/profile/stacks')
+class ProfileStacks(Resource):
+    @api.doc('profile_stacks', security='apikey', params={
+        'seconds': 'Sampling window (default 5, capped by PROFILE_MAX_SECONDS)',
+        'interval_ms': 'Sampling interval in milliseconds (default 5)',
+        'format': "'json' (default) or 'collapsed' for flamegraph.pl / speedscope"
+    })
+    @api.response(200, 'Sampled stacks of every thread')
+    @api.response(409, 'Another profile is running')
+    @require_role(['admin'])
+    def get(self):
+        """🩺 Sample every thread's stack for a bounded window"""
+        interval = max(request.args.get('interval_ms', 5.0, type=float), 1.0) / 1000
+        try:
+            result = sample_stacks(profile_window(), interval)
+        except ProfilerBusy as e:
+            return {'error': str(e)}, 409
+        if request.args.get('format') == 'collapsed':
+            return Response(collapsed(result['stacks']), mimetype='text/plain')
+        return result
+
+@ns_system.route('/profile/memory')
+class ProfileMemory(Resource):
+    @api.doc('profile_memory', security='apikey', params={
+        'seconds': 'Capture window (default 5, capped by PROFILE_MAX_SECONDS)',
+        'limit': 'Entries per list (default 25)',
+        'group_by': "'lineno' (default), 'filename' or 'traceback'"
+    })
+    @api.response(200, 'Top allocations and growth')
+    @api.response(409, 'Another profile is running')
+    @require_role(['admin'])
+    def get(self):
+        """🧠 tracemalloc top allocations and growth over a bounded window"""
+        group_by = request.args.get('group_by', 'lineno')
+        if group_by not in ('lineno', 'filename', 'traceback'):
+            return {'error': "group_by must be lineno, filename or traceback"}, 400
+        try:
+            return capture_allocations(
+                profile_window(),
+                limit=min(request.args.get('limit', 25, type=int), 200),
+                group_by=group_by,
+                frames=10 if group_by == 'traceback' else 1
+            )
+        except ProfilerBusy as e:
+            return {'error': str(e)}, 409
+
+@ns_system.route('/profile/jobs/<string:job_id>')
+class ProfileJobParse(Resource):
+    @api.doc('profile_job_parse', security='apikey', params={
+        'sort': "pstats sort key (default 'cumulative')",
+        'limit': 'Functions in the report (default 40)'
+    })
+    @api.response(200, 'cProfile report of parsing and validating the job file')
+    @api.response(404, 'Job or file not found')
+    @api.response(409, 'Another profile is running')
+    @api.response(413, 'File too large to parse in process')
+    @require_role(['admin'])
+    def get(self, job_id):
+        """⏱️ Re-parse one job's file under cProfile (staged copy or archived delivery)"""
+        job = routing_engine.get_job(job_id)
+        if job is None:
+            return {'error': f'Job {job_id} not found'}, 404
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'calls', 'ncalls', 'time'):
+            return {'error': "sort must be cumulative, tottime, calls, ncalls or time"}, 400
+        path, temporary = job_source_file(job)
+        if path is None:
+            return {'error': f'No staged or archived copy of {job.original_filename}'}, 404
+
+        file_size = os.path.getsize(path)
+        processor = processor_for_job(job)
+        mode, estimate = memory_budget.plan(processor, file_size)
+        if mode == 'isolated':
+            if temporary:
+                os.remove(path)
+            return {'error': f'{job.original_filename} needs ~{estimate // MB} MB to parse, over the '
+                             f'{memory_budget.budget_bytes // MB} MB in-process budget'}, 413
+        parse = processor.parse_streaming if mode == 'streaming' else processor.parse
+        def parse_and_validate():
+            parsed = parse(path)
+            return {'valid': processor.validate(parsed), 'transactions': parsed.get('total_transactions', 0)}
+        try:
+            outcome, report = profile_call(parse_and_validate, sort=sort,
+                                           limit=min(request.args.get('limit', 40, type=int), 500))
+        except ProfilerBusy as e:
+            return {'error': str(e)}, 409
+        finally:
+            if temporary:
+                os.remove(path)
+        if isinstance(outcome, Exception):
+            report['error'] = f"{type(outcome).__name__}: {outcome}"
+        else:
+            report.update(outcome)
+        return dict(report, job_id=job_id, file=job.original_filename, file_type=processor.file_type,
+                    file_size=file_size, parse_mode=mode, source='archive' if temporary else 'staging')
+
+@ns_system.route('/memory')
+class ParseMemory(Resource):
+    @api.doc('parse_memory', security='apikey')
+    @api.response(200, 'Per-file memory budget, estimate factors and peak usage per format')
+    @require_role(['admin'])
+    def get(self):
+        """🧮 Parse memory budget and measured peak bytes (per transaction) by format and mode"""
+        return memory_budget.stats()
+
+@ns_system.route('/leader')
+class PollerLeader(Resource):
+    @api.doc('poller_leader', security='apikey')
+    @api.response(200, 'SFTP poller leader election state of this process')
+    @require_role(['admin'])
+    def get(self):
+        """👑 Whether this process holds the SFTP poller leader lock"""
+        return dict(poller_elector.status(), background_services=background_services_running,
+                    polling=poller_thread is not None and poller_thread.is_alive())
+
+@ns_system.route('/queue')
+class WorkQueueStatus(Resource):
+    @api.doc('work_queue', security='apikey')
+    @api.response(200, 'Work queue counts, leases held by this process and recent dead letters')
+    @require_role(['admin'])
+    def get(self):
+        """📬 Shared work queue state and its dead-letter queue"""
+        with held_leases_lock:
+            held = [{'task_id': lease.task_id, 'file': lease.payload.get('filename'), 'attempts': lease.attempts,
+                     'expires_at': lease.expires_at} for lease in held_leases.values()]
+        return dict(work_queue.stats(), held_by_this_process=held,
+                    dead_letters=work_queue.dead_letters(request.args.get('limit', 50, type=int)))
+
+@ns_system.route('/queue/dead/<string:task_id>/requeue')
+class RequeueDeadLetter(Resource):
+    @api.doc('requeue_dead_letter', security='apikey')
+    @api.response(200, 'Task queued again with a fresh set of attempts')
+    @api.response(404, 'No dead-lettered task with this id')
+    @require_role(['admin'])
+    def post(self, task_id):
+        """♻️ Give a dead-lettered task another round of attempts"""
+        if not work_queue.requeue_dead(task_id):
+            return {'error': f'No dead-lettered task {task_id}'}, 404
+        feeder_wake.set()
+        logger.info(f"♻️ Dead-lettered task {task_id} requeued by {get_jwt_identity()}")
+        return {'task_id': task_id, 'state': work_queue.state(task_id)}
+
+@web.route("/supported-formats")
 def supported_formats():
     """Get list of supported bank file formats"""
     formats = file_processor_factory.get_supported_formats()
@@ -475,124 +746,478 @@ def supported_formats():
     })
 
 # ---- Core Processing ----
+# Remote files on the work queue: remote_path -> task id. The poller owns the SFTP
+# session, so whichever node processes a file only acks its task; the next poll cycle
+# sees the task done and removes the file from the server.
+remote_in_flight = {}
+remote_in_flight_lock = threading.Lock()
+# Work queue leases held by this process (on the local scheduler or running): task id -> Lease
+held_leases = {}
+held_leases_lock = threading.Lock()
+
+@contextmanager
+def pipeline_stage(stage, file_type='none'):
+    """Time one pipeline stage for /metrics and as a span of the active trace"""
+    with tracer.span(stage, **{'file.format': file_type}) as span, pipeline_metrics.stage(stage, file_type):
+        yield span
+
+def list_remote_bank_files(sftp):
+    """List (remote_path, filename, department, attributes) for the inbox and its department subdirectories"""
+    remote_files = []
+    for entry in sftp.listdir_attr(SFTP_REMOTE_DIR):
+        if stat.S_ISDIR(entry.st_mode or 0):
+            department = entry.filename.upper()
+            if department not in routing_engine.departments:
+                continue
+            subdir = f"{SFTP_REMOTE_DIR}/{entry.filename}"
+            for child in sftp.listdir_attr(subdir):
+                remote_files.append((f"{subdir}/{child.filename}", child.filename, department, child))
+        else:
+            remote_files.append((f"{SFTP_REMOTE_DIR}/{entry.filename}", entry.filename, None, entry))
+    return remote_files
+
+def remote_task_id(remote_path, attributes):
+    """Work queue task id of one delivery of a remote file (a re-delivered file gets a new one)"""
+    identity = f"{remote_path}:{attributes.st_size}:{attributes.st_mtime}"
+    return 'sftp-' + hashlib.sha1(identity.encode()).hexdigest()
+
+def sftp_job_id(task_id):
+    """Job id of an SFTP file's delivery - the same on every attempt and every node"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, task_id))
+
+def find_upload_job(filename):
+    """Uploaded files are stored as '<job_id>_<filename>' - recover their job"""
+    job_id, sep, _ = filename.partition('_')
+    return routing_engine.get_job(job_id) if sep else None
+
 def sftp_poll_loop():
     logger.info(f"🚀 Starting SFTP polling loop - checking {SFTP_HOST}:{SFTP_PORT}{SFTP_REMOTE_DIR} every 15 seconds")
     dashboard_data.add_activity('system', f"🚀 SFTP polling started - monitoring {SFTP_HOST}:{SFTP_PORT}{SFTP_REMOTE_DIR}", 'info', '🚀')
     
-    while True:
+    while not poller_stop.is_set():
+        with tracer.trace('sftp_poll', **{'sftp.host': SFTP_HOST}):
+            poll_sftp_once()
+        poller_stop.wait(15)  # Poll every 15 seconds
+    logger.info("🛑 SFTP polling loop stopped")
+
+def open_sftp():
+    """(transport, sftp client) connected to the bank's SFTP server"""
+    import paramiko  # only the process running the poller pays for the SSH stack
+    ssh = paramiko.Transport((SFTP_HOST, SFTP_PORT))
+    ssh.connect(username=SFTP_USER, password=SFTP_PASS)
+    return ssh, paramiko.SFTPClient.from_transport(ssh)
+
+def remove_finished_remote_files(sftp):
+    """Delete the remote files whose tasks finished (on any node) since the last cycle"""
+    with remote_in_flight_lock:
+        in_flight = list(remote_in_flight.items())
+    for remote_path, task_id in in_flight:
+        state = work_queue.state(task_id)
+        if state == 'done':
+            try:
+                sftp.remove(remote_path)
+                logger.info("🗑️ Removed %s from SFTP server", remote_path)
+            except FileNotFoundError:
+                pass  # removed while another process held the poller leadership
+        elif state is not None:
+            continue  # still queued or running; dead letters stay on the server for an operator
+        with remote_in_flight_lock:
+            remote_in_flight.pop(remote_path, None)
+
+def poll_sftp_once():
+    """One polling cycle: clean up finished files, list, download and queue new ones"""
+    try:
+        logger.debug("🔍 Polling SFTP server %s:%s...", SFTP_HOST, SFTP_PORT)
+        ssh, sftp = open_sftp()
+        remove_finished_remote_files(sftp)
+
+        with pipeline_stage('sftp_list'):
+            files_found = list_remote_bank_files(sftp)
+        logger.info("📁 Found %d files in %s", len(files_found), SFTP_REMOTE_DIR,
+                    extra={'sftp_files': len(files_found)})
+        logger.debug("📁 Remote files: %s", [name for _, name, _, _ in files_found])
+        
+        # Update dashboard SFTP status
+        dashboard_data.update_sftp_status('Connected', len(files_found))
+        
+        # Filter for supported bank file formats not already on the work queue
+        listed = {remote_path for remote_path, _, _, _ in files_found}
+        with remote_in_flight_lock:
+            for remote_path in [path for path in remote_in_flight if path not in listed]:
+                remote_in_flight.pop(remote_path)
+            candidates = [entry for entry in files_found if entry[0] not in remote_in_flight]
+        bank_files = []
+        for remote_path, filename, department, attributes in candidates:
+            processor = file_processor_factory.get_processor(filename)
+            if not processor.can_process(filename):
+                continue
+            task_id = remote_task_id(remote_path, attributes)
+            if work_queue.state(task_id) is not None:
+                # Queued by a previous leader: wait for its task instead of downloading again
+                with remote_in_flight_lock:
+                    remote_in_flight[remote_path] = task_id
+                continue
+            bank_files.append((remote_path, filename, department, processor, task_id))
+        
+        if bank_files:
+            file_summary = ", ".join([f"{proc.emoji} {name} ({proc.file_type})" for _, name, _, proc, _ in bank_files])
+            logger.info(f"🎯 Found {len(bank_files)} bank files to process: {file_summary}")
+            dashboard_data.add_activity('sftp', f"🎯 Found {len(bank_files)} bank files to process", 'info', '🎯')
+        else:
+            logger.info("😴 No supported bank files found to process", extra={'log_every': 20})
+
+        for remote_path, filename, department, processor, task_id in bank_files:
+            if poller_stop.is_set():
+                break  # no longer the leader - the next one downloads the rest
+            local_name = f"{department.lower()}_{filename}" if department else filename
+            local_path = os.path.join(LOCAL_STAGING, local_name)
+            logger.debug("⬇️ Downloading %s from SFTP...", filename)
+            download_started = time.time_ns()
+            with pipeline_stage('download', processor.file_type):
+                sftp.get(remote_path, local_path)
+            download_ns = (download_started, time.time_ns())
+            logger.info("✅ Downloaded %s from SFTP to %s", filename, local_path,
+                        extra={'file': filename, 'file_type': processor.file_type})
+            dashboard_data.add_activity('file_download', f"⬇️ Downloaded {processor.emoji} {filename} ({processor.file_type})", 'info', '⬇️')
+
+            enqueue_remote_file(task_id, remote_path, filename, department, processor, local_path, download_ns)
+
+        sftp.close()
+        ssh.close()
+        archive_store.apply_retention()
+        upload_sessions.expire()
+        logger.debug("✅ SFTP polling cycle completed. Sleeping for 15 seconds...")
+        
+    except Exception as e:
+        logger.error(f"💥 SFTP polling error: {e}")
+        tracer.current_trace().set_attribute('sftp.error', str(e))
+        dashboard_data.update_sftp_status('Error', 0, str(e))
+        dashboard_data.add_activity('sftp_error', f"💥 SFTP polling error: {str(e)}", 'error', '💥')
+
+def enqueue_remote_file(task_id, remote_path, filename, department, processor, local_path, download_ns=None):
+    """Queue a downloaded SFTP file under a job id fixed now, so every attempt shares one job"""
+    # Uploaded files carry their job's priority; other files use the department default
+    sender = department
+    job = find_upload_job(filename)
+    if job:
+        department, priority = job.routing_code.department, job.priority
+    elif department:
+        priority = routing_engine.departments[department]['default_priority']
+    else:
+        priority = Priority.NORMAL
+
+    enqueue_task(
+        task_id,
+        {
+            'filename': filename,
+            'local_path': local_path,
+            'remote_path': remote_path,
+            'file_type': processor.file_type,
+            'job_id': job.job_id if job else sftp_job_id(task_id),
+            'sender': sender,
+            'download_ns': download_ns
+        },
+        department=department,
+        priority=priority
+    )
+    with remote_in_flight_lock:
+        remote_in_flight[remote_path] = task_id
+    logger.info("📥 Queued %s %s for %s at %s priority", processor.emoji, filename,
+                department or DEFAULT_DEPARTMENT, priority.value.upper(),
+                extra={'file': filename, 'department': department, 'priority': priority.value})
+
+def update_queue_metrics():
+    """Publish this process's scheduler backlog to /metrics"""
+    pipeline_metrics.set('helix_queue_depth', processing_scheduler.qsize())
+
+def new_task(task_id, payload, department=None, priority=Priority.NORMAL):
+    """A processing task ordered by the scheduler's aged priority key"""
+    return NewTask(task_id, payload, department, priority.value, processing_scheduler.queue_key(department, priority))
+
+def enqueue_task(task_id, payload, department=None, priority=Priority.NORMAL):
+    """Put a processing task on the shared work queue"""
+    return enqueue_tasks([new_task(task_id, payload, department, priority)])[0]
+
+def enqueue_tasks(tasks):
+    """Put several processing tasks on the shared work queue in one write"""
+    queued = work_queue.enqueue_many(tasks)
+    feeder_wake.set()
+    return queued
+
+def processor_for_type(file_type, filename):
+    """Processor for a task's file type (falls back to the file name)"""
+    for processor in file_processor_factory.processors:
+        if processor.file_type == file_type:
+            return processor
+    return file_processor_factory.get_processor(filename)
+
+def work_queue_feeder_loop():
+    """Lease tasks from the work queue for idle local workers and keep held leases alive"""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    extended_at = time.time()
+    while not feeder_stop.is_set():
+        leases = []
         try:
-            logger.info(f"🔍 Polling SFTP server {SFTP_HOST}:{SFTP_PORT}...")
-            ssh = paramiko.Transport((SFTP_HOST, SFTP_PORT))
-            ssh.connect(username=SFTP_USER, password=SFTP_PASS)
-            sftp = paramiko.SFTPClient.from_transport(ssh)
+            with held_leases_lock:
+                capacity = PROCESSING_WORKERS - len(held_leases)
+            if capacity > 0:
+                leases = work_queue.lease(owner, capacity, department_limits)
+            for lease in leases:
+                schedule_lease(lease)
+            if time.time() - extended_at >= work_queue.visibility_timeout / 3:
+                extend_held_leases()
+                extended_at = time.time()
+        except Exception as e:
+            logger.error("💥 Work queue unavailable: %s", e, extra={'log_rate': 0.1})
+        if not leases:
+            feeder_wake.wait(WORK_QUEUE_POLL_SECONDS)
+            feeder_wake.clear()
 
-            files_found = sftp.listdir(SFTP_REMOTE_DIR)
-            logger.info(f"📁 Found {len(files_found)} files in {SFTP_REMOTE_DIR}: {files_found}")
-            
-            # Update dashboard SFTP status
-            dashboard_data.update_sftp_status('Connected', len(files_found))
-            
-            # Filter for supported bank file formats
-            bank_files = []
-            for filename in files_found:
-                processor = file_processor_factory.get_processor(filename)
-                if processor.can_process(filename):
-                    bank_files.append((filename, processor.file_type, processor.emoji))
-            
-            if bank_files:
-                file_summary = ", ".join([f"{emoji} {name} ({ftype})" for name, ftype, emoji in bank_files])
-                logger.info(f"🎯 Found {len(bank_files)} bank files to process: {file_summary}")
-                dashboard_data.add_activity('sftp', f"🎯 Found {len(bank_files)} bank files to process", 'info', '🎯')
-            else:
-                logger.info(f"😴 No supported bank files found to process")
-
-            for filename in files_found:
-                processor = file_processor_factory.get_processor(filename)
-                if processor.can_process(filename):
-                    remote_path = f"{SFTP_REMOTE_DIR}/{filename}"
-                    local_path = os.path.join(LOCAL_STAGING, filename)
-                    logger.info(f"⬇️ Downloading {filename} from SFTP...")
-                    sftp.get(remote_path, local_path)
-                    logger.info(f"✅ Downloaded {filename} from SFTP to {local_path}")
-
-                    # Mark as processing in dashboard
-                    dashboard_data.start_processing(filename, processor.file_type, processor.emoji)
-                    dashboard_data.add_activity('file_download', f"⬇️ Downloaded {processor.emoji} {filename} ({processor.file_type})", 'info', '⬇️')
-
-                    logger.info(f"🔄 Starting processing of {processor.emoji} {filename} ({processor.file_type})...")
-                    
-                    start_time = time.time()
-                    try:
-                        result = process_file(local_path, processor)
-                        processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-                        
-                        # Update dashboard with successful processing
-                        dashboard_data.complete_processing(
-                            filename, 
-                            success=True, 
-                            transactions=result.get('total_transactions', 0),
-                            amount=result.get('total_amount', 0.0),
-                            processing_time=processing_time
-                        )
-                    except Exception as e:
-                        processing_time = (time.time() - start_time) * 1000
-                        dashboard_data.complete_processing(filename, success=False, processing_time=processing_time)
-                        raise e
-
-                    # Create audit-friendly filename with timestamp matching Docker logs
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # microseconds to milliseconds
-                    name_part, ext_part = os.path.splitext(filename)
-                    archived_filename = f"{name_part}_Processed_{timestamp}{ext_part}"
-                    archive_path = os.path.join(ARCHIVE_DIR, archived_filename)
-                    
-                    shutil.move(local_path, archive_path)
-                    logger.info(f"📦 Moved {filename} from staging to archive: {archived_filename}")
-                    sftp.remove(remote_path)
-                    logger.info(f"🗑️ Removed {filename} from SFTP server")
-                    logger.info(f"🎉 Successfully archived {filename} as {archived_filename}")
+def schedule_lease(lease):
+    """Hand a leased task to the local scheduler (within its department's quota already)"""
+    payload = dict(lease.payload, lease=lease,
+                   processor=processor_for_type(lease.payload.get('file_type'), lease.payload['filename']))
+    with held_leases_lock:
+        held_leases[lease.task_id] = lease
+    task = processing_scheduler.submit(payload, department=lease.department,
+                                       priority=Priority(lease.priority), task_id=lease.task_id)
+    update_queue_metrics()
+    logger.debug("📬 Leased %s (attempt %d) for %s", lease.payload['filename'], lease.attempts, task.department)
 
-            sftp.close()
-            ssh.close()
-            logger.info(f"✅ SFTP polling cycle completed. Sleeping for 15 seconds...")
-            
+def extend_held_leases():
+    with held_leases_lock:
+        leases = list(held_leases.values())
+    for lease in leases:
+        if not work_queue.extend(lease):
+            logger.warning("⚠️ Lost the lease on %s - another node may process it too", lease.payload['filename'],
+                           extra={'task_id': lease.task_id})
+
+class JobNotFound(LookupError):
+    """A task names a job the job store does not have - retrying cannot help"""
+
+def retry_delay(attempts):
+    """Back-off before the next attempt of a failed SFTP file"""
+    return min(WORK_QUEUE_RETRY_SECONDS * 2 ** (attempts - 1), 900.0)
+
+def retries_left(payload):
+    return bool(payload.get('remote_path')) and payload['lease'].attempts < work_queue.max_attempts
+
+def settle_lease(payload, error=None):
+    """Ack the task, or hand a failed SFTP file back for a retry with back-off"""
+    lease = payload['lease']
+    with held_leases_lock:
+        held_leases.pop(lease.task_id, None)
+    feeder_wake.set()
+    try:
+        # The job's outcome is durable before its task is; the next attempt may run on another process
+        if payload.get('job_id'):
+            routing_engine.job_store.release(payload['job_id'])
+        else:
+            routing_engine.job_store.flush()
+        if isinstance(error, JobNotFound):
+            work_queue.dead_letter(lease, str(error))
+        elif error is None or not payload.get('remote_path'):
+            work_queue.ack(lease)  # failed uploads are final - the job records the error
+        else:
+            work_queue.nack(lease, f"{type(error).__name__}: {error}", delay=retry_delay(lease.attempts))
+    except Exception as e:
+        logger.error(f"💥 Could not settle work queue task {lease.task_id}: {e}")
+
+def dead_lettered_task(task_id, payload, error):
+    """A task ran out of attempts: fail its job so clients stop waiting"""
+    job = routing_engine.get_job(payload['job_id']) if payload.get('job_id') else None
+    if job is not None and not job.is_terminal:
+        job.fail_processing(f"Gave up after {work_queue.max_attempts} attempts: {error}")
+    dashboard_data.add_activity('dead_letter', f"☠️ {payload.get('filename')} moved to the dead-letter queue", 'error', '☠️')
+
+def processing_worker_loop():
+    """Pull the most urgent task from the scheduler and run it through the pipeline"""
+    while True:
+        task = processing_scheduler.get()
+        if task is None:
+            return
+        update_queue_metrics()
+        pipeline_metrics.inc('helix_workers_busy')
+        pipeline_metrics.inc('helix_queue_in_flight')
+        error = None
+        try:
+            handle_processing_task(task)
         except Exception as e:
-            logger.error(f"💥 SFTP polling error: {e}")
-            dashboard_data.update_sftp_status('Error', 0, str(e))
-            dashboard_data.add_activity('sftp_error', f"💥 SFTP polling error: {str(e)}", 'error', '💥')
+            error = e
+            logger.error(f"💥 Processing worker error for {task.payload.get('filename')}: {e}")
+        finally:
+            processing_scheduler.task_done(task)
+            settle_lease(task.payload, error)
+            pipeline_metrics.inc('helix_queue_in_flight', -1)
+            pipeline_metrics.inc('helix_workers_busy', -1)
 
-        time.sleep(15)  # Poll every 15 seconds
+def handle_processing_task(task):
+    """Run one task inside a trace covering download, queue wait and every processing stage"""
+    payload = task.payload
+    download_ns = payload.get('download_ns')
+    enqueued_ns = int(task.enqueued_at * 1e9)
+    started_ns = int((task.started_at or time.time()) * 1e9)
+    attributes = {
+        'file.name': payload['filename'],
+        'file.format': payload['processor'].file_type,
+        'file.size': os.path.getsize(payload['local_path']) if os.path.exists(payload['local_path']) else 0,
+        'job.id': payload.get('job_id') or '',
+        'source': 'sftp' if payload.get('remote_path') else 'upload'
+    }
+    with tracer.trace('process_file', start_ns=download_ns[0] if download_ns else enqueued_ns, **attributes) as trace:
+        if download_ns:
+            trace.add_span('download', *download_ns, **{'file.format': attributes['file.format']})
+        trace.add_span('queue_wait', enqueued_ns, started_ns, department=task.department, priority=task.priority.value)
+        process_task(task)
 
-def process_file(file_path, processor):
-    logger.info(f"{processor.emoji} ===== PROCESSING {processor.file_type} FILE: {file_path} =====")
+def process_task(task):
+    """Process, archive and release one downloaded file"""
+    payload = task.payload
+    filename = payload['filename']
+    local_path = payload['local_path']
+    remote_path = payload.get('remote_path')
+    processor = payload['processor']
+    job = routing_engine.get_job(payload['job_id']) if payload.get('job_id') else None
+    if job is None and payload.get('job_id') and not remote_path:
+        raise JobNotFound(f"Job {payload['job_id']} of uploaded file {filename} is not in the job store")
+    if job is not None and job.status == ProcessingStatus.COMPLETED:
+        # Redelivered after its node stopped between finishing the job and acking the task
+        logger.info("⏭️ %s is already completed - skipping redelivered task", filename,
+                    extra={'file': filename, 'job_id': job.job_id})
+        return
+    if job is not None and job.status != ProcessingStatus.PROCESSING:
+        job.start_processing()
+
+    # Mark as processing in dashboard
+    dashboard_data.start_processing(filename, processor.file_type, processor.emoji)
+    logger.info("🔄 Starting processing of %s %s (%s) after %.1fs in queue...", processor.emoji, filename,
+                processor.file_type, task.wait_time,
+                extra={'file': filename, 'file_type': processor.file_type, 'job_id': payload.get('job_id')})
+    
+    start_time = time.time()
+    file_size = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+    try:
+        result = parse_file(local_path, processor)
+        if job is None:
+            with pipeline_stage('route', processor.file_type):
+                job = route_by_content(result, payload)
+            if job is not None:
+                tracer.current_trace().set_attribute('job.id', job.job_id)
+        with pipeline_stage('sap_call', processor.file_type):
+            send_to_sap(local_path, processor, result)
+        processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+        
+        # Update dashboard with successful processing
+        dashboard_data.complete_processing(
+            filename, 
+            success=True, 
+            transactions=result.get('total_transactions', 0),
+            amount=result.get('total_amount', 0.0),
+            processing_time=processing_time,
+            amounts_by_currency=amounts_by_currency(result)
+        )
+    except Exception as e:
+        processing_time = (time.time() - start_time) * 1000
+        dashboard_data.complete_processing(filename, success=False, processing_time=processing_time)
+        pipeline_metrics.inc('helix_files_processed_total', file_type=processor.file_type, outcome='failure')
+        if job and retries_left(payload):
+            job.retry_processing(str(e), retry_delay(payload['lease'].attempts))
+        elif job:
+            job.fail_processing(str(e))
+        raise  # SFTP files are retried by the work queue
+
+    pipeline_metrics.inc('helix_files_processed_total', file_type=processor.file_type, outcome='success')
+    pipeline_metrics.inc('helix_bytes_processed_total', file_size, file_type=processor.file_type)
+    pipeline_metrics.inc('helix_transactions_processed_total', result.get('total_transactions', 0),
+                         file_type=processor.file_type)
+
+    # Archive by content digest - redeliveries reuse the existing blob
+    with pipeline_stage('archive', processor.file_type):
+        entry = archive_store.archive(
+            local_path,
+            original_name=filename,
+            source=f"sftp://{SFTP_HOST}{remote_path}" if remote_path else 'upload'
+        )
+    os.remove(local_path)
+    if entry.deduplicated:
+        logger.info(f"📦 {filename} already archived as blob {entry.digest[:12]} - recorded redelivery")
+    else:
+        logger.info(f"📦 Archived {filename} as blob {entry.digest[:12]} ({entry.size} → {entry.compressed_size} bytes)")
+
+    if job:
+        job.complete_processing()
+    logger.info(f"🎉 Successfully archived {filename}")
+
+def route_by_content(parsed_data, payload):
+    """Assign a routing code to an unrouted SFTP file from its parsed content (under the task's job id)"""
+    match = routing_rules.evaluate(parsed_data, payload['processor'].file_type, payload.get('sender'))
+    if match is None:
+        return None
+    job = routing_engine.create_job(
+        match.routing_code,
+        payload['filename'],
+        os.path.getsize(payload['local_path']),
+        'sftp',
+        match.priority,
+        job_id=payload.get('job_id')
+    )
+    job.file_path = payload['local_path']
+    job.audit(AuditAction.ROUTING_RULE_MATCHED, match.explanation, 'sftp')
+    job.start_processing()
+    logger.info(f"🧭 Routed {payload['filename']} to {match.routing_code}: {match.explanation}")
+    return job
+
+def parse_file(file_path, processor):
+    """Parse and validate a bank file with its format processor"""
+    logger.info("%s ===== PROCESSING %s FILE: %s =====", processor.emoji, processor.file_type, file_path)
     try:
         # Parse the file using the specific processor
-        logger.info(f"📖 Parsing {processor.emoji} {processor.file_type} file using specialized processor...")
-        parsed_data = processor.parse(file_path)
+        logger.debug("📖 Parsing %s %s file using specialized processor...", processor.emoji, processor.file_type)
+        with pipeline_stage('parse', processor.file_type) as span:
+            parsed_data, memory = memory_budget.parse(processor, file_path)
+            for key in ('mode', 'estimate_bytes', 'peak_bytes', 'peak_bytes_per_transaction'):
+                span.set_attribute(f"memory.{key}", memory[key])
+        pipeline_metrics.inc('helix_parse_mode_total', file_type=processor.file_type, mode=memory['mode'])
+        if memory['peak_bytes_per_transaction'] is not None:
+            pipeline_metrics.observe('helix_parse_peak_bytes_per_transaction', memory['peak_bytes_per_transaction'],
+                                     file_type=processor.file_type)
         
         # Validate the parsed data
-        if not processor.validate(parsed_data):
-            raise ValueError(f"Validation failed for {processor.file_type} file")
+        with pipeline_stage('validate', processor.file_type):
+            if not processor.validate(parsed_data):
+                raise ValueError(f"Validation failed for {processor.file_type} file")
         
-        logger.info(f"✅ Successfully parsed {processor.emoji} {processor.file_type}: {parsed_data['total_transactions']} transactions, total amount: {parsed_data['total_amount']}")
-        
-        # Log some details about the parsed data
-        for i, statement in enumerate(parsed_data['statements'][:2]):  # Show first 2 statements
-            account_id = statement.get('account_id', 'Unknown')
-            tx_count = len(statement.get('transactions', []))
-            logger.info(f"📋 Statement {i+1}: Account {account_id}, {tx_count} transactions")
-            
-            # Show first few transactions
-            for j, tx in enumerate(statement.get('transactions', [])[:3]):
-                amount = tx.get('amount', 'N/A')
-                currency = tx.get('currency', 'N/A')
-                desc = tx.get('description', tx.get('purpose', tx.get('text', 'N/A')))
-                logger.info(f"  💰 Tx {j+1}: {amount} {currency} - {desc}")
-
-        # Send to SAP
-        logger.info(f"🔗 Connecting to SAP system...")
-        conn = Connection(**SAP_CONFIG)
+        logger.info("✅ Successfully parsed %s %s: %s transactions, total amount: %s",
+                    processor.emoji, processor.file_type, parsed_data['total_transactions'], parsed_data['total_amount'],
+                    extra={'file': os.path.basename(file_path), 'file_type': processor.file_type,
+                           'transactions': parsed_data['total_transactions']})
+
+        # Sample details of the parsed data (debug only - never built at INFO)
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, statement in enumerate(parsed_data['statements'][:2]):  # Show first 2 statements
+                logger.debug("📋 Statement %d: Account %s, %d transactions", i + 1,
+                             statement.get('account_id', 'Unknown'), len(statement.get('transactions', [])),
+                             extra={'log_rate': 5})
+                for j, tx in enumerate(statement.get('transactions', [])[:3]):
+                    logger.debug("  💰 Tx %d: %s %s - %s", j + 1, tx.get('amount', 'N/A'), tx.get('currency', 'N/A'),
+                                 tx.get('description', tx.get('purpose', tx.get('text', 'N/A'))),
+                                 extra={'log_rate': 10})
+
+        return parsed_data
+
+    except Exception as e:
+        logger.error(f"❌ Error processing {processor.emoji} {processor.file_type} file {file_path}: {e}")
+        logger.error(f"💥 ===== {processor.emoji} {processor.file_type} FILE PROCESSING FAILED: {file_path} =====")
+        raise e
+
+def send_to_sap(file_path, processor, parsed_data):
+    """Hand the raw file and its parsed data to the SAP RFC"""
+    try:
+        logger.debug("🔗 Connecting to SAP system...")
+        conn = sap_connection_class()(**SAP_CONFIG)
         
-        logger.info(f"📡 Calling SAP function {SAP_FUNCTION} with {processor.emoji} {processor.file_type} data...")
+        logger.info("📡 Calling SAP function %s with %s %s data...", SAP_FUNCTION, processor.emoji, processor.file_type,
+                    extra={'file': os.path.basename(file_path), 'file_type': processor.file_type})
         
         # Send both raw file content and parsed JSON data
         with open(file_path, 'rb') as f:
@@ -605,42 +1230,52 @@ def process_file(file_path, processor):
             FILE_TYPE=processor.file_type
         )
         
-        logger.info(f"✅ SAP RFC response: {sap_result}")
-        logger.info(f"🎉 ===== {processor.emoji} {processor.file_type} FILE PROCESSING COMPLETED: {file_path} =====")
-        
-        return parsed_data
+        logger.info("✅ SAP RFC response: %s", sap_result)
+        logger.info("🎉 ===== %s %s FILE PROCESSING COMPLETED: %s =====", processor.emoji, processor.file_type, file_path)
 
     except Exception as e:
-        logger.error(f"❌ Error processing {processor.emoji} {processor.file_type} file {file_path}: {e}")
+        logger.error(f"❌ Error sending {processor.emoji} {processor.file_type} file {file_path} to SAP: {e}")
         logger.error(f"💥 ===== {processor.emoji} {processor.file_type} FILE PROCESSING FAILED: {file_path} =====")
         raise e
 
-# ---- Start Poller Immediately ----
-logger.info("=" * 60)
-logger.info("🚀 STARTING HELIX CORE APPLICATION")
-logger.info("=" * 70)
-logger.info(f"🔧 SFTP Config: {SFTP_HOST}:{SFTP_PORT} user:{SFTP_USER}")
-logger.info(f"📂 Directories: staging={LOCAL_STAGING}, archive={ARCHIVE_DIR}")
-logger.info(f"💼 SAP Config: {SAP_CONFIG}")
-logger.info("=" * 70)
-logger.info("🎛️ DASHBOARD ACCESS OPTIONS:")
-logger.info("📊 Helix Dashboard: http://localhost:5000/dashboard")
-logger.info("🌐 Via Traefik: https://helix.local:8443/dashboard")
-logger.info("🔧 Traefik Dashboard: http://localhost:8080")
-logger.info("=" * 70)
-logger.info("� API ENDPOINTS:")
-logger.info("📈 Stats: http://localhost:5000/api/stats")
-logger.info("📝 Logs: http://localhost:5000/api/logs")
-logger.info("🏥 Health: http://localhost:5000/health")
-logger.info("📋 Formats: http://localhost:5000/supported-formats")
-logger.info("=" * 70)
-logger.info("🧑‍💻 DEVELOPER & API TESTING:")
-logger.info("📚 Swagger API Docs: http://localhost:5000/swagger/")
-logger.info("🔍 Debug Dashboard: http://localhost:5000/api/debug/dashboard")
-logger.info("🏥 Health Check: http://localhost:5000/api/system/health")
-logger.info("🔑 Login Required: Use 'admin' / 'adminpass' for JWT endpoints")
-logger.info("💡 Pro Tip: Swagger UI provides interactive API testing!")
-logger.info("🚀 Ready for Swiss-precision bank file processing! 🇨🇭")
+def process_file(file_path, processor):
+    """Parse, validate and send one file to SAP"""
+    parsed_data = parse_file(file_path, processor)
+    send_to_sap(file_path, processor, parsed_data)
+    return parsed_data
+
+# ---- Startup Banner ----
+def log_startup_banner():
+    """Configuration and entry points, logged once by the process running the background services"""
+    logger.info("=" * 60)
+    logger.info("🚀 STARTING HELIX CORE APPLICATION")
+    logger.info("=" * 70)
+    logger.info(f"🔧 SFTP Config: {SFTP_HOST}:{SFTP_PORT} user:{SFTP_USER}")
+    logger.info(f"📂 Directories: staging={LOCAL_STAGING}, archive={ARCHIVE_DIR}")
+    logger.info(f"💼 SAP Config: {SAP_CONFIG}")
+    logger.info(f"🎯 Supported formats: {file_processor_factory.get_supported_formats()}")
+    logger.info("=" * 70)
+    logger.info("🎛️ DASHBOARD ACCESS OPTIONS:")
+    logger.info("📊 Helix Dashboard: http://localhost:5000/dashboard")
+    logger.info("🌐 Via Traefik: https://helix.local:8443/dashboard")
+    logger.info("🔧 Traefik Dashboard: http://localhost:8080")
+    logger.info("=" * 70)
+    logger.info("� API ENDPOINTS:")
+    logger.info("📈 Stats: http://localhost:5000/api/stats")
+    logger.info("📝 Logs: http://localhost:5000/api/logs")
+    logger.info("📡 Live Dashboard Stream: http://localhost:5000/api/dashboard-stream")
+    logger.info("🏥 Health: http://localhost:5000/health")
+    logger.info("📈 Prometheus: http://localhost:5000/metrics")
+    logger.info("📋 Formats: http://localhost:5000/supported-formats")
+    logger.info("=" * 70)
+    logger.info("🧑‍💻 DEVELOPER & API TESTING:")
+    logger.info("📚 Swagger API Docs: http://localhost:5000/swagger/")
+    logger.info("🔍 Debug Dashboard: http://localhost:5000/api/debug/dashboard")
+    logger.info("🔬 Slowest Traces: http://localhost:5000/api/debug/traces")
+    logger.info("🏥 Health Check: http://localhost:5000/api/system/health")
+    logger.info("🔑 Login Required: Use 'admin' / 'adminpass' for JWT endpoints")
+    logger.info("💡 Pro Tip: Swagger UI provides interactive API testing!")
+    logger.info("🚀 Ready for Swiss-precision bank file processing! 🇨🇭")
 
 # ---- Enterprise File Upload API Endpoints ----
 
@@ -655,15 +1290,8 @@ class EnterpriseFileUpload(Resource):
     def post(self):
         """🇨🇭 Swiss-precision enterprise file upload with routing"""
         try:
-            data = request.get_json()
-            
-            # Extract routing code
-            routing_data = data.get('routing_code', {})
-            routing_code = RoutingCode(
-                department=routing_data.get('department'),
-                process=routing_data.get('process'),
-                file_type=routing_data.get('file_type')
-            )
+            # Multipart form: routing_code arrives as a JSON string next to the file
+            routing_code = parse_routing_code(request.form.get('routing_code'))
             
             # Validate routing code
             if not routing_engine.validate_routing_code(routing_code):
@@ -681,8 +1309,8 @@ class EnterpriseFileUpload(Resource):
                 return {'error': 'No file selected'}, 400
             
             # Create file job
-            priority = data.get('priority', 'NORMAL')
-            notes = data.get('notes', '')
+            priority = request.form.get('priority', 'NORMAL')
+            notes = request.form.get('notes', '')
             
             job = routing_engine.create_file_job(
                 routing_code=routing_code,
@@ -692,15 +1320,13 @@ class EnterpriseFileUpload(Resource):
             )
             
             # Save file to processing directory
-            upload_dir = f"/sftp/incoming/{routing_code.department.lower()}"
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            file_path = os.path.join(upload_dir, f"{job.job_id}_{file.filename}")
+            file_path = upload_destination(job)
             file.save(file_path)
+            job.file_size = os.path.getsize(file_path)
             
-            # Update job with actual file path
+            # Update job with actual file path and hand it straight to the workers
             job.file_path = file_path
-            job.start_processing()
+            enqueue_upload(job)
             
             logger.info(routing_engine.get_beautiful_log_message(job, "📤 File uploaded"))
             
@@ -711,10 +1337,314 @@ class EnterpriseFileUpload(Resource):
                 'message': f'🎯 File routed to {routing_code.department} for {routing_code.process} processing'
             }, 201
             
+        except ValueError as e:
+            return {'error': f'Invalid routing code: {e}'}, 400
         except Exception as e:
             logger.error(f"❌ File upload failed: {str(e)}")
             return {'error': f'Upload failed: {str(e)}'}, 500
 
+def processor_for_job(job):
+    """Processor matching the job's routing file type (falls back to the file name)"""
+    for processor in file_processor_factory.processors:
+        if processor.file_type.replace('.', '') == job.routing_code.file_type:
+            return processor
+    return file_processor_factory.get_processor(job.original_filename)
+
+def enqueue_upload(job, processor=None):
+    """Put an uploaded job on the shared work queue - no SFTP round trip, any node may process it"""
+    return enqueue_uploads([(job, processor)])[0]
+
+def enqueue_uploads(jobs):
+    """enqueue_upload() for (job, processor or None) pairs: one job store flush and one queue write"""
+    if not jobs:
+        return []
+    for job, _ in jobs:
+        job.mark_queued()
+    # Durable before they are visible to other nodes; whichever node processes a job loads it from the store
+    routing_engine.job_store.release_many([job.job_id for job, _ in jobs])
+    queued = enqueue_tasks([
+        new_task(
+            job.job_id,
+            {
+                'filename': job.original_filename,
+                'local_path': job.file_path,
+                'remote_path': None,
+                'file_type': (processor or processor_for_job(job)).file_type,
+                'job_id': job.job_id
+            },
+            department=job.routing_code.department,
+            priority=job.priority
+        )
+        for job, processor in jobs
+    ])
+    for job, _ in jobs:
+        logger.info("📥 Queued upload %s for %s at %s priority", job.original_filename, job.routing_code.department,
+                    job.priority.value.upper(), extra={'job_id': job.job_id, 'department': job.routing_code.department})
+    return queued
+
+def requeue_pending_uploads():
+    """Queue uploads that are QUEUED in the job store but missing from the work queue
+    (jobs from before the work queue, or a process stopped between the two writes)"""
+    jobs, _ = routing_engine.job_store.list_jobs(status=ProcessingStatus.QUEUED, limit=None)
+    pending = []
+    for job in jobs:
+        if work_queue.state(job.job_id) is not None:
+            continue
+        job = routing_engine.get_job(job.job_id)
+        if job.file_path and os.path.exists(job.file_path):
+            pending.append((job, None))
+        else:
+            job.fail_processing('Uploaded file missing after restart')
+    requeued = sum(enqueue_uploads(pending))
+    if requeued:
+        logger.info(f"♻️ Queued {requeued} uploads found only in the job store")
+
+def parse_routing_code(value):
+    """Routing code from a {department, process, file_type} object, its JSON string or 'DEPT-PROC-TYPE'"""
+    if isinstance(value, str):
+        value = value.strip()
+        if not value.startswith('{'):
+            return RoutingCode.from_string(value)
+        value = json.loads(value)
+    value = value or {}
+    return RoutingCode.of(
+        value.get('department') or '',
+        value.get('process') or '',
+        value.get('file_type') or ''
+    )
+
+def upload_destination(job):
+    """Where an uploaded file waits for its worker: UPLOAD_DIR/<dept>/<job_id>_<filename>"""
+    upload_dir = os.path.join(UPLOAD_DIR, job.routing_code.department.lower())
+    os.makedirs(upload_dir, exist_ok=True)
+    return os.path.join(upload_dir, f"{job.job_id}_{job.original_filename}")
+
+def parse_content_range(header):
+    """'bytes <start>-<end>/<total>' → (start, length, total); total may be '*'"""
+    try:
+        unit, _, spec = header.partition(' ')
+        byte_range, _, total = spec.partition('/')
+        start, _, end = byte_range.partition('-')
+        if unit != 'bytes' or int(end) < int(start):
+            raise ValueError
+        return int(start), int(end) - int(start) + 1, None if total == '*' else int(total)
+    except (AttributeError, ValueError):
+        raise UploadError(f"Invalid Content-Range header: {header!r}")
+
+def upload_owner():
+    """Identity an upload session must belong to - None lets admins act on any session"""
+    return None if get_jwt().get("role") == "admin" else get_jwt_identity()
+
+def upload_error_response(error):
+    body = {'error': str(error)}
+    if error.offset is not None:
+        body['offset'] = error.offset
+    return body, error.status
+
+@ns_files.route('/uploads')
+class ResumableUploads(Resource):
+    @api.expect(upload_session_model)
+    @api.doc('create_upload', security='apikey')
+    @api.response(201, 'Upload session created')
+    @api.response(400, 'Invalid routing code or size')
+    @api.response(413, 'File too large')
+    @jwt_required()
+    def post(self):
+        """📤 Open a resumable upload session for a large file"""
+        data = request.get_json() or {}
+        try:
+            routing_code = parse_routing_code(data.get('routing_code'))
+        except ValueError as e:
+            return {'error': f'Invalid routing code: {e}'}, 400
+        if not routing_engine.validate_routing_code(routing_code):
+            return {
+                'error': 'Invalid routing code',
+                'message': f'❌ Routing {routing_code.to_string()} not supported'
+            }, 400
+        try:
+            session = upload_sessions.create(
+                filename=data.get('filename'),
+                routing_code=routing_code.to_string(),
+                total_size=int(data.get('total_size') or 0),
+                uploaded_by=get_jwt_identity(),
+                priority=data.get('priority', 'NORMAL'),
+                notes=data.get('notes', ''),
+                sha256=data.get('sha256')
+            )
+        except UploadError as e:
+            return upload_error_response(e)
+        return dict(session.to_dict(), chunk_size=upload_sessions.max_chunk_bytes), 201
+
+@ns_files.route('/uploads/<string:upload_id>')
+class ResumableUpload(Resource):
+    @api.doc('get_upload', security='apikey')
+    @api.response(200, 'Current offset - resume from here')
+    @api.response(403, 'Upload belongs to another user')
+    @api.response(404, 'Upload not found')
+    @jwt_required()
+    def get(self, upload_id):
+        """🔎 Current offset of an upload session (resume point after a network drop)"""
+        try:
+            return upload_sessions.get(upload_id, upload_owner()).to_dict()
+        except UploadError as e:
+            return upload_error_response(e)
+
+    @api.doc('put_upload_chunk', security='apikey')
+    @api.response(200, 'Chunk stored')
+    @api.response(409, 'Chunk does not start at the current offset')
+    @api.response(413, 'Chunk too large')
+    @jwt_required()
+    def put(self, upload_id):
+        """📦 Append a byte range (Content-Range: bytes start-end/total), streamed to disk"""
+        try:
+            start, length, total = parse_content_range(request.headers.get('Content-Range'))
+            session = upload_sessions.get(upload_id, upload_owner())
+            if total is not None and total != session.total_size:
+                raise UploadError(f"Total size {total} does not match the declared {session.total_size}")
+            session = upload_sessions.write_chunk(upload_id, start, request.stream, length, upload_owner())
+        except UploadError as e:
+            return upload_error_response(e)
+        return session.to_dict()
+
+    @api.doc('abort_upload', security='apikey')
+    @api.response(204, 'Upload aborted')
+    @api.response(403, 'Upload belongs to another user')
+    @jwt_required()
+    def delete(self, upload_id):
+        """🗑️ Abort an upload and drop its partial data"""
+        try:
+            upload_sessions.abort(upload_id, upload_owner())
+        except UploadError as e:
+            return upload_error_response(e)
+        return '', 204
+
+@ns_files.route('/uploads/<string:upload_id>/complete')
+class CompleteUpload(Resource):
+    @api.doc('complete_upload', security='apikey')
+    @api.response(201, 'File uploaded successfully', job_status_model)
+    @api.response(409, 'Upload incomplete')
+    @api.response(422, 'Checksum mismatch')
+    @jwt_required()
+    def post(self, upload_id):
+        """✅ Finalize a completed upload and hand it to routing"""
+        try:
+            session = upload_sessions.get(upload_id, upload_owner())
+            if not session.complete:
+                raise UploadError(f"Upload incomplete: {session.offset}/{session.total_size} bytes",
+                                  status=409, offset=session.offset)
+            routing_code = RoutingCode.from_string(session.routing_code)
+            job = routing_engine.create_file_job(
+                routing_code=routing_code,
+                file_path=session.filename,
+                priority=session.priority,
+                notes=session.notes
+            )
+            try:
+                digest = upload_sessions.finalize(upload_id, upload_destination(job), upload_owner())
+            except UploadError as e:
+                job.fail_processing(str(e))
+                raise
+        except UploadError as e:
+            return upload_error_response(e)
+
+        job.file_size = session.total_size
+        job.file_path = upload_destination(job)
+        enqueue_upload(job)
+        logger.info(routing_engine.get_beautiful_log_message(job, "📤 Chunked upload finalized"))
+
+        return {
+            'job_id': job.job_id,
+            'routing_code': job.routing_code.to_string(),
+            'status': job.status.value,
+            'sha256': digest,
+            'message': f'🎯 File routed to {routing_code.department} for {routing_code.process} processing'
+        }, 201
+
+def bulk_upload_entries():
+    """(name, reader) for every uploaded file - archives are expanded entry by entry"""
+    for upload in request.files.getlist('files') + request.files.getlist('file'):
+        if is_archive(upload.filename):
+            yield from iter_archive_entries(upload.stream, upload.filename)
+        elif upload.filename:
+            yield os.path.basename(upload.filename), upload.stream
+
+@ns_files.route('/bulk-upload')
+class BulkFileUpload(Resource):
+    @api.doc('bulk_upload', security='apikey', params={
+        'files': 'Bank files and/or zip/tar archives (multipart, repeatable)',
+        'routing_code': 'JSON {department, process[, file_type]} - file_type is detected per file when omitted',
+        'priority': 'Processing priority for every file',
+        'notes': 'Optional notes for every file'
+    })
+    @api.response(201, 'Batch accepted with per-file status')
+    @api.response(400, 'Invalid routing code or no files')
+    @jwt_required()
+    def post(self):
+        """📦 Upload many files (or one archive) as a single batch"""
+        try:
+            routing_data = json.loads(request.form.get('routing_code') or '{}')
+        except ValueError as e:
+            return {'error': f'Invalid routing code: {e}'}, 400
+        department = (routing_data.get('department') or '').upper()
+        process = (routing_data.get('process') or '').upper()
+        forced_type = (routing_data.get('file_type') or '').upper()
+        if department not in routing_engine.departments:
+            return {'error': f"Unknown department '{department}'"}, 400
+        priority = request.form.get('priority', 'NORMAL')
+        notes = request.form.get('notes', '')
+
+        batch_id = str(uuid.uuid4())
+        jobs, results, error = [], [], None
+        try:
+            for name, reader in bulk_upload_entries():
+                if len(results) >= BULK_UPLOAD_MAX_FILES:
+                    error = f"Batch limit of {BULK_UPLOAD_MAX_FILES} files reached - remaining files skipped"
+                    break
+                head = reader.read(4096)
+                processor = file_processor_factory.detect_processor(name, head)
+                if processor is None:
+                    results.append({'filename': name, 'status': 'rejected', 'error': 'Unrecognized file format'})
+                    continue
+                routing_code = RoutingCode.of(department, process, forced_type or processor.file_type.replace('.', ''))
+                if not routing_engine.validate_routing_code(routing_code):
+                    results.append({'filename': name, 'status': 'rejected',
+                                    'error': f'Routing {routing_code} not supported'})
+                    continue
+
+                job = routing_engine.build_file_job(routing_code, name, priority, notes)
+                job.processing_notes.append(f"batch {batch_id}")
+                file_path = upload_destination(job)
+                try:
+                    job.file_size = copy_stream(reader, file_path, upload_sessions.max_file_bytes, head)
+                except UploadError as e:
+                    results.append({'filename': name, 'status': 'rejected', 'error': str(e)})
+                    continue
+                job.file_path = file_path
+                jobs.append((job, processor))
+                results.append({'filename': name, 'status': ProcessingStatus.QUEUED.value, 'job_id': job.job_id,
+                                'routing_code': routing_code.to_string(), 'file_type': processor.file_type})
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            error = f"Archive could not be read: {e}"
+
+        # One batched store write (and journal batch) for the whole upload, then straight to the workers
+        routing_engine.register_jobs([job for job, _ in jobs])
+        enqueue_uploads(jobs)
+
+        if not results and error is None:
+            return {'error': 'No files provided'}, 400
+        logger.info(f"📦 Bulk upload {batch_id}: {len(jobs)} accepted, {len(results) - len(jobs)} rejected")
+        dashboard_data.add_activity('upload', f"📦 Bulk upload of {len(jobs)} files to {department}-{process}", 'info', '📦')
+
+        response = {
+            'batch_id': batch_id,
+            'accepted': len(jobs),
+            'rejected': len(results) - len(jobs),
+            'files': results
+        }
+        if error:
+            response['error'] = error
+        return response, 201 if jobs else 400
+
 @ns_files.route('/jobs/<string:job_id>')
 class FileJobStatus(Resource):
     @api.doc('get_job_status', security='apikey')
@@ -737,99 +1667,465 @@ class FileJobStatus(Resource):
                 'started_at': job.started_at.isoformat() if job.started_at else None,
                 'completed_at': job.completed_at.isoformat() if job.completed_at else None,
                 'error_message': job.error_message,
-                'audit_trail': job.audit_trail
+                'audit_trail': job.audit_trail_dicts()
             }
             
         except Exception as e:
             return {'error': str(e)}, 500
 
+# ---- Job Events (SSE + long-poll) ----
+JOB_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("JOB_EVENTS_HEARTBEAT_SECONDS", "15"))
+JOB_EVENTS_MAX_STREAM_SECONDS = float(os.getenv("JOB_EVENTS_MAX_STREAM_SECONDS", "3600"))
+JOB_EVENTS_MAX_WAIT_SECONDS = 60.0
+
+def job_event_filter(args):
+    """Predicate over job events from job_id / department / status query parameters"""
+    job_ids = {value for value in args.get('job_id', '').split(',') if value}
+    departments = {value.strip().upper() for value in args.get('department', '').split(',') if value.strip()}
+    statuses = {ProcessingStatus(value.strip().lower()).value for value in args.get('status', '').split(',') if value.strip()}
+
+    def matches(event):
+        return ((not job_ids or event.job_id in job_ids)
+                and (not departments or event.department in departments or 'COMPLIANCE' in departments)
+                and (not statuses or event.status in statuses))
+    return matches
+
+def job_state_event(job):
+    """Current job state as an SSE frame (sent first so late subscribers never miss a finish)"""
+    return f"event: job\ndata: {json.dumps(dict(job_summary(job), terminal=job.is_terminal))}\n\n"
+
+def sse_response(generator):
+    return Response(
+        stream_with_context(generator),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def stream_job_events(predicate, cursor, job_id=None):
+    """SSE generator: matching events as they happen, heartbeats in between"""
+    yield "retry: 3000\n\n"
+    if job_id is not None:
+        job = routing_engine.get_job(job_id)
+        yield job_state_event(job)
+        if job.is_terminal:
+            return
+        last_status = job.status
+
+    deadline = time.time() + JOB_EVENTS_MAX_STREAM_SECONDS
+    while time.time() < deadline:
+        events, cursor = job_events.wait(cursor, predicate, timeout=JOB_EVENTS_HEARTBEAT_SECONDS)
+        for event in events:
+            yield event.to_sse()
+            if job_id is not None and event.terminal:
+                return
+        if events:
+            continue
+        if job_id is not None:
+            # Safety net for transitions the store follower coalesced: re-check the store on each heartbeat
+            job = routing_engine.get_job(job_id)
+            if job.status != last_status:
+                yield job_state_event(job)
+                if job.is_terminal:
+                    return
+                last_status = job.status
+        yield ": keep-alive\n\n"
+
+@ns_files.route('/jobs/<string:job_id>/events')
+class FileJobEvents(Resource):
+    @api.doc('job_events', security='apikey')
+    @api.response(200, 'text/event-stream of status changes until the job finishes')
+    @api.response(404, 'Job not found')
+    @jwt_required()
+    def get(self, job_id):
+        """📡 Server-Sent Events stream for one job (closes when it completes or fails)"""
+        if routing_engine.get_job(job_id) is None:
+            return {'error': f'Job {job_id} not found'}, 404
+        predicate = lambda event: event.job_id == job_id
+        return sse_response(stream_job_events(predicate, job_events.latest_seq, job_id=job_id))
+
+@ns_files.route('/jobs/<string:job_id>/wait')
+class FileJobWait(Resource):
+    @api.doc('wait_for_job', security='apikey', params={
+        'status': 'Last status the client saw - returns as soon as it changes (default: wait for completion)',
+        'timeout': f'Seconds to wait (max {int(JOB_EVENTS_MAX_WAIT_SECONDS)})'
+    })
+    @api.response(200, 'Job status (changed=false when the wait timed out)')
+    @api.response(404, 'Job not found')
+    @jwt_required()
+    def get(self, job_id):
+        """⏳ Long-poll until a job's status changes or it finishes"""
+        try:
+            timeout = min(max(float(request.args.get('timeout', 30)), 0.0), JOB_EVENTS_MAX_WAIT_SECONDS)
+            known = ProcessingStatus(request.args['status'].lower()) if request.args.get('status') else None
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        def settled(job):
+            return job.is_terminal or (known is not None and job.status != known)
+
+        cursor = job_events.latest_seq
+        job = routing_engine.get_job(job_id)
+        if job is None:
+            return {'error': f'Job {job_id} not found'}, 404
+
+        end = time.time() + timeout
+        while not settled(job):
+            remaining = end - time.time()
+            if remaining <= 0:
+                break
+            _, cursor = job_events.wait(cursor, lambda event: event.job_id == job_id,
+                                        timeout=min(remaining, JOB_EVENTS_HEARTBEAT_SECONDS))
+            job = routing_engine.get_job(job_id)
+
+        return dict(job_summary(job), changed=settled(job), terminal=job.is_terminal,
+                    error_message=job.error_message)
+
+@ns_files.route('/events')
+class FileJobEventFeed(Resource):
+    @api.doc('job_event_feed', security='apikey', params={
+        'job_id': 'Only these jobs (comma-separated)',
+        'department': 'Only jobs of these departments (comma-separated)',
+        'status': 'Only these statuses (comma-separated)',
+        'since': 'Sequence number of the last event seen (or Last-Event-ID header)',
+        'wait': 'Long-poll: return JSON after at most this many seconds instead of streaming'
+    })
+    @api.response(200, 'text/event-stream, or JSON {events, cursor} when long-polling')
+    @api.response(400, 'Invalid filter')
+    @jwt_required()
+    def get(self):
+        """📡 Filtered job event feed - SSE stream or long-poll"""
+        try:
+            predicate = job_event_filter(request.args)
+            since = request.args.get('since', request.headers.get('Last-Event-ID'))
+            cursor = int(since) if since else job_events.latest_seq
+            wait = request.args.get('wait')
+            wait = min(max(float(wait), 0.0), JOB_EVENTS_MAX_WAIT_SECONDS) if wait is not None else None
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        if wait is None:
+            return sse_response(stream_job_events(predicate, cursor))
+
+        events, cursor = job_events.wait(cursor, predicate, timeout=wait)
+        return {'events': [event.to_dict() for event in events], 'cursor': cursor}
+
+# ---- Dashboard Stream (SSE) ----
+def stream_dashboard(version):
+    """SSE generator: compact snapshot unless the client can resume, then only deltas"""
+    yield "retry: 3000\n\n"
+    result = dashboard_feed.frames_since(version) if version is not None else None
+    deadline = time.time() + JOB_EVENTS_MAX_STREAM_SECONDS
+    while True:
+        if result is None:
+            frame, version = dashboard_feed.snapshot_frame()
+            yield frame
+        elif result[0]:
+            frames, version = result
+            yield ''.join(frames)
+        else:
+            yield ": heartbeat\n\n"
+        if time.time() >= deadline:
+            return
+        result = dashboard_feed.wait(version, timeout=JOB_EVENTS_HEARTBEAT_SECONDS)
+
+@web.route("/api/dashboard-stream")
+def dashboard_stream():
+    """📡 Live dashboard over SSE (resume with Last-Event-ID or ?version=)"""
+    last_version = request.headers.get('Last-Event-ID') or request.args.get('version', '')
+    dashboard_feed.start()
+    return sse_response(stream_dashboard(int(last_version) if last_version.isdigit() else None))
+
 @ns_files.route('/departments')
 class AvailableDepartments(Resource):
     @api.doc('get_departments')
     @api.response(200, 'Available departments')
+    @api.response(304, 'Not modified')
     def get(self):
         """🏢 Get available departments for routing"""
-        departments = []
-        for dept_code, dept_info in routing_engine.departments.items():
-            departments.append({
-                'code': dept_code,
-                'name': dept_info['name'],
-                'emoji': dept_info['emoji'],
-                'processes': list(dept_info['processes'].keys())
-            })
-        return {'departments': departments}
+        return cached_json_response(routing_engine.route_listings['departments'])
 
 @ns_files.route('/routing-codes')
 class AvailableRoutingCodes(Resource):
     @api.doc('get_routing_codes')
     @api.response(200, 'Available routing codes')
+    @api.response(304, 'Not modified')
     def get(self):
         """🎯 Get all valid routing code combinations"""
-        codes = []
-        for dept_code, dept_info in routing_engine.departments.items():
-            for process_code, file_types in dept_info['processes'].items():
-                for file_type in file_types:
-                    routing_code = RoutingCode(dept_code, process_code, file_type)
-                    codes.append({
-                        'routing_code': routing_code.to_string(),
-                        'department': dept_code,
-                        'process': process_code,
-                        'file_type': file_type,
-                        'description': f"{dept_info['name']} - {process_code} - {file_type}"
-                    })
-        return {'routing_codes': codes}
+        return cached_json_response(routing_engine.route_listings['routing_codes'])
+
+@ns_files.route('/archive')
+class ArchivedFiles(Resource):
+    @api.doc('lookup_archive', security='apikey', params={'name': 'Original file name', 'digest': 'SHA-256 content digest'})
+    @api.response(200, 'Archive entries retrieved')
+    @api.response(400, 'Missing lookup key')
+    @jwt_required()
+    def get(self):
+        """📦 Look up archived deliveries by original name or content digest"""
+        name = request.args.get('name')
+        digest = request.args.get('digest')
+        if digest:
+            entry = archive_store.get(digest.lower())
+            entries = [entry] if entry else []
+        elif name:
+            entries = archive_store.lookup(name)
+        else:
+            return {'error': 'Provide a name or digest to look up'}, 400
+
+        return {'entries': [entry.to_dict() for entry in entries]}
+
+JOBS_PAGE_SIZE = 50
+JOBS_MAX_PAGE_SIZE = 500
+JOBS_STREAM_THRESHOLD = 100  # pages larger than this are streamed
+
+def job_summary(job):
+    """Compact job representation for listings"""
+    return {
+        'job_id': job.job_id,
+        'routing_code': job.routing_code.to_string(),
+        'status': job.status.value,
+        'priority': job.priority.value,
+        'created_at': job.created_at.isoformat(),
+        'file_path': job.file_path
+    }
 
 @ns_files.route('/jobs')
 class AllFileJobs(Resource):
-    @api.doc('list_jobs', security='apikey')
+    @api.doc('list_jobs', security='apikey', params={
+        'department': 'Only jobs visible to this department (comma-separated for several)',
+        'status': 'Filter by processing status',
+        'priority': 'Filter by priority',
+        'cursor': 'Cursor from the previous page',
+        'limit': f'Page size (max {JOBS_MAX_PAGE_SIZE})',
+        'stream': 'Stream the JSON response'
+    })
     @api.response(200, 'Jobs list retrieved')
+    @api.response(400, 'Invalid filter or cursor')
     @jwt_required()
     def get(self):
-        """📊 List all file processing jobs"""
+        """📊 List file processing jobs (filtered, newest first, cursor-paginated)"""
         try:
-            jobs = []
-            for job_id, job in routing_engine.jobs.items():
-                jobs.append({
-                    'job_id': job.job_id,
-                    'routing_code': job.routing_code.to_string(),
-                    'status': job.status.value,
-                    'created_at': job.created_at.isoformat(),
-                    'file_path': job.file_path
-                })
-            
-            # Sort by creation time (newest first)
-            jobs.sort(key=lambda x: x['created_at'], reverse=True)
-            
+            department = request.args.get('department')
+            access = [dept.strip().upper() for dept in department.split(',')] if department else None
+            status = ProcessingStatus(request.args['status'].lower()) if request.args.get('status') else None
+            priority = Priority(request.args['priority'].lower()) if request.args.get('priority') else None
+            limit = min(max(int(request.args.get('limit', JOBS_PAGE_SIZE)), 1), JOBS_MAX_PAGE_SIZE)
+            jobs, next_cursor = routing_engine.list_jobs(
+                access=access,
+                status=status,
+                priority=priority,
+                cursor=request.args.get('cursor'),
+                limit=limit
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        try:
+            if limit > JOBS_STREAM_THRESHOLD or request.args.get('stream', '').lower() in ('1', 'true'):
+                return Response(stream_job_page(jobs, next_cursor), mimetype='application/json')
+
             return {
-                'jobs': jobs,
-                'total_count': len(jobs),
+                'jobs': [job_summary(job) for job in jobs],
+                'count': len(jobs),
+                'next_cursor': next_cursor,
                 'message': f'🇨🇭 {len(jobs)} jobs managed with Swiss precision'
             }
             
         except Exception as e:
             return {'error': str(e)}, 500
 
-# ---- Startup and Initialization ----
+def stream_job_page(jobs, next_cursor):
+    """Yield a job page as JSON without building the whole document in memory"""
+    yield '{"jobs":['
+    for i, job in enumerate(jobs):
+        yield (',' if i else '') + json.dumps(job_summary(job))
+    yield f'],"count":{len(jobs)},"next_cursor":{json.dumps(next_cursor)}}}'
+
+# ---- Application Factory ----
+# ---- Shared State ----
+shared_state_open = False
+_shared_state_lock = threading.Lock()
 
-logger.info("=" * 70)
-logger.info("🇨🇭 HELIX ENTERPRISE ROUTING ENGINE ACTIVE")
-logger.info("📊 Enterprise File Upload: POST /api/files/upload")
-logger.info("📋 Job Status Tracking: GET /api/files/jobs/{job_id}")
-logger.info("🏢 Available Departments: GET /api/files/departments")
-logger.info("🎯 Routing Codes: GET /api/files/routing-codes")
-logger.info("💡 TIP: Add '127.0.0.1 helix.local' to your hosts file for Traefik!")
-logger.info("=" * 70)
-logger.info("🧵 Starting SFTP polling thread...")
-sys.stdout.flush()  # Force flush
+def open_shared_state():
+    """
+    Open the state every process shares - job store, audit journal, work queue, metrics
+    segments, archive, upload staging - and start the log writer, instead of waiting for
+    first use: a bad configuration fails at startup (idempotent)
+    """
+    global shared_state_open
+    with _shared_state_lock:
+        if shared_state_open:
+            return
+        configure_logging(
+            level=os.getenv("LOG_LEVEL", "INFO"),
+            log_format=os.getenv("LOG_FORMAT", "text"),
+            queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        )
+        atexit.register(shutdown_logging)
+        for state in (job_store, audit_journal, work_queue, pipeline_metrics, dashboard_data,
+                      archive_store, upload_sessions):
+            resolve(state)
+        shared_state_open = True
+    logger.info("🇨🇭 SwissLife-inspired Routing Engine initialized - Ready for precision!")
+
+def create_app():
+    """
+    🏭 Build the Flask app serving the dashboard and API.
+    Importing app creates no files and starts no threads; this opens the state every
+    process shares (open_shared_state) with its files and writer threads (helix-job-store,
+    helix-audit-journal, helix-log-writer) and the upload directories. No SFTP / SAP /
+    format libraries are loaded and no poller or workers run: background services start
+    separately.
+    """
+    open_shared_state()
+    application = Flask(__name__)
+    application.config["JWT_SECRET_KEY"] = os.getenv("SECRET_KEY", "changeme")
+    if os.getenv("FLASK_ENV") != "production":
+        application.config["DEBUG"] = True
+        logger.info("Flask running in DEBUG mode")
+    else:
+        logger.info("Flask running in PRODUCTION mode")
+
+    for directory in (LOCAL_STAGING, UPLOAD_DIR):
+        os.makedirs(directory, exist_ok=True)
+    if job_store.scope == 'process' and not background_services_running:
+        logger.warning("⚠️ In-memory job store: uploads are only processed if this process also runs the background services")
+    jwt.init_app(application)
+    api.init_app(application)
+    application.register_blueprint(web)
+    return application
+
+_default_app = None
+
+def __getattr__(name):
+    """`app.app` (e.g. `gunicorn app:app`) builds the default app on first access"""
+    global _default_app
+    if name == 'app':
+        if _default_app is None:
+            _default_app = create_app()
+        return _default_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ---- Background Services ----
+# Started explicitly (services.py, or `python app.py` for everything in one process).
+# Web-only processes put uploads on the work queue for the nodes running the services.
+background_services_running = False
+_background_services_lock = threading.Lock()
+processing_workers = []
+feeder_stop = threading.Event()
+feeder_wake = threading.Event()
+feeder_thread = None
+
+# Exactly one process polls SFTP: the holder of the poller leader lock. Candidates on one
+# host share a file lock; replicas on several hosts need a Postgres advisory lock.
+POLLER_LEADER_LOCK = os.getenv("POLLER_LEADER_LOCK", "file:/tmp/helix_state/poller.lock")
+poller_elector = LeaderElector(
+    lock_from_url(POLLER_LEADER_LOCK, name='helix-sftp-poller'),
+    on_elected=lambda: start_sftp_poller(),
+    on_demoted=lambda: stop_sftp_poller(),
+    retry_interval=float(os.getenv("LEADER_RETRY_SECONDS", "2")),
+    check_interval=float(os.getenv("LEADER_CHECK_SECONDS", "2")),
+    name='sftp-poller'
+)
+poller_stop = threading.Event()
+poller_thread = None
+
+def start_sftp_poller():
+    """Leadership won: start polling SFTP"""
+    global poller_thread
+    poller_stop.clear()
+    logger.info("🧵 Starting SFTP polling thread...")
+    poller_thread = threading.Thread(target=sftp_poll_loop, name='helix-sftp-poller', daemon=True)
+    poller_thread.start()
+    pipeline_metrics.set('helix_poller_leader', 1)
+    logger.info("✅ SFTP polling thread started successfully!")
 
-threading.Thread(target=sftp_poll_loop, daemon=True).start()
-logger.info("✅ SFTP polling thread started successfully!")
+def stop_sftp_poller(timeout=30.0):
+    """Leadership lost or handed over: stop polling (files already queued still get processed)"""
+    poller_stop.set()
+    if poller_thread is not None and poller_thread is not threading.current_thread():
+        poller_thread.join(timeout)
+    pipeline_metrics.set('helix_poller_leader', 0)
+
+def start_background_services():
+    """Start the SFTP poller election, the processing workers and the work queue feeder (idempotent)"""
+    global background_services_running, feeder_thread
+    open_shared_state()
+    with _background_services_lock:
+        if background_services_running:
+            return
+        background_services_running = True
+
+    for directory in (LOCAL_STAGING, UPLOAD_DIR, ARCHIVE_DIR):
+        os.makedirs(directory, exist_ok=True)
+    log_startup_banner()
+    logger.info("=" * 70)
+    logger.info("🇨🇭 HELIX ENTERPRISE ROUTING ENGINE ACTIVE")
+    logger.info("📊 Enterprise File Upload: POST /api/files/upload")
+    logger.info("📋 Job Status Tracking: GET /api/files/jobs/{job_id}")
+    logger.info("🏢 Available Departments: GET /api/files/departments")
+    logger.info("🎯 Routing Codes: GET /api/files/routing-codes")
+    logger.info("💡 TIP: Add '127.0.0.1 helix.local' to your hosts file for Traefik!")
+    logger.info("=" * 70)
+    logger.info(f"👑 Campaigning for SFTP poller leadership via {poller_elector.lock.description}")
+    pipeline_metrics.set('helix_poller_leader', 0)
+    poller_elector.start()
+    requeue_pending_uploads()
+    for worker_index in range(PROCESSING_WORKERS):
+        worker = threading.Thread(target=processing_worker_loop, name=f"helix-worker-{worker_index}", daemon=True)
+        worker.start()
+        processing_workers.append(worker)
+    pipeline_metrics.set('helix_workers', PROCESSING_WORKERS)
+    logger.info(f"✅ Started {PROCESSING_WORKERS} processing workers")
+    feeder_thread = threading.Thread(target=work_queue_feeder_loop, name='helix-queue-feeder', daemon=True)
+    feeder_thread.start()
+    logger.info(f"📬 Leasing work from {WORK_QUEUE_URL.split('@')[-1]}")
+
+def stop_background_services(timeout=30.0):
+    """
+    Graceful shutdown: stop polling and leasing, finish the files in hand, return the
+    leases not yet started to the queue, delete finished files from SFTP and only then
+    hand poller leadership over
+    """
+    if poller_elector.is_leader:
+        stop_sftp_poller(timeout)
+    feeder_stop.set()
+    feeder_wake.set()
+    if feeder_thread is not None:
+        feeder_thread.join(timeout)
+    processing_scheduler.close()
+    for worker in processing_workers:
+        worker.join(timeout)
+    if any(worker.is_alive() for worker in processing_workers):
+        unstarted = []  # a file is still running: let all leases expire rather than hand it out twice
+    else:
+        with held_leases_lock:
+            unstarted = list(held_leases.values())
+            held_leases.clear()
+    for lease in unstarted:
+        try:
+            work_queue.nack(lease, 'node shut down before processing it')
+        except Exception as e:
+            logger.error(f"💥 Could not return {lease.task_id} to the work queue: {e}")
+    if poller_elector.is_leader:
+        try:
+            ssh, sftp = open_sftp()
+            remove_finished_remote_files(sftp)
+            sftp.close()
+            ssh.close()
+        except Exception as e:
+            logger.error(f"💥 Final SFTP cleanup failed (the next leader removes the finished files): {e}")
+    poller_elector.stop()
 
 if __name__ == "__main__":
+    # Development: web app and background services in one process
+    application = create_app()
+    start_background_services()
     logger.info("🌐 Starting Flask application on 0.0.0.0:5000")
     sys.stdout.flush()  # Force flush
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    application.run(host="0.0.0.0", port=5000, debug=True)
 # ---- Docker Compose Integration ----
 # Ensure the app runs with Gunicorn in production
-# Gunicorn command: gunicorn -w 4 -b 0.0.0.0:5000 app:app
+# Gunicorn command: gunicorn -w 4 -b 0.0.0.0:5000 'app:create_app()'
+# Background services (SFTP poller + processing workers): python services.py
+# (any number of them - only the POLLER_LEADER_LOCK holder polls SFTP)
 # helix-core\app.py
\ No newline at end of file
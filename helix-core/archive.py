@@ -0,0 +1,280 @@
+"""
+📦 Helix Archive Store - Content-addressed, compressed file archive
+Every processed bank file is kept exactly once, no matter how often the bank redelivers it.
+
+Layout on disk:
+- blobs/ab/cd/<sha256>.gz  - gzip-compressed file content, fanned out by digest prefix
+- index.db                 - SQLite index mapping original name, source and processing time to blobs
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB read/compress window
+
+@dataclass
+class ArchiveEntry:
+    """One archived delivery of a file (several entries may share a blob)"""
+    entry_id: int
+    digest: str
+    original_name: str
+    source: str
+    archived_at: float
+    size: int
+    compressed_size: int
+    deduplicated: bool = False
+
+    def to_dict(self):
+        """Convert to dictionary for JSON responses"""
+        return {
+            'entry_id': self.entry_id,
+            'digest': self.digest,
+            'original_name': self.original_name,
+            'source': self.source,
+            'archived_at': self.archived_at,
+            'size': self.size,
+            'compressed_size': self.compressed_size,
+            'deduplicated': self.deduplicated
+        }
+
+class ArchiveStore:
+    """
+    🗄️ Content-addressed archive with write-time compression and retention policies.
+    Writes hash the file once, compress it only if the content is new, and record a
+    single index row - the cost does not grow with the size of the archive.
+    """
+
+    def __init__(self, root: str, retention_days: Optional[int] = None,
+                 max_entries: Optional[int] = None, compresslevel: int = 6):
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.retention_days = retention_days
+        self.max_entries = max_entries
+        self.compresslevel = compresslevel
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        # Several processes share index.db: every check-then-write runs in one BEGIN IMMEDIATE
+        # transaction, so no entry is ever recorded against a blob that retention is deleting
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, 'index.db'), check_same_thread=False,
+                                   timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                compressed_size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                digest TEXT NOT NULL,
+                original_name TEXT NOT NULL,
+                source TEXT NOT NULL,
+                archived_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_name ON entries(original_name);
+            CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries(digest);
+            CREATE INDEX IF NOT EXISTS idx_entries_archived_at ON entries(archived_at);
+        """)
+
+    def blob_path(self, digest: str) -> str:
+        """Fan-out path for a digest: blobs/ab/cd/abcd....gz"""
+        return os.path.join(self.blob_dir, digest[:2], digest[2:4], f"{digest}.gz")
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def archive(self, file_path: str, original_name: Optional[str] = None,
+                source: str = 'local', processed_at: Optional[float] = None) -> ArchiveEntry:
+        """Archive a file by content digest; redeliveries only add an index row"""
+        original_name = original_name or os.path.basename(file_path)
+        archived_at = processed_at if processed_at is not None else time.time()
+
+        digest, size = self._hash_file(file_path)
+
+        # Compress new content before taking the write lock; the decision is re-made inside it
+        with self._lock:
+            known = self._db.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        compressed = None if known and os.path.exists(self.blob_path(digest)) else self._compress(file_path)
+
+        def record(db):
+            nonlocal compressed
+            row = db.execute("SELECT compressed_size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            deduplicated = row is not None and os.path.exists(self.blob_path(digest))
+            if deduplicated:
+                compressed_size = row[0]
+            else:
+                if compressed is None:  # retention removed the blob since the first look
+                    compressed = self._compress(file_path)
+                compressed_size = self._store_blob(compressed, digest)
+                compressed = None
+            db.execute(
+                "INSERT OR REPLACE INTO blobs (digest, size, compressed_size, created_at) "
+                "VALUES (?, ?, ?, COALESCE((SELECT created_at FROM blobs WHERE digest = ?), ?))",
+                (digest, size, compressed_size, digest, archived_at)
+            )
+            cursor = db.execute(
+                "INSERT INTO entries (digest, original_name, source, archived_at) VALUES (?, ?, ?, ?)",
+                (digest, original_name, source, archived_at)
+            )
+            return ArchiveEntry(
+                entry_id=cursor.lastrowid,
+                digest=digest,
+                original_name=original_name,
+                source=source,
+                archived_at=archived_at,
+                size=size,
+                compressed_size=compressed_size,
+                deduplicated=deduplicated
+            )
+
+        try:
+            return self._transaction(record)
+        finally:
+            if compressed is not None and os.path.exists(compressed):
+                os.remove(compressed)
+
+    def open(self, digest: str):
+        """Open an archived blob for streaming decompressed reads"""
+        return gzip.open(self.blob_path(digest), 'rb')
+
+    def lookup(self, original_name: str, limit: int = 50) -> List[ArchiveEntry]:
+        """Find archived deliveries of a file by its original name (newest first)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT e.id, e.digest, e.original_name, e.source, e.archived_at, b.size, b.compressed_size "
+                "FROM entries e JOIN blobs b ON b.digest = e.digest "
+                "WHERE e.original_name = ? ORDER BY e.id DESC LIMIT ?",
+                (original_name, limit)
+            ).fetchall()
+        return [ArchiveEntry(*row) for row in rows]
+
+    def get(self, digest: str) -> Optional[ArchiveEntry]:
+        """Return the most recent delivery recorded for a digest"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT e.id, e.digest, e.original_name, e.source, e.archived_at, b.size, b.compressed_size "
+                "FROM entries e JOIN blobs b ON b.digest = e.digest "
+                "WHERE e.digest = ? ORDER BY e.id DESC LIMIT 1",
+                (digest,)
+            ).fetchone()
+        return ArchiveEntry(*row) if row else None
+
+    def apply_retention(self, now: Optional[float] = None) -> int:
+        """Drop entries outside the retention policy and delete blobs nobody references"""
+        if not self.retention_days and not self.max_entries:
+            return 0
+
+        now = now if now is not None else time.time()
+
+        def expire(db):
+            if self.retention_days:
+                cutoff = now - self.retention_days * 86400
+                db.execute("DELETE FROM entries WHERE archived_at < ?", (cutoff,))
+            if self.max_entries:
+                db.execute(
+                    "DELETE FROM entries WHERE id NOT IN (SELECT id FROM entries ORDER BY id DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+            orphans = [row[0] for row in db.execute(
+                "SELECT digest FROM blobs WHERE NOT EXISTS "
+                "(SELECT 1 FROM entries WHERE entries.digest = blobs.digest)"
+            )]
+            removed = []
+            for digest in orphans:
+                # Still holding the write lock: no archive() can reference the blob until we commit
+                if db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                    continue
+                db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                try:
+                    os.remove(self.blob_path(digest))
+                except FileNotFoundError:
+                    pass
+                removed.append(digest)
+            return removed
+
+        orphans = self._transaction(expire)
+
+        if orphans:
+            logger.info(f"🧹 Archive retention removed {len(orphans)} blobs")
+        return len(orphans)
+
+    def stats(self):
+        """Archive size summary for dashboards"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            blobs, size, compressed = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(compressed_size), 0) FROM blobs"
+            ).fetchone()
+        return {
+            'entries': entries,
+            'blobs': blobs,
+            'original_bytes': size,
+            'stored_bytes': compressed
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _hash_file(self, file_path: str):
+        """Stream the file through SHA-256"""
+        sha = hashlib.sha256()
+        size = 0
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha.update(chunk)
+                size += len(chunk)
+        return sha.hexdigest(), size
+
+    def _compress(self, file_path: str) -> str:
+        """Compress into a temp file under tmp/ and return its path"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix='.gz')
+        try:
+            with os.fdopen(fd, 'wb') as raw, open(file_path, 'rb') as src:
+                with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=self.compresslevel, mtime=0) as gz:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        gz.write(chunk)
+                raw.flush()
+                os.fsync(raw.fileno())
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _store_blob(self, tmp_path: str, digest: str) -> int:
+        """Atomically rename a compressed temp file into the fan-out directory"""
+        target = self.blob_path(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        compressed_size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, target)
+        return compressed_size
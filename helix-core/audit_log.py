@@ -0,0 +1,167 @@
+"""
+📜 Helix Audit Journal - Durable, append-only audit log with group commit
+Compliance gets every audit event on disk without a disk sync inside every status update.
+
+Features:
+- Background writer batches events from all jobs and fsyncs once per batch
+- Segment rotation (one segment per process start, rolled over by size)
+- Checksummed records: <length:u32><crc32:u32><payload>, payload = compact JSON
+- Replay reader that rebuilds job history and stops cleanly at torn writes
+"""
+
+import glob
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from routing import AuditAction, AuditEntry
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct('<II')
+SEGMENT_PATTERN = 'audit-*.log'
+
+def encode_record(job_id: str, entry: AuditEntry) -> bytes:
+    """Serialize one audit event with its length and CRC32 header"""
+    payload = json.dumps(
+        [job_id, int(entry.action), entry.ts_ns, entry.user, entry.details],
+        separators=(',', ':'), ensure_ascii=False
+    ).encode('utf-8')
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+class AuditJournal:
+    """
+    ✍️ Append-only journal written by a single background thread.
+    `append()` only queues the event; the writer drains everything queued,
+    writes it in one go and issues a single fsync for the whole batch.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 max_batch: int = 1000):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_batch = max_batch
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: List[bytes] = []
+        self._condition = threading.Condition()
+        self._appended_seq = 0
+        self._committed_seq = 0
+        self._closed = False
+
+        self._segment = None
+        self._segment_size = 0
+        self._open_segment()
+
+        self._writer = threading.Thread(target=self._write_loop, name='helix-audit-journal', daemon=True)
+        self._writer.start()
+
+    def append(self, job_id: str, entry: AuditEntry) -> int:
+        """Queue an audit event; returns its sequence number for sync()"""
+        record = encode_record(job_id, entry)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Audit journal is closed")
+            self._pending.append(record)
+            self._appended_seq += 1
+            self._condition.notify_all()
+            return self._appended_seq
+
+    def sync(self, seq: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Block until everything up to `seq` (default: all appended so far) is on disk"""
+        end = None if timeout is None else time.time() + timeout
+        with self._condition:
+            target = self._appended_seq if seq is None else seq
+            while self._committed_seq < target:
+                remaining = None if end is None else end - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def close(self):
+        """Commit everything queued and stop the writer"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join(timeout=10)
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        name = f"audit-{time.time_ns():020d}-{os.getpid()}.log"
+        self._segment = open(os.path.join(self.directory, name), 'ab')
+        self._segment_size = 0
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending and self._closed:
+                    return
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+
+            try:
+                self._commit(batch)
+            except Exception as e:
+                logger.error(f"💥 Audit journal write failed, retrying batch of {len(batch)}: {e}")
+                with self._condition:
+                    self._pending[:0] = batch
+                time.sleep(1)
+                continue
+
+            with self._condition:
+                self._committed_seq += len(batch)
+                self._condition.notify_all()
+
+    def _commit(self, batch: List[bytes]):
+        """Group commit: one write and one fsync for the whole batch"""
+        if self._segment_size >= self.segment_bytes:
+            self._open_segment()
+        data = b''.join(batch)
+        self._segment.write(data)
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._segment_size += len(data)
+
+def read_segment(path: str) -> Iterator[Tuple[str, AuditEntry]]:
+    """Yield (job_id, entry) from one segment, stopping at a torn or corrupt record"""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            length, checksum = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                logger.warning(f"⚠️ Audit segment {os.path.basename(path)} ends with a damaged record - stopping replay here")
+                return
+            job_id, action, ts_ns, user, details = json.loads(payload)
+            yield job_id, AuditEntry(AuditAction(action), ts_ns, user, details)
+
+def replay(directory: str) -> Iterator[Tuple[str, AuditEntry]]:
+    """Yield every journaled event, segment by segment in creation order"""
+    for path in sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN))):
+        yield from read_segment(path)
+
+def rebuild_history(directory: str) -> Dict[str, List[AuditEntry]]:
+    """Rebuild each job's audit trail (ordered by timestamp) from the journal"""
+    history: Dict[str, List[AuditEntry]] = defaultdict(list)
+    for job_id, entry in replay(directory):
+        history[job_id].append(entry)
+    for entries in history.values():
+        entries.sort(key=lambda entry: entry.ts_ns)
+    return dict(history)
@@ -0,0 +1,107 @@
+"""
+⏱️ Helix Startup Benchmark - How long until a fresh process can serve?
+Every run starts a new interpreter (nothing cached in sys.modules) with its own
+throw-away state directory, and times the phases a rolling deploy waits for:
+
+- import:      `import app` (modules and configuration only - no files, no threads)
+- create_app:  opening the shared state (job store, journal, queue, metrics segments) and
+               building the Flask app (what each gunicorn worker does on boot)
+- first_request: first GET /health through the WSGI stack
+- services:    start_background_services() (poller election, work queue feeder, workers)
+- worker_boot: wall time from spawning the process to the first response
+
+    python bench_startup.py [--runs 10] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+response = application.test_client().get('/health')
+served = time.perf_counter()
+assert response.status_code == 200
+app.start_background_services()
+services = time.perf_counter()
+open(sys.argv[1], 'w').write(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'services': services - served,
+    'served_at': time.time() - (services - served)
+}))
+"""
+
+PHASES = ('import', 'create_app', 'first_request', 'services', 'worker_boot')
+
+def run_once(state_dir: str) -> dict:
+    env = dict(
+        os.environ,
+        PYTHONPATH=HERE,
+        JOB_STORE_PATH=os.path.join(state_dir, 'jobs.db'),
+        AUDIT_JOURNAL_DIR=os.path.join(state_dir, 'audit'),
+        METRICS_SHM_PATH=os.path.join(state_dir, 'metrics'),
+        PIPELINE_METRICS_PATH=os.path.join(state_dir, 'pipeline_metrics'),
+        ARCHIVE_DIR=os.path.join(state_dir, 'archive'),
+        UPLOAD_DIR=os.path.join(state_dir, 'uploads'),
+        UPLOAD_STAGING_DIR=os.path.join(state_dir, 'upload_staging'),
+        WORK_QUEUE_URL='sqlite:' + os.path.join(state_dir, 'queue.db'),
+        POLLER_LEADER_LOCK='file:' + os.path.join(state_dir, 'poller.lock'),
+        SFTP_HOST='127.0.0.1', SFTP_PORT='1',
+        LOG_LEVEL='WARNING', FLASK_ENV='production'
+    )
+    spawned = time.time()
+    result_path = os.path.join(state_dir, 'timings.json')
+    child = subprocess.run([sys.executable, '-c', CHILD, result_path], cwd=HERE, env=env,
+                           capture_output=True, text=True, timeout=120)
+    if child.returncode != 0:
+        raise RuntimeError(f"Benchmark child failed:\n{child.stderr[-2000:]}")
+    with open(result_path) as result:
+        timings = json.load(result)
+    timings['worker_boot'] = timings.pop('served_at') - spawned
+    return timings
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory(prefix='helix-bench-') as state_dir:
+            runs.append(run_once(state_dir))
+
+    summary = {
+        phase: {
+            'median_ms': round(statistics.median(run[phase] for run in runs) * 1000, 1),
+            'min_ms': round(min(run[phase] for run in runs) * 1000, 1),
+            'max_ms': round(max(run[phase] for run in runs) * 1000, 1)
+        }
+        for phase in PHASES
+    }
+    if args.json:
+        print(json.dumps({'runs': args.runs, 'python': sys.version.split()[0], 'phases': summary}, indent=2))
+        return 0
+
+    print(f"⏱️ Helix startup over {args.runs} cold runs (Python {sys.version.split()[0]})")
+    print(f"{'phase':<15}{'median':>10}{'min':>10}{'max':>10}")
+    for phase, stats in summary.items():
+        print(f"{phase:<15}{stats['median_ms']:>8.1f}ms{stats['min_ms']:>8.1f}ms{stats['max_ms']:>8.1f}ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+👥 Helix User Admin - Add or replace a user in the users file (argon2 hashes only)
+Point the app at the file with USERS_FILE; hashing uses the same ARGON2_* settings.
+
+    python create_users.py /etc/helix/users.json alice admin "Alice Example" [--email alice@bank.example]
+"""
+
+import argparse
+import getpass
+import sys
+
+from user_store import ROLE_PERMISSIONS, HashingPool, UserStore, password_hasher_from_env
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('users_file')
+    parser.add_argument('username')
+    parser.add_argument('role', choices=sorted(ROLE_PERMISSIONS))
+    parser.add_argument('full_name')
+    parser.add_argument('--email')
+    args = parser.parse_args(argv)
+
+    password = getpass.getpass(f"Password for {args.username}: ")
+    if not password or password != getpass.getpass("Repeat password: "):
+        print("❌ Passwords empty or not matching", file=sys.stderr)
+        return 1
+
+    store = UserStore(HashingPool(password_hasher_from_env(), workers=1), args.users_file)
+    store.set_user(args.username, password, args.role, args.full_name, args.email)
+    store.save()
+    print(f"✅ {args.username} ({args.role}) saved to {args.users_file} - {len(store)} users")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,29 +6,30 @@ from flask import render_template, jsonify, request
 from datetime import datetime, timedelta
 import json
 import os
-from collections import defaultdict, deque
+import threading
+import time
+from routing import CachedPayload
+from shared_metrics import FILE_TYPES, SFTP_STATUS_CODES, SharedMetrics
+from rollups import ProcessingRollups, QuantileSketch
+from lazy_state import Lazy
 
-# Dashboard data store (in production, use Redis or database)
+# Dashboard data store - backed by a shared memory segment so every gunicorn worker agrees
 class DashboardData:
-    def __init__(self):
-        # Circular buffer for recent activities
-        self.recent_activities = deque(maxlen=50)
-        self.processing_stats = {
-            'total_files_processed': 0,
-            'total_transactions': 0,
-            'total_amount': 0.0,
-            'files_by_type': defaultdict(int),
-            'processing_times': deque(maxlen=20),
-            'hourly_stats': defaultdict(lambda: {'files': 0, 'transactions': 0, 'amount': 0.0})
+    def __init__(self, metrics=None, rollups=None):
+        self.metrics = metrics or SharedMetrics(
+            os.getenv("METRICS_SHM_PATH") or None,
+            shards=int(os.getenv("METRICS_SHARDS", "16"))
+        )
+        # Minute / hour / day rollups with latency sketches, stored next to the metrics segment
+        self.rollups = rollups or ProcessingRollups(f"{self.metrics.path}_rollups", shards=self.metrics.shards)
+        # view name -> (version, serialized payload); rebuilt only after a mutation
+        self._views = {}
+        self._views_lock = threading.Lock()
+        self._view_builders = {
+            'stats': self.get_stats,
+            'logs': lambda: {'logs': self.get_logs()},
+            'dashboard': self.get_dashboard_data
         }
-        self.sftp_status = {
-            'last_poll': None,
-            'connection_status': 'Unknown',
-            'files_found': 0,
-            'poll_count': 0,
-            'errors': deque(maxlen=10)
-        }
-        self.current_processing = {}  # Currently processing files
         
     def add_activity(self, activity_type, message, level='info', emoji='ℹ️'):
         """Add a new activity to the dashboard"""
@@ -39,47 +40,38 @@ class DashboardData:
             'level': level,
             'emoji': emoji
         }
-        self.recent_activities.append(activity)
+        self.metrics.append_activity(activity)
     
     def update_sftp_status(self, status, files_found=0, error=None):
         """Update SFTP connection status"""
-        self.sftp_status['last_poll'] = datetime.now().isoformat()
-        self.sftp_status['connection_status'] = status
-        self.sftp_status['files_found'] = files_found
-        self.sftp_status['poll_count'] += 1
+        code = SFTP_STATUS_CODES.index(status) if status in SFTP_STATUS_CODES else 0
+        self.metrics.set_gauges(sftp_status=code, sftp_files_found=files_found, sftp_last_poll=time.time())
+        self.metrics.add(sftp_polls=1)
         
         if error:
-            self.sftp_status['errors'].append({
+            self.metrics.append_error({
                 'timestamp': datetime.now().isoformat(),
                 'error': str(error)
             })
     
     def start_processing(self, filename, file_type, emoji):
         """Mark file as currently processing"""
-        self.current_processing[filename] = {
+        self.metrics.set_current(filename, {
             'file_type': file_type,
             'emoji': emoji,
             'started_at': datetime.now().isoformat(),
             'status': 'Processing...'
-        }
+        })
     
-    def complete_processing(self, filename, success=True, transactions=0, amount=0.0, processing_time=0):
+    def complete_processing(self, filename, success=True, transactions=0, amount=0.0, processing_time=0,
+                            amounts_by_currency=None):
         """Mark file processing as complete"""
-        if filename in self.current_processing:
-            file_info = self.current_processing.pop(filename)
-            
-            # Update stats
-            self.processing_stats['total_files_processed'] += 1
-            self.processing_stats['total_transactions'] += transactions
-            self.processing_stats['total_amount'] += amount
-            self.processing_stats['files_by_type'][file_info['file_type']] += 1
-            self.processing_stats['processing_times'].append(processing_time)
-            
-            # Update hourly stats
-            hour_key = datetime.now().strftime('%Y-%m-%d %H:00')
-            self.processing_stats['hourly_stats'][hour_key]['files'] += 1
-            self.processing_stats['hourly_stats'][hour_key]['transactions'] += transactions
-            self.processing_stats['hourly_stats'][hour_key]['amount'] += amount
+        file_info = self.metrics.pop_current(filename)
+        if file_info is not None:
+            # Update stats (counters and timing ring in one shared-memory write, then the time rollups)
+            self.rollups.record(processing_time, success, transactions,
+                                amounts_by_currency or {'OTHER': amount}, file_info['file_type'])
+            self.metrics.record_processing(processing_time, transactions, amount, success, file_info['file_type'])
             
             # Add activity
             status_emoji = '✅' if success else '❌'
@@ -91,21 +83,87 @@ class DashboardData:
                 status_emoji
             )
     
+    # ---- Views over the shared snapshot ----
+    @staticmethod
+    def _success_rate(counters):
+        finished = counters['files_succeeded'] + counters['files_failed']
+        return round(100.0 * counters['files_succeeded'] / finished, 2) if finished else 100.0
+    
+    def _processing_stats(self, snapshot):
+        counters = snapshot['counters']
+        hours = self.rollups.buckets('hour')
+        last_day = hours[-24:]
+        latency = {}
+        for hour in last_day:
+            for file_type, sketch in hour.latency.items():
+                if sketch.count:
+                    latency.setdefault(file_type, QuantileSketch()).merge(sketch)
+        return {
+            'total_files_processed': int(counters['files_processed']),
+            'total_transactions': int(counters['transactions']),
+            'total_amount': counters['amount'],
+            'files_by_type': {
+                file_type: int(counters[f"type:{file_type}"])
+                for file_type in FILE_TYPES if counters[f"type:{file_type}"]
+            },
+            'processing_times': snapshot['processing_times'],
+            'success_rate': self._success_rate(counters),
+            # p50 / p95 / p99 processing time (ms) per format over the last 24 hours
+            'latency_percentiles': {file_type: sketch.percentiles() for file_type, sketch in latency.items()},
+            'hourly_stats': {
+                datetime.fromtimestamp(hour.start).strftime('%Y-%m-%d %H:00'): {
+                    'files': hour.files,
+                    'transactions': hour.transactions,
+                    'amount': sum(hour.amounts.values()),
+                    'succeeded': hour.succeeded,
+                    'failed': hour.failed
+                }
+                for hour in hours
+            }
+        }
+    
+    @staticmethod
+    def _sftp_status(snapshot):
+        gauges = snapshot['gauges']
+        return {
+            'last_poll': datetime.fromtimestamp(gauges['sftp_last_poll']).isoformat() if gauges['sftp_last_poll'] else None,
+            'connection_status': SFTP_STATUS_CODES[int(gauges['sftp_status'])],
+            'files_found': int(gauges['sftp_files_found']),
+            'poll_count': int(snapshot['counters']['sftp_polls']),
+            'errors': snapshot['errors']
+        }
+    
+    @property
+    def processing_stats(self):
+        return self._processing_stats(self.metrics.snapshot())
+    
+    @property
+    def sftp_status(self):
+        return self._sftp_status(self.metrics.snapshot())
+    
+    @property
+    def recent_activities(self):
+        return self.metrics.snapshot()['activities']
+    
+    @property
+    def current_processing(self):
+        return self.metrics.snapshot()['current']
+    
     def get_stats(self):
         """Get current statistics for the dashboard"""
-        total_files = self.processing_stats['total_files_processed']
-        success_rate = 100.0  # We'll calculate this later based on actual success/failure
+        snapshot = self.metrics.snapshot()
+        counters = snapshot['counters']
         
         return {
-            'total_files': total_files,
-            'total_transactions': self.processing_stats['total_transactions'],
-            'success_rate': success_rate,
-            'last_processed': self.sftp_status.get('last_poll', 'Never')
+            'total_files': int(counters['files_processed']),
+            'total_transactions': int(counters['transactions']),
+            'success_rate': self._success_rate(counters),
+            'last_processed': self._sftp_status(snapshot)['last_poll'] or 'Never'
         }
     
     def get_logs(self):
         """Get recent log entries for the dashboard"""
-        return list(self.recent_activities)
+        return self.recent_activities
     
     def add_file_processed(self, filename, file_type, transaction_count, success=True):
         """Record a processed file (compatibility method)"""
@@ -130,28 +188,41 @@ class DashboardData:
         }
         self.add_activity('log', message, level, emoji_map.get(level, 'ℹ️'))
 
+    def get_timeseries(self, resolution='hour', limit=None):
+        """Rollup buckets of one resolution (minute / hour / day) with latency percentiles"""
+        return [bucket.to_dict() for bucket in self.rollups.buckets(resolution, limit)]
+    
     def get_dashboard_data(self):
-        """Get all dashboard data for the frontend"""
-        # Convert processing_stats with proper serialization of deque objects
-        processing_stats = dict(self.processing_stats)
-        processing_stats['processing_times'] = list(processing_stats['processing_times'])
-        processing_stats['files_by_type'] = dict(processing_stats['files_by_type'])
-        processing_stats['hourly_stats'] = dict(processing_stats['hourly_stats'])
-        
-        # Convert sftp_status with proper serialization of deque objects
-        sftp_status = dict(self.sftp_status)
-        sftp_status['errors'] = list(sftp_status['errors'])
-        # Handle last_poll - it might be a datetime or string
-        if sftp_status['last_poll'] and hasattr(sftp_status['last_poll'], 'isoformat'):
-            sftp_status['last_poll'] = sftp_status['last_poll'].isoformat()
-        
+        """Get all dashboard data for the frontend (one consistent snapshot)"""
+        snapshot = self.metrics.snapshot()
         return {
-            'recent_activities': list(self.recent_activities),
-            'processing_stats': processing_stats,
-            'sftp_status': sftp_status,
-            'current_processing': self.current_processing,
+            'recent_activities': snapshot['activities'],
+            'processing_stats': self._processing_stats(snapshot),
+            'sftp_status': self._sftp_status(snapshot),
+            'current_processing': snapshot['current'],
             'timestamp': datetime.now().isoformat()
         }
 
-# Global dashboard instance
-dashboard_data = DashboardData()
+    # ---- Versioned, pre-serialized views ----
+    @property
+    def version(self):
+        """Bumped by every mutation in any process (writes to the shared segment)"""
+        return self.metrics.version
+    
+    def view(self, name):
+        """Serialized (and gzipped) view, built at most once per version"""
+        version = self.version
+        cached = self._views.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._views_lock:
+            version = self.version
+            cached = self._views.get(name)
+            if cached is None or cached[0] != version:
+                # Tagged with the version read before building: a racing write only causes a rebuild
+                cached = (version, CachedPayload.from_data(self._view_builders[name]()))
+                self._views[name] = cached
+        return cached[1]
+
+# Global dashboard instance - its metrics segment is opened on first use, not on import
+dashboard_data = Lazy(DashboardData, 'dashboard_data')
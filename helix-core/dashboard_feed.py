@@ -0,0 +1,159 @@
+"""
+📡 Helix Dashboard Feed - Versioned change log behind the live dashboard stream
+Open dashboards subscribe over SSE instead of re-fetching /api/dashboard-data every
+two seconds. Each process builds the dashboard state once per change, diffs it
+against the previous state and serializes the delta once, however many dashboards listen.
+
+- Version: completed writes to the shared metrics segment (same in every gunicorn worker)
+- Delta frames: new activities plus only the stats / SFTP fields that changed
+- Snapshot frame: compact full state, sent on connect or when a client fell behind the log
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _compact(payload: Dict) -> str:
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+
+def new_activities(previous: List[Dict], current: List[Dict]) -> List[Dict]:
+    """Activities in `current` that came after the last one in `previous`"""
+    if not previous:
+        return list(current)
+    last = previous[-1]
+    for i in range(len(current) - 1, -1, -1):
+        if current[i] == last:
+            return current[i + 1:]
+    return list(current)  # the whole ring turned over since the last refresh
+
+def diff_dashboard(previous: Dict, current: Dict) -> Dict:
+    """Changes between two get_dashboard_data() results (empty dict if none)"""
+    delta = {}
+    activities = new_activities(previous['recent_activities'], current['recent_activities'])
+    if activities:
+        delta['activities'] = activities
+    for section in ('processing_stats', 'sftp_status'):
+        changed = {key: value for key, value in current[section].items() if previous[section].get(key) != value}
+        if changed:
+            delta[section] = changed
+    if previous['current_processing'] != current['current_processing']:
+        delta['current_processing'] = current['current_processing']
+    return delta
+
+class DashboardFeed:
+    """
+    🗞️ Per-process change log of dashboard deltas.
+    A single refresher thread watches the shared segment's version; stream
+    handlers only wait on a condition and replay pre-serialized frames.
+    """
+
+    def __init__(self, dashboard, history: int = 512, poll_interval: float = 0.5):
+        self.dashboard = dashboard
+        self.poll_interval = poll_interval
+        self._log: deque = deque(maxlen=history)    # (base_version, version, sse frame)
+        self._condition = threading.Condition()
+        self._version: Optional[int] = None
+        self._state: Optional[Dict] = None
+        self._snapshot_frame: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def start(self):
+        """Start the refresher thread (idempotent, called when the first client subscribes)"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._state is None:
+                self._refresh_locked()
+            self._thread = threading.Thread(target=self._run, name='helix-dashboard-feed', daemon=True)
+            self._thread.start()
+        logger.info("📡 Dashboard feed refresher started")
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"💥 Dashboard feed refresh failed: {e}")
+
+    def refresh(self) -> bool:
+        """Record a delta if the shared metrics changed; returns True when one was published"""
+        if self.dashboard.metrics.version == self._version:
+            return False
+        with self._condition:
+            return self._refresh_locked()
+
+    def _refresh_locked(self) -> bool:
+        version, state = self._read_consistent()
+        if version == self._version:
+            return False
+        previous, base = self._state, self._version
+        self._state, self._version = state, version
+        self._snapshot_frame = None
+        if previous is not None:
+            delta = diff_dashboard(previous, state)
+            delta['version'] = version
+            self._log.append((base, version, f"id: {version}\nevent: delta\ndata: {_compact(delta)}\n\n"))
+        self._condition.notify_all()
+        return True
+
+    def _read_consistent(self) -> Tuple[int, Dict]:
+        """Dashboard state tagged with the version it belongs to (re-read if a write raced us)"""
+        metrics = self.dashboard.metrics
+        for _ in range(5):
+            version = metrics.version
+            state = self.dashboard.get_dashboard_data()
+            if metrics.version == version:
+                break
+        state.pop('timestamp', None)
+        return version, state
+
+    def snapshot_frame(self) -> Tuple[str, int]:
+        """Full state as one SSE frame, serialized at most once per version"""
+        with self._condition:
+            if self._state is None:
+                self._refresh_locked()
+            if self._snapshot_frame is None:
+                self._snapshot_frame = (
+                    f"id: {self._version}\nevent: snapshot\n"
+                    f"data: {_compact(dict(self._state, version=self._version))}\n\n"
+                )
+            return self._snapshot_frame, self._version
+
+    def frames_since(self, version: int) -> Optional[Tuple[List[str], int]]:
+        """Delta frames after `version`, or None if the log cannot bridge the gap (send a snapshot)"""
+        with self._condition:
+            return self._frames_locked(version)
+
+    def wait(self, version: int, timeout: float) -> Optional[Tuple[List[str], int]]:
+        """Block until something newer than `version` is logged; ([], version) on timeout"""
+        end = time.time() + timeout
+        with self._condition:
+            while True:
+                result = self._frames_locked(version)
+                if result is None or result[0]:
+                    return result
+                remaining = end - time.time()
+                if remaining <= 0:
+                    return [], version
+                self._condition.wait(remaining)
+
+    def _frames_locked(self, version: int) -> Optional[Tuple[List[str], int]]:
+        if version == self._version:
+            return [], version
+        frames = []
+        for base, _, frame in reversed(self._log):
+            frames.append(frame)
+            if base == version:
+                frames.reverse()
+                return frames, self._version
+        return None
@@ -6,8 +6,7 @@ import os
 import logging
 import xml.etree.ElementTree as ET
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
-import mt940
+from typing import Dict, List, Any, Optional
 import csv
 import json
 from datetime import datetime
@@ -21,6 +20,7 @@ class BaseFileProcessor(ABC):
         self.supported_extensions = []
         self.file_type = "UNKNOWN"
         self.emoji = "📄"  # Default emoji
+        self.supports_streaming = False  # True if parse_streaming() exists for oversized files
         
     @abstractmethod
     def can_process(self, filename: str) -> bool:
@@ -50,12 +50,13 @@ class MT940Processor(BaseFileProcessor):
         return any(filename.lower().endswith(ext) for ext in self.supported_extensions)
     
     def parse(self, file_path: str) -> Dict[str, Any]:
-        logger.info(f"{self.emoji} Parsing {self.file_type} file: {file_path}")
+        logger.debug("%s Parsing %s file: %s", self.emoji, self.file_type, file_path)
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
+            import mt940  # loaded on the first MT940 file, not when the service starts
             statements = mt940.parse(content)
             
             result = {
@@ -67,37 +68,56 @@ class MT940Processor(BaseFileProcessor):
                 'total_amount': 0.0
             }
             
-            for statement in statements:
-                stmt_data = {
-                    'account_id': getattr(statement, 'account_identification', 'Unknown'),
-                    'statement_number': getattr(statement, 'statement_number', ''),
-                    'opening_balance': getattr(statement, 'opening_balance', None),
-                    'closing_balance': getattr(statement, 'closing_balance', None),
-                    'transactions': []
+            # mt940.parse() returns one Transactions container for the file; its items are
+            # the transactions (each links back to the container, so don't iterate those too)
+            header = statements.data
+            stmt_data = {
+                'account_id': header.get('account_identification', 'Unknown'),
+                'statement_number': header.get('statement_number', ''),
+                'opening_balance': self._balance(header.get('final_opening_balance') or header.get('opening_balance')),
+                'closing_balance': self._balance(header.get('final_closing_balance') or header.get('closing_balance')),
+                'transactions': []
+            }
+            
+            for tx in statements:
+                data = tx.data
+                amount = data.get('amount')
+                booking_date = data.get('date')
+                tx_data = {
+                    'amount': float(getattr(amount, 'amount', amount) or 0),
+                    'currency': data.get('currency') or getattr(amount, 'currency', None) or 'USD',
+                    'date': booking_date.isoformat() if hasattr(booking_date, 'isoformat') else str(booking_date or ''),
+                    'reference': data.get('customer_reference') or data.get('bank_reference') or '',
+                    'purpose': data.get('transaction_details', ''),
+                    'transaction_code': data.get('id', '')
                 }
-                
-                for tx in statement.transactions:
-                    tx_data = {
-                        'amount': getattr(tx, 'amount', 0),
-                        'currency': getattr(tx, 'currency', 'USD'),
-                        'date': getattr(tx, 'booking_date', '').isoformat() if hasattr(getattr(tx, 'booking_date', ''), 'isoformat') else str(getattr(tx, 'booking_date', '')),
-                        'reference': getattr(tx, 'reference', ''),
-                        'purpose': getattr(tx, 'purpose', ''),
-                        'transaction_code': getattr(tx, 'transaction_code', '')
-                    }
-                    stmt_data['transactions'].append(tx_data)
-                    result['total_amount'] += float(tx_data['amount'])
-                
+                stmt_data['transactions'].append(tx_data)
+                result['total_amount'] += tx_data['amount']
+            
+            if stmt_data['transactions'] or header:
                 result['statements'].append(stmt_data)
                 result['total_transactions'] += len(stmt_data['transactions'])
             
-            logger.info(f"✅ Successfully parsed {len(result['statements'])} statements with {result['total_transactions']} transactions")
+            logger.debug("✅ Successfully parsed %d statements with %d transactions", len(result['statements']), result['total_transactions'])
             return result
             
         except Exception as e:
             logger.error(f"❌ Error parsing MT940 file {file_path}: {e}")
             raise
 
+    def _balance(self, balance) -> Optional[Dict[str, Any]]:
+        """mt940 Balance as a plain dict"""
+        if balance is None:
+            return None
+        amount = getattr(balance, 'amount', None)
+        balance_date = getattr(balance, 'date', None)
+        return {
+            'amount': float(getattr(amount, 'amount', 0) or 0),
+            'currency': getattr(amount, 'currency', None),
+            'credit_debit': getattr(balance, 'status', None),
+            'date': balance_date.isoformat() if hasattr(balance_date, 'isoformat') else None
+        }
+    
     def validate(self, data: Dict[str, Any]) -> bool:
         """Validate MT940 data structure"""
         required_fields = ['file_type', 'statements', 'total_transactions']
@@ -111,6 +131,7 @@ class CAMT053Processor(BaseFileProcessor):
         self.supported_extensions = ['.xml']
         self.file_type = "CAMT.053"
         self.emoji = "💼"  # File type emoji
+        self.supports_streaming = True
     
     def can_process(self, filename: str) -> bool:
         if not filename.lower().endswith('.xml'):
@@ -129,7 +150,7 @@ class CAMT053Processor(BaseFileProcessor):
         return True  # Let's be more permissive and check content in parse method
     
     def parse(self, file_path: str) -> Dict[str, Any]:
-        logger.info(f"{self.emoji} Parsing {self.file_type} file: {file_path}")
+        logger.debug("%s Parsing %s file: %s", self.emoji, self.file_type, file_path)
         
         try:
             tree = ET.parse(file_path)
@@ -142,7 +163,7 @@ class CAMT053Processor(BaseFileProcessor):
                 if not (root.find('.//*BkToCstmrAcctRpt') or 'camt.053' in str(root.tag).lower()):
                     raise ValueError(f"Not a valid CAMT.053 file - missing required elements")
             
-            logger.info(f"{self.emoji} Confirmed this is a valid {self.file_type} file!")
+            logger.debug("%s Confirmed this is a valid %s file!", self.emoji, self.file_type)
             
             # Remove namespace for easier parsing
             for elem in root.iter():
@@ -158,46 +179,129 @@ class CAMT053Processor(BaseFileProcessor):
                 'total_amount': 0.0
             }
             
-            # Parse bank to customer account report
+            # Parse bank to customer account report - the account may sit on the enclosing report
+            reports = None
             for stmt in root.findall('.//Stmt'):
-                stmt_data = {
-                    'account_id': self._get_text(stmt, './/IBAN') or self._get_text(stmt, './/Othr/Id'),
-                    'statement_id': self._get_text(stmt, './/Id'),
-                    'creation_date': self._get_text(stmt, './/CreDtTm'),
-                    'opening_balance': self._parse_balance(stmt.find('.//OpenBal')),
-                    'closing_balance': self._parse_balance(stmt.find('.//ClsgBal')),
-                    'transactions': []
-                }
+                acct = stmt.find('./Acct')
+                if acct is None:
+                    # Rare, so the statement -> report map is only built when needed
+                    if reports is None:
+                        reports = {child: report for report in root.iterfind('.//*[Stmt]')
+                                   for child in report.iterfind('Stmt')}
+                    if stmt in reports:
+                        acct = reports[stmt].find('./Acct')
+                if acct is None:
+                    acct = stmt
+                stmt_data = self._statement_data(stmt, acct)
                 
                 # Parse entries (transactions)
                 for entry in stmt.findall('.//Ntry'):
-                    tx_data = {
-                        'amount': float(self._get_text(entry, './/Amt') or 0),
-                        'currency': self._get_attr(entry, './/Amt', 'Ccy'),
-                        'credit_debit': self._get_text(entry, './/CdtDbtInd'),
-                        'booking_date': self._get_text(entry, './/BookgDt/Dt'),
-                        'value_date': self._get_text(entry, './/ValDt/Dt'),
-                        'reference': self._get_text(entry, './/AcctSvcrRef'),
-                        'remittance_info': self._get_text(entry, './/RmtInf/Ustrd')
-                    }
-                    
-                    # Adjust amount sign based on credit/debit indicator
-                    if tx_data['credit_debit'] == 'DBIT':
-                        tx_data['amount'] = -tx_data['amount']
-                    
+                    tx_data = self._entry_data(entry)
                     stmt_data['transactions'].append(tx_data)
                     result['total_amount'] += tx_data['amount']
                 
                 result['statements'].append(stmt_data)
                 result['total_transactions'] += len(stmt_data['transactions'])
             
-            logger.info(f"{self.emoji} Successfully parsed CAMT.053: {result['total_transactions']} transactions")
+            logger.debug("%s Successfully parsed CAMT.053: %d transactions", self.emoji, result['total_transactions'])
+            return result
+            
+        except Exception as e:
+            logger.error(f"❌ Error parsing {self.file_type} file {file_path}: {e}")
+            raise
+    
+    def parse_streaming(self, file_path: str) -> Dict[str, Any]:
+        """
+        Low-memory parse for large files: iterparse keeps only the statement being
+        read in memory and drops every entry once it is converted. Same result as parse().
+        """
+        logger.debug("%s Streaming parse of %s file: %s", self.emoji, self.file_type, file_path)
+        
+        try:
+            result = {
+                'file_type': self.file_type,
+                'file_path': file_path,
+                'parsed_at': datetime.now().isoformat(),
+                'statements': [],
+                'total_transactions': 0,
+                'total_amount': 0.0
+            }
+            is_camt = False
+            path = []                 # open elements, root first
+            transactions = None       # entries of the statement being read
+            
+            for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+                if event == 'start':
+                    if 'camt.053' in elem.tag.lower():
+                        is_camt = True
+                    path.append(elem)
+                    if elem.tag.endswith('}Stmt') or elem.tag == 'Stmt':
+                        transactions = []
+                    continue
+                
+                path.pop()
+                if '}' in elem.tag:
+                    elem.tag = elem.tag.split('}')[1]
+                if elem.tag == 'BkToCstmrAcctRpt':
+                    is_camt = True
+                
+                if elem.tag == 'Ntry' and transactions is not None:
+                    tx_data = self._entry_data(elem)
+                    transactions.append(tx_data)
+                    result['total_amount'] += tx_data['amount']
+                    path[-1].remove(elem)
+                elif elem.tag == 'Stmt':
+                    parent = path[-1] if path else None
+                    acct = elem.find('./Acct')
+                    if acct is None and parent is not None:
+                        acct = parent.find('./Acct')
+                    stmt_data = self._statement_data(elem, acct if acct is not None else elem)
+                    stmt_data['transactions'] = transactions
+                    result['statements'].append(stmt_data)
+                    result['total_transactions'] += len(transactions)
+                    transactions = None
+                    if parent is not None:
+                        parent.remove(elem)
+            
+            if not is_camt:
+                raise ValueError(f"Not a valid CAMT.053 file - missing required elements")
+            
+            logger.debug("%s Streamed CAMT.053: %d transactions", self.emoji, result['total_transactions'])
             return result
             
         except Exception as e:
             logger.error(f"❌ Error parsing {self.file_type} file {file_path}: {e}")
             raise
     
+    def _statement_data(self, stmt, acct) -> Dict[str, Any]:
+        """Statement header fields (transactions are filled in by the caller)"""
+        return {
+            'account_id': self._get_text(acct, './/IBAN') or self._get_text(acct, './/Othr/Id'),
+            'bic': self._get_text(acct, './/Svcr/FinInstnId/BICFI') or self._get_text(acct, './/Svcr/FinInstnId/BIC'),
+            'statement_id': self._get_text(stmt, './/Id'),
+            'creation_date': self._get_text(stmt, './/CreDtTm'),
+            'opening_balance': self._parse_balance(stmt.find('.//OpenBal')),
+            'closing_balance': self._parse_balance(stmt.find('.//ClsgBal')),
+            'transactions': []
+        }
+    
+    def _entry_data(self, entry) -> Dict[str, Any]:
+        """One Ntry as a transaction, amount signed by its credit/debit indicator"""
+        tx_data = {
+            'amount': float(self._get_text(entry, './/Amt') or 0),
+            'currency': self._get_attr(entry, './/Amt', 'Ccy'),
+            'credit_debit': self._get_text(entry, './/CdtDbtInd'),
+            'booking_date': self._get_text(entry, './/BookgDt/Dt'),
+            'value_date': self._get_text(entry, './/ValDt/Dt'),
+            'reference': self._get_text(entry, './/AcctSvcrRef'),
+            'remittance_info': self._get_text(entry, './/RmtInf/Ustrd')
+        }
+        
+        # Adjust amount sign based on credit/debit indicator
+        if tx_data['credit_debit'] == 'DBIT':
+            tx_data['amount'] = -tx_data['amount']
+        return tx_data
+    
     def _get_text(self, element, xpath):
         """Safely get text from XML element"""
         found = element.find(xpath)
@@ -237,7 +341,7 @@ class BAI2Processor(BaseFileProcessor):
         return any(filename.lower().endswith(ext) for ext in self.supported_extensions) and 'bai' in filename.lower()
     
     def parse(self, file_path: str) -> Dict[str, Any]:
-        logger.info(f"{self.emoji} Parsing {self.file_type} file: {file_path}")
+        logger.debug("%s Parsing %s file: %s", self.emoji, self.file_type, file_path)
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -291,7 +395,7 @@ class BAI2Processor(BaseFileProcessor):
             if current_account:
                 result['statements'].append(current_account)
             
-            logger.info(f"{self.emoji} Successfully parsed {self.file_type}: {result['total_transactions']} transactions")
+            logger.debug("%s Successfully parsed %s: %d transactions", self.emoji, self.file_type, result['total_transactions'])
             return result
             
         except Exception as e:
@@ -316,7 +420,7 @@ class CSVProcessor(BaseFileProcessor):
         return filename.lower().endswith('.csv')
     
     def parse(self, file_path: str) -> Dict[str, Any]:
-        logger.info(f"{self.emoji} Parsing {self.file_type} file: {file_path}")
+        logger.debug("%s Parsing %s file: %s", self.emoji, self.file_type, file_path)
         
         try:
             result = {
@@ -362,7 +466,7 @@ class CSVProcessor(BaseFileProcessor):
                     }
                     result['statements'].append(stmt_data)
             
-            logger.info(f"{self.emoji} Successfully parsed {self.file_type}: {result['total_transactions']} transactions")
+            logger.debug("%s Successfully parsed %s: %d transactions", self.emoji, self.file_type, result['total_transactions'])
             return result
             
         except Exception as e:
@@ -413,12 +517,29 @@ class FileProcessorFactory:
         """Get the appropriate processor for a file"""
         for processor in self.processors:
             if processor.can_process(filename):
-                logger.info(f"🎯 Selected {processor.emoji} {processor.file_type} processor for {filename}")
+                logger.debug("🎯 Selected %s %s processor for %s", processor.emoji, processor.file_type, filename)
                 return processor
         
-        logger.warning(f"⚠️ No specific processor found for {filename}, using {CSVProcessor().emoji} CSV processor")
+        logger.warning("⚠️ No specific processor found for %s, using CSV processor", filename, extra={'log_rate': 1})
         return CSVProcessor()
     
+    def detect_processor(self, filename: str, head: bytes = b'') -> Optional[BaseFileProcessor]:
+        """Processor by extension, falling back to sniffing the first bytes; None if unrecognized"""
+        for processor in self.processors:
+            if processor.can_process(filename):
+                return processor
+
+        text = head.lstrip(b'\xef\xbb\xbf \t\r\n')
+        if text.startswith(b'<') and b'camt.053' in head:
+            detected = CAMT053Processor
+        elif text.startswith((b'{1:', b':20:')):
+            detected = MT940Processor
+        elif text.startswith(b'01,'):
+            detected = BAI2Processor
+        else:
+            return None
+        return next(processor for processor in self.processors if isinstance(processor, detected))
+    
     def get_supported_formats(self) -> List[str]:
         """Get list of all supported file formats"""
         formats = []
@@ -0,0 +1,33 @@
+"""
+🦄 Helix gunicorn settings - web workers from the app factory, background services beside them
+The image runs `gunicorn -c gunicorn.conf.py`: WEB_WORKERS processes serve 'app:create_app()'
+(threaded, since SSE streams hold a thread each) and services.py runs the SFTP poller and
+processing workers as a sibling process, stopped gracefully with the server. Set
+RUN_BACKGROUND_SERVICES=0 when the services run in their own container.
+"""
+
+import os
+import subprocess
+import sys
+
+wsgi_app = 'app:create_app()'
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_WORKERS', '2'))
+threads = int(os.getenv('WEB_THREADS', '8'))
+graceful_timeout = 30
+
+_services = None
+
+def when_ready(server):
+    global _services
+    if os.getenv('RUN_BACKGROUND_SERVICES', '1') == '1':
+        _services = subprocess.Popen([sys.executable, 'services.py'])
+        server.log.info("🧵 Background services started (pid %s)", _services.pid)
+
+def on_exit(server):
+    if _services is not None and _services.poll() is None:
+        _services.terminate()  # SIGTERM: finish the files in hand, hand over poller leadership
+        try:
+            _services.wait(float(os.getenv('SERVICES_STOP_TIMEOUT_SECONDS', '30')) + 5)
+        except subprocess.TimeoutExpired:
+            _services.kill()
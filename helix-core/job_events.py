@@ -0,0 +1,169 @@
+"""
+📣 Helix Job Events - Push job status transitions to waiting clients
+Instead of polling GET /api/files/jobs/<id> in a loop, clients subscribe
+(SSE) or long-poll and are woken the moment a job changes state.
+
+Features:
+- Monotonic sequence numbers (usable as SSE event ids / Last-Event-ID for resume)
+- Bounded ring of recent events, so reconnecting clients can catch up
+- One condition variable; waiters sleep until a publish, no busy polling
+- Changes made by other processes: while anyone waits, a follower thread reads the
+  jobs the shared store saw change every `poll_interval` seconds and publishes them
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class JobEvent:
+    """One job status transition"""
+    seq: int
+    job_id: str
+    status: str
+    routing_code: str
+    department: str
+    priority: str
+    timestamp: float
+    terminal: bool
+
+    def to_dict(self) -> Dict:
+        return {
+            'seq': self.seq,
+            'job_id': self.job_id,
+            'status': self.status,
+            'routing_code': self.routing_code,
+            'department': self.department,
+            'priority': self.priority,
+            'timestamp': self.timestamp,
+            'terminal': self.terminal
+        }
+
+    def to_sse(self) -> str:
+        """Server-Sent Events frame"""
+        return f"id: {self.seq}\nevent: job\ndata: {json.dumps(self.to_dict())}\n\n"
+
+# changed_since(ts) → [(updated_at, job)]: jobs written to the shared store after `ts`
+ChangeSource = Callable[[float], Iterable[Tuple[float, object]]]
+
+class JobEventBus:
+    """
+    🚌 Publish/subscribe for job status changes.
+    Publishing is cheap (append + notify); only actual status transitions are published.
+    With a `changes` source, transitions written by other processes are published too.
+    """
+
+    # Re-read this much of the store's past on every poll: a row stamped just before the
+    # previous poll may only have been committed after it (repeats are dropped by status)
+    POLL_OVERLAP_SECONDS = 2.0
+
+    def __init__(self, history: int = 10000, changes: Optional[ChangeSource] = None,
+                 poll_interval: float = 0.5, tracked_jobs: Optional[int] = None):
+        self._events: deque = deque(maxlen=history)
+        self._condition = threading.Condition()
+        self._seq = 0
+        # Last published (status, time) per job, least recently changed first
+        self._last_status: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self.tracked_jobs = tracked_jobs or history
+        self.changes = changes
+        self.poll_interval = poll_interval
+        self._waiters = 0
+        self._follower: Optional[threading.Thread] = None
+
+    @property
+    def latest_seq(self) -> int:
+        return self._seq
+
+    def publish(self, job, as_of: Optional[float] = None) -> Optional[JobEvent]:
+        """Record the job's current status if it changed since the last event
+        (`as_of`: when a copy read from the store was written - older copies are ignored)"""
+        status = job.status.value
+        with self._condition:
+            last_status, last_at = self._last_status.get(job.job_id, (None, 0.0))
+            if last_status == status or (as_of is not None and as_of <= last_at):
+                return None
+            self._seq += 1
+            event = JobEvent(
+                seq=self._seq,
+                job_id=job.job_id,
+                status=status,
+                routing_code=job.routing_code.to_string(),
+                department=job.routing_code.department,
+                priority=job.priority.value,
+                timestamp=time.time(),
+                terminal=job.is_terminal
+            )
+            self._last_status[job.job_id] = (status, event.timestamp)
+            self._last_status.move_to_end(job.job_id)
+            if len(self._last_status) > self.tracked_jobs:
+                self._last_status.popitem(last=False)
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def events_since(self, seq: int, predicate: Optional[Callable[[JobEvent], bool]] = None
+                     ) -> Tuple[List[JobEvent], int]:
+        """Buffered events newer than `seq` (oldest first) matching the predicate, and the new cursor"""
+        with self._condition:
+            return self._collect(seq, predicate), self._seq
+
+    def wait(self, seq: int, predicate: Optional[Callable[[JobEvent], bool]] = None,
+             timeout: Optional[float] = None) -> Tuple[List[JobEvent], int]:
+        """Block until an event newer than `seq` matches or the timeout expires; returns (events, cursor)"""
+        end = None if timeout is None else time.time() + timeout
+        with self._condition:
+            self._start_follower()
+            self._waiters += 1
+            try:
+                while True:
+                    events = self._collect(seq, predicate)
+                    seq = max(seq, self._seq)
+                    if events:
+                        return events, seq
+                    remaining = None if end is None else end - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return [], seq
+                    self._condition.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+    def _start_follower(self):
+        """Start following the shared store on the first wait (never for in-process stores)"""
+        if self.changes is not None and self._follower is None:
+            self._follower = threading.Thread(target=self._follow_loop, name='helix-job-events', daemon=True)
+            self._follower.start()
+
+    def _follow_loop(self):
+        watermark = time.time()
+        while True:
+            with self._condition:
+                if not self._waiters:
+                    # Nobody listens: stop reading the store until someone does
+                    while not self._waiters:
+                        self._condition.wait()
+                    watermark = time.time()
+            try:
+                for updated_at, job in self.changes(watermark - self.POLL_OVERLAP_SECONDS):
+                    self.publish(job, as_of=updated_at)
+                    watermark = max(watermark, updated_at)
+            except Exception as e:
+                logger.error("💥 Could not read job changes: %s", e, extra={'log_rate': 0.1})
+            time.sleep(self.poll_interval)
+
+    def _collect(self, seq: int, predicate) -> List[JobEvent]:
+        if seq >= self._seq:
+            return []
+        newer = []
+        for event in reversed(self._events):
+            if event.seq <= seq:
+                break
+            if predicate is None or predicate(event):
+                newer.append(event)
+        newer.reverse()
+        return newer
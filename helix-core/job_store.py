@@ -0,0 +1,667 @@
+"""
+🗃️ Helix Job Store - Where FileJobs live between upload and audit
+Live jobs stay in memory, finished jobs are evicted so memory stays flat under load.
+
+Implementations:
+- InMemoryJobStore: single process, bounded number of finished jobs kept
+- SQLiteJobStore: WAL-mode SQLite shared by all gunicorn workers, write-behind batching
+- RedisJobStore: a Redis-compatible server shared by every host, write-through
+
+Listings are keyset-paginated (newest first) over secondary indexes on
+department access, status, priority and creation time.
+"""
+
+import base64
+import bisect
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from routing import FileJob, Priority, ProcessingStatus
+
+logger = logging.getLogger(__name__)
+
+SortKey = Tuple[int, str]  # (created_ns, job_id) - unique, ordered by creation time
+
+def encode_cursor(key: SortKey) -> str:
+    """Opaque cursor for the last job of a page"""
+    return base64.urlsafe_b64encode(f"{key[0]}:{key[1]}".encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_ns, job_id = raw.split(':', 1)
+        return int(created_ns), job_id
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+class JobIndex:
+    """
+    🔎 Secondary indexes for in-memory jobs, maintained on every put/remove.
+    Listing either walks the creation-order index backwards or, for selective
+    filters, picks the newest matches straight from the smallest posting set.
+    """
+
+    def __init__(self):
+        self.order: List[SortKey] = []
+        self.by_access: Dict[str, Set[str]] = {}
+        self.by_status: Dict[ProcessingStatus, Set[str]] = {}
+        self.by_priority: Dict[Priority, Set[str]] = {}
+        self._indexed: Dict[str, Tuple[SortKey, ProcessingStatus, Priority, Tuple[str, ...]]] = {}
+
+    def update(self, job: FileJob):
+        key = (job.created_ns, job.job_id)
+        access = tuple(job.department_access)
+        previous = self._indexed.get(job.job_id)
+        if previous == (key, job.status, job.priority, access):
+            return
+        if previous is not None:
+            self.remove(job.job_id)
+
+        if not self.order or self.order[-1] < key:
+            self.order.append(key)
+        else:
+            bisect.insort(self.order, key)
+        for dept in access:
+            self.by_access.setdefault(dept, set()).add(job.job_id)
+        self.by_status.setdefault(job.status, set()).add(job.job_id)
+        self.by_priority.setdefault(job.priority, set()).add(job.job_id)
+        self._indexed[job.job_id] = (key, job.status, job.priority, access)
+
+    def remove(self, job_id: str):
+        previous = self._indexed.pop(job_id, None)
+        if previous is None:
+            return
+        key, status, priority, access = previous
+        position = bisect.bisect_left(self.order, key)
+        if position < len(self.order) and self.order[position] == key:
+            del self.order[position]
+        for dept in access:
+            self.by_access.get(dept, set()).discard(job_id)
+        self.by_status.get(status, set()).discard(job_id)
+        self.by_priority.get(priority, set()).discard(job_id)
+
+    def query(self, access=None, status=None, priority=None,
+              before: Optional[SortKey] = None, limit: Optional[int] = None) -> List[SortKey]:
+        """Sort keys of matching jobs, newest first, strictly older than `before`"""
+        filters: List[Set[str]] = []
+        if access:
+            visible = set()
+            for dept in access:
+                visible |= self.by_access.get(dept, set())
+            filters.append(visible)
+        if status is not None:
+            filters.append(self.by_status.get(status, set()))
+        if priority is not None:
+            filters.append(self.by_priority.get(priority, set()))
+
+        end = len(self.order) if before is None else bisect.bisect_left(self.order, before)
+
+        if filters:
+            smallest = min(filters, key=len)
+            others = [f for f in filters if f is not smallest]
+            if len(smallest) * 8 < end:
+                candidates = (
+                    self._indexed[job_id][0] for job_id in smallest
+                    if all(job_id in f for f in others)
+                )
+                candidates = (key for key in candidates if before is None or key < before)
+                if limit is None:
+                    return sorted(candidates, reverse=True)
+                return heapq.nlargest(limit, candidates)
+
+        keys = []
+        for position in range(end - 1, -1, -1):
+            key = self.order[position]
+            if all(key[1] in f for f in filters):
+                keys.append(key)
+                if limit is not None and len(keys) >= limit:
+                    break
+        return keys
+
+class JobStore(ABC):
+    """Base class for all job stores"""
+
+    scope = 'process'  # where its jobs can be read from: 'process', 'host' or 'cluster'
+
+    @abstractmethod
+    def put(self, job: FileJob):
+        """Insert or update a job (called by the routing engine on every change)"""
+        pass
+
+    def put_many(self, jobs: Iterable[FileJob]):
+        """Insert or update several jobs at once"""
+        for job in jobs:
+            self.put(job)
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[FileJob]:
+        """Look up a job by ID"""
+        pass
+
+    @abstractmethod
+    def iter_jobs(self) -> Iterator[FileJob]:
+        """Iterate over every job the store knows about"""
+        pass
+
+    @abstractmethod
+    def live_jobs(self) -> Dict[str, FileJob]:
+        """Jobs currently held in memory"""
+        pass
+
+    @abstractmethod
+    def list_jobs(self, access: Optional[List[str]] = None, status: Optional[ProcessingStatus] = None,
+                  priority: Optional[Priority] = None, cursor: Optional[str] = None,
+                  limit: Optional[int] = 50) -> Tuple[List[FileJob], Optional[str]]:
+        """One page of jobs (newest first) and the cursor for the next page"""
+        pass
+
+    def flush(self):
+        """Persist pending writes (no-op for purely in-memory stores)"""
+        pass
+
+    def release(self, job_id: str):
+        """Persist a job and stop holding it in memory - another process works on it from now on"""
+        pass
+
+    def release_many(self, job_ids: Iterable[str]):
+        """release() several jobs with a single write"""
+        for job_id in job_ids:
+            self.release(job_id)
+
+    def close(self):
+        self.flush()
+
+class InMemoryJobStore(JobStore):
+    """
+    🧠 Process-local store. Finished jobs are kept for `completed_ttl` seconds
+    and at most `max_completed` of them, so memory stays bounded.
+    """
+
+    def __init__(self, max_completed: int = 1000, completed_ttl: Optional[float] = None):
+        self.max_completed = max_completed
+        self.completed_ttl = completed_ttl
+        self._jobs: Dict[str, FileJob] = {}
+        self._finished: 'OrderedDict[str, float]' = OrderedDict()
+        self._index = JobIndex()
+        self._lock = threading.RLock()
+
+    def put(self, job: FileJob):
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._index.update(job)
+            if job.is_terminal:
+                self._finished.setdefault(job.job_id, time.time())
+            self._evict()
+
+    def get(self, job_id: str) -> Optional[FileJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def iter_jobs(self) -> Iterator[FileJob]:
+        with self._lock:
+            return iter(list(self._jobs.values()))
+
+    def live_jobs(self) -> Dict[str, FileJob]:
+        with self._lock:
+            return dict(self._jobs)
+
+    def list_jobs(self, access=None, status=None, priority=None, cursor=None, limit=50):
+        before = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            keys = self._index.query(access, status, priority, before,
+                                     None if limit is None else limit + 1)
+            jobs = [self._jobs[job_id] for _, job_id in keys[:limit]]
+        next_cursor = encode_cursor(keys[limit - 1]) if limit is not None and len(keys) > limit else None
+        return jobs, next_cursor
+
+    def _evict(self):
+        now = time.time()
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            expired = self.completed_ttl is not None and now - finished_at > self.completed_ttl
+            if len(self._finished) <= self.max_completed and not expired:
+                break
+            self._finished.popitem(last=False)
+            self._jobs.pop(job_id, None)
+            self._index.remove(job_id)
+
+class SQLiteJobStore(JobStore):
+    """
+    💾 Shared, durable job store. Every change is queued and written by a
+    background thread in one transaction per batch; finished jobs leave the
+    in-memory working set once they are on disk and past the age/count limit.
+    Any gunicorn worker can read any job from the database.
+    """
+
+    scope = 'host'
+
+    def __init__(self, path: str, max_completed_in_memory: int = 500,
+                 completed_ttl: float = 300.0, flush_interval: float = 0.5,
+                 batch_size: int = 500):
+        self.path = path
+        self.max_completed_in_memory = max_completed_in_memory
+        self.completed_ttl = completed_ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._live: Dict[str, FileJob] = {}
+        self._dirty: Dict[str, FileJob] = {}
+        self._finished: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                department TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                created_ns INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_access (
+                department TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                PRIMARY KEY (job_id, department)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_ns, job_id);
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_ns, job_id);
+            CREATE INDEX IF NOT EXISTS idx_jobs_priority ON jobs(priority, created_ns, job_id);
+            CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at);
+        """)
+        self._db.commit()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name='helix-job-store', daemon=True)
+        self._flusher.start()
+
+    def put(self, job: FileJob):
+        with self._lock:
+            self._live[job.job_id] = job
+            self._dirty[job.job_id] = job
+            if job.is_terminal:
+                self._finished.setdefault(job.job_id, time.time())
+            pending = len(self._dirty)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def put_many(self, jobs: Iterable[FileJob]):
+        with self._lock:
+            for job in jobs:
+                self._live[job.job_id] = job
+                self._dirty[job.job_id] = job
+                if job.is_terminal:
+                    self._finished.setdefault(job.job_id, time.time())
+        self._wakeup.set()
+
+    def get(self, job_id: str) -> Optional[FileJob]:
+        with self._lock:
+            job = self._live.get(job_id)
+        if job is not None:
+            return job
+
+        with self._db_lock:
+            row = self._db.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return FileJob.from_record(json.loads(row[0])) if row else None
+
+    def iter_jobs(self) -> Iterator[FileJob]:
+        self.flush()
+        with self._db_lock:
+            rows = self._db.execute("SELECT data FROM jobs ORDER BY created_ns, job_id").fetchall()
+        with self._lock:
+            live = dict(self._live)
+        for (data,) in rows:
+            record = json.loads(data)
+            yield live.get(record[0]) or FileJob.from_record(record)
+
+    def live_jobs(self) -> Dict[str, FileJob]:
+        with self._lock:
+            return dict(self._live)
+
+    def changed_since(self, since: float) -> List[Tuple[float, FileJob]]:
+        """(updated_at, job) for jobs any process wrote after `since`, oldest write first"""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT updated_at, data FROM jobs WHERE updated_at > ? ORDER BY updated_at", (since,)
+            ).fetchall()
+        return [(updated_at, FileJob.from_record(json.loads(data))) for updated_at, data in rows]
+
+    def list_jobs(self, access=None, status=None, priority=None, cursor=None, limit=50):
+        self.flush()
+
+        clauses = []
+        params: list = []
+        if cursor:
+            clauses.append("(created_ns, job_id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status.value)
+        if priority is not None:
+            clauses.append("priority = ?")
+            params.append(priority.value)
+        if access:
+            placeholders = ', '.join('?' for _ in access)
+            clauses.append(
+                f"EXISTS (SELECT 1 FROM job_access a WHERE a.job_id = jobs.job_id AND a.department IN ({placeholders}))"
+            )
+            params.extend(access)
+
+        sql = "SELECT job_id, created_ns, data FROM jobs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_ns DESC, job_id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._db_lock:
+            rows = self._db.execute(sql, params).fetchall()
+        with self._lock:
+            live = dict(self._live)
+
+        page = rows[:limit] if limit is not None else rows
+        jobs = [live.get(job_id) or FileJob.from_record(json.loads(data)) for job_id, _, data in page]
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            job_id, created_ns, _ = rows[limit - 1]
+            next_cursor = encode_cursor((created_ns, job_id))
+        return jobs, next_cursor
+
+    def flush(self):
+        """Write all pending changes in a single transaction, then evict finished jobs"""
+        with self._lock:
+            if not self._dirty:
+                self._evict()
+                return
+            batch = list(self._dirty.values())
+            self._dirty.clear()
+            rows = [self._row(job) for job in batch]
+
+        try:
+            with self._db_lock:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO jobs "
+                        "(job_id, status, department, priority, created_ns, updated_at, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO job_access (department, job_id) VALUES (?, ?)",
+                        [(dept, job.job_id) for job in batch for dept in job.department_access]
+                    )
+        except Exception:
+            # Put the batch back so nothing is lost; newer in-memory versions win
+            with self._lock:
+                for job in batch:
+                    self._dirty.setdefault(job.job_id, job)
+            raise
+
+        with self._lock:
+            self._evict()
+
+    def release(self, job_id: str):
+        self.release_many([job_id])
+
+    def release_many(self, job_ids: Iterable[str]):
+        self.flush()
+        with self._lock:
+            for job_id in job_ids:
+                if job_id not in self._dirty:
+                    self._live.pop(job_id, None)
+                    self._finished.pop(job_id, None)
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"💥 Job store flush failed: {e}")
+
+    def _evict(self):
+        """Drop finished, already-persisted jobs beyond the age/count limits"""
+        now = time.time()
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_completed_in_memory and now - finished_at <= self.completed_ttl:
+                break
+            if job_id in self._dirty:
+                break
+            self._finished.popitem(last=False)
+            self._live.pop(job_id, None)
+
+    def _row(self, job: FileJob):
+        return (
+            job.job_id,
+            job.status.value,
+            job.routing_code.department,
+            job.priority.value,
+            job.created_ns,
+            time.time(),
+            json.dumps(job.to_record(), separators=(',', ':'))
+        )
+
+class RedisJobStore(JobStore):
+    """
+    🟥 Job store on a Redis-compatible server, readable from every host - what a Redis work
+    queue needs, since a task may run on any host. Every put() is written through in one
+    MULTI, so release() and flush() have nothing left to write; the jobs this process
+    works on stay in memory (finished ones up to the age/count limit) so that in-process
+    updates share one object.
+
+    - `<ns>:job:<id>`        the job record (FileJob.to_record() as JSON)
+    - `<ns>:all`             zset of '<created_ns, 20 digits>:<id>' members, all scored 0:
+                             lexicographic order is creation order
+    - `<ns>:status:<s>`, `<ns>:priority:<p>`, `<ns>:access:<dept>` - the same, per filter value
+    - `<ns>:changes`         zset of job ids by the time of their last write (changed_since)
+
+    Listings walk the most selective index backwards from the cursor and check the other
+    filters on the records, a page of `page_size` members at a time.
+    """
+
+    scope = 'cluster'
+    page_size = 200
+
+    def __init__(self, client, namespace: str = 'helix:jobs', max_completed_in_memory: int = 500,
+                 completed_ttl: float = 300.0, changes_retention: float = 3600.0):
+        self.client = client
+        self.ns = namespace
+        self.max_completed_in_memory = max_completed_in_memory
+        self.completed_ttl = completed_ttl
+        self.changes_retention = changes_retention
+
+        self._live: Dict[str, FileJob] = {}
+        self._finished: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._trimmed_at = 0.0
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisJobStore':
+        import redis  # only needed when a Redis job store is configured
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, kind: str, value: str = '') -> str:
+        return f"{self.ns}:{kind}:{value}" if value else f"{self.ns}:{kind}"
+
+    @staticmethod
+    def _member(key: SortKey) -> str:
+        return f"{key[0]:020d}:{key[1]}"
+
+    def _write(self, pipe, job: FileJob, now: float):
+        member = self._member((job.created_ns, job.job_id))
+        pipe.set(self._key('job', job.job_id), json.dumps(job.to_record(), separators=(',', ':')))
+        pipe.zadd(self._key('all'), {member: 0})
+        # Out of every other status/priority index, whatever this job's previous writer saw
+        for status in ProcessingStatus:
+            if status is not job.status:
+                pipe.zrem(self._key('status', status.value), member)
+        for priority in Priority:
+            if priority is not job.priority:
+                pipe.zrem(self._key('priority', priority.value), member)
+        pipe.zadd(self._key('status', job.status.value), {member: 0})
+        pipe.zadd(self._key('priority', job.priority.value), {member: 0})
+        for dept in job.department_access:
+            pipe.zadd(self._key('access', dept), {member: 0})
+        pipe.zadd(self._key('changes'), {job.job_id: now})
+
+    def put(self, job: FileJob):
+        self.put_many([job])
+
+    def put_many(self, jobs: Iterable[FileJob]):
+        now = time.time()
+        # Held while writing, so two threads' writes of one job land in the order they were made
+        with self._lock:
+            with self.client.pipeline(transaction=True) as pipe:
+                for job in jobs:
+                    self._live[job.job_id] = job
+                    if job.is_terminal:
+                        self._finished.setdefault(job.job_id, now)
+                    self._write(pipe, job, now)
+                if now - self._trimmed_at > 60:
+                    pipe.zremrangebyscore(self._key('changes'), '-inf', now - self.changes_retention)
+                    self._trimmed_at = now
+                pipe.execute()
+            self._evict()
+
+    def _load(self, job_ids: List[str]) -> List[Optional[FileJob]]:
+        """Jobs by id - this process's copy where it has one - with None for unknown ids"""
+        if not job_ids:
+            return []
+        raws = self.client.mget([self._key('job', job_id) for job_id in job_ids])
+        with self._lock:
+            live = [self._live.get(job_id) for job_id in job_ids]
+        return [job or (FileJob.from_record(json.loads(raw)) if raw else None) for job, raw in zip(live, raws)]
+
+    def get(self, job_id: str) -> Optional[FileJob]:
+        with self._lock:
+            job = self._live.get(job_id)
+        if job is not None:
+            return job
+        raw = self.client.get(self._key('job', job_id))
+        return FileJob.from_record(json.loads(raw)) if raw else None
+
+    def iter_jobs(self) -> Iterator[FileJob]:
+        low = '-'
+        while True:
+            members = self.client.zrangebylex(self._key('all'), low, '+', start=0, num=self.page_size)
+            if not members:
+                return
+            low = '(' + members[-1]
+            yield from (job for job in self._load([member.split(':', 1)[1] for member in members]) if job)
+
+    def live_jobs(self) -> Dict[str, FileJob]:
+        with self._lock:
+            return dict(self._live)
+
+    def changed_since(self, since: float) -> List[Tuple[float, FileJob]]:
+        """(updated_at, job) for jobs any host wrote after `since`, oldest write first"""
+        changes = self.client.zrangebyscore(self._key('changes'), f"({since}", '+inf', withscores=True)
+        raws = self.client.mget([self._key('job', job_id) for job_id, _ in changes]) if changes else []
+        return [(updated_at, FileJob.from_record(json.loads(raw)))
+                for (_, updated_at), raw in zip(changes, raws) if raw]
+
+    def list_jobs(self, access=None, status=None, priority=None, cursor=None, limit=50):
+        if status is not None:
+            index = self._key('status', status.value)
+        elif priority is not None:
+            index = self._key('priority', priority.value)
+        elif access and len(access) == 1:
+            index = self._key('access', access[0])
+        else:
+            index = self._key('all')
+        visible = set(access or ())
+
+        high = '(' + self._member(decode_cursor(cursor)) if cursor else '+'
+        wanted = None if limit is None else limit + 1
+        matches: List[FileJob] = []
+        while wanted is None or len(matches) < wanted:
+            members = self.client.zrevrangebylex(index, high, '-', start=0, num=self.page_size)
+            if not members:
+                break
+            high = '(' + members[-1]
+            for job in self._load([member.split(':', 1)[1] for member in members]):
+                if job is None or (status is not None and job.status is not status) \
+                        or (priority is not None and job.priority is not priority) \
+                        or (visible and visible.isdisjoint(job.department_access)):
+                    continue
+                matches.append(job)
+                if wanted is not None and len(matches) >= wanted:
+                    break
+
+        page = matches[:limit] if limit is not None else matches
+        next_cursor = None
+        if limit is not None and len(matches) > limit:
+            next_cursor = encode_cursor((page[-1].created_ns, page[-1].job_id))
+        return page, next_cursor
+
+    def flush(self):
+        with self._lock:
+            self._evict()
+
+    def release(self, job_id: str):
+        self.release_many([job_id])
+
+    def release_many(self, job_ids: Iterable[str]):
+        with self._lock:
+            for job_id in job_ids:
+                self._live.pop(job_id, None)
+                self._finished.pop(job_id, None)
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+    def _evict(self):
+        """Drop finished jobs beyond the age/count limits (they are already written)"""
+        now = time.time()
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_completed_in_memory and now - finished_at <= self.completed_ttl:
+                break
+            self._finished.popitem(last=False)
+            self._live.pop(job_id, None)
+
+def store_from_url(url: str, **kwargs) -> JobStore:
+    """
+    Job store from configuration: '' / 'memory' (this process only), 'sqlite:<path>'
+    (the processes of one host) or a 'redis://' / 'rediss://' URL (every host)
+    """
+    url = (url or '').strip()
+    if url in ('', 'memory'):
+        return InMemoryJobStore(**kwargs)
+    if url.startswith('sqlite:'):
+        path = url[len('sqlite:'):]
+        return SQLiteJobStore(path[2:] if path.startswith('//') else path, **kwargs)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisJobStore.from_url(url, **kwargs)
+    raise ValueError(f"Unsupported job store {url!r} (expected sqlite:<path> or redis://...)")
@@ -0,0 +1,46 @@
+"""
+💤 Helix Lazy State - Module-level singletons that open on first use
+Importing app must not create files or start threads (tools, tests and the gunicorn
+master import it too), yet the rest of the code refers to `job_store`, `work_queue`
+and friends as plain module globals. A Lazy stands in for such an object: the first
+attribute access builds it (once, under a lock) and every access after that is
+forwarded to it.
+"""
+
+import threading
+from typing import Any, Callable
+
+class Lazy:
+    """Proxy building its target with `build()` on first attribute access"""
+
+    __slots__ = ('_lazy_build', '_lazy_lock', '_lazy_target', '_lazy_name')
+
+    def __init__(self, build: Callable[[], Any], name: str = ''):
+        object.__setattr__(self, '_lazy_build', build)
+        object.__setattr__(self, '_lazy_lock', threading.Lock())
+        object.__setattr__(self, '_lazy_target', None)
+        object.__setattr__(self, '_lazy_name', name or getattr(build, '__name__', 'state'))
+
+    def __getattr__(self, name):
+        return getattr(resolve(self), name)
+
+    def __setattr__(self, name, value):
+        setattr(resolve(self), name, value)
+
+    def __repr__(self):
+        target = object.__getattribute__(self, '_lazy_target')
+        name = object.__getattribute__(self, '_lazy_name')
+        return f"<Lazy {name}: {'not opened' if target is None else repr(target)}>"
+
+def resolve(state):
+    """The object behind a Lazy, built now if it was not yet (anything else is returned as is)"""
+    if not isinstance(state, Lazy):
+        return state
+    target = object.__getattribute__(state, '_lazy_target')
+    if target is None:
+        with object.__getattribute__(state, '_lazy_lock'):
+            target = object.__getattribute__(state, '_lazy_target')
+            if target is None:
+                target = object.__getattribute__(state, '_lazy_build')()
+                object.__setattr__(state, '_lazy_target', target)
+    return target
@@ -0,0 +1,297 @@
+"""
+👑 Helix Leader Election - Exactly one SFTP poller across processes and replicas
+Every process running the background services is a candidate; the one holding the
+leader lock polls SFTP, all others keep processing and serving HTTP only.
+
+- File lock (`file:/path/poller.lock`): flock on a local file - the kernel releases it
+  the moment the leader process dies, for candidates on the same host / shared volume
+- Postgres advisory lock (`postgresql://...`): session lock held on a dedicated
+  connection - released by the server when the leader's connection drops, for replicas
+  on different hosts (TCP keepalives bound how long a dead host keeps it)
+
+Standbys retry every few seconds; the leader re-verifies its lock just as often and
+steps down (stops polling) as soon as it cannot.
+"""
+
+import fcntl
+import logging
+import os
+import socket
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LeaderLock(ABC):
+    """A non-blocking, process-owned lock that is released when its owner dies"""
+
+    description = 'lock'
+
+    @abstractmethod
+    def try_acquire(self) -> bool:
+        """Take the lock if nobody holds it; never blocks"""
+
+    @abstractmethod
+    def still_held(self) -> bool:
+        """Whether this process still owns the lock (checked by the leader periodically)"""
+
+    @abstractmethod
+    def release(self):
+        """Give the lock up (safe to call when not held)"""
+
+class LocalLeaderLock(LeaderLock):
+    """No coordination: this process is always the leader (single-process development)"""
+
+    description = 'local (no election)'
+
+    def try_acquire(self) -> bool:
+        return True
+
+    def still_held(self) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+class FileLeaderLock(LeaderLock):
+    """
+    🔒 flock() on a lock file. Works between processes on one host (gunicorn workers,
+    several services processes); the lock disappears with the process that held it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.description = f"file:{path}"
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return self.still_held()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        if not self.still_held():
+            # The file was replaced between open and flock - locking the old inode means nothing
+            self.release()
+            return False
+        # Owner details for operators; the lock itself is the flock
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{socket.gethostname()} {os.getpid()}\n".encode())
+        return True
+
+    def still_held(self) -> bool:
+        if self._fd is None:
+            return False
+        try:
+            return os.fstat(self._fd).st_ino == os.stat(self.path).st_ino
+        except OSError:
+            return False   # lock file deleted: a new one could be locked by someone else
+
+    def release(self):
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+
+class PostgresAdvisoryLock(LeaderLock):
+    """
+    🐘 pg_try_advisory_lock() on a dedicated autocommit connection. The lock lives as long
+    as the session: a crashed leader's connection is closed by its kernel at once, a
+    vanished host is detected by TCP keepalives within about `keepalive_seconds`.
+    """
+
+    def __init__(self, dsn: str, name: str, keepalive_seconds: int = 10, connect_timeout: int = 5):
+        self.dsn = dsn
+        self.key = zlib.crc32(name.encode())
+        self.description = f"postgres advisory lock {self.key} ({name})"
+        self.keepalive_seconds = keepalive_seconds
+        self.connect_timeout = connect_timeout
+        self._conn = None
+
+    def _connect(self):
+        import psycopg2  # only needed when a Postgres lock is configured
+        idle = max(self.keepalive_seconds // 2, 1)
+        conn = psycopg2.connect(
+            self.dsn,
+            connect_timeout=self.connect_timeout,
+            application_name=f"helix-leader-{socket.gethostname()}-{os.getpid()}",
+            keepalives=1,
+            keepalives_idle=idle,
+            keepalives_interval=max(idle // 3, 1),
+            keepalives_count=3
+        )
+        conn.autocommit = True
+        return conn
+
+    def _query(self, sql: str, *params) -> Any:
+        with self._conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def try_acquire(self) -> bool:
+        if self._conn is not None:
+            return self.still_held()
+        self._conn = self._connect()
+        try:
+            acquired = bool(self._query("SELECT pg_try_advisory_lock(%s)", self.key))
+        except Exception:
+            self._close()
+            raise
+        if not acquired:
+            self._close()
+        return acquired
+
+    def still_held(self) -> bool:
+        if self._conn is None:
+            return False
+        try:
+            # A bigint advisory key is stored as classid (high 32 bits) / objid (low 32 bits)
+            return bool(self._query(
+                "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND granted"
+                " AND pid = pg_backend_pid() AND classid = %s AND objid = %s AND objsubid = 1",
+                self.key >> 32, self.key & 0xFFFFFFFF
+            ))
+        except Exception as e:
+            logger.warning("👑 Lost the leader lock connection: %s", e)
+            self._close()
+            return False
+
+    def release(self):
+        if self._conn is not None:
+            try:
+                self._query("SELECT pg_advisory_unlock(%s)", self.key)
+            except Exception:
+                pass   # closing the session releases it anyway
+            self._close()
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+def lock_from_url(url: str, name: str) -> LeaderLock:
+    """
+    Leader lock from configuration: '' / 'local' (no election), 'file:<path>',
+    or a 'postgres://' / 'postgresql://' DSN
+    """
+    url = (url or '').strip()
+    if url in ('', 'local'):
+        return LocalLeaderLock()
+    if url.startswith('file:'):
+        path = url[len('file:'):]
+        return FileLeaderLock(path[2:] if path.startswith('//') else path)
+    if url.startswith(('postgres://', 'postgresql://')):
+        return PostgresAdvisoryLock(url, name)
+    raise ValueError(f"Unsupported leader lock {url!r} (expected file:<path> or postgresql://...)")
+
+class LeaderElector:
+    """
+    🗳️ Campaigns for a LeaderLock on a background thread and runs `on_elected` /
+    `on_demoted` as leadership is won and lost. `on_demoted` also runs on stop().
+    """
+
+    def __init__(self, lock: LeaderLock, on_elected: Callable[[], None], on_demoted: Callable[[], None],
+                 retry_interval: float = 2.0, check_interval: float = 2.0, name: str = 'leader'):
+        self.lock = lock
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.retry_interval = retry_interval
+        self.check_interval = check_interval
+        self.name = name
+        self._leader = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._leader_since: Optional[float] = None
+        self._elections = 0
+        self._last_error: Optional[str] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader.is_set()
+
+    def wait_for_leadership(self, timeout: Optional[float] = None) -> bool:
+        return self._leader.wait(timeout)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"helix-{self.name}-election", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop campaigning; a leader steps down and releases the lock for the next candidate"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.is_leader:
+                if not self._stop.wait(self.check_interval) and not self._check():
+                    self._step_down(f"👑 Lost {self.name} leadership ({self.lock.description}) - stopping")
+            elif self._campaign():
+                self._elections += 1
+                self._leader_since = time.time()
+                self._leader.set()
+                logger.info("👑 Elected %s leader via %s", self.name, self.lock.description,
+                            extra={'leader': self.name, 'pid': os.getpid()})
+                self._callback(self.on_elected)
+            else:
+                self._stop.wait(self.retry_interval)
+        if self.is_leader:
+            self._step_down(f"👋 Handing over {self.name} leadership ({self.lock.description})")
+
+    def _campaign(self) -> bool:
+        try:
+            return self.lock.try_acquire()
+        except Exception as e:
+            self._last_error = f"{type(e).__name__}: {e}"
+            logger.warning("👑 Leader lock unavailable: %s", self._last_error, extra={'log_rate': 0.1})
+            return False
+
+    def _check(self) -> bool:
+        try:
+            return self.lock.still_held()
+        except Exception as e:
+            self._last_error = f"{type(e).__name__}: {e}"
+            return False
+
+    def _step_down(self, message: str):
+        logger.log(logging.INFO if self._stop.is_set() else logging.WARNING, message)
+        self._leader.clear()
+        self._leader_since = None
+        self._callback(self.on_demoted)
+        try:
+            self.lock.release()
+        except Exception as e:
+            logger.warning("👑 Releasing the leader lock failed: %s", e)
+
+    def _callback(self, callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception as e:
+            logger.error("💥 %s leadership callback failed: %s", self.name, e)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'role': self.name,
+            'lock': self.lock.description,
+            'is_leader': self.is_leader,
+            'leader_since': self._leader_since,
+            'elections': self._elections,
+            'last_error': self._last_error,
+            'host': socket.gethostname(),
+            'pid': os.getpid()
+        }
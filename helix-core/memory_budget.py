@@ -0,0 +1,285 @@
+"""
+🧮 Helix Memory Budget - One oversized bank file must not take the service down
+Every parse is planned against a per-file memory budget before it starts:
+
+- Estimate: file size × peak-bytes-per-file-byte of its format (defaults measured on
+  synthetic files, raised automatically when a parse is observed to need more)
+- In process: the estimate fits the budget - parse as usual
+- Streaming: the format has a low-memory parser (CAMT.053 iterparse) and that fits
+- Isolated: anything else runs in a dedicated child process with a hard address-space
+  limit, one at a time; if it runs out of memory only the child dies and the file fails
+
+Each parse is measured (RSS sampling, plus tracemalloc peaks if enabled) and reported
+as peak bytes and peak bytes per transaction, per format and mode.
+"""
+
+import logging
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+MODES = ('in_process', 'streaming', 'isolated')
+
+# Peak bytes per byte of input (tracemalloc, 20k-transaction files) with headroom
+PARSE_FACTORS = {'MT940': 30.0, 'CAMT.053': 10.0, 'BAI2': 10.0, 'CSV': 10.0}
+STREAMING_FACTORS = {'CAMT.053': 2.0}
+DEFAULT_FACTOR = 10.0
+LEARN_MIN_BYTES = 256 * 1024   # smaller files are dominated by fixed overhead
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+class MemoryBudgetExceeded(Exception):
+    """The file could not be parsed within the memory it was allowed"""
+
+def rss_bytes() -> int:
+    """Resident set size of this process (0 where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _address_space_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[0]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class PeakSampler:
+    """
+    📈 Peak memory growth while a block runs: RSS sampled from a helper thread and,
+    when tracemalloc is tracing, its peak. Both are process-wide, so a parse running
+    next to other busy workers is measured generously rather than optimistically.
+    """
+
+    def __init__(self, interval: float = 0.02, trace_allocations: bool = False):
+        self.interval = interval
+        self.trace_allocations = trace_allocations
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._started_tracing = False
+
+    def __enter__(self):
+        self._baseline = self._peak = rss_bytes()
+        if self.trace_allocations:
+            _tracing.acquire()
+            self._started_tracing = True
+            self._traced_baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        if self._baseline:
+            self._thread = threading.Thread(target=self._sample, name='helix-memory-sampler', daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._peak = max(self._peak, rss_bytes())
+        self.peak_bytes = max(self._peak - self._baseline, 0)
+        if self._started_tracing:
+            traced_peak = tracemalloc.get_traced_memory()[1] - self._traced_baseline
+            self.peak_bytes = max(self.peak_bytes, traced_peak)
+            _tracing.release()
+        return False
+
+class _TracingRefCount:
+    """tracemalloc is process-global: start it for the first parse, stop after the last"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._started = False
+
+    def acquire(self):
+        with self._lock:
+            if self._users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+            self._users += 1
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+_tracing = _TracingRefCount()
+
+def _isolated_main(argv) -> int:
+    """Child process entry point: parse under an address-space limit, pickle the outcome to stdout"""
+    file_type, file_path, streaming, limit_bytes = argv[0], argv[1], argv[2] == '1', int(argv[3])
+    from file_processors import FileProcessorFactory
+
+    baseline = rss_bytes()
+    try:
+        processor = next(p for p in FileProcessorFactory().processors if p.file_type == file_type)
+        if limit_bytes:
+            ceiling = _address_space_bytes() + limit_bytes
+            resource.setrlimit(resource.RLIMIT_AS, (ceiling, ceiling))
+        parsed = processor.parse_streaming(file_path) if streaming else processor.parse(file_path)
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - baseline, 0)
+        outcome = ('ok', parsed, peak)
+    except (MemoryError, SystemError):
+        # C extensions hitting the address-space limit often surface as SystemError
+        outcome = ('memory', f"ran out of its {limit_bytes // MB} MB limit", 0)
+    except ImportError as e:
+        # A lazily imported extension module cannot be mapped once the limit is reached
+        if 'failed to map segment' in str(e):
+            outcome = ('memory', f"ran out of its {limit_bytes // MB} MB limit", 0)
+        else:
+            outcome = ('error', f"{type(e).__name__}: {e}", 0)
+    except Exception as e:
+        outcome = ('error', f"{type(e).__name__}: {e}", 0)
+    sys.stdout.buffer.write(pickle.dumps(outcome, protocol=pickle.HIGHEST_PROTOCOL))
+    return 0
+
+class MemoryBudget:
+    """
+    🛡️ Plans, runs and measures parses against a per-file memory budget.
+    Keeps per-format statistics for /api/system/memory.
+    """
+
+    def __init__(self, budget_bytes: int, isolated_limit_bytes: int = 0, isolated_timeout: float = 600.0,
+                 trace_allocations: bool = False, isolated_slots: int = 1):
+        self.budget_bytes = budget_bytes
+        self.isolated_limit_bytes = isolated_limit_bytes
+        self.isolated_timeout = isolated_timeout
+        self.trace_allocations = trace_allocations
+        self._isolated_slots = threading.BoundedSemaphore(max(isolated_slots, 1))
+        self._learned: Dict[Tuple[str, bool], float] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # ---- Planning ----
+    def factor(self, file_type: str, streaming: bool = False) -> float:
+        defaults = STREAMING_FACTORS if streaming else PARSE_FACTORS
+        default = defaults.get(file_type, DEFAULT_FACTOR)
+        return max(default, self._learned.get((file_type, streaming), 0.0))
+
+    def estimate(self, file_type: str, size: int, streaming: bool = False) -> int:
+        return int(size * self.factor(file_type, streaming))
+
+    def plan(self, processor, size: int) -> Tuple[str, int]:
+        """(mode, estimated peak bytes) for a file of `size` bytes"""
+        estimate = self.estimate(processor.file_type, size)
+        if estimate <= self.budget_bytes:
+            return 'in_process', estimate
+        if getattr(processor, 'supports_streaming', False):
+            streaming_estimate = self.estimate(processor.file_type, size, streaming=True)
+            if streaming_estimate <= self.budget_bytes:
+                return 'streaming', streaming_estimate
+            estimate = streaming_estimate
+        return 'isolated', estimate
+
+    # ---- Parsing ----
+    def parse(self, processor, file_path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Parse within the budget; returns (parsed data, memory report)"""
+        size = os.path.getsize(file_path)
+        mode, estimate = self.plan(processor, size)
+        if mode != 'in_process':
+            logger.warning(
+                "🧮 %s is %.1f MB (estimated %.0f MB to parse, budget %.0f MB) - using %s parse",
+                os.path.basename(file_path), size / MB, estimate / MB, self.budget_bytes / MB, mode,
+                extra={'file': os.path.basename(file_path), 'file_type': processor.file_type, 'parse_mode': mode}
+            )
+
+        started = time.perf_counter()
+        if mode == 'isolated':
+            parsed, peak_bytes = self._parse_isolated(processor, file_path)
+        else:
+            with PeakSampler(trace_allocations=self.trace_allocations) as sampler:
+                parsed = processor.parse_streaming(file_path) if mode == 'streaming' else processor.parse(file_path)
+            peak_bytes = sampler.peak_bytes
+
+        transactions = parsed.get('total_transactions', 0) or 0
+        report = {
+            'mode': mode,
+            'file_size': size,
+            'estimate_bytes': estimate,
+            'budget_bytes': self.budget_bytes,
+            'peak_bytes': peak_bytes,
+            'peak_bytes_per_transaction': round(peak_bytes / transactions, 1) if transactions else None,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+        self._record(processor.file_type, mode, size, transactions, peak_bytes)
+        return parsed, report
+
+    def _parse_isolated(self, processor, file_path: str) -> Tuple[Dict[str, Any], int]:
+        streaming = getattr(processor, 'supports_streaming', False)
+        name = os.path.basename(file_path)
+        command = [sys.executable, os.path.abspath(__file__), processor.file_type, os.path.abspath(file_path),
+                   '1' if streaming else '0', str(self.isolated_limit_bytes)]
+        with self._isolated_slots:
+            try:
+                child = subprocess.run(command, capture_output=True, timeout=self.isolated_timeout,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+            except subprocess.TimeoutExpired:
+                raise MemoryBudgetExceeded(f"Isolated parse of {name} gave no result within {self.isolated_timeout:.0f}s")
+        try:
+            status, value, peak_bytes = pickle.loads(child.stdout)
+        except Exception:
+            detail = child.stderr.decode(errors='replace').strip().splitlines()[-1:] or [f"exit code {child.returncode}"]
+            raise MemoryBudgetExceeded(f"Isolated parse of {name} died: {detail[0]}")
+        if status == 'memory':
+            raise MemoryBudgetExceeded(f"Isolated parse of {name} {value}")
+        if status == 'error':
+            raise ValueError(value)
+        return value, peak_bytes
+
+    # ---- Reporting ----
+    def _record(self, file_type: str, mode: str, size: int, transactions: int, peak_bytes: int):
+        with self._lock:
+            if size >= LEARN_MIN_BYTES and mode != 'isolated' and peak_bytes:
+                # Only ever raise an estimate: RSS can hide growth the allocator reused
+                key = (file_type, mode == 'streaming')
+                self._learned[key] = max(self._learned.get(key, 0.0), peak_bytes / size)
+            stats = self._stats.setdefault(file_type, {})
+            entry = stats.setdefault(mode, {
+                'files': 0, 'bytes': 0, 'transactions': 0, 'max_peak_bytes': 0,
+                'max_peak_bytes_per_transaction': None, 'last_peak_bytes': 0
+            })
+            entry['files'] += 1
+            entry['bytes'] += size
+            entry['transactions'] += transactions
+            entry['last_peak_bytes'] = peak_bytes
+            entry['max_peak_bytes'] = max(entry['max_peak_bytes'], peak_bytes)
+            if transactions:
+                per_transaction = round(peak_bytes / transactions, 1)
+                entry['max_peak_bytes_per_transaction'] = max(entry['max_peak_bytes_per_transaction'] or 0, per_transaction)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'budget_bytes': self.budget_bytes,
+                'isolated_limit_bytes': self.isolated_limit_bytes,
+                'rss_bytes': rss_bytes(),
+                'factors': {
+                    file_type: {
+                        'in_process': self.factor(file_type),
+                        'streaming': self.factor(file_type, True) if file_type in STREAMING_FACTORS else None
+                    }
+                    for file_type in sorted(set(PARSE_FACTORS) | set(self._stats))
+                },
+                'formats': {file_type: {mode: dict(entry) for mode, entry in modes.items()}
+                            for file_type, modes in self._stats.items()}
+            }
+
+if __name__ == '__main__':
+    sys.exit(_isolated_main(sys.argv[1:]))
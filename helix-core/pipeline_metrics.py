@@ -0,0 +1,208 @@
+"""
+📊 Helix Pipeline Metrics - Prometheus exposition for the processing pipeline
+Served at /metrics (scraped by prometheus/prometheus.yml) to find throughput bottlenecks.
+
+- Stage latency histograms: SFTP list, download, parse and validate (per format), SAP call, archive
+- Errors by stage and exception type, files / bytes / transactions processed per format
+- Parse memory plans and peak bytes per transaction (see memory_budget)
+- Queue depth, in-flight tasks and worker pool utilization
+
+Every series has a fixed slot in a shared-memory segment (see shared_metrics.ShardedSegment):
+an update is a dict lookup plus a float add in this process's own shard, and a scrape
+sums all shards so every gunicorn worker is included whichever one answers.
+Label values are declared up front; anything unexpected is reported as "other".
+"""
+
+import bisect
+import os
+import struct
+import time
+import zlib
+from contextlib import contextmanager
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from shared_metrics import SHARD_HEADER, ShardedSegment, _pid_alive, default_metrics_path
+
+DOUBLE = struct.Struct('<d')
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGES = ('sftp_list', 'download', 'parse', 'validate', 'route', 'sap_call', 'archive', 'other')
+FORMATS = ('MT940', 'CAMT.053', 'BAI2', 'CSV', 'none', 'other')
+OUTCOMES = ('success', 'failure', 'other')
+PARSE_MODES = ('in_process', 'streaming', 'isolated', 'other')
+BYTES_PER_TRANSACTION_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 65536, 262144)
+ERROR_TYPES = (
+    'ValueError', 'KeyError', 'TypeError', 'ParseError', 'OSError', 'FileNotFoundError',
+    'TimeoutError', 'ConnectionError', 'SSHException', 'AuthenticationException',
+    'MemoryError', 'MemoryBudgetExceeded', 'other'
+)
+
+class MetricFamily:
+    """One metric name with a fixed set of label values (every combination gets a slot)"""
+
+    def __init__(self, name: str, kind: str, help_text: str,
+                 labels: Optional[Dict[str, Sequence[str]]] = None,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.labels = {label: tuple(values) for label, values in (labels or {}).items()}
+        self.buckets = tuple(buckets) if kind == 'histogram' else ()
+        # histogram slot: one count per bucket, +Inf overflow, then the sum
+        self.width = len(self.buckets) + 2 if kind == 'histogram' else 1
+        self.combinations = list(product(*self.labels.values())) or [()]
+        self.index = {combo: i for i, combo in enumerate(self.combinations)}
+        self.offset = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.combinations) * self.width * DOUBLE.size
+
+    def slot(self, label_values: Dict[str, str]) -> int:
+        """Byte offset (inside a shard) of the series for these label values"""
+        combo = tuple(
+            value if value in allowed else 'other'
+            for value, allowed in ((str(label_values.get(label, 'other')), allowed)
+                                   for label, allowed in self.labels.items())
+        )
+        return self.offset + self.index.get(combo, 0) * self.width * DOUBLE.size
+
+    def describe(self) -> str:
+        return f"{self.name}:{self.kind}:{sorted(self.labels.items())}:{self.buckets}"
+
+HELIX_METRICS = (
+    MetricFamily('helix_stage_duration_seconds', 'histogram', 'Time spent in each pipeline stage',
+                 {'stage': STAGES, 'file_type': FORMATS}),
+    MetricFamily('helix_stage_errors_total', 'counter', 'Pipeline stage failures by exception type',
+                 {'stage': STAGES, 'error_type': ERROR_TYPES}),
+    MetricFamily('helix_files_processed_total', 'counter', 'Files that finished processing',
+                 {'file_type': FORMATS, 'outcome': OUTCOMES}),
+    MetricFamily('helix_bytes_processed_total', 'counter', 'Bytes of successfully processed files',
+                 {'file_type': FORMATS}),
+    MetricFamily('helix_transactions_processed_total', 'counter', 'Transactions in successfully processed files',
+                 {'file_type': FORMATS}),
+    MetricFamily('helix_parse_mode_total', 'counter', 'Parses by memory plan (in process, streaming, isolated child)',
+                 {'file_type': FORMATS, 'mode': PARSE_MODES}),
+    MetricFamily('helix_parse_peak_bytes_per_transaction', 'histogram', 'Peak memory growth of a parse per transaction',
+                 {'file_type': FORMATS}, buckets=BYTES_PER_TRANSACTION_BUCKETS),
+    MetricFamily('helix_queue_depth', 'gauge', 'Tasks waiting in the processing scheduler'),
+    MetricFamily('helix_queue_in_flight', 'gauge', 'Tasks currently being processed'),
+    MetricFamily('helix_workers', 'gauge', 'Processing worker threads'),
+    MetricFamily('helix_workers_busy', 'gauge', 'Processing worker threads currently busy'),
+    MetricFamily('helix_poller_leader', 'gauge', 'Processes running the SFTP poller (1 when healthy)'),
+)
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(int(value)) if value == int(value) and abs(value) < 1e15 else repr(value)
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ''
+    escaped = ','.join(
+        f'{name}="{value}"'.replace('\\', '\\\\').replace('\n', '\\n') for name, value in pairs
+    )
+    return '{' + escaped + '}'
+
+class PipelineMetrics:
+    """
+    📡 Prometheus registry on shared memory: counters, gauges and histograms
+    aggregated across processes (gauges only from live processes).
+    """
+
+    def __init__(self, path: Optional[str] = None, shards: int = 16,
+                 families: Sequence[MetricFamily] = HELIX_METRICS):
+        self.families = {family.name: family for family in families}
+        offset = SHARD_HEADER.size
+        for family in families:
+            family.offset = offset
+            offset += family.size
+        layout_version = zlib.crc32('|'.join(family.describe() for family in families).encode())
+        self.path = path or os.path.join(os.path.dirname(default_metrics_path()), 'helix_pipeline_metrics')
+        self._segment = ShardedSegment(self.path, (offset + 63) // 64 * 64, shards,
+                                       magic=b'HLXPROM1', version=layout_version)
+        self._map = self._segment.map
+
+    # ---- Hot path ----
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """Add to a counter (or gauge)"""
+        offset = self.families[name].slot(labels)
+        with self._segment.write() as base:
+            current, = DOUBLE.unpack_from(self._map, base + offset)
+            DOUBLE.pack_into(self._map, base + offset, current + value)
+
+    def set(self, name: str, value: float, **labels):
+        """Set this process's value of a gauge (scrapes sum live processes)"""
+        offset = self.families[name].slot(labels)
+        with self._segment.write() as base:
+            DOUBLE.pack_into(self._map, base + offset, float(value))
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one histogram observation"""
+        family = self.families[name]
+        offset = family.slot(labels)
+        bucket = bisect.bisect_left(family.buckets, value)
+        sum_offset = offset + (len(family.buckets) + 1) * DOUBLE.size
+        with self._segment.write() as base:
+            position = base + offset + bucket * DOUBLE.size
+            DOUBLE.pack_into(self._map, position, DOUBLE.unpack_from(self._map, position)[0] + 1)
+            DOUBLE.pack_into(self._map, base + sum_offset, DOUBLE.unpack_from(self._map, base + sum_offset)[0] + value)
+
+    @contextmanager
+    def stage(self, stage: str, file_type: str = 'none'):
+        """Time a pipeline stage; failures are counted by exception type and re-raised"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc('helix_stage_errors_total', stage=stage, error_type=type(e).__name__)
+            raise
+        finally:
+            self.observe('helix_stage_duration_seconds', time.perf_counter() - started,
+                         stage=stage, file_type=file_type)
+
+    # ---- Scrape ----
+    def collect(self) -> Dict[str, List[float]]:
+        """Per family, the flat list of slot values summed over all shards"""
+        totals = {name: [0.0] * (len(family.combinations) * family.width) for name, family in self.families.items()}
+        for shard, owner in self._segment.read_shards():
+            alive = owner != 0 and _pid_alive(owner)
+            for name, family in self.families.items():
+                if family.kind == 'gauge' and not alive:
+                    continue
+                values = totals[name]
+                for i, value in enumerate(struct.unpack_from(f'<{len(values)}d', shard, family.offset)):
+                    values[i] += value
+        return totals
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        totals = self.collect()
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {family.help_text}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            values = totals[name]
+            for i, combo in enumerate(family.combinations):
+                pairs = list(zip(family.labels, combo))
+                slot = values[i * family.width:(i + 1) * family.width]
+                if family.kind == 'histogram':
+                    count = sum(slot[:-1])
+                    if not count and pairs:
+                        continue
+                    cumulative = 0.0
+                    for bound, bucket_count in zip(family.buckets + (float('inf'),), slot[:-1]):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {_format_value(cumulative)}")
+                    lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(slot[-1])}")
+                    lines.append(f"{name}_count{_format_labels(pairs)} {_format_value(count)}")
+                else:
+                    if not slot[0] and pairs:
+                        continue
+                    lines.append(f"{name}{_format_labels(pairs)} {_format_value(slot[0])}")
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        self._segment.close()
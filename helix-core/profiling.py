@@ -0,0 +1,162 @@
+"""
+🩺 Helix Profiling - Look inside the running service when production is slow
+On-demand, time-boxed tools behind admin-only endpoints:
+
+- Stack sampler: snapshots every thread's stack (SFTP poller, workers, request
+  threads) at a fixed interval and returns collapsed stacks for flamegraph.pl / speedscope
+- Allocation capture: tracemalloc top allocations and growth over a window
+- Call profiler: cProfile around one function call (e.g. parsing one job's file)
+
+Nothing runs and nothing is hooked while no profile is being taken, so this
+module can stay deployed in production at zero cost.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_profiling_lock = threading.Lock()
+
+class ProfilerBusy(Exception):
+    """Another profile is already running (only one at a time, they skew each other)"""
+
+def _exclusive():
+    if not _profiling_lock.acquire(blocking=False):
+        raise ProfilerBusy("Another profiling session is already running")
+    return _profiling_lock
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def sample_stacks(duration: float, interval: float = 0.005) -> Dict[str, Any]:
+    """Sample all other threads' stacks for `duration` seconds; counts per collapsed stack"""
+    lock = _exclusive()
+    try:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.monotonic()
+        end = started + duration
+        while time.monotonic() < end:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                stacks[';'.join(reversed(labels))] += 1
+            samples += 1
+            time.sleep(interval)
+        elapsed = time.monotonic() - started
+    finally:
+        lock.release()
+
+    logger.info(f"🩺 Stack sampler took {samples} samples over {elapsed:.1f}s")
+    return {
+        'duration_seconds': round(elapsed, 3),
+        'interval_ms': interval * 1000,
+        'samples': samples,
+        'threads': sorted({stack.split(';', 1)[0] for stack in stacks}),
+        'stacks': dict(stacks.most_common())
+    }
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    """Brendan Gregg's collapsed format: 'frame;frame;frame count' per line"""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.items())
+
+def capture_allocations(duration: float, limit: int = 25, group_by: str = 'lineno',
+                        frames: int = 1) -> Dict[str, Any]:
+    """Top live allocations after `duration` seconds and the biggest growth during it"""
+    lock = _exclusive()
+    started_here = not tracemalloc.is_tracing()
+    try:
+        if started_here:
+            tracemalloc.start(max(frames, 1))
+        ignore = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        )
+        before = tracemalloc.take_snapshot().filter_traces(ignore)
+        time.sleep(duration)
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+        current, peak = tracemalloc.get_traced_memory()
+        top = after.statistics(group_by)[:limit]
+        growth = after.compare_to(before, group_by)[:limit]
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        lock.release()
+
+    def location(stat) -> str:
+        return ' <- '.join(f"{os.path.basename(f.filename)}:{f.lineno}" for f in stat.traceback)
+
+    return {
+        'duration_seconds': duration,
+        'tracing_started_for_capture': started_here,
+        'traced_current_kb': round(current / 1024, 1),
+        'traced_peak_kb': round(peak / 1024, 1),
+        'top_allocations': [
+            {'location': location(stat), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in top
+        ],
+        'top_growth': [
+            {'location': location(stat), 'size_diff_kb': round(stat.size_diff / 1024, 1),
+             'count_diff': stat.count_diff, 'size_kb': round(stat.size / 1024, 1)}
+            for stat in growth if stat.size_diff
+        ]
+    }
+
+def profile_call(fn: Callable, *args, sort: str = 'cumulative', limit: int = 40,
+                 **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """Run fn under cProfile; returns (result or exception, report)"""
+    lock = _exclusive()
+    profiler = cProfile.Profile()
+    outcome: Any = None
+    started = time.perf_counter()
+    try:
+        outcome = profiler.runcall(fn, *args, **kwargs)
+    except Exception as e:
+        outcome = e
+    finally:
+        elapsed = time.perf_counter() - started
+        lock.release()
+
+    stats = pstats.Stats(profiler)
+    stats.sort_stats(sort)
+    rows: List[Dict[str, Any]] = []
+    for function in stats.fcn_list[:limit]:
+        primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[function]
+        filename, line, name = function
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({name})",
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'total_ms': round(total_time * 1000, 3),
+            'cumulative_ms': round(cumulative_time * 1000, 3)
+        })
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats(sort).print_stats(limit)
+
+    return outcome, {
+        'wall_ms': round(elapsed * 1000, 3),
+        'sort': sort,
+        'functions': rows,
+        'report': text.getvalue()
+    }
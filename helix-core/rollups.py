@@ -0,0 +1,248 @@
+"""
+⏱️ Helix Processing Rollups - Fixed-memory time series of processing statistics
+Replaces the ever-growing hourly dict and the 20-sample timing list with ring
+buffers at three resolutions, so memory stays constant over months of uptime:
+
+- minute buckets for the last hour, hour buckets for two days, day buckets for two months
+- per bucket: files, successes, failures, transactions and amount per currency
+- per bucket and format: a quantile sketch of processing time (p50 / p95 / p99)
+
+The sketch is DDSketch-style: log-spaced bins give every quantile within ±5 %
+relative error, and merging two sketches is adding their bin counts - across
+buckets, formats and gunicorn workers alike. Buckets live in a shared-memory
+segment (see shared_metrics.ShardedSegment) next to the dashboard metrics.
+"""
+
+import math
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from shared_metrics import FILE_TYPES, SHARD_HEADER, ShardedSegment
+
+MAGIC = b'HLXROLL1'
+LAYOUT_VERSION = 1
+
+# name -> (seconds per bucket, buckets kept)
+RESOLUTIONS = {
+    'minute': (60, 60),
+    'hour': (3600, 48),
+    'day': (86400, 60),
+}
+CURRENCIES = ('CHF', 'EUR', 'USD', 'GBP', 'OTHER')
+
+SKETCH_ACCURACY = 0.05                 # relative error of every quantile
+SKETCH_MIN_MS = 1.0                    # everything at or below lands in bin 0
+SKETCH_BINS = 162                      # 1 ms .. ~3 h, longer times share the last bin
+GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+BUCKET_HEADER = struct.Struct(f'<5d{len(CURRENCIES)}d')   # start, files, succeeded, failed, transactions, amounts
+SKETCH = struct.Struct(f'<{SKETCH_BINS}I')
+BIN = struct.Struct('<I')
+BUCKET_SIZE = BUCKET_HEADER.size + SKETCH.size * len(FILE_TYPES)
+
+def _layout():
+    offsets = {}
+    position = SHARD_HEADER.size
+    for name, (_, slots) in RESOLUTIONS.items():
+        offsets[name] = position
+        position += BUCKET_SIZE * slots
+    return offsets, (position + 63) // 64 * 64
+
+OFFSETS, SHARD_SIZE = _layout()
+
+class QuantileSketch:
+    """
+    📐 Log-bucketed histogram of processing times (ms) with bounded relative error.
+    Bin i holds values in (MIN·γ^(i-1), MIN·γ^i]; merging is element-wise addition.
+    """
+
+    def __init__(self, counts: Optional[Sequence[int]] = None):
+        self.counts = list(counts) if counts is not None else [0] * SKETCH_BINS
+
+    @staticmethod
+    def bin_for(value_ms: float) -> int:
+        if value_ms <= SKETCH_MIN_MS:
+            return 0
+        return min(SKETCH_BINS - 1, math.ceil(math.log(value_ms / SKETCH_MIN_MS) / LOG_GAMMA))
+
+    @staticmethod
+    def bin_value(index: int) -> float:
+        """Representative value of a bin (within SKETCH_ACCURACY of anything in it)"""
+        if index == 0:
+            return SKETCH_MIN_MS
+        return SKETCH_MIN_MS * 2 * GAMMA ** index / (GAMMA + 1)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def add(self, value_ms: float, count: int = 1):
+        self.counts[self.bin_for(value_ms)] += count
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                return self.bin_value(index)
+        return self.bin_value(SKETCH_BINS - 1)
+
+    def percentiles(self) -> Dict:
+        return {
+            'count': self.count,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+class Rollup:
+    """Totals for one time bucket (or several merged)"""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.files = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.transactions = 0
+        self.amounts = {currency: 0.0 for currency in CURRENCIES}
+        self.latency = {file_type: QuantileSketch() for file_type in FILE_TYPES}
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        return 100.0 * self.succeeded / self.files if self.files else None
+
+    def merge(self, other: 'Rollup') -> 'Rollup':
+        self.files += other.files
+        self.succeeded += other.succeeded
+        self.failed += other.failed
+        self.transactions += other.transactions
+        for currency, amount in other.amounts.items():
+            self.amounts[currency] += amount
+        for file_type, sketch in other.latency.items():
+            self.latency[file_type].merge(sketch)
+        return self
+
+    def overall_latency(self) -> QuantileSketch:
+        merged = QuantileSketch()
+        for sketch in self.latency.values():
+            merged.merge(sketch)
+        return merged
+
+    def to_dict(self) -> Dict:
+        return {
+            'start': self.start,
+            'files': self.files,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'success_rate': self.success_rate,
+            'transactions': self.transactions,
+            'amount_by_currency': {currency: amount for currency, amount in self.amounts.items() if amount},
+            'processing_time_ms': dict(
+                {file_type: sketch.percentiles() for file_type, sketch in self.latency.items() if sketch.count},
+                all=self.overall_latency().percentiles()
+            )
+        }
+
+def amounts_by_currency(parsed_data: Dict) -> Dict[str, float]:
+    """Transaction amounts of a parsed file summed per currency"""
+    amounts: Dict[str, float] = {}
+    for statement in parsed_data.get('statements', []):
+        for tx in statement.get('transactions', []):
+            currency = (tx.get('currency') or statement.get('currency') or 'OTHER').upper()
+            try:
+                amounts[currency] = amounts.get(currency, 0.0) + float(tx.get('amount') or 0)
+            except (TypeError, ValueError):
+                continue
+    return amounts
+
+class ProcessingRollups:
+    """
+    🗓️ Minute / hour / day rings in shared memory. Each process adds to its own
+    shard; readers merge buckets with the same start time across shards.
+    """
+
+    def __init__(self, path: str, shards: int = 16):
+        self.path = path
+        self._segment = ShardedSegment(path, SHARD_SIZE, shards, magic=MAGIC, version=LAYOUT_VERSION)
+        self._map = self._segment.map
+
+    def record(self, processing_ms: float, success: bool, transactions: int,
+               amounts: Dict[str, float], file_type: str, now: Optional[float] = None):
+        """Add one finished file to the current bucket of every resolution"""
+        now = time.time() if now is None else now
+        type_index = FILE_TYPES.index(file_type) if file_type in FILE_TYPES else FILE_TYPES.index('OTHER')
+        bin_offset = BUCKET_HEADER.size + SKETCH.size * type_index + BIN.size * QuantileSketch.bin_for(processing_ms)
+        per_currency = [0.0] * len(CURRENCIES)
+        for currency, amount in amounts.items():
+            currency = currency if currency in CURRENCIES else 'OTHER'
+            per_currency[CURRENCIES.index(currency)] += amount
+
+        with self._segment.write() as base:
+            for name, (width, slots) in RESOLUTIONS.items():
+                start = now // width * width
+                offset = base + OFFSETS[name] + BUCKET_SIZE * int(start // width % slots)
+                header = list(BUCKET_HEADER.unpack_from(self._map, offset))
+                if header[0] != start:
+                    # Ring slot still holds an old bucket: recycle it
+                    self._map[offset:offset + BUCKET_SIZE] = bytes(BUCKET_SIZE)
+                    header = [start] + [0.0] * (len(header) - 1)
+                header[1] += 1
+                header[2 if success else 3] += 1
+                header[4] += transactions
+                for i, amount in enumerate(per_currency):
+                    header[5 + i] += amount
+                BUCKET_HEADER.pack_into(self._map, offset, *header)
+                count, = BIN.unpack_from(self._map, offset + bin_offset)
+                BIN.pack_into(self._map, offset + bin_offset, count + 1)
+
+    def buckets(self, resolution: str, limit: Optional[int] = None, now: Optional[float] = None) -> List[Rollup]:
+        """Merged buckets of one resolution still inside its window, oldest first"""
+        width, slots = RESOLUTIONS[resolution]
+        now = time.time() if now is None else now
+        oldest = (now // width - slots + 1) * width
+        merged: Dict[float, Rollup] = {}
+        for region, _ in self._segment.read_shards(OFFSETS[resolution], BUCKET_SIZE * slots):
+            for slot in range(slots):
+                offset = BUCKET_SIZE * slot
+                header = BUCKET_HEADER.unpack_from(region, offset)
+                start = header[0]
+                if not start or start < oldest or not header[1]:
+                    continue
+                rollup = merged.setdefault(start, Rollup(start))
+                rollup.merge(self._decode(region, offset, header))
+        ordered = [merged[start] for start in sorted(merged)]
+        return ordered[-limit:] if limit else ordered
+
+    def summary(self, resolution: str, limit: Optional[int] = None, now: Optional[float] = None) -> Rollup:
+        """All buckets in the window folded into one"""
+        return merge_rollups(self.buckets(resolution, limit, now))
+
+    def close(self):
+        self._segment.close()
+
+    @staticmethod
+    def _decode(region: bytes, offset: int, header: Sequence[float]) -> Rollup:
+        rollup = Rollup(header[0])
+        rollup.files, rollup.succeeded, rollup.failed, rollup.transactions = (int(value) for value in header[1:5])
+        rollup.amounts = dict(zip(CURRENCIES, header[5:]))
+        for i, file_type in enumerate(FILE_TYPES):
+            rollup.latency[file_type] = QuantileSketch(
+                SKETCH.unpack_from(region, offset + BUCKET_HEADER.size + SKETCH.size * i)
+            )
+        return rollup
+
+def merge_rollups(rollups: Iterable[Rollup]) -> Rollup:
+    merged = None
+    for rollup in rollups:
+        merged = Rollup(rollup.start).merge(rollup) if merged is None else merged.merge(rollup)
+    return merged or Rollup(0.0)
@@ -10,12 +10,18 @@ Features:
 - Swiss-precision logging with emojis! ✨
 """
 
+import gzip
+import hashlib
+import json
 import re
+import sys
+import time
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
-from enum import Enum
+from functools import lru_cache
+from typing import ClassVar, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum
 
 class Priority(Enum):
     LOW = "low"
@@ -32,92 +38,275 @@ class ProcessingStatus(Enum):
     FAILED = "failed"
     REQUIRES_APPROVAL = "requires_approval"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RoutingCode:
-    """Swiss-style 3-part routing identifier"""
+    """Swiss-style 3-part routing identifier (immutable, hashable, interned when valid)"""
     department: str
     process: str
     file_type: str
-    
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    # Canonical instances for every valid route, filled by HelixRoutingEngine.compile_routes()
+    _interned: ClassVar[Dict[Tuple[str, str, str], 'RoutingCode']] = {}
+
+    def __post_init__(self):
+        department = self.department.upper()
+        process = self.process.upper()
+        file_type = self.file_type.upper()
+        object.__setattr__(self, 'department', department)
+        object.__setattr__(self, 'process', process)
+        object.__setattr__(self, 'file_type', file_type)
+        object.__setattr__(self, '_hash', hash((department, process, file_type)))
+
+    def __hash__(self):
+        return self._hash
+
     def __str__(self):
         return f"{self.department}-{self.process}-{self.file_type}"
     
     def to_string(self):
         """Return string representation for API compatibility"""
         return self.__str__()
-    
+
+    @classmethod
+    def of(cls, department: str, process: str, file_type: str) -> 'RoutingCode':
+        """Return the interned instance for a valid route, or a fresh (uninterned) one"""
+        code = cls._interned.get((department, process, file_type))
+        if code is None:
+            code = cls(department=department, process=process, file_type=file_type)
+            code = cls._interned.get((code.department, code.process, code.file_type), code)
+        return code
+
     @classmethod
     def from_string(cls, routing_string: str) -> 'RoutingCode':
         """Parse routing code from string format"""
-        parts = routing_string.upper().split('-')
-        if len(parts) != 3:
-            raise ValueError(f"Invalid routing code format: {routing_string}. Expected: DEPT-PROCESS-TYPE")
-        return cls(department=parts[0], process=parts[1], file_type=parts[2])
+        return _parse_routing_code(routing_string)
 
-@dataclass
+@lru_cache(maxsize=1024)
+def _parse_routing_code(routing_string: str) -> RoutingCode:
+    parts = routing_string.upper().split('-')
+    if len(parts) != 3:
+        raise ValueError(f"Invalid routing code format: {routing_string}. Expected: DEPT-PROCESS-TYPE")
+    return RoutingCode.of(parts[0], parts[1], parts[2])
+
+GZIP_MIN_BYTES = 1024
+
+@dataclass(frozen=True)
+class CachedPayload:
+    """Pre-serialized JSON response body with its strong ETag (and a gzip copy when worth it)"""
+    body: bytes
+    etag: str
+    gzipped: Optional[bytes] = None
+
+    @classmethod
+    def from_data(cls, data) -> 'CachedPayload':
+        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        gzipped = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        return cls(body=body, etag=hashlib.sha1(body).hexdigest(), gzipped=gzipped)
+
+class AuditAction(IntEnum):
+    """Compact action codes for the job audit trail"""
+    JOB_CREATED = 1
+    JOB_CREATED_VIA_API = 2
+    PROCESSING_STARTED = 3
+    PROCESSING_COMPLETED = 4
+    PROCESSING_FAILED = 5
+    STATUS_UPDATED = 6
+    ROUTING_RULE_MATCHED = 7
+    JOB_QUEUED = 8
+
+class AuditEntry(NamedTuple):
+    """One audit trail record - a plain tuple, dicts are only built at the API edge"""
+    action: AuditAction
+    ts_ns: int
+    user: str
+    details: str
+
+    @classmethod
+    def now(cls, action: AuditAction, details: str, user: str = 'system') -> 'AuditEntry':
+        return cls(action, time.time_ns(), sys.intern(user), details)
+
+    def to_dict(self):
+        return {
+            'timestamp': datetime.fromtimestamp(self.ts_ns / 1e9).isoformat(),
+            'action': self.action.name.lower(),
+            'details': self.details,
+            'user': self.user
+        }
+
+@dataclass(slots=True)
 class FileJob:
     """Enterprise file processing job with Swiss precision"""
     job_id: str
     routing_code: RoutingCode
     original_filename: str
     file_size: int
-    upload_timestamp: str
     status: ProcessingStatus
     priority: Priority
     requires_approval: bool
     uploaded_by: str
-    department_access: List[str]
-    processing_notes: List[str]
+    department_access: Tuple[str, ...]
+    processing_notes: List[str] = field(default_factory=list)
     error_message: str = ""
+    file_path: str = ""
+    created_ns: int = 0
     
     # Swiss banking compliance fields
-    audit_trail: List[Dict] = None
-    compliance_flags: List[str] = None
+    audit_trail: List[AuditEntry] = field(default_factory=list)
+    compliance_flags: List[str] = field(default_factory=list)
+
+    # Observer installed by the routing engine (job store, audit journal)
+    _observer: Optional['HelixRoutingEngine'] = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
-        if self.audit_trail is None:
-            self.audit_trail = []
-        if self.compliance_flags is None:
-            self.compliance_flags = []
+        self.uploaded_by = sys.intern(self.uploaded_by)
+        self.department_access = tuple(self.department_access)
+        if not self.created_ns:
+            self.created_ns = time.time_ns()
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self.created_ns / 1e9)
+
+    @property
+    def upload_timestamp(self) -> str:
+        """ISO creation time (kept for API compatibility)"""
+        return self.created_at.isoformat()
+
+    @property
+    def started_at(self) -> Optional[datetime]:
+        return self._last_audit_time(AuditAction.PROCESSING_STARTED)
+
+    @property
+    def completed_at(self) -> Optional[datetime]:
+        return self._last_audit_time(AuditAction.PROCESSING_COMPLETED, AuditAction.PROCESSING_FAILED)
+
+    def _last_audit_time(self, *actions: AuditAction) -> Optional[datetime]:
+        for entry in reversed(self.audit_trail):
+            if entry.action in actions:
+                return datetime.fromtimestamp(entry.ts_ns / 1e9)
+        return None
+
+    def audit_trail_dicts(self) -> List[Dict]:
+        """Audit trail as JSON-friendly dicts (built on demand)"""
+        return [entry.to_dict() for entry in self.audit_trail]
     
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
-        result = asdict(self)
-        result['routing_code'] = str(self.routing_code)
-        result['status'] = self.status.value
-        result['priority'] = self.priority.value
-        return result
+        return {
+            'job_id': self.job_id,
+            'routing_code': str(self.routing_code),
+            'original_filename': self.original_filename,
+            'file_size': self.file_size,
+            'upload_timestamp': self.upload_timestamp,
+            'status': self.status.value,
+            'priority': self.priority.value,
+            'requires_approval': self.requires_approval,
+            'uploaded_by': self.uploaded_by,
+            'department_access': list(self.department_access),
+            'processing_notes': list(self.processing_notes),
+            'error_message': self.error_message,
+            'file_path': self.file_path,
+            'audit_trail': self.audit_trail_dicts(),
+            'compliance_flags': list(self.compliance_flags)
+        }
+
+    def to_record(self) -> List:
+        """Compact positional form for storage (see from_record)"""
+        return [
+            self.job_id,
+            str(self.routing_code),
+            self.original_filename,
+            self.file_size,
+            self.status.value,
+            self.priority.value,
+            self.requires_approval,
+            self.uploaded_by,
+            list(self.department_access),
+            self.processing_notes,
+            self.error_message,
+            self.file_path,
+            self.created_ns,
+            [[int(e.action), e.ts_ns, e.user, e.details] for e in self.audit_trail],
+            self.compliance_flags
+        ]
+
+    @classmethod
+    def from_record(cls, record: List) -> 'FileJob':
+        """Rebuild a job from its to_record() form"""
+        (job_id, routing_code, original_filename, file_size, status, priority,
+         requires_approval, uploaded_by, department_access, processing_notes,
+         error_message, file_path, created_ns, audit_trail, compliance_flags) = record
+        return cls(
+            job_id=job_id,
+            routing_code=RoutingCode.from_string(routing_code),
+            original_filename=original_filename,
+            file_size=file_size,
+            status=ProcessingStatus(status),
+            priority=Priority(priority),
+            requires_approval=requires_approval,
+            uploaded_by=uploaded_by,
+            department_access=department_access,
+            processing_notes=list(processing_notes),
+            error_message=error_message,
+            file_path=file_path,
+            created_ns=created_ns,
+            audit_trail=[
+                AuditEntry(AuditAction(action), ts_ns, sys.intern(user), details)
+                for action, ts_ns, user, details in audit_trail
+            ],
+            compliance_flags=list(compliance_flags)
+        )
+
+    @property
+    def is_terminal(self) -> bool:
+        """Completed and failed jobs no longer change"""
+        return self.status in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED)
+
+    def changed(self):
+        """Notify the owner (job store) that this job was modified"""
+        if self._observer is not None:
+            self._observer.job_changed(self)
+
+    def audit(self, action: AuditAction, details: str, user: str = 'system') -> AuditEntry:
+        """Append an audit trail entry (journaled durably by the observer)"""
+        entry = AuditEntry.now(action, details, user)
+        self.audit_trail.append(entry)
+        if self._observer is not None:
+            self._observer.job_audited(self, entry)
+        return entry
+    
+    def mark_queued(self):
+        """Job handed to the processing queue"""
+        self.status = ProcessingStatus.QUEUED
+        self.audit(AuditAction.JOB_QUEUED, 'Job queued for processing')
+        self.changed()
     
     def start_processing(self):
         """Start processing the job"""
         self.status = ProcessingStatus.PROCESSING
-        self.audit_trail.append({
-            'timestamp': datetime.now().isoformat(),
-            'action': 'processing_started',
-            'details': 'Job processing initiated',
-            'user': 'system'
-        })
+        self.audit(AuditAction.PROCESSING_STARTED, 'Job processing initiated')
+        self.changed()
     
     def complete_processing(self):
         """Mark job as completed"""
         self.status = ProcessingStatus.COMPLETED
-        self.audit_trail.append({
-            'timestamp': datetime.now().isoformat(),
-            'action': 'processing_completed',
-            'details': 'Job processing completed successfully',
-            'user': 'system'
-        })
+        self.audit(AuditAction.PROCESSING_COMPLETED, 'Job processing completed successfully')
+        self.changed()
     
     def fail_processing(self, error_message: str):
         """Mark job as failed"""
         self.status = ProcessingStatus.FAILED
         self.error_message = error_message
-        self.audit_trail.append({
-            'timestamp': datetime.now().isoformat(),
-            'action': 'processing_failed',
-            'details': f'Job processing failed: {error_message}',
-            'user': 'system'
-        })
+        self.audit(AuditAction.PROCESSING_FAILED, f'Job processing failed: {error_message}')
+        self.changed()
+
+    def retry_processing(self, error_message: str, retry_in: float):
+        """Processing failed but will be tried again - back in the queue, not terminal"""
+        self.status = ProcessingStatus.QUEUED
+        self.error_message = error_message
+        self.audit(AuditAction.PROCESSING_FAILED, f'Job processing failed, retrying in {retry_in:.0f}s: {error_message}')
+        self.changed()
 
 class HelixRoutingEngine:
     """
@@ -125,8 +314,9 @@ class HelixRoutingEngine:
     SwissLife-inspired enterprise file routing with emoji-powered logging
     """
     
-    def __init__(self):
+    def __init__(self, job_store=None, audit_journal=None, event_bus=None):
         # Department configurations with processes mapped to supported file types 
+        # ('quota' and 'cutoff' - local HH:MM bank cut-off - feed the processing scheduler)
         self.departments = {
             'HR': {
                 'name': 'Human Resources',
@@ -137,7 +327,8 @@ class HelixRoutingEngine:
                     'ONBOARDING': ['CSV']
                 },
                 'default_priority': Priority.NORMAL,
-                'requires_approval': False
+                'requires_approval': False,
+                'quota': {'max_concurrent': 1, 'rate_per_minute': 120, 'burst': 10}
             },
             'FINANCE': {
                 'name': 'Finance Department', 
@@ -148,7 +339,8 @@ class HelixRoutingEngine:
                     'BUDGETING': ['CSV']
                 },
                 'default_priority': Priority.HIGH,
-                'requires_approval': True
+                'requires_approval': True,
+                'cutoff': '16:00'
             },
             'TREASURY': {
                 'name': 'Treasury Operations',
@@ -159,7 +351,8 @@ class HelixRoutingEngine:
                     'FOREX': ['CAMT053']
                 },
                 'default_priority': Priority.CRITICAL,
-                'requires_approval': True
+                'requires_approval': True,
+                'cutoff': '15:00'
             },
             'COMPLIANCE': {
                 'name': 'Compliance & Risk',
@@ -170,7 +363,8 @@ class HelixRoutingEngine:
                     'MONITORING': ['CAMT053', 'CSV']
                 },
                 'default_priority': Priority.HIGH,
-                'requires_approval': True
+                'requires_approval': True,
+                'quota': {'max_concurrent': 1}
             },
             'OPERATIONS': {
                 'name': 'Operations',
@@ -181,7 +375,8 @@ class HelixRoutingEngine:
                     'RECONCILE': ['CSV', 'MT940']
                 },
                 'default_priority': Priority.NORMAL,
-                'requires_approval': False
+                'requires_approval': False,
+                'quota': {'max_concurrent': 2}
             }
         }
         
@@ -195,14 +390,73 @@ class HelixRoutingEngine:
             'PAIN002': {'emoji': '✅', 'extensions': ['.xml'], 'description': 'ISO 20022 Payment Status'}
         }
         
-        # Active jobs tracking
-        self.active_jobs: Dict[str, FileJob] = {}
-        
+        # Job tracking - live jobs in memory, finished jobs evicted by the store
+        if job_store is None:
+            from job_store import InMemoryJobStore
+            job_store = InMemoryJobStore()
+        self.job_store = job_store
+        self.audit_journal = audit_journal
+        self.event_bus = event_bus
+
+        # Compiled lookup tables - rebuilt by compile_routes() on startup and reload
+        self.valid_routes: FrozenSet[RoutingCode] = frozenset()
+        self.route_listings: Dict[str, CachedPayload] = {}
+        self.compile_routes()
+
+    def compile_routes(self):
+        """Compile the department config into a frozen route set and pre-serialized listings"""
+        valid_routes = set()
+        routing_codes = []
+        departments = []
+
+        for dept_code, dept_info in self.departments.items():
+            departments.append({
+                'code': dept_code,
+                'name': dept_info['name'],
+                'emoji': dept_info['emoji'],
+                'processes': list(dept_info['processes'].keys())
+            })
+            for process_code, file_types in dept_info['processes'].items():
+                for file_type in file_types:
+                    if file_type not in self.file_types:
+                        continue
+                    routing_code = RoutingCode(dept_code, process_code, file_type)
+                    valid_routes.add(routing_code)
+                    routing_codes.append({
+                        'routing_code': routing_code.to_string(),
+                        'department': dept_code,
+                        'process': process_code,
+                        'file_type': file_type,
+                        'description': f"{dept_info['name']} - {process_code} - {file_type}"
+                    })
+
+        RoutingCode._interned.clear()
+        RoutingCode._interned.update(
+            {(code.department, code.process, code.file_type): code for code in valid_routes}
+        )
+        _parse_routing_code.cache_clear()
+
+        self.valid_routes = frozenset(valid_routes)
+        self.route_listings = {
+            'departments': CachedPayload.from_data({'departments': departments}),
+            'routing_codes': CachedPayload.from_data({'routing_codes': routing_codes})
+        }
+
+    def reload(self, departments: Optional[Dict] = None, file_types: Optional[Dict] = None):
+        """Swap in a new routing configuration and recompile the lookup tables"""
+        if departments is not None:
+            self.departments = departments
+        if file_types is not None:
+            self.file_types = file_types
+        self.compile_routes()
+
     def create_routing_code(self, department: str, process: str, file_type: str) -> RoutingCode:
         """Create and validate a routing code"""
-        dept = department.upper()
-        proc = process.upper()
-        ftype = file_type.upper()
+        routing_code = RoutingCode.of(department, process, file_type)
+        if routing_code in self.valid_routes:
+            return routing_code
+
+        dept, proc, ftype = routing_code.department, routing_code.process, routing_code.file_type
         
         # Validate department
         if dept not in self.departments:
@@ -219,78 +473,52 @@ class HelixRoutingEngine:
             raise ValueError(f"File type '{ftype}' not supported for {dept}-{proc}. Valid: {supported_file_types}")
         
         # Validate file type exists in our system
-        if ftype not in self.file_types:
-            raise ValueError(f"Invalid file type: {ftype}. Valid: {list(self.file_types.keys())}")
-        
-        return RoutingCode(department=dept, process=proc, file_type=ftype)
+        raise ValueError(f"Invalid file type: {ftype}. Valid: {list(self.file_types.keys())}")
     
     def validate_routing_code(self, routing_code: RoutingCode) -> bool:
-        """Validate a routing code against department-process-filetype rules"""
+        """Validate a routing code against the compiled department-process-filetype table"""
         try:
-            dept = routing_code.department.upper()
-            proc = routing_code.process.upper()
-            ftype = routing_code.file_type.upper()
-            
-            # Check department exists
-            if dept not in self.departments:
-                return False
-            
-            # Check process exists for department
-            if proc not in self.departments[dept]['processes']:
-                return False
-            
-            # Check file type is supported for this department-process
-            if ftype not in self.departments[dept]['processes'][proc]:
-                return False
-            
-            # Check file type exists in our system
-            if ftype not in self.file_types:
-                return False
-                
-            return True
-        except Exception:
+            return routing_code in self.valid_routes
+        except TypeError:
             return False
     
     def create_job(self, routing_code: RoutingCode, filename: str, file_size: int, 
-                   uploaded_by: str, priority: Optional[Priority] = None) -> FileJob:
+                   uploaded_by: str, priority: Optional[Priority] = None,
+                   job_id: Optional[str] = None) -> FileJob:
         """Create a new file processing job with Swiss precision"""
         
-        job_id = str(uuid.uuid4())
+        job_id = job_id or str(uuid.uuid4())
         dept_config = self.departments[routing_code.department]
         
         # Use provided priority or department default
         job_priority = priority or dept_config['default_priority']
         
         # Department access control - users can see their dept + compliance
-        department_access = [routing_code.department, 'COMPLIANCE']
+        department_access = (routing_code.department, 'COMPLIANCE')
         
         job = FileJob(
             job_id=job_id,
             routing_code=routing_code,
             original_filename=filename,
             file_size=file_size,
-            upload_timestamp=datetime.now().isoformat(),
             status=ProcessingStatus.UPLOADED,
             priority=job_priority,
             requires_approval=dept_config['requires_approval'],
             uploaded_by=uploaded_by,
-            department_access=department_access,
-            processing_notes=[],
-            audit_trail=[{
-                'timestamp': datetime.now().isoformat(),
-                'action': 'job_created',
-                'details': f"Job created with routing {routing_code}",
-                'user': uploaded_by
-            }],
-            compliance_flags=[]
+            department_access=department_access
         )
+        job.audit(AuditAction.JOB_CREATED, f"Job created with routing {routing_code}", uploaded_by)
         
-        self.active_jobs[job_id] = job
-        return job
+        return self.register_job(job)
     
     def create_file_job(self, routing_code: RoutingCode, file_path: str, 
                        priority: str = "NORMAL", notes: str = "") -> FileJob:
         """Create a new file processing job - API-friendly version"""
+        return self.register_job(self.build_file_job(routing_code, file_path, priority, notes))
+    
+    def build_file_job(self, routing_code: RoutingCode, file_path: str, 
+                       priority: str = "NORMAL", notes: str = "") -> FileJob:
+        """Build an API job without registering it (see register_jobs for batches)"""
         import os
         
         # Convert priority string to Priority enum
@@ -298,7 +526,7 @@ class HelixRoutingEngine:
             'LOW': Priority.LOW,
             'NORMAL': Priority.NORMAL, 
             'HIGH': Priority.HIGH,
-            'URGENT': Priority.URGENT,
+            'URGENT': Priority.CRITICAL,
             'CRITICAL': Priority.CRITICAL
         }
         
@@ -312,66 +540,95 @@ class HelixRoutingEngine:
         dept_config = self.departments[routing_code.department]
         
         # Department access control
-        department_access = [routing_code.department, 'COMPLIANCE']
+        department_access = (routing_code.department, 'COMPLIANCE')
         
         job = FileJob(
             job_id=job_id,
             routing_code=routing_code,
             original_filename=filename,
             file_size=file_size,
-            upload_timestamp=datetime.now().isoformat(),
-            status=ProcessingStatus.PENDING,
+            status=ProcessingStatus.UPLOADED,
             priority=job_priority,
             requires_approval=dept_config['requires_approval'],
             uploaded_by="api_user",  # Default for API uploads
             department_access=department_access,
-            processing_notes=[notes] if notes else [],
-            audit_trail=[{
-                'timestamp': datetime.now().isoformat(),
-                'action': 'job_created_via_api',
-                'details': f"API upload with routing {routing_code}",
-                'user': 'api_user'
-            }],
-            compliance_flags=[]
+            processing_notes=[notes] if notes else []
         )
+        job.audit(AuditAction.JOB_CREATED_VIA_API, f"API upload with routing {routing_code}", 'api_user')
         
-        self.active_jobs[job_id] = job
         return job
     
+    def register_job(self, job: FileJob) -> FileJob:
+        """Attach this engine as the job's observer, journal its history so far and persist it"""
+        job._observer = self
+        if self.audit_journal is not None:
+            for entry in job.audit_trail:
+                self.audit_journal.append(job.job_id, entry)
+        self.job_store.put(job)
+        if self.event_bus is not None:
+            self.event_bus.publish(job)
+        return job
+
+    def register_jobs(self, jobs: List[FileJob]) -> List[FileJob]:
+        """Register a batch of jobs with a single store write"""
+        for job in jobs:
+            job._observer = self
+            if self.audit_journal is not None:
+                for entry in job.audit_trail:
+                    self.audit_journal.append(job.job_id, entry)
+        self.job_store.put_many(jobs)
+        if self.event_bus is not None:
+            for job in jobs:
+                self.event_bus.publish(job)
+        return jobs
+
+    def job_changed(self, job: FileJob):
+        """Observer hook: a job's state changed"""
+        self.job_store.put(job)
+        if self.event_bus is not None:
+            self.event_bus.publish(job)
+
+    def job_audited(self, job: FileJob, entry: AuditEntry):
+        """Observer hook: an audit entry was appended to a job"""
+        if self.audit_journal is not None:
+            self.audit_journal.append(job.job_id, entry)
+
     def get_job(self, job_id: str) -> Optional[FileJob]:
-        """Get job by ID"""
-        return self.active_jobs.get(job_id)
+        """Get job by ID (from memory, or from the shared store for other workers' jobs)"""
+        job = self.job_store.get(job_id)
+        if job is not None and job._observer is None:
+            job._observer = self
+        return job
     
     def update_job_status(self, job_id: str, status: ProcessingStatus, 
                          note: str = "", user: str = "system") -> bool:
         """Update job status with audit trail"""
-        job = self.active_jobs.get(job_id)
+        job = self.get_job(job_id)
         if not job:
             return False
         
+        old_status = job.status
         job.status = status
         if note:
             job.processing_notes.append(f"{datetime.now().isoformat()}: {note}")
         
-        job.audit_trail.append({
-            'timestamp': datetime.now().isoformat(),
-            'action': 'status_updated',
-            'old_status': job.status.value,
-            'new_status': status.value,
-            'note': note,
-            'user': user
-        })
+        details = f"{old_status.value} → {status.value}" + (f": {note}" if note else "")
+        job.audit(AuditAction.STATUS_UPDATED, details, user)
+        job.changed()
         
         return True
     
     def get_jobs_by_department(self, department: str, user_access: List[str]) -> List[FileJob]:
-        """Get jobs visible to user based on department access"""
-        jobs = []
-        for job in self.active_jobs.values():
-            # Check if user has access to this job's department
-            if any(dept in user_access for dept in job.department_access):
-                jobs.append(job)
+        """Get jobs visible to user based on department access (newest first)"""
+        jobs, _ = self.job_store.list_jobs(access=user_access, limit=None)
         return jobs
+
+    def list_jobs(self, access: Optional[List[str]] = None, status: Optional[ProcessingStatus] = None,
+                  priority: Optional[Priority] = None, cursor: Optional[str] = None,
+                  limit: Optional[int] = 50) -> Tuple[List[FileJob], Optional[str]]:
+        """Indexed, keyset-paginated job listing (newest first)"""
+        return self.job_store.list_jobs(access=access, status=status, priority=priority,
+                                        cursor=cursor, limit=limit)
     
     def get_beautiful_log_message(self, job: FileJob, action: str) -> str:
         """Generate emoji-rich log messages that make bankers drool! 💰"""
@@ -396,7 +653,12 @@ class HelixRoutingEngine:
     @property
     def jobs(self):
         """Property to access jobs - alias for API compatibility"""
-        return self.active_jobs
+        return {job.job_id: job for job in self.job_store.iter_jobs()}
+
+    @property
+    def active_jobs(self) -> Dict[str, FileJob]:
+        """Jobs currently held in memory (live and recently finished)"""
+        return self.job_store.live_jobs()
     
     def get_beautiful_log_message(self, job: FileJob, action_description: str) -> str:
         """Generate beautiful emoji-rich log message"""
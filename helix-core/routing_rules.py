@@ -0,0 +1,314 @@
+"""
+🧭 Helix Content Routing Rules - Route files by what is inside them
+SFTP deliveries carry no routing code, so rules assign one (and a priority)
+from the parsed statements: account/IBAN, BIC, currency, amount and sender directory.
+
+Rules file (JSON, hot-reloaded on change):
+    {"rules": [{"id": "treasury-chf-large",
+                "routing_code": "TREASURY-CASHFLOW",      # file type appended if omitted
+                "priority": "critical",                    # optional, else department default
+                "order": 10,                               # lower wins, default: file order
+                "match": {"iban": "CH93...", "bic": "UBSWCHZH80A", "currency": "CHF",
+                          "sender": "treasury", "amount_min": 1000000, "amount_max": null}}]}
+
+Compiled form: rules are numbered by precedence and every field maps values to
+bitsets of rule numbers, amounts go into an interval tree of bitsets. Evaluating a
+statement is a handful of dict lookups and integer ANDs, independent of rule count.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from routing import Priority, RoutingCode
+
+logger = logging.getLogger(__name__)
+
+EXACT_FIELDS = ('account', 'bic', 'currency', 'sender')
+FIELD_ALIASES = {'iban': 'account'}
+
+def normalize(field_name: str, value: Any) -> Optional[str]:
+    """Canonical form used on both sides of an exact match"""
+    if value is None or value == '':
+        return None
+    value = str(value).strip().upper()
+    if field_name == 'account':
+        value = value.replace(' ', '')
+    if field_name == 'sender':
+        value = value.strip('/').split('/')[-1]
+    return value
+
+@dataclass
+class RoutingRule:
+    """One content routing rule"""
+    rule_id: str
+    routing_code: str
+    match: Dict[str, Any]
+    priority: Optional[Priority] = None
+    order: int = 0
+    description: str = ''
+
+    @property
+    def amount_range(self) -> Optional[Tuple[float, float]]:
+        low = self.match.get('amount_min')
+        high = self.match.get('amount_max')
+        if low is None and high is None:
+            return None
+        return (float('-inf') if low is None else float(low),
+                float('inf') if high is None else float(high))
+
+    @classmethod
+    def from_dict(cls, data: Dict, position: int) -> 'RoutingRule':
+        match = {}
+        for key, value in (data.get('match') or {}).items():
+            key = FIELD_ALIASES.get(key, key)
+            if key in EXACT_FIELDS:
+                match[key] = normalize(key, value)
+            elif key in ('amount_min', 'amount_max'):
+                match[key] = value
+            else:
+                raise ValueError(f"Rule {data.get('id', position)}: unknown match field '{key}'")
+        priority = data.get('priority')
+        return cls(
+            rule_id=str(data.get('id', f"rule-{position}")),
+            routing_code=data['routing_code'].upper(),
+            match=match,
+            priority=Priority(priority.lower()) if priority else None,
+            order=int(data.get('order', position)),
+            description=data.get('description', '')
+        )
+
+    def explain(self, facts: Dict[str, Any]) -> str:
+        """Human-readable reason for the audit trail"""
+        reasons = [f"{name}={facts.get(name)}" for name in EXACT_FIELDS if self.match.get(name) is not None]
+        amount_range = self.amount_range
+        if amount_range is not None:
+            reasons.append(f"amount {facts.get('amount'):,.2f} in [{amount_range[0]:,.2f}, {amount_range[1]:,.2f}]")
+        return f"rule '{self.rule_id}' matched ({', '.join(reasons) or 'catch-all'})"
+
+class IntervalTree:
+    """
+    🌳 Centered interval tree answering "which intervals contain x" as a bitset.
+    Each node keeps its intervals sorted by start (with prefix ORs) and by end
+    (with suffix ORs), so a stabbing query is O(log n) bisects plus integer ORs.
+    """
+
+    def __init__(self, intervals: List[Tuple[float, float, int]]):
+        self._root = self._build(intervals)
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        points = sorted(p for low, high, _ in intervals for p in (low, high) if abs(p) != float('inf'))
+        center = points[len(points) // 2] if points else 0.0
+
+        left = [iv for iv in intervals if iv[1] < center]
+        right = [iv for iv in intervals if iv[0] > center]
+        here = [iv for iv in intervals if iv[0] <= center <= iv[1]]
+
+        by_start = sorted(here, key=lambda iv: iv[0])
+        starts = [iv[0] for iv in by_start]
+        start_masks = []
+        mask = 0
+        for iv in by_start:
+            mask |= iv[2]
+            start_masks.append(mask)
+
+        by_end = sorted(here, key=lambda iv: iv[1])
+        ends = [iv[1] for iv in by_end]
+        end_masks = [0] * len(by_end)
+        mask = 0
+        for i in range(len(by_end) - 1, -1, -1):
+            mask |= by_end[i][2]
+            end_masks[i] = mask
+
+        return (center, starts, start_masks, ends, end_masks, self._build(left), self._build(right))
+
+    def stab(self, x: float) -> int:
+        """Bitset of all intervals [low, high] with low <= x <= high"""
+        result = 0
+        node = self._root
+        while node is not None:
+            center, starts, start_masks, ends, end_masks, left, right = node
+            if x < center:
+                count = bisect.bisect_right(starts, x)
+                if count:
+                    result |= start_masks[count - 1]
+                node = left
+            elif x > center:
+                first = bisect.bisect_left(ends, x)
+                if first < len(ends):
+                    result |= end_masks[first]
+                node = right
+            else:
+                if start_masks:
+                    result |= start_masks[-1]
+                node = None
+        return result
+
+@dataclass
+class RuleMatch:
+    """Outcome of evaluating the rules for one file"""
+    rule: RoutingRule
+    routing_code: RoutingCode
+    priority: Optional[Priority]
+    facts: Dict[str, Any]
+    explanation: str
+
+class CompiledRuleSet:
+    """Indexed decision structure built from a list of rules"""
+
+    def __init__(self, rules: List[RoutingRule]):
+        self.rules = sorted(rules, key=lambda rule: rule.order)
+        self.all_mask = (1 << len(self.rules)) - 1
+        self.index: Dict[str, Dict[str, int]] = {name: {} for name in EXACT_FIELDS}
+        self.wildcard: Dict[str, int] = {name: 0 for name in EXACT_FIELDS}
+        self.amount_wildcard = 0
+        intervals = []
+
+        for number, rule in enumerate(self.rules):
+            bit = 1 << number
+            for name in EXACT_FIELDS:
+                value = rule.match.get(name)
+                if value is None:
+                    self.wildcard[name] |= bit
+                else:
+                    self.index[name][value] = self.index[name].get(value, 0) | bit
+            amount_range = rule.amount_range
+            if amount_range is None:
+                self.amount_wildcard |= bit
+            else:
+                intervals.append((amount_range[0], amount_range[1], bit))
+
+        self.amounts = IntervalTree(intervals)
+
+    def candidates(self, facts: Dict[str, Any]) -> int:
+        """Bitset of rules whose every condition holds for these facts"""
+        mask = self.all_mask
+        for name in EXACT_FIELDS:
+            mask &= self.index[name].get(facts.get(name), 0) | self.wildcard[name]
+            if not mask:
+                return 0
+        amount = facts.get('amount')
+        if amount is None:
+            return mask & self.amount_wildcard
+        return mask & (self.amounts.stab(amount) | self.amount_wildcard)
+
+def statement_facts(parsed_data: Dict, sender: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Matchable facts per statement: account, BIC, currency, largest single amount, sender"""
+    for statement in parsed_data.get('statements', []):
+        transactions = statement.get('transactions', [])
+        amounts = []
+        for tx in transactions:
+            try:
+                amounts.append(abs(float(tx.get('amount') or 0)))
+            except (TypeError, ValueError):
+                continue
+        currency = statement.get('currency') or next(
+            (tx.get('currency') for tx in transactions if tx.get('currency')), None
+        )
+        yield {
+            'account': normalize('account', statement.get('account_id')),
+            'bic': normalize('bic', statement.get('bic')),
+            'currency': normalize('currency', currency),
+            'sender': normalize('sender', sender),
+            'amount': max(amounts) if amounts else None
+        }
+
+class RoutingRulesEngine:
+    """
+    🎯 Evaluates content rules against parsed files, reloading the rules file when it changes.
+    """
+
+    def __init__(self, routing_engine, rules_path: Optional[str] = None, check_interval: float = 5.0):
+        self.routing_engine = routing_engine
+        self.rules_path = rules_path
+        self.check_interval = check_interval
+        self._compiled = CompiledRuleSet([])
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        if rules_path:
+            self.maybe_reload(force=True)
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._compiled.rules)
+
+    def load(self, rules: List[Dict]):
+        """Compile and swap in a new rule list"""
+        compiled = CompiledRuleSet([RoutingRule.from_dict(rule, i) for i, rule in enumerate(rules)])
+        self._compiled = compiled
+        logger.info(f"🧭 Loaded {len(compiled.rules)} content routing rules")
+
+    def maybe_reload(self, force: bool = False):
+        """Re-read the rules file if it changed (checked at most every check_interval seconds)"""
+        if not self.rules_path:
+            return
+        now = time.time()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.rules_path).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime == self._mtime and not force:
+                return
+            try:
+                with open(self.rules_path, 'r', encoding='utf-8') as f:
+                    self.load(json.load(f).get('rules', []))
+                self._mtime = mtime
+            except Exception as e:
+                logger.error(f"❌ Failed to reload routing rules from {self.rules_path}, keeping previous rules: {e}")
+                self._mtime = mtime
+
+    def evaluate(self, parsed_data: Dict, file_type: str, sender: Optional[str] = None) -> Optional[RuleMatch]:
+        """Best matching rule across the file's statements (lowest order wins)"""
+        self.maybe_reload()
+        compiled = self._compiled
+        if not compiled.rules:
+            return None
+
+        file_type = file_type.replace('.', '').upper()
+        best = None
+        for facts in statement_facts(parsed_data, sender):
+            mask = compiled.candidates(facts)
+            while mask:
+                lowest = mask & -mask
+                number = lowest.bit_length() - 1
+                if best is not None and number >= best[0]:
+                    break
+                rule = compiled.rules[number]
+                routing_code = self._resolve(rule, file_type)
+                if routing_code is not None:
+                    best = (number, rule, routing_code, facts)
+                    break
+                mask ^= lowest
+
+        if best is None:
+            return None
+        _, rule, routing_code, facts = best
+        return RuleMatch(
+            rule=rule,
+            routing_code=routing_code,
+            priority=rule.priority,
+            facts=facts,
+            explanation=rule.explain(facts)
+        )
+
+    def _resolve(self, rule: RoutingRule, file_type: str) -> Optional[RoutingCode]:
+        """Routing code for this rule and file type, if the route exists"""
+        parts = rule.routing_code.split('-')
+        if len(parts) == 2:
+            parts.append(file_type)
+        if len(parts) != 3:
+            return None
+        routing_code = RoutingCode.of(*parts)
+        return routing_code if self.routing_engine.validate_routing_code(routing_code) else None
@@ -0,0 +1,244 @@
+"""
+⏱️ Helix Priority Scheduler - Feeds the file processing workers
+CRITICAL treasury files jump the queue, LOW files still get their turn.
+
+Features:
+- Priority queue per department, ordered by an aged sort key
+- Aging: every priority level is worth `aging_seconds` of waiting time
+- Bank cut-off deadlines pull work forward as the cut-off approaches
+- Per-department concurrency and rate quotas (token bucket)
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from routing import Priority
+
+PRIORITY_RANK = {
+    Priority.LOW: 0,
+    Priority.NORMAL: 1,
+    Priority.HIGH: 2,
+    Priority.CRITICAL: 3
+}
+
+DEFAULT_DEPARTMENT = 'UNROUTED'
+
+@dataclass
+class ScheduledTask:
+    """A unit of work waiting for (or held by) a processing worker"""
+    task_id: str
+    department: str
+    priority: Priority
+    payload: Any
+    enqueued_at: float
+    deadline: Optional[float] = None
+    sort_key: float = 0.0
+    started_at: Optional[float] = None
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent in the queue before a worker picked the task up"""
+        return (self.started_at or time.time()) - self.enqueued_at
+
+@dataclass
+class DepartmentQuota:
+    """Concurrency and rate limits for one department"""
+    max_concurrent: Optional[int] = None
+    rate_per_minute: Optional[float] = None
+    burst: int = 1
+    in_flight: int = 0
+    tokens: float = field(default=0.0, repr=False)
+    refilled_at: float = field(default=0.0, repr=False)
+
+    def __post_init__(self):
+        self.tokens = float(max(self.burst, 1))
+        self.refilled_at = time.time()
+
+    def refill(self, now: float):
+        if self.rate_per_minute:
+            elapsed = now - self.refilled_at
+            self.tokens = min(float(max(self.burst, 1)), self.tokens + elapsed * self.rate_per_minute / 60.0)
+        self.refilled_at = now
+
+    def available(self, now: float) -> bool:
+        if self.max_concurrent is not None and self.in_flight >= self.max_concurrent:
+            return False
+        if self.rate_per_minute:
+            self.refill(now)
+            return self.tokens >= 1.0
+        return True
+
+    def seconds_until_token(self) -> float:
+        if not self.rate_per_minute or self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) * 60.0 / self.rate_per_minute
+
+    def acquire(self):
+        self.in_flight += 1
+        if self.rate_per_minute:
+            self.tokens -= 1.0
+
+    def release(self):
+        self.in_flight = max(0, self.in_flight - 1)
+
+class PriorityScheduler:
+    """
+    🏦 Priority queue with aging, deadlines and per-department quotas.
+    Each department keeps its own heap; `get()` picks the best head among
+    departments that still have quota, so a blocked department never stalls the rest.
+    """
+
+    def __init__(self, aging_seconds: float = 30.0, deadline_lead_seconds: float = 300.0,
+                 quotas: Optional[Dict[str, DepartmentQuota]] = None,
+                 cutoffs: Optional[Dict[str, str]] = None):
+        self.aging_seconds = aging_seconds
+        self.deadline_lead_seconds = deadline_lead_seconds
+        self.quotas: Dict[str, DepartmentQuota] = quotas or {}
+        self.cutoffs: Dict[str, str] = cutoffs or {}
+
+        self._queues: Dict[str, List[Tuple[float, int, ScheduledTask]]] = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    @classmethod
+    def from_departments(cls, departments: Dict[str, Dict], **kwargs) -> 'PriorityScheduler':
+        """Build quotas and cut-offs from the routing engine's department config"""
+        quotas = {}
+        cutoffs = {}
+        for dept_code, dept_info in departments.items():
+            quota = dept_info.get('quota')
+            if quota:
+                quotas[dept_code] = DepartmentQuota(**quota)
+            if dept_info.get('cutoff'):
+                cutoffs[dept_code] = dept_info['cutoff']
+        return cls(quotas=quotas, cutoffs=cutoffs, **kwargs)
+
+    def submit(self, payload: Any, department: Optional[str] = None,
+               priority: Priority = Priority.NORMAL, deadline: Optional[float] = None,
+               task_id: Optional[str] = None) -> ScheduledTask:
+        """Queue work for the processing workers"""
+        department = department or DEFAULT_DEPARTMENT
+        now = time.time()
+        if deadline is None:
+            deadline = self.next_cutoff(department, now)
+
+        task = ScheduledTask(
+            task_id=task_id or str(uuid.uuid4()),
+            department=department,
+            priority=priority,
+            payload=payload,
+            enqueued_at=now,
+            deadline=deadline
+        )
+        task.sort_key = self._sort_key(task)
+
+        with self._condition:
+            heapq.heappush(self._queues.setdefault(department, []), (task.sort_key, next(self._counter), task))
+            self._condition.notify()
+        return task
+
+    def get(self, timeout: Optional[float] = None) -> Optional[ScheduledTask]:
+        """Take the most urgent task whose department has quota left (blocks until one is ready)"""
+        end = None if timeout is None else time.time() + timeout
+
+        with self._condition:
+            while not self._closed:
+                now = time.time()
+                best_dept = None
+                best_key = None
+                retry_in = None
+
+                for dept, heap in self._queues.items():
+                    if not heap:
+                        continue
+                    quota = self.quotas.get(dept)
+                    if quota is not None and not quota.available(now):
+                        wait = quota.seconds_until_token()
+                        if wait > 0:
+                            retry_in = wait if retry_in is None else min(retry_in, wait)
+                        continue
+                    if best_key is None or heap[0][0] < best_key:
+                        best_dept = dept
+                        best_key = heap[0][0]
+
+                if best_dept is not None:
+                    _, _, task = heapq.heappop(self._queues[best_dept])
+                    quota = self.quotas.get(best_dept)
+                    if quota is not None:
+                        quota.acquire()
+                    task.started_at = now
+                    return task
+
+                wait = retry_in
+                if end is not None:
+                    remaining = end - now
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+        return None
+
+    def task_done(self, task: ScheduledTask):
+        """Release the department's concurrency slot held by a finished task"""
+        with self._condition:
+            quota = self.quotas.get(task.department)
+            if quota is not None:
+                quota.release()
+            self._condition.notify_all()
+
+    def close(self):
+        """Wake all waiting workers and stop handing out tasks"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def qsize(self) -> int:
+        with self._condition:
+            return sum(len(heap) for heap in self._queues.values())
+
+    def depths(self) -> Dict[str, int]:
+        """Queue depth per department for dashboards"""
+        with self._condition:
+            return {dept: len(heap) for dept, heap in self._queues.items() if heap}
+
+    def in_flight(self) -> Dict[str, int]:
+        with self._condition:
+            return {dept: quota.in_flight for dept, quota in self.quotas.items() if quota.in_flight}
+
+    def next_cutoff(self, department: str, now: Optional[float] = None) -> Optional[float]:
+        """Epoch time of the department's next bank cut-off (local 'HH:MM'), if configured"""
+        cutoff = self.cutoffs.get(department)
+        if not cutoff:
+            return None
+        now_dt = datetime.fromtimestamp(now if now is not None else time.time())
+        hour, minute = (int(part) for part in cutoff.split(':'))
+        deadline = now_dt.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if deadline <= now_dt:
+            deadline += timedelta(days=1)
+        return deadline.timestamp()
+
+    def queue_key(self, department: Optional[str], priority: Priority, enqueued_at: Optional[float] = None,
+                  deadline: Optional[float] = None) -> float:
+        """
+        Sort key for work queued now (or at `enqueued_at`) - lower runs first. Each priority
+        level is worth `aging_seconds` of waiting, so a LOW task overtakes newer CRITICAL
+        work once it has waited 3 levels' worth; cut-offs pull work forward. The key never
+        changes, so queues outside this process (the shared work queue) order by it too.
+        """
+        enqueued_at = time.time() if enqueued_at is None else enqueued_at
+        if deadline is None:
+            deadline = self.next_cutoff(department or DEFAULT_DEPARTMENT, enqueued_at)
+        key = enqueued_at - PRIORITY_RANK[priority] * self.aging_seconds
+        if deadline is not None:
+            key = min(key, deadline - self.deadline_lead_seconds)
+        return key
+
+    def _sort_key(self, task: ScheduledTask) -> float:
+        return self.queue_key(task.department, task.priority, task.enqueued_at, task.deadline)
@@ -0,0 +1,40 @@
+"""
+🧵 Helix Background Services - SFTP poller and processing workers, without the web server
+Runs next to the web workers (gunicorn 'app:create_app()'), which record uploads and
+put them on the shared work queue; this process leases tasks from it, polls SFTP and
+processes files. Run as many as needed: they elect one SFTP poller between them
+(POLLER_LEADER_LOCK) and all lease work. `python app.py` still runs everything
+in one process for development.
+
+    python services.py
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+STOP_TIMEOUT_SECONDS = float(os.getenv("SERVICES_STOP_TIMEOUT_SECONDS", "30"))
+
+def main() -> int:
+    import app as helix
+
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    helix.start_background_services()
+    logger.info("🧵 Background services running (SIGTERM to stop)")
+    stop.wait()
+
+    # Finish the files in hand, then hand poller leadership to the next candidate;
+    # leased tasks not yet started go back to the work queue for the remaining processes
+    logger.info(f"👋 Stopping background services (up to {STOP_TIMEOUT_SECONDS:.0f}s for running files)")
+    helix.stop_background_services(STOP_TIMEOUT_SECONDS)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+📈 Helix Shared Metrics - One set of dashboard numbers for every gunicorn worker
+Counters, gauges and event rings live in a memory-mapped file (/dev/shm when available),
+so all workers and threads see the same totals.
+
+Layout: a small file header followed by fixed-size shards. Each process claims its own
+shard and is the only writer to it (threads in the process serialize on a local lock),
+so updates never contend across processes. Every shard carries a sequence counter
+(seqlock): the writer makes it odd while updating and even when done, readers copy
+the shard and retry if the counter moved. Readers merge all shards:
+- counters are summed
+- gauges are last-writer-wins by timestamp
+- activity / error rings and in-flight files are merged by time
+Shards of processes that exited are reclaimed by new processes with their totals kept;
+their in-flight files are dropped (and hidden from readers as soon as the process is gone).
+Time-bucketed statistics live in their own segment (see rollups.py).
+"""
+
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'HLXMETR1'
+FILE_HEADER = struct.Struct('<8sIIQ')            # magic, layout version, shards, shard size
+FILE_HEADER_SIZE = 64
+LAYOUT_VERSION = 2
+
+COUNTERS = (
+    'files_processed', 'files_succeeded', 'files_failed',
+    'transactions', 'amount', 'sftp_polls',
+)
+FILE_TYPES = ('MT940', 'CAMT.053', 'BAI2', 'CSV', 'OTHER')
+GAUGES = ('sftp_status', 'sftp_files_found', 'sftp_last_poll')
+SFTP_STATUS_CODES = ('Unknown', 'Connected', 'Error')
+
+TIMES_SLOTS = 20
+ACTIVITY_SLOTS = 50
+ERROR_SLOTS = 10
+CURRENT_SLOTS = 32
+TEXT_SLOT_SIZE = 1024
+TEXT_HEADER = struct.Struct('<dI4x')            # timestamp, payload length
+
+SHARD_HEADER = struct.Struct('<QQ')             # seqlock counter, owner pid
+DOUBLE = struct.Struct('<d')
+HEAD = struct.Struct('<Q')
+PAIR = struct.Struct('<dd')
+
+def _layout():
+    """Byte offsets of every section inside a shard"""
+    offsets = {}
+    position = SHARD_HEADER.size
+    sections = (
+        ('counters', DOUBLE.size * (len(COUNTERS) + len(FILE_TYPES))),
+        ('gauges', PAIR.size * len(GAUGES)),
+        ('times', HEAD.size + PAIR.size * TIMES_SLOTS),
+        ('activities', HEAD.size + TEXT_SLOT_SIZE * ACTIVITY_SLOTS),
+        ('errors', HEAD.size + TEXT_SLOT_SIZE * ERROR_SLOTS),
+        ('current', TEXT_SLOT_SIZE * CURRENT_SLOTS),
+    )
+    for name, size in sections:
+        offsets[name] = position
+        position += size
+    return offsets, (position + 63) // 64 * 64
+
+OFFSETS, SHARD_SIZE = _layout()
+COUNTER_INDEX = {name: i for i, name in enumerate(COUNTERS + tuple(f"type:{t}" for t in FILE_TYPES))}
+GAUGE_INDEX = {name: i for i, name in enumerate(GAUGES)}
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def default_metrics_path() -> str:
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else '/tmp/helix_state'
+    return os.path.join(base, 'helix_metrics')
+
+class ShardedSegment:
+    """
+    🧱 Memory-mapped file of fixed-size shards with one writer process per shard.
+    Shard bytes 0-15 hold the seqlock counter and the owning pid; the rest is the caller's layout.
+    `volatile` lists (start, length) byte ranges of a shard that describe its process's live
+    work; they are zeroed when a dead process's shard is reclaimed, totals are kept.
+    """
+
+    def __init__(self, path: str, shard_size: int, shards: int, magic: bytes = MAGIC,
+                 version: int = LAYOUT_VERSION, volatile: Tuple[Tuple[int, int], ...] = ()):
+        self.path = path
+        self.shard_size = shard_size
+        self.shards = shards
+        self.volatile = volatile
+        self._size = FILE_HEADER_SIZE + shard_size * shards
+        self._lock = threading.Lock()
+        self._pid = None
+        self._base = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o660)
+        expected = (magic, version, shards, shard_size)
+        with self._file_lock():
+            header = os.pread(self._fd, FILE_HEADER.size, 0)
+            if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header) != expected:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, FILE_HEADER.pack(*expected), 0)
+                logger.info(f"📈 Initialized shared metrics segment {path} ({self._size} bytes)")
+        self.map = mmap.mmap(self._fd, self._size)
+
+    @contextmanager
+    def _file_lock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _claim_shard(self):
+        """Take a free shard (or one left behind by a dead process) for this process"""
+        pid = os.getpid()
+        with self._file_lock():
+            for index in range(self.shards):
+                base = FILE_HEADER_SIZE + index * self.shard_size
+                seq, owner = SHARD_HEADER.unpack_from(self.map, base)
+                if owner == 0 or owner == pid or not _pid_alive(owner):
+                    seq += seq & 1   # a writer that died mid-update left it odd
+                    if owner not in (0, pid) and self.volatile:
+                        SHARD_HEADER.pack_into(self.map, base, seq + 1, pid)
+                        for start, length in self.volatile:
+                            self.map[base + start:base + start + length] = bytes(length)
+                        seq += 2
+                    SHARD_HEADER.pack_into(self.map, base, seq, pid)
+                    self._base, self._pid = base, pid
+                    return
+        raise RuntimeError(f"All {self.shards} shards of {self.path} are in use - raise the shard count")
+
+    @contextmanager
+    def write(self):
+        """Seqlock write section on this process's shard; yields the shard's base offset"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._claim_shard()
+            base = self._base
+            seq, = HEAD.unpack_from(self.map, base)
+            HEAD.pack_into(self.map, base, seq + 1)
+            try:
+                yield base
+            finally:
+                HEAD.pack_into(self.map, base, seq + 2)
+
+    def read_shards(self, start: int = 0, length: Optional[int] = None) -> Iterator[Tuple[bytes, int]]:
+        """Consistent copy of every shard that was ever written (or of bytes start..start+length), with its owner pid"""
+        length = self.shard_size - start if length is None else length
+        for index in range(self.shards):
+            base = FILE_HEADER_SIZE + index * self.shard_size
+            region = self._read_shard(base, start, length)
+            if region is not None:
+                yield region
+
+    def write_count(self) -> int:
+        """Completed writes across all shards - grows on every change, usable as a version"""
+        total = 0
+        for index in range(self.shards):
+            seq, = HEAD.unpack_from(self.map, FILE_HEADER_SIZE + index * self.shard_size)
+            total += seq // 2
+        return total
+
+    def _read_shard(self, base: int, start: int, length: int) -> Optional[Tuple[bytes, int]]:
+        for _ in range(100):
+            seq, owner = SHARD_HEADER.unpack_from(self.map, base)
+            if seq == 0:
+                return None
+            if seq & 1:
+                time.sleep(0)
+                continue
+            region = self.map[base + start:base + start + length]
+            if HEAD.unpack_from(self.map, base)[0] == seq:
+                return region, owner
+        return self.map[base + start:base + start + length], owner
+
+    def close(self):
+        self.map.close()
+        os.close(self._fd)
+
+class SharedMetrics:
+    """
+    🧮 Cross-process dashboard metrics. Writers update only their own shard;
+    `snapshot()` returns the merged view of all shards.
+    """
+
+    def __init__(self, path: Optional[str] = None, shards: int = 16):
+        self.path = path or default_metrics_path()
+        self.shards = shards
+        # In-flight files die with their process; everything else is kept on reclaim
+        self._segment = ShardedSegment(self.path, SHARD_SIZE, shards,
+                                       volatile=((OFFSETS['current'], TEXT_SLOT_SIZE * CURRENT_SLOTS),))
+        self._map = self._segment.map
+        self._write = self._segment.write
+
+    # ---- Writers ----
+    def add(self, **increments):
+        """Add to named counters (sftp_polls=1, ...)"""
+        with self._write() as base:
+            for name, value in increments.items():
+                offset = base + OFFSETS['counters'] + DOUBLE.size * COUNTER_INDEX[name]
+                current, = DOUBLE.unpack_from(self._map, offset)
+                DOUBLE.pack_into(self._map, offset, current + value)
+
+    def set_gauges(self, **values):
+        with self._write() as base:
+            now = time.time()
+            for name, value in values.items():
+                PAIR.pack_into(self._map, base + OFFSETS['gauges'] + PAIR.size * GAUGE_INDEX[name], float(value), now)
+
+    def record_processing(self, processing_time: float, transactions: int, amount: float,
+                          success: bool, file_type: str):
+        """All counters and the timing ring for one finished file in a single write"""
+        now = time.time()
+        with self._write() as base:
+            counters = base + OFFSETS['counters']
+            for name, value in (('files_processed', 1), ('files_succeeded' if success else 'files_failed', 1),
+                                ('transactions', transactions), ('amount', amount),
+                                (f"type:{file_type if file_type in FILE_TYPES else 'OTHER'}", 1)):
+                offset = counters + DOUBLE.size * COUNTER_INDEX[name]
+                current, = DOUBLE.unpack_from(self._map, offset)
+                DOUBLE.pack_into(self._map, offset, current + value)
+
+            times = base + OFFSETS['times']
+            head, = HEAD.unpack_from(self._map, times)
+            PAIR.pack_into(self._map, times + HEAD.size + PAIR.size * (head % TIMES_SLOTS), now, processing_time)
+            HEAD.pack_into(self._map, times, head + 1)
+
+    def append_activity(self, record: Dict):
+        self._append_text('activities', ACTIVITY_SLOTS, record)
+
+    def append_error(self, record: Dict):
+        self._append_text('errors', ERROR_SLOTS, record)
+
+    def set_current(self, key: str, record: Dict):
+        """Register an in-flight file (replaces an existing entry with the same key)"""
+        payload = self._encode(dict(record, key=key))
+        with self._write() as base:
+            free = None
+            for i in range(CURRENT_SLOTS):
+                offset = base + OFFSETS['current'] + TEXT_SLOT_SIZE * i
+                entry = self._read_text(self._map, offset)
+                if entry is None:
+                    free = offset if free is None else free
+                elif entry.get('key') == key:
+                    free = offset
+                    break
+            if free is None:
+                logger.warning(f"⚠️ No free in-flight slot for {key} - not shown on the dashboard")
+                return
+            self._write_text(free, time.time(), payload)
+
+    def pop_current(self, key: str) -> Optional[Dict]:
+        """Remove and return this process's in-flight entry for `key`"""
+        with self._write() as base:
+            for i in range(CURRENT_SLOTS):
+                offset = base + OFFSETS['current'] + TEXT_SLOT_SIZE * i
+                entry = self._read_text(self._map, offset)
+                if entry is not None and entry.get('key') == key:
+                    TEXT_HEADER.pack_into(self._map, offset, 0.0, 0)
+                    entry.pop('key', None)
+                    return entry
+        return None
+
+    # ---- Reader ----
+    @property
+    def version(self) -> int:
+        """Changes whenever any process writes; cheap enough to poll"""
+        return self._segment.write_count()
+
+    def snapshot(self) -> Dict:
+        """Merged, consistent view of every shard"""
+        counters = {name: 0.0 for name in COUNTER_INDEX}
+        gauges = {name: (0.0, 0.0) for name in GAUGES}
+        times, activities, errors, current = [], [], [], {}
+
+        for shard, owner in self._segment.read_shards():
+            for name, i in COUNTER_INDEX.items():
+                counters[name] += DOUBLE.unpack_from(shard, OFFSETS['counters'] + DOUBLE.size * i)[0]
+            for name, i in GAUGE_INDEX.items():
+                value, ts = PAIR.unpack_from(shard, OFFSETS['gauges'] + PAIR.size * i)
+                if ts > gauges[name][1]:
+                    gauges[name] = (value, ts)
+
+            head, = HEAD.unpack_from(shard, OFFSETS['times'])
+            for i in range(min(head, TIMES_SLOTS)):
+                times.append(PAIR.unpack_from(shard, OFFSETS['times'] + HEAD.size + PAIR.size * i))
+
+            for section, slots, target in (('activities', ACTIVITY_SLOTS, activities), ('errors', ERROR_SLOTS, errors)):
+                for i in range(slots):
+                    offset = OFFSETS[section] + HEAD.size + TEXT_SLOT_SIZE * i
+                    entry = self._read_text(shard, offset)
+                    if entry is not None:
+                        target.append((TEXT_HEADER.unpack_from(shard, offset)[0], entry))
+
+            # Files of a crashed process are not in flight, even before its shard is reclaimed
+            for i in range(CURRENT_SLOTS if _pid_alive(owner) else 0):
+                entry = self._read_text(shard, OFFSETS['current'] + TEXT_SLOT_SIZE * i)
+                if entry is not None:
+                    current[entry.pop('key')] = entry
+
+        times.sort()
+        activities.sort(key=lambda item: item[0])
+        errors.sort(key=lambda item: item[0])
+        return {
+            'counters': counters,
+            'gauges': {name: value for name, (value, _) in gauges.items()},
+            'processing_times': [ms for _, ms in times[-TIMES_SLOTS:]],
+            'activities': [entry for _, entry in activities[-ACTIVITY_SLOTS:]],
+            'errors': [entry for _, entry in errors[-ERROR_SLOTS:]],
+            'current': current
+        }
+
+    def close(self):
+        self._segment.close()
+
+    # ---- Internals ----
+    @staticmethod
+    def _encode(record: Dict) -> bytes:
+        payload = json.dumps(record, ensure_ascii=False).encode('utf-8')
+        limit = TEXT_SLOT_SIZE - TEXT_HEADER.size
+        if len(payload) > limit and 'message' in record:
+            overflow = len(payload) - limit
+            message = record['message'].encode('utf-8')[:-(overflow + 4)].decode('utf-8', 'ignore') + '…'
+            payload = json.dumps(dict(record, message=message), ensure_ascii=False).encode('utf-8')
+        return payload[:limit]
+
+    @staticmethod
+    def _read_text(buffer, offset: int) -> Optional[Dict]:
+        ts, length = TEXT_HEADER.unpack_from(buffer, offset)
+        if not ts or not length:
+            return None
+        start = offset + TEXT_HEADER.size
+        try:
+            return json.loads(bytes(buffer[start:start + length]))
+        except ValueError:
+            return None
+
+    def _write_text(self, offset: int, ts: float, payload: bytes):
+        start = offset + TEXT_HEADER.size
+        self._map[start:start + len(payload)] = payload
+        TEXT_HEADER.pack_into(self._map, offset, ts, len(payload))
+
+    def _append_text(self, section: str, slots: int, record: Dict):
+        payload = self._encode(record)
+        with self._write() as base:
+            ring = base + OFFSETS[section]
+            head, = HEAD.unpack_from(self._map, ring)
+            self._write_text(ring + HEAD.size + TEXT_SLOT_SIZE * (head % slots), time.time(), payload)
+            HEAD.pack_into(self._map, ring, head + 1)
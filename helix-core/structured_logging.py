@@ -0,0 +1,174 @@
+"""
+🪵 Helix Structured Logging - Log calls never wait on stdout
+Every record goes through a bounded in-memory queue; a single background thread
+formats it and writes it to stdout, so a slow Docker log driver can no longer
+block the SFTP poller or the workers.
+
+- Structured fields: pass them as `extra={...}`; they become JSON keys (LOG_FORMAT=json)
+  or trailing key=value pairs (LOG_FORMAT=text)
+- Lazy formatting: use %-style arguments - they are only rendered if the record is kept
+- Hot call sites opt into `extra={'log_every': N}` (keep 1 in N) or
+  `extra={'log_rate': per_second}` (token bucket); suppressed counts ride on the next record
+- When the queue is full records are dropped (and counted) instead of blocking
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Attributes every LogRecord has; everything else on a record is a structured field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+_CONTROL_FIELDS = frozenset({'log_every', 'log_rate'})
+
+def record_fields(record: logging.LogRecord) -> Dict:
+    """Structured fields attached to a record via `extra`"""
+    return {
+        key: value for key, value in vars(record).items()
+        if key not in _RECORD_ATTRIBUTES and key not in _CONTROL_FIELDS
+    }
+
+class CallSiteSampler(logging.Filter):
+    """
+    🎚️ Per-call-site sampling and rate limiting for hot loops.
+    Records without `log_every` / `log_rate` pass untouched.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._sites: Dict[Tuple[str, int], list] = {}   # (pathname, lineno) -> [seen, tokens, last, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, 'log_every', None)
+        rate = getattr(record, 'log_rate', None)
+        if every is None and rate is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            burst = max(float(rate or 0), 1.0)   # rates below 1/s still let one record through
+            site = self._sites.get((record.pathname, record.lineno))
+            if site is None:
+                site = self._sites[(record.pathname, record.lineno)] = [0, burst, now, 0]
+            site[0] += 1
+            if every is not None:
+                keep = (site[0] - 1) % max(int(every), 1) == 0
+            else:
+                site[1] = min(burst, site[1] + (now - site[2]) * rate)
+                site[2] = now
+                keep = site[1] >= 1
+                if keep:
+                    site[1] -= 1
+            if not keep:
+                site[3] += 1
+                return False
+            if site[3]:
+                record.suppressed = site[3]
+                site[3] = 0
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller: a full queue drops the record"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the %-arguments here (the caller's objects may change later);
+        # the formatter and any traceback rendering run on the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, thread plus structured fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """The classic '[Helix]' line with structured fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s [Helix] %(levelname)s: %(message)s')
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = record_fields(record)
+        if fields:
+            line += ' | ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+class _DropReporter(logging.Handler):
+    """Runs on the listener thread after each write; reports records dropped upstream"""
+
+    def __init__(self, queue_handler: DroppingQueueHandler, target: logging.Handler):
+        super().__init__()
+        self.queue_handler = queue_handler
+        self.target = target
+
+    def emit(self, record: logging.LogRecord):
+        dropped = self.queue_handler.dropped
+        if dropped:
+            self.queue_handler.dropped -= dropped
+            self.target.handle(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"⚠️ Log queue full - dropped {dropped} records", 'dropped': dropped
+            }))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging(level: str = 'INFO', log_format: str = 'text', queue_size: int = 10000,
+                      stream=None) -> logging.handlers.QueueListener:
+    """Route the root logger through a bounded queue to a background stdout writer"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter() if log_format.lower() == 'json' else TextFormatter())
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.addFilter(CallSiteSampler())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(
+        queue_handler.queue, output, _DropReporter(queue_handler, output), respect_handler_level=True
+    )
+    _listener.start()
+    _listener._thread.name = 'helix-log-writer'
+    return _listener
+
+def shutdown_logging():
+    """Flush the queue and stop the writer thread (registered with atexit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
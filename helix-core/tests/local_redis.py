@@ -0,0 +1,199 @@
+"""Stand-in Redis server for the Redis-backed work queue and job store tests"""
+
+import os
+import threading
+import time
+
+import pytest
+
+
+class LocalRedis:
+    """Stand-in for a Redis server: the commands RedisWorkQueue and RedisJobStore use, with key expiry"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.RLock()
+
+    def _live(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        with self.lock:
+            if nx and self._live(key) is not None:
+                return None
+            self.data[key] = str(value)
+            self.expires.pop(key, None)
+            if px:
+                self.expires[key] = time.time() + px / 1000
+            return True
+
+    def get(self, key):
+        with self.lock:
+            return self._live(key)
+
+    def mget(self, keys):
+        with self.lock:
+            return [self._live(key) for key in keys]
+
+    def exists(self, key):
+        with self.lock:
+            return int(self._live(key) is not None)
+
+    def delete(self, key):
+        with self.lock:
+            self.expires.pop(key, None)
+            return int(self.data.pop(key, None) is not None)
+
+    def pexpire(self, key, ms):
+        with self.lock:
+            if self._live(key) is None:
+                return False
+            self.expires[key] = time.time() + ms / 1000
+            return True
+
+    def expire(self, key, seconds):
+        return self.pexpire(key, seconds * 1000)
+
+    def pttl(self, key):
+        with self.lock:
+            if self._live(key) is None:
+                return -2
+            return int((self.expires[key] - time.time()) * 1000) if key in self.expires else -1
+
+    def hset(self, key, mapping):
+        with self.lock:
+            self.data.setdefault(key, {}).update({field: str(value) for field, value in mapping.items()})
+
+    def hget(self, key, field):
+        with self.lock:
+            return (self._live(key) or {}).get(field)
+
+    def hgetall(self, key):
+        with self.lock:
+            return dict(self._live(key) or {})
+
+    def hincrby(self, key, field, amount):
+        with self.lock:
+            row = self.data.setdefault(key, {})
+            row[field] = str(int(row.get(field, 0)) + amount)
+            return int(row[field])
+
+    def zadd(self, key, mapping, nx=False):
+        with self.lock:
+            zset = self.data.setdefault(key, {})
+            added = 0
+            for member, score in mapping.items():
+                if nx and member in zset:
+                    continue
+                added += member not in zset
+                zset[member] = float(score)
+            return added
+
+    def zrem(self, key, *members):
+        with self.lock:
+            return sum(self.data.get(key, {}).pop(member, None) is not None for member in members)
+
+    def _sorted(self, key):
+        return sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    @staticmethod
+    def _score_bound(bound):
+        bound = str(bound)
+        return (float(bound[1:]), True) if bound.startswith('(') else (float(bound), False)
+
+    def zrangebyscore(self, key, low, high, start=None, num=None, withscores=False):
+        (low, low_open), (high, high_open) = self._score_bound(low), self._score_bound(high)
+        with self.lock:
+            items = [(member, score) for member, score in self._sorted(key)
+                     if (low < score if low_open else low <= score) and (score < high if high_open else score <= high)]
+            items = items[start or 0:(start or 0) + num] if num is not None else items
+            return items if withscores else [member for member, _ in items]
+
+    @staticmethod
+    def _lex_match(member, low, high):
+        above = low == '-' or (member > low[1:] if low[0] == '(' else member >= low[1:])
+        below = high == '+' or (member < high[1:] if high[0] == '(' else member <= high[1:])
+        return above and below
+
+    def zrangebylex(self, key, low, high, start=None, num=None):
+        with self.lock:
+            members = sorted(member for member in self.data.get(key, {}) if self._lex_match(member, low, high))
+            return members[start or 0:(start or 0) + num] if num is not None else members
+
+    def zrevrangebylex(self, key, high, low, start=None, num=None):
+        with self.lock:
+            members = sorted((member for member in self.data.get(key, {}) if self._lex_match(member, low, high)),
+                             reverse=True)
+            return members[start or 0:(start or 0) + num] if num is not None else members
+
+    def zrange(self, key, start, stop, withscores=False):
+        with self.lock:
+            items = self._sorted(key)[start:None if stop == -1 else stop + 1]
+            return items if withscores else [member for member, _ in items]
+
+    def zremrangebyscore(self, key, low, high):
+        with self.lock:
+            zset = self.data.get(key, {})
+            doomed = [member for member, score in zset.items() if float(low) <= score <= float(high)]
+            for member in doomed:
+                del zset[member]
+            return len(doomed)
+
+    def sadd(self, key, *members):
+        with self.lock:
+            members_set = self.data.setdefault(key, set())
+            added = len(set(members) - members_set)
+            members_set.update(members)
+            return added
+
+    def smembers(self, key):
+        with self.lock:
+            return set(self.data.get(key, set()))
+
+    def zrevrange(self, key, start, stop):
+        with self.lock:
+            return [member for member, _ in reversed(self._sorted(key))][start:stop + 1]
+
+    def zcard(self, key):
+        with self.lock:
+            return len(self.data.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        return LocalPipeline(self)
+
+    def close(self):
+        pass
+
+
+class LocalPipeline:
+    def __init__(self, server):
+        self.server = server
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        with self.server.lock:   # MULTI/EXEC: nothing interleaves
+            return [getattr(self.server, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+def redis_server():
+    """A real server when REDIS_URL is set, else the local stand-in"""
+    if not os.getenv('REDIS_URL'):
+        return LocalRedis()
+    redis = pytest.importorskip('redis')
+    client = redis.Redis.from_url(os.environ['REDIS_URL'], decode_responses=True)
+    for key in client.scan_iter('helix-test:*'):
+        client.delete(key)
+    return client
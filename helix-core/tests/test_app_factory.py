@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+HELIX_CORE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: importing app creates no files and starts no threads;
+# create_app() opens the shared state - no poller, workers or client libraries
+CHILD = r"""
+import io, json, os, sys, threading, time
+def state_files():
+    return sorted({name.split('-')[0] for name in os.listdir(sys.argv[2])})
+import app
+facts = {
+    'threads': sorted(thread.name for thread in threading.enumerate()),
+    'lazy_modules': [name for name in ('paramiko', 'mt940', 'pyrfc') if name in sys.modules],
+    'imported_files': state_files()
+}
+application = app.create_app()
+facts['created_files'] = state_files()
+facts['app_threads'] = sorted(thread.name for thread in threading.enumerate())
+client = application.test_client()
+facts['health'] = client.get('/health').status_code
+facts['dashboard_redirect'] = client.get('/dashboard').location
+
+from flask_jwt_extended import create_access_token
+with application.app_context():
+    headers = {'Authorization': 'Bearer ' + create_access_token(identity='admin', additional_claims={'role': 'admin'})}
+upload = client.post('/api/files/upload', headers=headers, content_type='multipart/form-data', data={
+    'file': (io.BytesIO(open('data/sample.mt940', 'rb').read()), 'statement.mt940'),
+    'routing_code': '{"department":"TREASURY","process":"CASHFLOW","file_type":"MT940"}'
+})
+job_url = '/api/files/jobs/' + upload.json['job_id']
+facts['queued_status'] = client.get(job_url, headers=headers).json['status']
+
+app.start_background_services()
+deadline = time.time() + 10
+while time.time() < deadline and client.get(job_url, headers=headers).json['status'] != 'completed':
+    time.sleep(0.05)
+facts['final_status'] = client.get(job_url, headers=headers).json['status']
+open(sys.argv[1], 'w').write(json.dumps(facts))
+"""
+
+
+def test_import_has_no_side_effects_and_services_pick_up_uploads(tmp_path):
+    state = tmp_path / 'state'
+    state.mkdir()
+    env = dict(
+        os.environ,
+        PYTHONPATH=HELIX_CORE,
+        JOB_STORE_PATH=str(state / 'jobs.db'),
+        AUDIT_JOURNAL_DIR=str(state / 'audit'),
+        METRICS_SHM_PATH=str(state / 'metrics'),
+        PIPELINE_METRICS_PATH=str(state / 'pipeline_metrics'),
+        ARCHIVE_DIR=str(state / 'archive'),
+        LOCAL_STAGING=str(state / 'staging'),
+        UPLOAD_DIR=str(state / 'uploads'),
+        UPLOAD_STAGING_DIR=str(state / 'upload_staging'),
+        WORK_QUEUE_URL='sqlite:' + str(state / 'queue.db'),
+        POLLER_LEADER_LOCK='file:' + str(state / 'poller.lock'),
+        SFTP_HOST='127.0.0.1', SFTP_PORT='1', LOG_LEVEL='WARNING'
+    )
+    facts_path = tmp_path / 'facts.json'
+    child = subprocess.run([sys.executable, '-c', CHILD, str(facts_path), str(state)], cwd=HELIX_CORE, env=env,
+                           capture_output=True, text=True, timeout=60)
+    assert child.returncode == 0, child.stderr[-2000:]
+    facts = json.loads(facts_path.read_text())
+
+    assert facts['threads'] == ['MainThread']
+    assert facts['imported_files'] == []
+    assert facts['lazy_modules'] == []
+    assert facts['app_threads'] == ['MainThread', 'helix-audit-journal', 'helix-job-store', 'helix-log-writer']
+    assert facts['created_files'] == ['archive', 'audit', 'jobs.db', 'metrics', 'metrics_rollups',
+                                      'pipeline_metrics', 'queue.db', 'staging', 'upload_staging', 'uploads']
+    assert facts['health'] == 200 and facts['dashboard_redirect'] == '/helix'
+    # Web-only: the upload waits on the work queue until background services run
+    assert facts['queued_status'] == 'queued'
+    assert facts['final_status'] == 'completed'
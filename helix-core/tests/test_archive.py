@@ -0,0 +1,69 @@
+import os
+
+from archive import ArchiveStore
+
+
+def _write(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+    return str(path)
+
+
+def test_archive_deduplicates_redeliveries(tmp_path):
+    store = ArchiveStore(str(tmp_path / 'archive'))
+    content = b':20:STARTUMS\n:25:12345678/0001\n' * 200
+
+    first = store.archive(_write(tmp_path / 'a.mt940', content), source='sftp')
+    second = store.archive(_write(tmp_path / 'b.mt940', content), source='sftp')
+
+    assert not first.deduplicated
+    assert second.deduplicated
+    assert first.digest == second.digest
+    assert first.compressed_size < first.size
+    assert os.path.exists(store.blob_path(first.digest))
+    assert store.stats()['blobs'] == 1
+    assert store.stats()['entries'] == 2
+
+    with store.open(first.digest) as f:
+        assert f.read() == content
+
+
+def test_archive_lookup_by_name(tmp_path):
+    store = ArchiveStore(str(tmp_path / 'archive'))
+    store.archive(_write(tmp_path / 'statement.xml', b'<Document/>'), original_name='statement.xml')
+
+    entries = store.lookup('statement.xml')
+    assert len(entries) == 1
+    assert store.get(entries[0].digest).original_name == 'statement.xml'
+
+
+def test_retention_removes_orphaned_blobs(tmp_path):
+    store = ArchiveStore(str(tmp_path / 'archive'), retention_days=30)
+    old = store.archive(_write(tmp_path / 'old.csv', b'date,amount\n'), processed_at=0)
+    new = store.archive(_write(tmp_path / 'new.csv', b'date,amount\n2024-01-01,5\n'))
+
+    assert store.apply_retention() == 1
+    assert not os.path.exists(store.blob_path(old.digest))
+    assert os.path.exists(store.blob_path(new.digest))
+    assert store.lookup('old.csv') == []
+
+
+def test_retention_racing_a_redelivery_keeps_the_blob(tmp_path):
+    # Two processes on one archive: retention in the other one lands between our first look and our write
+    ours = ArchiveStore(str(tmp_path / 'archive'), retention_days=30)
+    theirs = ArchiveStore(str(tmp_path / 'archive'), retention_days=30)
+    content = b'date,amount\n2024-01-01,5\n'
+    old = ours.archive(_write(tmp_path / 'old.csv', content), processed_at=0)
+
+    transaction = ours._transaction
+    def after_their_retention(fn):
+        assert theirs.apply_retention() == 1
+        return transaction(fn)
+    ours._transaction = after_their_retention
+
+    again = ours.archive(_write(tmp_path / 'again.csv', content))
+    assert again.digest == old.digest and not again.deduplicated
+    with ours.open(again.digest) as f:
+        assert f.read() == content
+    assert ours.stats()['blobs'] == 1
+    assert os.listdir(ours.tmp_dir) == []
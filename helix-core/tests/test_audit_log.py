@@ -0,0 +1,48 @@
+import glob
+import os
+
+from audit_log import AuditJournal, rebuild_history, replay
+from routing import AuditAction, HelixRoutingEngine, RoutingCode
+
+
+def test_journal_rebuilds_job_history(tmp_path):
+    journal = AuditJournal(str(tmp_path))
+    engine = HelixRoutingEngine(audit_journal=journal)
+
+    job = engine.create_job(RoutingCode.of('TREASURY', 'FOREX', 'CAMT053'), 'fx.xml', 512, 'auditor')
+    job.start_processing()
+    job.complete_processing()
+    assert journal.sync(timeout=5)
+    journal.close()
+
+    history = rebuild_history(str(tmp_path))
+    assert history[job.job_id] == job.audit_trail
+    assert [entry.action for entry in history[job.job_id]] == [
+        AuditAction.JOB_CREATED, AuditAction.PROCESSING_STARTED, AuditAction.PROCESSING_COMPLETED
+    ]
+
+
+def test_replay_stops_at_torn_record(tmp_path):
+    journal = AuditJournal(str(tmp_path))
+    engine = HelixRoutingEngine(audit_journal=journal)
+    job = engine.create_job(RoutingCode.of('HR', 'BENEFITS', 'CSV'), 'b.csv', 10, 'dev')
+    job.fail_processing('bad header')
+    journal.close()
+
+    segment = glob.glob(os.path.join(str(tmp_path), 'audit-*.log'))[0]
+    with open(segment, 'ab') as f:
+        f.write(b'\x40\x00\x00\x00\x00\x00\x00\x00{"torn')
+
+    assert len(list(replay(str(tmp_path)))) == 2
+
+
+def test_segments_rotate_by_size(tmp_path):
+    journal = AuditJournal(str(tmp_path), segment_bytes=200)
+    engine = HelixRoutingEngine(audit_journal=journal)
+    for i in range(5):
+        engine.create_job(RoutingCode.of('HR', 'PAYROLL', 'CSV'), f"p{i}.csv", 10, 'dev')
+        journal.sync(timeout=5)
+    journal.close()
+
+    assert len(glob.glob(os.path.join(str(tmp_path), 'audit-*.log'))) > 1
+    assert len(list(replay(str(tmp_path)))) == 5
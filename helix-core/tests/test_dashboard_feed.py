@@ -0,0 +1,56 @@
+import json
+
+from dashboard import DashboardData
+from dashboard_feed import DashboardFeed
+from shared_metrics import SharedMetrics
+
+
+def _payload(frame):
+    return json.loads(frame.split('data: ', 1)[1])
+
+
+def test_deltas_carry_only_changes_and_resume(tmp_path):
+    dashboard = DashboardData(SharedMetrics(str(tmp_path / 'metrics'), shards=2))
+    dashboard.add_activity('system', 'started')
+    feed = DashboardFeed(dashboard, history=2)
+
+    snapshot, version = feed.snapshot_frame()
+    assert _payload(snapshot)['recent_activities'][0]['message'] == 'started'
+    assert feed.refresh() is False
+
+    dashboard.start_processing('a.mt940', 'MT940', '💰')
+    dashboard.complete_processing('a.mt940', transactions=4, amount=10.0, processing_time=5)
+    assert feed.refresh() is True
+
+    frames, cursor = feed.frames_since(version)
+    delta = _payload(frames[0])
+    assert cursor == feed.version == delta['version']
+    assert [activity['message'] for activity in delta['activities']] == [
+        '💰 a.mt940 (MT940) completed successfully - 4 transactions, 10.00 total amount'
+    ]
+    assert delta['processing_stats']['total_transactions'] == 4
+    assert 'sftp_status' not in delta
+    assert feed.wait(cursor, timeout=0.01) == ([], cursor)
+
+    # Clients older than the retained log get a fresh snapshot instead
+    for i in range(3):
+        dashboard.add_activity('system', f"tick {i}")
+        feed.refresh()
+    assert feed.frames_since(version) is None
+    assert len(feed.frames_since(cursor + 1)[0]) == 2
+
+
+def test_views_are_serialized_once_per_version(tmp_path):
+    dashboard = DashboardData(SharedMetrics(str(tmp_path / 'metrics'), shards=2))
+    for i in range(40):
+        dashboard.add_activity('system', f"event {i}")
+
+    first = dashboard.view('dashboard')
+    assert dashboard.view('dashboard') is first
+    assert json.loads(first.body)['recent_activities'][-1]['message'] == 'event 39'
+    assert first.gzipped is not None and len(first.gzipped) < len(first.body)
+
+    dashboard.update_sftp_status('Connected', 3)
+    second = dashboard.view('dashboard')
+    assert second is not first and second.etag != first.etag
+    assert json.loads(dashboard.view('stats').body)['success_rate'] == 100.0
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from job_events import JobEventBus
+from job_store import SQLiteJobStore
+from routing import HelixRoutingEngine, RoutingCode
+
+
+def test_status_transitions_are_published_once():
+    bus = JobEventBus()
+    engine = HelixRoutingEngine(event_bus=bus)
+    job = engine.create_job(RoutingCode.of('HR', 'PAYROLL', 'CSV'), 'p.csv', 10, 'dev')
+    job.start_processing()
+    job.changed()  # no status change, no event
+    job.complete_processing()
+
+    events, cursor = bus.events_since(0)
+    assert [event.status for event in events] == ['uploaded', 'processing', 'completed']
+    assert events[-1].terminal and cursor == 3
+
+
+def test_waiters_wake_on_matching_event():
+    bus = JobEventBus()
+    engine = HelixRoutingEngine(event_bus=bus)
+    hr = engine.create_job(RoutingCode.of('HR', 'PAYROLL', 'CSV'), 'p.csv', 10, 'dev')
+    finance = engine.create_job(RoutingCode.of('FINANCE', 'PAYMENT', 'MT940'), 'f.mt940', 10, 'dev')
+
+    def finish():
+        time.sleep(0.05)
+        hr.complete_processing()
+        finance.fail_processing('bad')
+
+    threading.Thread(target=finish).start()
+    started = time.time()
+    events, cursor = bus.wait(bus.latest_seq, lambda event: event.department == 'FINANCE', timeout=5)
+    assert time.time() - started < 1
+    assert [(event.job_id, event.status) for event in events] == [(finance.job_id, 'failed')]
+    assert bus.wait(cursor, timeout=0.01) == ([], cursor)
+
+
+def test_changes_written_by_another_process_reach_waiters(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    store = SQLiteJobStore(path, flush_interval=0.05)
+    bus = JobEventBus(changes=store.changed_since, poll_interval=0.05, tracked_jobs=2)
+    here = HelixRoutingEngine(job_store=store, event_bus=bus)
+    elsewhere = HelixRoutingEngine(job_store=SQLiteJobStore(path, flush_interval=0.05))
+
+    # Our own job moves on before the store has its latest write: the older row is not replayed
+    ours = here.create_job(RoutingCode.of('HR', 'PAYROLL', 'CSV'), 'p.csv', 10, 'dev')
+    store.flush()
+    ours.start_processing()
+
+    job = elsewhere.create_job(RoutingCode.of('FINANCE', 'PAYMENT', 'MT940'), 'f.mt940', 10, 'worker')
+    def finish():
+        time.sleep(0.1)
+        job.complete_processing()
+    threading.Thread(target=finish).start()
+
+    seen, cursor = [], bus.latest_seq
+    deadline = time.time() + 5
+    while ('completed' not in seen) and time.time() < deadline:
+        events, cursor = bus.wait(cursor, lambda event: event.job_id == job.job_id, timeout=1)
+        seen += [event.status for event in events]
+    assert seen[-1] == 'completed' and seen.count('completed') == 1
+    assert [event.status for event in bus.events_since(0)[0] if event.job_id == ours.job_id] == ['uploaded', 'processing']
+    assert len(bus._last_status) == 2  # bounded, not one entry per job ever seen
@@ -0,0 +1,118 @@
+from job_store import InMemoryJobStore, RedisJobStore, SQLiteJobStore, store_from_url
+from local_redis import redis_server
+from routing import AuditAction, HelixRoutingEngine, ProcessingStatus, RoutingCode
+
+
+def _create_job(engine, filename='statement.mt940'):
+    return engine.create_job(
+        RoutingCode.of('FINANCE', 'PAYMENT', 'MT940'),
+        filename=filename,
+        file_size=128,
+        uploaded_by='dev'
+    )
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    engine = HelixRoutingEngine(job_store=SQLiteJobStore(path))
+    job = _create_job(engine)
+    job.start_processing()
+    engine.job_store.flush()
+
+    other_worker = HelixRoutingEngine(job_store=SQLiteJobStore(path))
+    loaded = other_worker.get_job(job.job_id)
+
+    assert loaded is not job
+    assert loaded.status == ProcessingStatus.PROCESSING
+    assert loaded.routing_code is RoutingCode.of('FINANCE', 'PAYMENT', 'MT940')
+    assert [entry.action for entry in loaded.audit_trail] == [AuditAction.JOB_CREATED, AuditAction.PROCESSING_STARTED]
+    assert loaded.audit_trail == job.audit_trail
+    assert loaded.started_at is not None
+
+    # Handing jobs over persists them and drops them from this worker's memory
+    handed_over = [_create_job(engine, f"batch_{i}.mt940") for i in range(3)]
+    engine.job_store.release_many([job.job_id for job in handed_over])
+    assert not any(job.job_id in engine.job_store.live_jobs() for job in handed_over)
+    assert all(other_worker.get_job(job.job_id) is not None for job in handed_over)
+
+
+def test_sqlite_store_evicts_finished_jobs_from_memory(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / 'jobs.db'), max_completed_in_memory=2)
+    engine = HelixRoutingEngine(job_store=store)
+
+    jobs = [_create_job(engine, f"file_{i}.mt940") for i in range(5)]
+    for job in jobs:
+        job.complete_processing()
+    store.flush()
+
+    assert len(store.live_jobs()) == 2
+    assert engine.get_job(jobs[0].job_id).status == ProcessingStatus.COMPLETED
+    assert len(list(store.iter_jobs())) == 5
+
+
+def test_in_memory_store_bounds_finished_jobs():
+    engine = HelixRoutingEngine(job_store=InMemoryJobStore(max_completed=3))
+
+    live = _create_job(engine, 'live.mt940')
+    for i in range(10):
+        _create_job(engine, f"done_{i}.mt940").fail_processing('boom')
+
+    assert len(engine.active_jobs) == 4
+    assert engine.get_job(live.job_id) is live
+
+
+def _paginate(store, **filters):
+    seen, cursor = [], None
+    while True:
+        jobs, cursor = store.list_jobs(cursor=cursor, limit=3, **filters)
+        seen.extend(job.job_id for job in jobs)
+        if cursor is None:
+            return seen
+
+
+def test_list_jobs_filters_and_paginates(tmp_path):
+    redis_store = RedisJobStore(redis_server(), namespace='helix-test:jobs')
+    redis_store.page_size = 4  # several index pages per listing
+    for store in (InMemoryJobStore(), SQLiteJobStore(str(tmp_path / 'jobs.db')), redis_store):
+        engine = HelixRoutingEngine(job_store=store)
+        finance = [_create_job(engine, f"f_{i}.mt940") for i in range(7)]
+        hr = [
+            engine.create_job(RoutingCode.of('HR', 'PAYROLL', 'CSV'), f"h_{i}.csv", 10, 'dev')
+            for i in range(4)
+        ]
+        finance[2].complete_processing()
+
+        all_ids = _paginate(store)
+        assert all_ids == [job.job_id for job in reversed(finance + hr)]
+        assert _paginate(store, access=['HR']) == [job.job_id for job in reversed(hr)]
+        assert len(_paginate(store, access=['COMPLIANCE'])) == 11
+        assert _paginate(store, status=ProcessingStatus.COMPLETED) == [finance[2].job_id]
+        assert engine.get_jobs_by_department('HR', ['FINANCE']) == list(reversed(finance))
+
+
+def test_redis_store_is_shared_between_hosts(tmp_path):
+    server = redis_server()
+    engine = HelixRoutingEngine(job_store=RedisJobStore(server, namespace='helix-test:jobs'))
+    job = _create_job(engine)
+    job.start_processing()
+
+    other_host = HelixRoutingEngine(job_store=RedisJobStore(server, namespace='helix-test:jobs'))
+    loaded = other_host.get_job(job.job_id)
+    assert loaded is not job
+    assert loaded.status == ProcessingStatus.PROCESSING and loaded.audit_trail == job.audit_trail
+
+    # The other host finishes it; this host sees the change and lists it under its new status
+    (written_at, _), = other_host.job_store.changed_since(0)
+    loaded.complete_processing()
+    (_, changed), = engine.job_store.changed_since(written_at)
+    assert changed.status == ProcessingStatus.COMPLETED
+    engine.job_store.release(job.job_id)
+    assert job.job_id not in engine.job_store.live_jobs()
+    assert engine.get_job(job.job_id).status == ProcessingStatus.COMPLETED
+    assert [found.job_id for found in engine.job_store.list_jobs(status=ProcessingStatus.COMPLETED)[0]] == [job.job_id]
+    assert engine.job_store.list_jobs(status=ProcessingStatus.PROCESSING)[0] == []
+    assert [found.job_id for found in engine.job_store.iter_jobs()] == [job.job_id]
+
+    assert store_from_url('').scope == 'process'
+    assert store_from_url('sqlite:' + str(tmp_path / 'jobs.db')).scope == 'host'
+    assert RedisJobStore.scope == 'cluster'
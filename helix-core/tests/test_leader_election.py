@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from leader_election import FileLeaderLock, LeaderElector, LeaderLock, LocalLeaderLock, lock_from_url
+
+
+class FlakyLock(LeaderLock):
+    description = 'flaky'
+
+    def __init__(self):
+        self.held = False
+        self.lost = threading.Event()
+
+    def try_acquire(self):
+        self.held = not self.lost.is_set()
+        return self.held
+
+    def still_held(self):
+        return self.held and not self.lost.is_set()
+
+    def release(self):
+        self.held = False
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_file_lock_is_exclusive_and_removing_the_file_loses_it(tmp_path):
+    path = str(tmp_path / 'state' / 'poller.lock')
+    first, second = FileLeaderLock(path), FileLeaderLock(path)
+    assert first.try_acquire()
+    assert not second.try_acquire()
+
+    first.release()
+    assert second.try_acquire()
+    os.remove(path)
+    assert not second.still_held()
+    second.release()
+
+    assert isinstance(lock_from_url('', 'poller'), LocalLeaderLock)
+    assert lock_from_url(f'file://{path}', 'poller').path == path
+    with pytest.raises(ValueError):
+        lock_from_url('redis://localhost', 'poller')
+
+
+def test_standby_takes_over_when_the_leader_process_dies(tmp_path):
+    path = str(tmp_path / 'poller.lock')
+    leader = subprocess.Popen(
+        [sys.executable, '-c',
+         'import sys, time; from leader_election import FileLeaderLock\n'
+         'assert FileLeaderLock(sys.argv[1]).try_acquire()\n'
+         'print("leader", flush=True); time.sleep(60)', path],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert leader.stdout.readline().strip() == 'leader'
+        elected = threading.Event()
+        elector = LeaderElector(FileLeaderLock(path), elected.set, lambda: None,
+                                retry_interval=0.05, check_interval=0.05)
+        elector.start()
+        assert not elected.wait(0.3)   # one leader at a time
+
+        killed = time.time()
+        leader.kill()
+        assert elected.wait(5)
+        assert time.time() - killed < 2
+        assert elector.status()['is_leader']
+        elector.stop()
+        assert not elector.is_leader and FileLeaderLock(path).try_acquire()
+    finally:
+        leader.kill()
+        leader.wait()
+
+
+def test_leader_steps_down_when_its_lock_is_lost():
+    lock = FlakyLock()
+    events = []
+    elector = LeaderElector(lock, lambda: events.append('elected'), lambda: events.append('demoted'),
+                            retry_interval=0.02, check_interval=0.02)
+    elector.start()
+    assert elector.wait_for_leadership(2)
+
+    lock.lost.set()
+    assert wait_until(lambda: not elector.is_leader)
+    lock.lost.clear()
+    assert wait_until(lambda: elector.is_leader)
+    elector.stop()
+    assert events == ['elected', 'demoted', 'elected', 'demoted']
+    assert elector.status()['elections'] == 2
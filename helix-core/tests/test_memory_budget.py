@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from file_processors import CAMT053Processor, MT940Processor
+from memory_budget import MB, MemoryBudget, MemoryBudgetExceeded
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def _big_camt(path, entries):
+    sample = open(os.path.join(DATA, 'sample_camt053.xml')).read()
+    head, rest = sample.split('<Ntry>', 1)
+    entry = '<Ntry>' + rest.split('</Ntry>', 1)[0] + '</Ntry>\n'
+    path.write_text(head + entry * entries + sample.rsplit('</Ntry>', 1)[1])
+    return str(path)
+
+
+def _big_mt940(path, pairs):
+    lines = open(os.path.join(DATA, 'sample.mt940')).read().splitlines()
+    path.write_text('\n'.join(lines[:4] + lines[4:8] * pairs + lines[8:]) + '\n')
+    return str(path)
+
+
+def _without_timestamp(parsed):
+    return dict(parsed, parsed_at=None)
+
+
+def test_streaming_parse_matches_full_parse_and_is_chosen_over_budget(tmp_path):
+    processor = CAMT053Processor()
+    path = _big_camt(tmp_path / 'big.xml', 500)
+    assert _without_timestamp(processor.parse_streaming(path)) == _without_timestamp(processor.parse(path))
+
+    size = os.path.getsize(path)
+    budget = MemoryBudget(budget_bytes=size * 4)
+    assert budget.plan(processor, size)[0] == 'streaming'
+    assert budget.plan(MT940Processor(), size)[0] == 'isolated'
+
+    parsed, report = budget.parse(processor, path)
+    assert parsed['total_transactions'] == 500 and parsed['total_amount'] == 500 * 2500.0
+    assert report['mode'] == 'streaming' and report['file_size'] == size
+    assert budget.stats()['formats']['CAMT.053']['streaming']['files'] == 1
+
+
+def test_mt940_counts_each_transaction_once():
+    parsed = MT940Processor().parse(os.path.join(DATA, 'sample.mt940'))
+    assert parsed['total_transactions'] == 2
+    assert [tx['amount'] for tx in parsed['statements'][0]['transactions']] == [500.0, -200.0]
+    assert parsed['statements'][0]['account_id'] == 'CH9300762011623852957'
+
+
+def test_isolated_parse_returns_result_or_fails_alone(tmp_path):
+    path = _big_mt940(tmp_path / 'big.mt940', 5000)
+    budget = MemoryBudget(budget_bytes=64 * 1024, isolated_limit_bytes=512 * MB)
+    parsed, report = budget.parse(MT940Processor(), path)
+    assert report['mode'] == 'isolated' and parsed['total_transactions'] == 10000
+    assert report['peak_bytes_per_transaction'] > 0
+
+    starved = MemoryBudget(budget_bytes=64 * 1024, isolated_limit_bytes=2 * MB)
+    with pytest.raises(MemoryBudgetExceeded):
+        starved.parse(MT940Processor(), path)
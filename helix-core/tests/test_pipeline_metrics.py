@@ -0,0 +1,50 @@
+import multiprocessing
+
+import pytest
+
+from pipeline_metrics import PipelineMetrics
+
+
+def _worker(path, files):
+    metrics = PipelineMetrics(path, shards=8)
+    for i in range(files):
+        with metrics.stage('parse', 'MT940'):
+            pass
+        metrics.inc('helix_bytes_processed_total', 100, file_type='MT940')
+    metrics.set('helix_workers', 2)
+
+
+def test_scrape_aggregates_all_processes(tmp_path):
+    path = str(tmp_path / 'prom')
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_worker, args=(path, 50)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    metrics = PipelineMetrics(path, shards=8)
+    metrics.set('helix_workers', 2)
+    text = metrics.render()
+    assert 'helix_stage_duration_seconds_count{stage="parse",file_type="MT940"} 200' in text
+    assert 'helix_stage_duration_seconds_bucket{stage="parse",file_type="MT940",le="+Inf"} 200' in text
+    assert 'helix_bytes_processed_total{file_type="MT940"} 20000' in text
+    # gauges of exited workers are dropped, only the live process counts
+    assert 'helix_workers 2\n' in text
+
+
+def test_errors_and_unknown_labels(tmp_path):
+    metrics = PipelineMetrics(str(tmp_path / 'prom'), shards=2)
+    with pytest.raises(ValueError):
+        with metrics.stage('sap_call', 'CAMT.053'):
+            raise ValueError('rfc down')
+    metrics.inc('helix_stage_errors_total', stage='mystery', error_type='WeirdError')
+    metrics.observe('helix_stage_duration_seconds', 0.3, stage='archive', file_type='PDF')
+
+    text = metrics.render()
+    assert '# TYPE helix_stage_duration_seconds histogram' in text
+    assert 'helix_stage_errors_total{stage="sap_call",error_type="ValueError"} 1' in text
+    assert 'helix_stage_errors_total{stage="other",error_type="other"} 1' in text
+    assert 'helix_stage_duration_seconds_bucket{stage="archive",file_type="other",le="0.25"} 0' in text
+    assert 'helix_stage_duration_seconds_bucket{stage="archive",file_type="other",le="0.5"} 1' in text
+    assert 'helix_stage_duration_seconds_sum{stage="archive",file_type="other"} 0.3' in text
@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from profiling import ProfilerBusy, _profiling_lock, capture_allocations, collapsed, profile_call, sample_stacks
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_stack_sampler_sees_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name='helix-worker-test')
+    worker.start()
+    try:
+        result = sample_stacks(0.2, interval=0.002)
+    finally:
+        stop.set()
+        worker.join()
+    assert result['samples'] > 10
+    assert 'helix-worker-test' in result['threads']
+    lines = collapsed(result['stacks']).splitlines()
+    assert any(line.startswith('helix-worker-test;') and 'test_profiling.py:_spin' in line for line in lines)
+
+
+def test_call_profile_and_single_session():
+    outcome, report = profile_call(lambda: sorted(range(10000), key=str), limit=5)
+    assert outcome[:3] == [0, 1, 10]
+    assert report['functions'] and 'cumulative' in report['report']
+
+    failed, _ = profile_call(lambda: int('x'))
+    assert isinstance(failed, ValueError)
+
+    with _profiling_lock:
+        with pytest.raises(ProfilerBusy):
+            capture_allocations(0.01)
+    assert capture_allocations(0.01, limit=3)['tracing_started_for_capture'] is True
@@ -0,0 +1,39 @@
+import random
+
+from rollups import ProcessingRollups, QuantileSketch, SKETCH_ACCURACY
+
+
+def test_sketch_quantiles_are_within_relative_error_and_mergeable():
+    random.seed(7)
+    samples = [random.lognormvariate(4, 1.2) for _ in range(5000)]
+    left, right = QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(samples):
+        (left if i % 2 else right).add(value)
+    merged = left.merge(right)
+
+    samples.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = samples[int(q * (len(samples) - 1))]
+        assert abs(merged.quantile(q) - exact) <= exact * SKETCH_ACCURACY * 1.01
+
+
+def test_rings_recycle_old_buckets(tmp_path):
+    rollups = ProcessingRollups(str(tmp_path / 'rollups'), shards=2)
+    start = 1_700_000_000 // 86400 * 86400
+    rollups.record(120, True, 5, {'CHF': 100.0, 'JPY': 7.0}, 'MT940', now=start + 10)
+    rollups.record(900, False, 0, {}, 'CAMT.053', now=start + 20)
+
+    minute = rollups.buckets('minute', now=start + 30)
+    assert len(minute) == 1
+    assert minute[0].files == 2 and minute[0].failed == 1 and minute[0].success_rate == 50.0
+    assert minute[0].amounts['CHF'] == 100.0 and minute[0].amounts['OTHER'] == 7.0
+    assert minute[0].latency['CAMT.053'].count == 1
+
+    # Two hours later the minute ring has moved on; the same slot is reused, not grown
+    later = start + 7200 + 10
+    rollups.record(50, True, 1, {'EUR': 1.0}, 'MT940', now=later)
+    assert [bucket.files for bucket in rollups.buckets('minute', now=later)] == [1]
+    assert [bucket.files for bucket in rollups.buckets('hour', now=later)] == [2, 1]
+    day = rollups.summary('day', now=later).to_dict()
+    assert day['files'] == 3 and day['amount_by_currency'] == {'CHF': 100.0, 'EUR': 1.0, 'OTHER': 7.0}
+    assert day['processing_time_ms']['all']['count'] == 3
@@ -0,0 +1,34 @@
+import json
+
+from routing import HelixRoutingEngine, RoutingCode
+
+
+def test_valid_routing_codes_are_interned():
+    engine = HelixRoutingEngine()
+
+    code = RoutingCode.from_string('treasury-cashflow-mt940')
+    assert code is RoutingCode.of('TREASURY', 'CASHFLOW', 'MT940')
+    assert engine.validate_routing_code(code)
+    assert engine.validate_routing_code(RoutingCode('finance', 'payment', 'camt053'))
+
+
+def test_invalid_routing_codes_are_rejected():
+    engine = HelixRoutingEngine()
+
+    assert not engine.validate_routing_code(RoutingCode('HR', 'PAYROLL', 'BAI2'))
+    assert not engine.validate_routing_code(None)
+
+
+def test_reload_recompiles_routes_and_listings():
+    engine = HelixRoutingEngine()
+    etag = engine.route_listings['routing_codes'].etag
+
+    departments = dict(engine.departments)
+    departments['HR'] = dict(departments['HR'], processes={'PAYROLL': ['CSV', 'BAI2']})
+    engine.reload(departments=departments)
+
+    assert engine.validate_routing_code(RoutingCode.of('HR', 'PAYROLL', 'BAI2'))
+    assert not engine.validate_routing_code(RoutingCode.of('HR', 'BENEFITS', 'CSV'))
+    assert engine.route_listings['routing_codes'].etag != etag
+    codes = json.loads(engine.route_listings['routing_codes'].body)['routing_codes']
+    assert 'HR-PAYROLL-BAI2' in [code['routing_code'] for code in codes]
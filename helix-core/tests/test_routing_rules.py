@@ -0,0 +1,70 @@
+import json
+import os
+
+from file_processors import CAMT053Processor
+from routing import HelixRoutingEngine, Priority, RoutingCode
+from routing_rules import IntervalTree, RoutingRulesEngine
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+RULES = [
+    {'id': 'big-chf', 'routing_code': 'TREASURY-FOREX', 'priority': 'critical',
+     'match': {'currency': 'CHF', 'amount_min': 1000}},
+    {'id': 'swiss-account', 'routing_code': 'FINANCE-PAYMENT',
+     'match': {'iban': 'CH93 0076 2011 6238 5295 7'}},
+    {'id': 'hr-drop', 'routing_code': 'HR-PAYROLL-CSV', 'match': {'sender': 'hr'}},
+]
+
+
+def _statement(amount, currency='CHF', account='CH9300762011623852957'):
+    return {'statements': [{'account_id': account, 'transactions': [{'amount': amount, 'currency': currency}]}]}
+
+
+def test_interval_tree_stabbing():
+    tree = IntervalTree([(0, 10, 1), (5, 15, 2), (20, float('inf'), 4), (float('-inf'), 2, 8)])
+    assert tree.stab(1) == 1 | 8
+    assert tree.stab(7) == 1 | 2
+    assert tree.stab(17) == 0
+    assert tree.stab(1e9) == 4
+
+
+def test_first_matching_rule_wins_and_falls_through_invalid_routes():
+    rules = RoutingRulesEngine(HelixRoutingEngine())
+    rules.load(RULES)
+
+    match = rules.evaluate(_statement(-2500.0), 'CAMT.053')
+    assert match.routing_code is RoutingCode.of('TREASURY', 'FOREX', 'CAMT053')
+    assert match.priority == Priority.CRITICAL
+    assert 'big-chf' in match.explanation
+
+    # TREASURY-FOREX has no MT940 route, so the next matching rule applies
+    assert rules.evaluate(_statement(2500.0), 'MT940').routing_code is RoutingCode.of('FINANCE', 'PAYMENT', 'MT940')
+    assert rules.evaluate(_statement(10.0, account='DE00'), 'CSV', sender='hr').rule.rule_id == 'hr-drop'
+    assert rules.evaluate(_statement(10.0, account='DE00'), 'CSV') is None
+
+
+def test_rules_file_reload_keeps_previous_rules_on_error(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'rules': RULES[:1]}))
+    rules = RoutingRulesEngine(HelixRoutingEngine(), rules_path=str(path), check_interval=0)
+    assert rules.rule_count == 1
+
+    path.write_text(json.dumps({'rules': RULES}))
+    os.utime(path, ns=(1, 1))
+    rules.maybe_reload()
+    assert rules.rule_count == 3
+
+    path.write_text('{"rules": [')
+    os.utime(path, ns=(2, 2))
+    rules.maybe_reload()
+    assert rules.rule_count == 3
+
+
+def test_sample_camt_routes_by_iban():
+    parsed = CAMT053Processor().parse(os.path.join(DATA_DIR, 'sample_camt053.xml'))
+    rules = RoutingRulesEngine(HelixRoutingEngine())
+    rules.load(RULES[1:])
+
+    match = rules.evaluate(parsed, 'CAMT.053')
+    assert match.routing_code is RoutingCode.of('FINANCE', 'PAYMENT', 'CAMT053')
+    assert 'account=CH9300762011623852957' in match.explanation
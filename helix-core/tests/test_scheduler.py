@@ -0,0 +1,58 @@
+import time
+
+from routing import Priority
+from scheduler import DepartmentQuota, PriorityScheduler
+
+
+def test_critical_work_jumps_the_queue():
+    scheduler = PriorityScheduler(aging_seconds=30)
+    for i in range(5):
+        scheduler.submit(f"hr-{i}", department='HR', priority=Priority.NORMAL)
+    scheduler.submit('treasury', department='TREASURY', priority=Priority.CRITICAL)
+
+    assert scheduler.get(timeout=0).payload == 'treasury'
+
+
+def test_aging_lets_old_low_priority_work_through():
+    scheduler = PriorityScheduler(aging_seconds=1)
+    low = scheduler.submit('low', department='HR', priority=Priority.LOW)
+    low.sort_key -= 10  # pretend it has been waiting for a long time
+    scheduler._queues['HR'] = [(low.sort_key, 0, low)]
+    scheduler.submit('critical', department='TREASURY', priority=Priority.CRITICAL)
+
+    assert scheduler.get(timeout=0).payload == 'low'
+
+
+def test_department_concurrency_quota():
+    scheduler = PriorityScheduler(quotas={'HR': DepartmentQuota(max_concurrent=1)})
+    scheduler.submit('hr-1', department='HR', priority=Priority.CRITICAL)
+    scheduler.submit('hr-2', department='HR', priority=Priority.CRITICAL)
+    scheduler.submit('ops', department='OPERATIONS', priority=Priority.LOW)
+
+    first = scheduler.get(timeout=0)
+    assert first.payload == 'hr-1'
+    assert scheduler.get(timeout=0).payload == 'ops'
+    assert scheduler.get(timeout=0) is None
+
+    scheduler.task_done(first)
+    assert scheduler.get(timeout=0).payload == 'hr-2'
+
+
+def test_approaching_deadline_pulls_work_forward():
+    scheduler = PriorityScheduler(aging_seconds=30, deadline_lead_seconds=300)
+    scheduler.submit('critical', department='TREASURY', priority=Priority.CRITICAL)
+    scheduler.submit('cutoff', department='FINANCE', priority=Priority.LOW, deadline=time.time() + 60)
+
+    assert scheduler.get(timeout=0).payload == 'cutoff'
+
+
+def test_cutoffs_from_department_config():
+    scheduler = PriorityScheduler.from_departments({
+        'TREASURY': {'cutoff': '15:00'},
+        'HR': {'quota': {'max_concurrent': 2}}
+    })
+
+    assert scheduler.quotas['HR'].max_concurrent == 2
+    deadline = scheduler.next_cutoff('TREASURY')
+    assert time.time() < deadline <= time.time() + 86400
+    assert scheduler.next_cutoff('HR') is None
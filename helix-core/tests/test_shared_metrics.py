@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+
+from dashboard import DashboardData
+from shared_metrics import SharedMetrics
+
+
+def _worker(path, files):
+    dashboard = DashboardData(SharedMetrics(path, shards=8))
+    for i in range(files):
+        name = f"{multiprocessing.current_process().pid}_{i}.mt940"
+        dashboard.start_processing(name, 'MT940', '💰')
+        dashboard.complete_processing(name, success=i % 5 != 0, transactions=3, amount=1.5, processing_time=10)
+
+
+def test_workers_share_one_set_of_numbers(tmp_path):
+    path = str(tmp_path / 'metrics')
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_worker, args=(path, 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    reader = DashboardData(SharedMetrics(path, shards=8))
+    stats = reader.processing_stats
+    assert stats['total_files_processed'] == 100
+    assert stats['total_transactions'] == 300
+    assert stats['total_amount'] == 150.0
+    assert stats['files_by_type'] == {'MT940': 100}
+    assert sum(bucket['files'] for bucket in stats['hourly_stats'].values()) == 100
+    assert len(stats['processing_times']) == 20
+    assert len(reader.recent_activities) == 50
+    assert reader.current_processing == {}
+    assert reader.metrics.snapshot()['counters']['files_failed'] == 20
+    assert stats['success_rate'] == 80.0
+    assert stats['latency_percentiles']['MT940']['count'] == 100
+
+
+def test_gauges_and_in_flight_files(tmp_path):
+    dashboard = DashboardData(SharedMetrics(str(tmp_path / 'metrics'), shards=2))
+    dashboard.update_sftp_status('Error', 0, 'connection refused')
+    dashboard.update_sftp_status('Connected', 7)
+    dashboard.start_processing('a.xml', 'CAMT.053', '💼')
+
+    data = dashboard.get_dashboard_data()
+    assert data['sftp_status']['connection_status'] == 'Connected'
+    assert data['sftp_status']['files_found'] == 7
+    assert data['sftp_status']['poll_count'] == 2
+    assert [error['error'] for error in data['sftp_status']['errors']] == ['connection refused']
+    assert data['current_processing']['a.xml']['file_type'] == 'CAMT.053'
+    dashboard.add_activity('log', 'x' * 5000)
+    assert dashboard.get_logs()[-1]['message'].endswith('…')
+
+
+def _crash_mid_file(path):
+    DashboardData(SharedMetrics(path, shards=1)).start_processing('lost.mt940', 'MT940', '💰')
+    os._exit(1)
+
+
+def test_files_of_a_crashed_worker_are_not_left_processing(tmp_path):
+    path = str(tmp_path / 'metrics')
+    crashed = multiprocessing.get_context('fork').Process(target=_crash_mid_file, args=(path,))
+    crashed.start()
+    crashed.join(timeout=30)
+
+    metrics = SharedMetrics(path, shards=1)
+    assert metrics.snapshot()['current'] == {}
+    assert b'lost.mt940' in bytes(metrics._map)   # the dead shard still holds it ...
+
+    dashboard = DashboardData(metrics)   # ... until this process reclaims the only shard
+    dashboard.start_processing('next.mt940', 'MT940', '💰')
+    assert b'lost.mt940' not in bytes(metrics._map)
+    assert list(dashboard.current_processing) == ['next.mt940']
@@ -0,0 +1,47 @@
+import io
+import json
+import logging
+import queue
+
+from structured_logging import CallSiteSampler, DroppingQueueHandler, JSONFormatter, TextFormatter
+
+
+def _record(lineno=10, **extra):
+    record = logging.LogRecord('helix', logging.INFO, '/app/app.py', lineno, 'Parsed %s: %d tx', ('a.xml', 3), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_fields_are_structured_and_formatting_is_deferred():
+    record = _record(file='a.xml', file_type='CAMT053', log_rate=5)
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(record)
+    queued = handler.queue.get_nowait()
+    assert queued.msg == 'Parsed a.xml: 3 tx' and queued.args is None
+
+    entry = json.loads(JSONFormatter().format(queued))
+    assert entry['message'] == 'Parsed a.xml: 3 tx'
+    assert entry['file'] == 'a.xml' and entry['file_type'] == 'CAMT053'
+    assert 'log_rate' not in entry
+    assert TextFormatter().format(queued).endswith('Parsed a.xml: 3 tx | file=a.xml file_type=CAMT053')
+
+    handler.handle(_record())
+    handler.handle(_record())
+    assert handler.dropped == 1
+
+
+def test_call_site_sampling_and_rate_limit():
+    sampler = CallSiteSampler()
+    kept = [sampler.filter(_record(lineno=1, log_every=10)) for _ in range(25)]
+    assert kept.count(True) == 3 and kept[0] and kept[10] and kept[20]
+
+    burst = [_record(lineno=2, log_rate=2) for _ in range(50)]
+    assert [sampler.filter(record) for record in burst].count(True) == 2
+    assert sampler.filter(_record(lineno=3))
+    slow = [sampler.filter(_record(lineno=4, log_rate=0.1)) for _ in range(5)]
+    assert slow == [True, False, False, False, False]
+
+    # Other call sites are unaffected; the count of suppressed records rides on the next kept one
+    sampler._sites[('/app/app.py', 2)][1] = 1.0
+    record = _record(lineno=2, log_rate=2)
+    assert sampler.filter(record) and record.suppressed == 48
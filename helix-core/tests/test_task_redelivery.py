@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+
+HELIX_CORE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter with the background services started
+CHILD = r"""
+import json, os, shutil, sys, time
+import app
+
+def wait_for(task_id, state):
+    deadline = time.time() + 15
+    while time.time() < deadline and app.work_queue.state(task_id) != state:
+        time.sleep(0.05)
+    return app.work_queue.state(task_id)
+
+facts = {}
+sap_calls = []
+def flaky_sap(file_path, processor, parsed_data):
+    sap_calls.append(file_path)
+    if len(sap_calls) == 1:
+        raise ConnectionError("SAP gateway down")
+app.send_to_sap = flaky_sap
+app.start_background_services()
+
+# An SFTP file whose first attempt fails is retried under the job it was queued with
+processor = app.file_processor_factory.get_processor('sample.mt940')
+staged = os.path.join(app.LOCAL_STAGING, 'hr_sample.mt940')
+shutil.copy('data/sample.mt940', staged)
+app.enqueue_remote_file('sftp-redelivered', '/outgoing/hr/sample.mt940', 'sample.mt940', 'HR', processor, staged)
+facts['sftp_state'] = wait_for('sftp-redelivered', 'done')
+job = app.routing_engine.get_job(app.sftp_job_id('sftp-redelivered'))
+facts['sftp_job'] = job and {'status': job.status.value, 'actions': [entry.action.name for entry in job.audit_trail]}
+facts['sap_calls'] = len(sap_calls)
+
+# An uploaded file whose job is not in this node's job store is dead-lettered, not routed
+orphan = os.path.join(app.UPLOAD_DIR, 'no-such-job_sample.mt940')
+os.makedirs(app.UPLOAD_DIR, exist_ok=True)
+shutil.copy('data/sample.mt940', orphan)
+app.enqueue_task('no-such-job', {'filename': 'sample.mt940', 'local_path': orphan, 'file_type': processor.file_type,
+                                 'remote_path': None, 'job_id': 'no-such-job'})
+facts['orphan_state'] = wait_for('no-such-job', 'dead')
+facts['dead_letters'] = [letter['error'] for letter in app.work_queue.dead_letters()]
+facts['job_ids'] = sorted(job.job_id for job in app.routing_engine.job_store.iter_jobs())
+open(sys.argv[1], 'w').write(json.dumps(facts))
+"""
+
+
+def child_env(tmp_path, **overrides):
+    env = dict(
+        os.environ,
+        PYTHONPATH=HELIX_CORE,
+        JOB_STORE_PATH=str(tmp_path / 'jobs.db'),
+        AUDIT_JOURNAL_DIR=str(tmp_path / 'audit'),
+        METRICS_SHM_PATH=str(tmp_path / 'metrics'),
+        PIPELINE_METRICS_PATH=str(tmp_path / 'pipeline_metrics'),
+        ARCHIVE_DIR=str(tmp_path / 'archive'),
+        UPLOAD_DIR=str(tmp_path / 'uploads'),
+        UPLOAD_STAGING_DIR=str(tmp_path / 'upload_staging'),
+        WORK_QUEUE_URL='sqlite:' + str(tmp_path / 'queue.db'),
+        WORK_QUEUE_RETRY_SECONDS='0.1',
+        POLLER_LEADER_LOCK='file:' + str(tmp_path / 'poller.lock'),
+        ROUTING_RULES_PATH=os.path.join(HELIX_CORE, 'config', 'routing_rules.json'),
+        SFTP_HOST='127.0.0.1', SFTP_PORT='1', LOG_LEVEL='CRITICAL'
+    )
+    env.update(overrides)
+    return env
+
+
+def test_redelivered_tasks_keep_their_job_and_orphans_are_dead_lettered(tmp_path):
+    facts_path = tmp_path / 'facts.json'
+    child = subprocess.run([sys.executable, '-c', CHILD, str(facts_path)], cwd=HELIX_CORE,
+                           env=child_env(tmp_path), capture_output=True, text=True, timeout=60)
+    assert child.returncode == 0, child.stderr[-2000:]
+    facts = json.loads(facts_path.read_text())
+
+    # One job across both attempts: failed once (not terminally), then completed
+    assert facts['sftp_state'] == 'done' and facts['sap_calls'] == 2
+    assert facts['sftp_job']['status'] == 'completed'
+    actions = facts['sftp_job']['actions']
+    assert actions.count('PROCESSING_FAILED') == 1 and actions[-1] == 'PROCESSING_COMPLETED'
+    assert actions.index('PROCESSING_FAILED') < len(actions) - 2  # started again after the failure
+
+    # The upload task without a job row created no job of its own
+    assert facts['orphan_state'] == 'dead'
+    assert any('no-such-job' in error for error in facts['dead_letters'])
+    assert len(facts['job_ids']) == 1
+
+
+def test_queue_reaching_further_than_the_job_store_is_refused(tmp_path):
+    child = subprocess.run([sys.executable, '-c', 'import app; app.create_app()'], cwd=HELIX_CORE,
+                           env=child_env(tmp_path, JOB_STORE_PATH=''), capture_output=True, text=True, timeout=60)
+    assert child.returncode != 0
+    assert 'RuntimeError: WORK_QUEUE_URL hands tasks to any host' in child.stderr
@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+from tracing import NOOP_SPAN, OTLPFileExporter, Tracer
+
+
+def test_spans_nest_and_slowest_traces_come_first():
+    tracer = Tracer(capacity=2)
+    for name, pause in (('a.mt940', 0.0), ('b.xml', 0.02), ('c.csv', 0.01)):
+        with tracer.trace('process_file', **{'file.name': name}) as trace:
+            trace.add_span('queue_wait', time.time_ns() - 1000, time.time_ns())
+            with tracer.span('parse') as parse:
+                with tracer.span('validate'):
+                    time.sleep(pause)
+            tracer.current_trace().set_attribute('job.id', 'job-1')
+
+    slowest = tracer.slowest()
+    assert [trace.root.attributes['file.name'] for trace in slowest] == ['b.xml', 'c.csv']
+    spans = {span['name']: span for span in slowest[0].to_dict()['spans']}
+    assert spans['validate']['parent_id'] == spans['parse']['span_id']
+    assert slowest[0].root.attributes['job.id'] == 'job-1'
+
+    with pytest.raises(ValueError):
+        with tracer.trace('process_file', **{'file.name': 'bad.bai'}):
+            with tracer.span('sap_call'):
+                raise ValueError('rfc down')
+    failed = tracer.slowest(errors_only=True)[0]
+    assert failed.root.error == 'ValueError: rfc down'
+    assert failed.spans[1].error == 'ValueError: rfc down'
+
+
+def test_unsampled_traces_are_noops_and_export_is_otlp(tmp_path):
+    tracer = Tracer(sample_rate=0.0)
+    with tracer.trace('process_file') as trace:
+        with tracer.span('parse') as span:
+            assert trace is NOOP_SPAN and span is NOOP_SPAN
+    assert tracer.slowest() == []
+
+    exporter = OTLPFileExporter(str(tmp_path))
+    tracer = Tracer(exporter=exporter)
+    with tracer.trace('process_file', **{'file.size': 42}):
+        with tracer.span('archive'):
+            pass
+    for _ in range(100):
+        files = list(tmp_path.iterdir())
+        if files and files[0].read_text():
+            break
+        time.sleep(0.01)
+    request = json.loads(files[0].read_text().splitlines()[0])
+    spans = request['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert [span['name'] for span in spans] == ['process_file', 'archive']
+    assert spans[1]['parentSpanId'] == spans[0]['spanId'] and len(spans[0]['traceId']) == 32
+    assert spans[0]['attributes'] == [{'key': 'file.size', 'value': {'intValue': '42'}}]
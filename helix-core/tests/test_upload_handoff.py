@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+
+HELIX_CORE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: uploads go straight to the local workers, no SFTP poll
+CHILD = r"""
+import io, json, os, shutil, sys, time
+import app
+from routing import RoutingCode
+
+def wait_until_finished(job_id):
+    deadline = time.time() + 15
+    while time.time() < deadline and not app.routing_engine.get_job(job_id).is_terminal:
+        time.sleep(0.02)
+    return app.routing_engine.get_job(job_id)
+
+def summary(job):
+    events = [event.status for event in app.job_events.events_since(0)[0] if event.job_id == job.job_id]
+    return {'status': job.status.value, 'events': events, 'error': job.error_message,
+            'actions': [entry.action.name for entry in job.audit_trail]}
+
+processed_as = {}
+def record_sap(file_path, processor, parsed_data):
+    processed_as[os.path.basename(file_path).partition('_')[2]] = processor.file_type
+app.send_to_sap = record_sap
+
+# Left QUEUED by a process that stopped before queueing them: one file survived, one is gone
+def leftover(name, keep_file):
+    job = app.routing_engine.create_file_job(RoutingCode.of('TREASURY', 'CASHFLOW', 'MT940'), name)
+    job.file_path = app.upload_destination(job)
+    if keep_file:
+        shutil.copy('data/sample.mt940', job.file_path)
+    job.mark_queued()
+    return job
+survivor, lost = leftover('survivor.mt940', True), leftover('lost.mt940', False)
+app.routing_engine.job_store.flush()
+
+application = app.create_app()
+client = application.test_client()
+from flask_jwt_extended import create_access_token
+with application.app_context():
+    headers = {'Authorization': 'Bearer ' + create_access_token(identity='dev', additional_claims={'role': 'dev'})}
+app.start_background_services()
+
+# The file name says nothing about the format: the routing code's file type picks the processor
+started = time.time()
+upload = client.post('/api/files/upload', headers=headers, content_type='multipart/form-data', data={
+    'file': (io.BytesIO(open('data/sample.mt940', 'rb').read()), 'statement.txt'),
+    'routing_code': '{"department":"TREASURY","process":"CASHFLOW","file_type":"MT940"}',
+    'priority': 'HIGH'
+})
+facts = {'upload_status': upload.status_code, 'queued_status': upload.json['status']}
+job = wait_until_finished(upload.json['job_id'])
+facts['seconds'] = time.time() - started
+facts['upload'] = summary(job)
+facts['survivor'] = summary(wait_until_finished(survivor.job_id))
+facts['lost'] = summary(wait_until_finished(lost.job_id))
+facts['processed_as'] = processed_as
+open(sys.argv[1], 'w').write(json.dumps(facts))
+"""
+
+
+def test_uploads_are_processed_directly_and_leftovers_requeued(tmp_path):
+    env = dict(
+        os.environ,
+        PYTHONPATH=HELIX_CORE,
+        JOB_STORE_PATH=str(tmp_path / 'jobs.db'),
+        AUDIT_JOURNAL_DIR=str(tmp_path / 'audit'),
+        METRICS_SHM_PATH=str(tmp_path / 'metrics'),
+        PIPELINE_METRICS_PATH=str(tmp_path / 'pipeline_metrics'),
+        ARCHIVE_DIR=str(tmp_path / 'archive'),
+        LOCAL_STAGING=str(tmp_path / 'staging'),
+        UPLOAD_DIR=str(tmp_path / 'uploads'),
+        UPLOAD_STAGING_DIR=str(tmp_path / 'upload_staging'),
+        WORK_QUEUE_URL='sqlite:' + str(tmp_path / 'queue.db'),
+        POLLER_LEADER_LOCK='file:' + str(tmp_path / 'poller.lock'),
+        SFTP_HOST='127.0.0.1', SFTP_PORT='1', LOG_LEVEL='CRITICAL'
+    )
+    facts_path = tmp_path / 'facts.json'
+    child = subprocess.run([sys.executable, '-c', CHILD, str(facts_path)], cwd=HELIX_CORE, env=env,
+                           capture_output=True, text=True, timeout=60)
+    assert child.returncode == 0, child.stderr[-2000:]
+    facts = json.loads(facts_path.read_text())
+
+    # Queued on upload, then parsed and sent to SAP well within one SFTP poll interval
+    assert facts['upload_status'] == 201 and facts['queued_status'] == 'queued'
+    assert facts['upload']['events'] == ['uploaded', 'queued', 'processing', 'completed']
+    assert facts['upload']['actions'][-3:] == ['JOB_QUEUED', 'PROCESSING_STARTED', 'PROCESSING_COMPLETED']
+    assert facts['seconds'] < 5
+    assert facts['processed_as'] == {'statement.txt': 'MT940', 'survivor.mt940': 'MT940'}
+
+    # Restart sweep: a leftover with its file is processed, one without is failed
+    assert facts['survivor']['status'] == 'completed'
+    assert facts['lost']['status'] == 'failed' and facts['lost']['error'] == 'Uploaded file missing after restart'
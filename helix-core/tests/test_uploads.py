@@ -0,0 +1,118 @@
+import hashlib
+import io
+
+import pytest
+
+from uploads import UploadError, UploadSessionStore
+
+DATA = b'{1:F01HELIXCHZZ}' * 1000
+
+
+def test_chunked_upload_resumes_after_restart(tmp_path):
+    store = UploadSessionStore(str(tmp_path / 'staging'))
+    session = store.create('big.mt940', 'FINANCE-PAYMENT-MT940', len(DATA), 'dev',
+                           sha256=hashlib.sha256(DATA).hexdigest())
+
+    store.write_chunk(session.upload_id, 0, io.BytesIO(DATA[:5000]), 5000)
+    with pytest.raises(UploadError) as wrong_offset:
+        store.write_chunk(session.upload_id, 0, io.BytesIO(DATA[:5000]), 5000)
+    assert wrong_offset.value.status == 409 and wrong_offset.value.offset == 5000
+
+    # A new process picks the session up from disk and rebuilds the running hash
+    restarted = UploadSessionStore(str(tmp_path / 'staging'))
+    assert restarted.get(session.upload_id).offset == 5000
+    restarted.write_chunk(session.upload_id, 5000, io.BytesIO(DATA[5000:]))
+
+    destination = tmp_path / 'incoming' / 'big.mt940'
+    digest = restarted.finalize(session.upload_id, str(destination))
+    assert digest == hashlib.sha256(DATA).hexdigest()
+    assert destination.read_bytes() == DATA
+    with pytest.raises(UploadError):
+        restarted.get(session.upload_id)
+
+
+def test_chunks_of_one_upload_can_land_on_any_worker(tmp_path):
+    # One store per gunicorn worker, all on the same staging directory
+    workers = [UploadSessionStore(str(tmp_path / 'staging')) for _ in range(3)]
+    session = workers[0].create('big.mt940', 'FINANCE-PAYMENT-MT940', len(DATA), 'dev',
+                                sha256=hashlib.sha256(DATA).hexdigest())
+    chunk = 2000
+    for index, start in enumerate(range(0, len(DATA), chunk)):
+        worker = workers[index % 2]   # the third worker never sees a chunk
+        worker.write_chunk(session.upload_id, start, io.BytesIO(DATA[start:start + chunk]), owner='dev')
+        assert workers[(index + 1) % 2].get(session.upload_id).offset == min(start + chunk, len(DATA))
+
+    destination = tmp_path / 'incoming' / 'big.mt940'
+    assert workers[2].finalize(session.upload_id, str(destination)) == hashlib.sha256(DATA).hexdigest()
+    with pytest.raises(UploadError) as gone:
+        workers[0].finalize(session.upload_id, str(tmp_path / 'again.mt940'))
+    assert gone.value.status == 404
+
+
+def test_sessions_belong_to_the_user_who_opened_them(tmp_path):
+    store = UploadSessionStore(str(tmp_path))
+    session = store.create('p.csv', 'HR-PAYROLL-CSV', 10, 'dev')
+    for attempt in (lambda: store.get(session.upload_id, owner='auditor'),
+                    lambda: store.write_chunk(session.upload_id, 0, io.BytesIO(b'x' * 10), owner='auditor'),
+                    lambda: store.finalize(session.upload_id, str(tmp_path / 'out.csv'), owner='auditor'),
+                    lambda: store.abort(session.upload_id, owner='auditor')):
+        with pytest.raises(UploadError) as forbidden:
+            attempt()
+        assert forbidden.value.status == 403
+    assert store.get(session.upload_id, owner='dev').offset == 0
+
+    store.write_chunk(session.upload_id, 0, io.BytesIO(b'x' * 10), owner=None)   # admins may act on any session
+    store.abort(session.upload_id, owner='dev')
+    assert not (tmp_path / f"{session.upload_id}.part").exists()
+
+
+def test_upload_limits_and_checksum(tmp_path):
+    store = UploadSessionStore(str(tmp_path), max_file_bytes=len(DATA), max_chunk_bytes=4096)
+    with pytest.raises(UploadError) as too_big:
+        store.create('huge.csv', 'HR-PAYROLL-CSV', len(DATA) + 1, 'dev')
+    assert too_big.value.status == 413
+
+    session = store.create('p.csv', 'HR-PAYROLL-CSV', 10, 'dev', sha256='0' * 64)
+    with pytest.raises(UploadError):
+        store.write_chunk(session.upload_id, 0, io.BytesIO(b'x' * 20))
+    assert store.get(session.upload_id).offset == 0
+
+    store.write_chunk(session.upload_id, 0, io.BytesIO(b'x' * 10), 10)
+    with pytest.raises(UploadError) as mismatch:
+        store.finalize(session.upload_id, str(tmp_path / 'out.csv'))
+    assert mismatch.value.status == 422
+
+
+def test_archive_entries_are_streamed_and_detected(tmp_path):
+    import tarfile
+    import zipfile
+
+    from file_processors import FileProcessorFactory, MT940Processor
+    from uploads import copy_stream, iter_archive_entries
+
+    zipped = io.BytesIO()
+    with zipfile.ZipFile(zipped, 'w') as archive:
+        archive.writestr('month-end/a.mt940', DATA)
+        archive.writestr('month-end/noext', b':20:STMT\n')
+        archive.writestr('__MACOSX/._a.mt940', b'junk')
+        archive.writestr('month-end/', b'')
+    zipped.seek(0)
+
+    tarred = io.BytesIO()
+    with tarfile.open(fileobj=tarred, mode='w:gz') as archive:
+        info = tarfile.TarInfo('../escape.mt940')
+        info.size = len(DATA)
+        archive.addfile(info, io.BytesIO(DATA))
+    tarred.seek(0)
+
+    factory = FileProcessorFactory()
+    names = []
+    for fileobj, filename in ((zipped, 'batch.zip'), (tarred, 'batch.tgz')):
+        for name, reader in iter_archive_entries(fileobj, filename):
+            head = reader.read(16)
+            assert isinstance(factory.detect_processor(name, head), MT940Processor)
+            size = copy_stream(reader, str(tmp_path / name), 10 * len(DATA), head)
+            names.append((name, size))
+
+    assert names == [('a.mt940', len(DATA)), ('noext', 9), ('escape.mt940', len(DATA))]
+    assert factory.detect_processor('readme.pdf', b'%PDF-1.4') is None
@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+
+import pytest
+from argon2 import PasswordHasher
+
+from user_store import HashingPool, HashingPoolBusy, UserStore, permissions_json, role_permissions
+
+def cheap_hasher(time_cost=1):
+    return PasswordHasher(time_cost=time_cost, memory_cost=8, parallelism=1)
+
+
+def test_authenticate_against_hashes_and_upgrade_old_ones(tmp_path):
+    demo = UserStore(HashingPool(cheap_hasher()))
+    assert demo.authenticate('admin', 'adminpass').role == 'admin'
+    assert demo.authenticate('admin', 'devpass') is None
+    assert demo.authenticate('nobody', 'adminpass') is None
+    assert demo.authenticate(None, None) is None
+
+    # Written with older parameters: the next successful login rehashes and saves
+    path = str(tmp_path / 'users.json')
+    old = UserStore(HashingPool(cheap_hasher(time_cost=1)), path)
+    old.set_user('alice', 's3cret', 'dev', 'Alice Example')
+    old.save()
+    old_hash = json.load(open(path))['users'][0]['password_hash']
+    assert 's3cret' not in open(path).read()
+
+    store = UserStore(HashingPool(cheap_hasher(time_cost=2)), path)
+    alice = store.authenticate('alice', 's3cret')
+    assert alice.email == 'alice@helix.bank'
+    new_hash = json.load(open(path))['users'][0]['password_hash']
+    assert new_hash != old_hash and 't=2' in new_hash
+    assert store.authenticate('alice', 's3cret') is alice
+
+    # A saturated pool after the password matched must not fail the login
+    busy = UserStore(HashingPool(cheap_hasher(time_cost=3)), path)
+    assert len(busy) == 1
+    def pool_full(password):
+        raise HashingPoolBusy("full")
+    busy.pool.hash = pool_full
+    assert busy.authenticate('alice', 's3cret').username == 'alice'
+    assert json.load(open(path))['users'][0]['password_hash'] == new_hash
+
+
+def test_roles_share_one_read_only_permission_table():
+    demo = UserStore(HashingPool(cheap_hasher()))
+    admin = demo.get('admin')
+    assert admin.permissions is role_permissions('admin')
+    assert role_permissions('intern') is role_permissions('auditor')
+    with pytest.raises(TypeError):
+        admin.permissions['can_manage_users'] = False
+    assert admin.to_dict()['permissions'] is permissions_json('admin')
+    assert permissions_json('dev')['dashboard_sections'] == ['upload', 'processing', 'api_tools', 'logs']
+
+
+def test_pool_turns_callers_away_once_its_queue_is_full():
+    release = threading.Event()
+
+    class SlowHasher(PasswordHasher):
+        def verify(self, password_hash, password):
+            release.wait(5)
+            return True
+
+    pool = HashingPool(SlowHasher(), workers=1, queue_depth=1, wait_seconds=0.05)
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(pool.verify('hash', 'pw'))) for _ in range(2)]
+    for caller in callers:
+        caller.start()
+    while pool.stats()['in_flight'] < 2:
+        pass
+
+    with pytest.raises(HashingPoolBusy):
+        pool.verify('hash', 'pw')
+    release.set()
+    for caller in callers:
+        caller.join()
+    assert results == [True, True] and pool.verify('hash', 'pw')
+    assert pool.stats() == {'workers': 1, 'queue_depth': 1, 'in_flight': 0, 'completed': 3, 'rejected': 1}
+
+
+def test_save_merges_with_users_written_by_other_processes(tmp_path):
+    path = str(tmp_path / 'users.json')
+    admin = UserStore(HashingPool(cheap_hasher(time_cost=1)), path)
+    admin.set_user('alice', 's3cret', 'dev', 'Alice Example')
+    admin.set_user('bob', 'hunter2', 'auditor', 'Bob Example')
+    admin.save()
+
+    # A worker loads the file, then create_users.py adds carol and resets bob's password
+    worker = UserStore(HashingPool(cheap_hasher(time_cost=2)), path)
+    assert len(worker) == 2
+    admin.set_user('carol', 'c4rol', 'admin', 'Carol Example')
+    admin.set_user('bob', 'n3w-pass', 'auditor', 'Bob Example')
+    admin.save()
+
+    # The worker's hash upgrades keep carol and do not undo bob's new password
+    assert worker.authenticate('alice', 's3cret') is not None
+    assert worker.authenticate('bob', 'hunter2') is not None
+    worker.save()
+    records = {record['username']: record for record in json.load(open(path))['users']}
+    assert sorted(records) == ['alice', 'bob', 'carol']
+    assert 't=2' in records['alice']['password_hash'] and 't=1' in records['bob']['password_hash']
+    assert worker.authenticate('carol', 'c4rol').role == 'admin'
+    assert worker.authenticate('bob', 'n3w-pass') is not None
+    assert sorted(os.listdir(tmp_path)) == ['users.json', 'users.json.lock']  # no temp files left behind
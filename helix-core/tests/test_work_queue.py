@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+from local_redis import LocalRedis, redis_server
+from work_queue import DepartmentLimit, NewTask, RedisWorkQueue, SQLiteWorkQueue, queue_from_url
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def make_queue(request, tmp_path):
+    """Factory for queues that share one backend, as separate nodes would"""
+    if request.param == 'sqlite':
+        path = str(tmp_path / 'queue.db')
+        return lambda **kwargs: SQLiteWorkQueue(path, **kwargs)
+    server = redis_server()
+    return lambda **kwargs: RedisWorkQueue(server, namespace='helix-test:queue', **kwargs)
+
+
+def test_tasks_are_leased_once_in_sort_key_order_and_acked(make_queue):
+    queue = make_queue()
+    assert queue.enqueue('low', {'filename': 'low.csv'}, 'TREASURY', 'low', sort_key=30.0)
+    assert queue.enqueue('urgent', {'filename': 'urgent.mt940'}, 'TREASURY', 'critical', sort_key=10.0)
+    assert not queue.enqueue('urgent', {'filename': 'again.mt940'}, sort_key=0.0)
+
+    first = queue.lease('node-a', limit=1)
+    assert [lease.task_id for lease in first] == ['urgent']
+    assert first[0].payload == {'filename': 'urgent.mt940'} and first[0].attempts == 1
+    assert [lease.task_id for lease in make_queue().lease('node-b', limit=5)] == ['low']
+    assert queue.lease('node-a') == []
+
+    queue.ack(first[0])
+    assert queue.state('urgent') == 'done' and queue.state('low') == 'leased'
+    assert queue.state('missing') is None
+
+    # Many nodes competing for many tasks: each task is delivered exactly once
+    assert queue.enqueue_many(NewTask(f"bulk-{index}", {'index': index}, sort_key=float(index))
+                              for index in range(200)) == [True] * 200
+    assert queue.enqueue_many([NewTask('bulk-7', {}), NewTask('bulk-200', {}, sort_key=200.0)]) == [False, True]
+    delivered = []
+    def node(name):
+        own = make_queue()
+        while True:
+            leases = own.lease(name, limit=3)
+            if not leases:
+                return
+            for lease in leases:
+                delivered.append(lease.task_id)
+                own.ack(lease)
+    nodes = [threading.Thread(target=node, args=(f"node-{n}",)) for n in range(4)]
+    for thread in nodes:
+        thread.start()
+    for thread in nodes:
+        thread.join()
+    assert sorted(delivered) == sorted(f"bulk-{index}" for index in range(201))
+
+
+def test_expired_leases_are_redelivered_then_dead_lettered(make_queue):
+    dead = []
+    queue = make_queue(visibility_timeout=0.4, max_attempts=2,
+                       on_dead_letter=lambda task_id, payload, error: dead.append((task_id, error)))
+    queue.enqueue('statement', {'job_id': 'job-1'})
+
+    crashed = queue.lease('node-a')[0]
+    time.sleep(0.2)
+    assert queue.extend(crashed)           # the holder keeps it alive while working
+    time.sleep(0.3)
+    assert queue.lease('node-b') == []
+    time.sleep(0.3)                        # ... then node-a stops extending
+
+    retry = queue.lease('node-b')[0]
+    assert retry.attempts == 2
+    queue.ack(crashed)                     # a stale holder cannot finish the redelivered task
+    assert queue.state('statement') == 'leased'
+    assert not queue.extend(crashed)
+
+    time.sleep(0.5)
+    assert queue.lease('node-c') == []
+    assert queue.state('statement') == 'dead' and dead == [('statement', 'lease expired')]
+    assert [letter['task_id'] for letter in queue.dead_letters()] == ['statement']
+
+    assert queue.requeue_dead('statement')
+    assert queue.lease('node-c')[0].attempts == 1
+
+
+def test_nack_backs_off_and_dead_letters_after_the_last_attempt(make_queue):
+    dead = []
+    queue = make_queue(max_attempts=2, on_dead_letter=lambda task_id, payload, error: dead.append(error))
+    queue.enqueue('flaky', {'filename': 'flaky.bai2'})
+
+    queue.nack(queue.lease('node-a')[0], 'SAP unavailable', delay=0.2)
+    assert queue.state('flaky') == 'pending'
+    assert queue.lease('node-a') == []
+    time.sleep(0.25)
+    second = queue.lease('node-a')[0]
+    assert second.attempts == 2
+
+    queue.nack(second, 'SAP unavailable again')
+    assert queue.state('flaky') == 'dead' and dead == ['SAP unavailable again']
+    assert queue.dead_letters()[0]['error'] == 'SAP unavailable again'
+
+
+def test_departments_at_their_limit_are_skipped_on_every_node(make_queue):
+    limits = {'HR': DepartmentLimit(max_concurrent=1), 'TREASURY': DepartmentLimit(rate_per_minute=60, burst=2)}
+    queue = make_queue()
+    queue.enqueue_many([NewTask('hr-1', {}, 'HR', sort_key=1.0), NewTask('hr-2', {}, 'HR', sort_key=2.0),
+                        NewTask('tr-1', {}, 'TREASURY', sort_key=3.0), NewTask('tr-2', {}, 'TREASURY', sort_key=4.0),
+                        NewTask('tr-3', {}, 'TREASURY', sort_key=5.0), NewTask('misc', {}, sort_key=6.0)])
+
+    first = queue.lease('node-a', limit=2, limits=limits)
+    assert [(lease.task_id, lease.department) for lease in first] == [('hr-1', 'HR'), ('tr-1', 'TREASURY')]
+
+    # HR is at its concurrency limit cluster-wide and TREASURY has one start left in its window:
+    # another node skips the blocked tasks instead of leasing them and holding them back
+    second = make_queue().lease('node-b', limit=5, limits=limits)
+    assert [lease.task_id for lease in second] == ['tr-2', 'misc']
+
+    queue.ack(first[0])
+    assert [lease.task_id for lease in make_queue().lease('node-b', limit=5, limits=limits)] == ['hr-2']
+    assert [lease.task_id for lease in queue.lease('node-a', limit=5)] == ['tr-3']  # unlimited without limits
+
+
+def test_redis_lease_cost_does_not_grow_with_tasks_in_flight():
+    class CountingRedis(LocalRedis):
+        commands = 0
+        def __getattribute__(self, name):
+            if not name.startswith('_') and name not in ('data', 'expires', 'lock', 'pipeline'):
+                type(self).commands += 1
+            return super().__getattribute__(name)
+
+    server = CountingRedis()
+    queue = RedisWorkQueue(server, namespace='helix-test:queue')
+    queue.enqueue_many(NewTask(f"task-{index}", {'index': index}, sort_key=float(index)) for index in range(500))
+    in_flight = queue.lease('node-a', limit=400)
+    assert len(in_flight) == 400
+
+    CountingRedis.commands = 0
+    assert [lease.task_id for lease in queue.lease('node-b', limit=2)] == ['task-400', 'task-401']
+    assert CountingRedis.commands < 30
+    assert queue.stats()['states'] == {'pending': 98, 'leased': 402, 'dead': 0}
+
+
+def test_queue_from_url(tmp_path):
+    assert queue_from_url('sqlite:' + str(tmp_path / 'q.db')).path == str(tmp_path / 'q.db')
+    assert queue_from_url('').path == ':memory:'
+    assert queue_from_url('').scope == 'process' and queue_from_url('sqlite:' + str(tmp_path / 'q.db')).scope == 'host'
+    with pytest.raises(ValueError):
+        queue_from_url('amqp://broker')
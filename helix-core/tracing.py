@@ -0,0 +1,270 @@
+"""
+🔬 Helix Tracing - Where did the time go for this file?
+Lightweight spans for every pipeline stage (download, queue wait, parse, validate,
+content routing, SAP call, archive), tagged with file name, format, size and job id.
+
+- Finished traces go into a bounded in-memory ring (queried by /api/debug/traces)
+- Optional exporter writes OTLP-compatible JSON lines to local files
+- Sampling is decided once per trace; unsampled traces and spans are a shared no-op
+  object, so the cost with sampling turned down is a context variable lookup
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """One timed operation inside a trace"""
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, trace: 'Trace', name: str, parent_id: Optional[str], start_ns: int,
+                 attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict:
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'offset_ms': round((self.start_ns - self.trace.root.start_ns) / 1e6, 3),
+            'duration_ms': None if self.end_ns is None else round(self.duration_ms, 3),
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+    def to_otlp(self) -> Dict:
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+class Trace:
+    """All spans recorded for one file (or one polling cycle)"""
+    __slots__ = ('trace_id', 'root', 'spans')
+
+    def __init__(self, name: str, start_ns: int, attributes: Dict[str, Any]):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.root = Span(self, name, None, start_ns, attributes)
+        self.spans.append(self.root)
+
+    @property
+    def duration_ms(self) -> float:
+        return self.root.duration_ms or 0.0
+
+    def set_attribute(self, key: str, value: Any):
+        self.root.attributes[key] = value
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, **attributes) -> Span:
+        """Record a span timed elsewhere (e.g. the download done by the poller thread)"""
+        span = Span(self, name, self.root.span_id, start_ns, attributes)
+        span.end_ns = end_ns
+        self.spans.append(span)
+        return span
+
+    def to_dict(self, include_spans: bool = True) -> Dict:
+        data = {
+            'trace_id': self.trace_id,
+            'name': self.root.name,
+            'started_at': datetime.fromtimestamp(self.root.start_ns / 1e9).isoformat(),
+            'duration_ms': round(self.duration_ms, 3),
+            'attributes': self.root.attributes,
+            'error': self.root.error
+        }
+        if include_spans:
+            data['spans'] = [span.to_dict() for span in sorted(self.spans[1:], key=lambda span: span.start_ns)]
+        return data
+
+class _NoopSpan:
+    """Stand-in for unsampled traces: every operation does nothing"""
+    __slots__ = ()
+    trace = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, **attributes):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar = ContextVar('helix_current_span', default=None)
+
+def _otlp_attribute(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+class Tracer:
+    """
+    🧵 Creates traces and spans and keeps the most recent finished traces.
+    The active span is tracked per thread / context, so nested stages become children.
+    """
+
+    def __init__(self, capacity: int = 1000, sample_rate: float = 1.0, exporter=None,
+                 service_name: str = 'helix-core'):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.service_name = service_name
+        self._finished: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, start_ns: Optional[int] = None, **attributes):
+        """Root span of a new trace (sampled or not); yields the Trace or a no-op"""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            token = _current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+
+        trace = Trace(name, start_ns or time.time_ns(), attributes)
+        token = _current_span.set(trace.root)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            trace.root.end_ns = time.time_ns()
+            self._finish(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Child of the active span; a no-op outside a sampled trace"""
+        parent = _current_span.get()
+        if parent is None or parent is NOOP_SPAN:
+            yield NOOP_SPAN
+            return
+        span = Span(parent.trace, name, parent.span_id, time.time_ns(), attributes)
+        parent.trace.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+
+    def current_trace(self):
+        """Trace of the active span (NOOP_SPAN when unsampled or outside a trace)"""
+        span = _current_span.get()
+        return NOOP_SPAN if span is None or span is NOOP_SPAN else span.trace
+
+    def _finish(self, trace: Trace):
+        with self._lock:
+            self._finished.append(trace)
+        if self.exporter is not None:
+            self.exporter.export(trace, self.service_name)
+
+    # ---- Queries ----
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return next((trace for trace in self._finished if trace.trace_id == trace_id), None)
+
+    def slowest(self, limit: int = 20, name: Optional[str] = None, min_ms: float = 0.0,
+                file_name: Optional[str] = None, errors_only: bool = False) -> List[Trace]:
+        """Finished traces in the ring, slowest first, after filtering"""
+        with self._lock:
+            traces = list(self._finished)
+        matching = [
+            trace for trace in traces
+            if (name is None or trace.root.name == name)
+            and trace.duration_ms >= min_ms
+            and (file_name is None or file_name in str(trace.root.attributes.get('file.name', '')))
+            and (not errors_only or trace.root.error)
+        ]
+        matching.sort(key=lambda trace: trace.duration_ms, reverse=True)
+        return matching[:limit]
+
+class OTLPFileExporter:
+    """
+    📤 Writes finished traces as OTLP/JSON (one ExportTraceServiceRequest per line)
+    to <directory>/traces-YYYYMMDD.jsonl from a background thread.
+    """
+
+    def __init__(self, directory: str, max_pending: int = 10000):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._dropped = 0
+        threading.Thread(target=self._run, name='helix-trace-exporter', daemon=True).start()
+
+    def export(self, trace: Trace, service_name: str):
+        try:
+            self._queue.put_nowait((trace, service_name))
+        except queue.Full:
+            self._dropped += 1
+
+    @staticmethod
+    def to_otlp(trace: Trace, service_name: str) -> Dict:
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', service_name)]},
+                'scopeSpans': [{
+                    'scope': {'name': 'helix.tracing'},
+                    'spans': [span.to_otlp() for span in trace.spans]
+                }]
+            }]
+        }
+
+    def _run(self):
+        while True:
+            trace, service_name = self._queue.get()
+            try:
+                path = os.path.join(self.directory, f"traces-{datetime.now().strftime('%Y%m%d')}.jsonl")
+                with open(path, 'a', encoding='utf-8') as out:
+                    out.write(json.dumps(self.to_otlp(trace, service_name), separators=(',', ':')) + '\n')
+                    # Drain whatever queued up meanwhile with the same file handle
+                    while not self._queue.empty():
+                        trace, service_name = self._queue.get_nowait()
+                        out.write(json.dumps(self.to_otlp(trace, service_name), separators=(',', ':')) + '\n')
+            except Exception as e:
+                logger.error(f"❌ Trace export to {self.directory} failed: {e}")
+            if self._dropped:
+                logger.warning(f"⚠️ Trace exporter queue full - dropped {self._dropped} traces")
+                self._dropped = 0
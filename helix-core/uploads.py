@@ -0,0 +1,348 @@
+"""
+📤 Helix Resumable Uploads - Chunked, streaming uploads for large statement files
+Branch offices on flaky links upload in byte ranges and pick up where they left off.
+
+Protocol:
+- create a session (filename, routing code, total size)       → upload_id, offset 0
+- PUT consecutive byte ranges (Content-Range: bytes a-b/total) → new offset
+- ask for the current offset after a network drop, resume from there
+- finalize once offset == total size (optional SHA-256 check)   → file ready for routing
+
+Chunks stream straight from the request into a .part file in the staging area
+while a SHA-256 is updated incrementally - nothing is buffered in worker memory.
+
+Bulk uploads (many files or one zip/tar archive) are streamed entry by entry
+with the helpers at the bottom of this module.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COPY_BLOCK_SIZE = 1024 * 1024
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+class UploadError(Exception):
+    """Upload request that cannot be applied; carries the HTTP status to answer with"""
+
+    def __init__(self, message: str, status: int = 400, offset: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+@dataclass
+class UploadSession:
+    """State of one resumable upload (persisted as a JSON sidecar next to the .part file)"""
+    upload_id: str
+    filename: str
+    routing_code: str
+    total_size: int
+    uploaded_by: str
+    priority: str = 'NORMAL'
+    notes: str = ''
+    expected_sha256: Optional[str] = None
+    offset: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.total_size
+
+    def to_dict(self) -> Dict:
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.filename,
+            'routing_code': self.routing_code,
+            'total_size': self.total_size,
+            'offset': self.offset,
+            'complete': self.complete
+        }
+
+class UploadSessionStore:
+    """
+    🗂️ Upload sessions backed by the staging directory, shared by every worker process.
+    Metadata lives in <id>.json and bytes in <id>.part; each call re-reads the metadata
+    under an flock on the .part file, so chunks of one upload can land on any gunicorn
+    worker. The running hash is cached per process and rebuilt from the partial file
+    whenever the cached state does not match the session's offset.
+    Pass `owner` (the caller's identity, None for admins) to restrict a session to the
+    user who opened it.
+    """
+
+    def __init__(self, staging_dir: str, max_file_bytes: int = 512 * 1024 * 1024,
+                 max_chunk_bytes: int = 16 * 1024 * 1024, session_ttl: float = 24 * 3600):
+        self.staging_dir = staging_dir
+        self.max_file_bytes = max_file_bytes
+        self.max_chunk_bytes = max_chunk_bytes
+        self.session_ttl = session_ttl
+        os.makedirs(staging_dir, exist_ok=True)
+
+        self._hashers: Dict[str, Tuple[int, 'hashlib._Hash']] = {}   # upload_id -> (offset covered, sha256)
+
+    # ---- Paths ----
+    def part_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{os.path.basename(upload_id)}.part")
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{os.path.basename(upload_id)}.json")
+
+    # ---- Session lifecycle ----
+    def create(self, filename: str, routing_code: str, total_size: int, uploaded_by: str,
+               priority: str = 'NORMAL', notes: str = '', sha256: Optional[str] = None) -> UploadSession:
+        """Open a new upload session after checking the declared size"""
+        filename = os.path.basename(filename or '')
+        if not filename:
+            raise UploadError("filename is required")
+        if total_size <= 0:
+            raise UploadError("total_size must be positive")
+        if total_size > self.max_file_bytes:
+            raise UploadError(f"File of {total_size} bytes exceeds the {self.max_file_bytes} byte limit", status=413)
+
+        session = UploadSession(
+            upload_id=str(uuid.uuid4()),
+            filename=filename,
+            routing_code=routing_code,
+            total_size=total_size,
+            uploaded_by=uploaded_by,
+            priority=priority,
+            notes=notes,
+            expected_sha256=sha256.lower() if sha256 else None
+        )
+        open(self.part_path(session.upload_id), 'wb').close()
+        self._save(session)
+        self._hashers[session.upload_id] = (0, hashlib.sha256())
+        logger.info(f"📤 Upload session {session.upload_id} opened for {filename} ({total_size} bytes)")
+        return session
+
+    def get(self, upload_id: str, owner: Optional[str] = None) -> UploadSession:
+        """Session by id, as currently on disk"""
+        session = self._load(upload_id)
+        self._check(session, owner)
+        return session
+
+    def write_chunk(self, upload_id: str, start: int, stream: BinaryIO, length: Optional[int] = None,
+                    owner: Optional[str] = None) -> UploadSession:
+        """Append bytes at `start` (must equal the current offset) streaming from `stream`"""
+        with self._locked(upload_id) as part:
+            session = self.get(upload_id, owner)
+            if start != session.offset:
+                raise UploadError(f"Expected chunk at offset {session.offset}, got {start}",
+                                  status=409, offset=session.offset)
+            if length is not None and length > self.max_chunk_bytes:
+                raise UploadError(f"Chunk of {length} bytes exceeds the {self.max_chunk_bytes} byte limit", status=413)
+            if length is not None and start + length > session.total_size:
+                raise UploadError(f"Chunk ends past the declared size of {session.total_size} bytes",
+                                  status=416, offset=session.offset)
+
+            # Work on a copy: the cached state only advances once the chunk is on disk
+            hasher = self._hasher(session, part).copy()
+            remaining = session.total_size - session.offset
+            limit = min(remaining, self.max_chunk_bytes) if length is None else length
+            written = 0
+            part.seek(session.offset)
+            part.truncate()
+            while True:
+                try:
+                    block = stream.read(min(COPY_BLOCK_SIZE, limit - written + 1))
+                except Exception as e:  # client went away mid-chunk
+                    logger.warning(f"⚠️ Upload {upload_id}: read failed after {written} bytes: {e}")
+                    block = b''
+                if not block:
+                    break
+                written += len(block)
+                if written > limit or session.offset + written > session.total_size:
+                    part.truncate(session.offset)
+                    raise UploadError("Chunk runs past the declared size or chunk limit", status=413,
+                                      offset=session.offset)
+                part.write(block)
+                hasher.update(block)
+            part.flush()
+            os.fsync(part.fileno())
+
+            if length is not None and written != length:
+                # Connection dropped mid-chunk: keep what arrived, the client resumes from the new offset
+                logger.warning(f"⚠️ Upload {upload_id}: chunk truncated ({written}/{length} bytes)")
+
+            session.offset += written
+            session.updated_at = time.time()
+            self._save(session)
+            self._hashers[upload_id] = (session.offset, hasher)
+            return session
+
+    def finalize(self, upload_id: str, destination: str, owner: Optional[str] = None) -> str:
+        """Verify size and checksum, move the file to `destination`; returns the SHA-256 hex digest"""
+        with self._locked(upload_id) as part:
+            session = self.get(upload_id, owner)
+            if not session.complete:
+                raise UploadError(f"Upload incomplete: {session.offset}/{session.total_size} bytes",
+                                  status=409, offset=session.offset)
+            digest = self._hasher(session, part).hexdigest()
+            if session.expected_sha256 and digest != session.expected_sha256:
+                raise UploadError(f"Checksum mismatch: expected {session.expected_sha256}, got {digest}", status=422)
+
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(self.part_path(upload_id), destination)
+            self._forget(upload_id)
+        logger.info(f"✅ Upload {upload_id} finalized as {destination} (sha256 {digest[:12]})")
+        return digest
+
+    def abort(self, upload_id: str, owner: Optional[str] = None):
+        """Drop a session and its partial data"""
+        try:
+            with self._locked(upload_id):
+                self.get(upload_id, owner)
+                self._remove(upload_id)
+        except UploadError as e:
+            if e.status != 404:
+                raise
+
+    def expire(self) -> int:
+        """Remove sessions idle for longer than the TTL; returns how many were dropped"""
+        cutoff = time.time() - self.session_ttl
+        expired = []
+        for name in os.listdir(self.staging_dir):
+            if not name.endswith('.json'):
+                continue
+            upload_id = name[:-5]
+            try:
+                if self._load(upload_id).updated_at < cutoff:
+                    expired.append(upload_id)
+            except UploadError:
+                continue
+        for upload_id in expired:
+            self._remove(upload_id)
+        if expired:
+            logger.info(f"🧹 Expired {len(expired)} stale upload sessions")
+        return len(expired)
+
+    # ---- Internals ----
+    @contextmanager
+    def _locked(self, upload_id: str):
+        """Exclusive access to one session across threads and processes (flock on its .part file)"""
+        try:
+            part = open(self.part_path(upload_id), 'r+b')
+        except FileNotFoundError:
+            raise UploadError(f"Upload {upload_id} not found", status=404)
+        with part:
+            fcntl.flock(part.fileno(), fcntl.LOCK_EX)
+            try:
+                yield part
+            finally:
+                fcntl.flock(part.fileno(), fcntl.LOCK_UN)
+
+    def _check(self, session: UploadSession, owner: Optional[str]):
+        if owner is not None and owner != session.uploaded_by:
+            raise UploadError(f"Upload {session.upload_id} belongs to another user", status=403)
+        if time.time() - session.updated_at > self.session_ttl:
+            self._remove(session.upload_id)
+            raise UploadError(f"Upload {session.upload_id} expired", status=410)
+
+    def _hasher(self, session: UploadSession, part: BinaryIO):
+        """Running SHA-256 up to the session's offset - cached, or rebuilt from the partial file"""
+        cached = self._hashers.get(session.upload_id)
+        if cached is not None and cached[0] == session.offset:
+            return cached[1]
+        hasher = hashlib.sha256()
+        part.seek(0)
+        remaining = session.offset
+        while remaining:
+            block = part.read(min(COPY_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+        self._hashers[session.upload_id] = (session.offset, hasher)
+        return hasher
+
+    def _save(self, session: UploadSession):
+        path = self._meta_path(session.upload_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(session), f)
+        os.replace(tmp_path, path)
+
+    def _load(self, upload_id: str) -> UploadSession:
+        try:
+            with open(self._meta_path(upload_id), 'r', encoding='utf-8') as f:
+                return UploadSession(**json.load(f))
+        except FileNotFoundError:
+            raise UploadError(f"Upload {upload_id} not found", status=404)
+
+    def _remove(self, upload_id: str):
+        for path in (self.part_path(upload_id), self._meta_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._hashers.pop(upload_id, None)
+
+    def _forget(self, upload_id: str):
+        try:
+            os.remove(self._meta_path(upload_id))
+        except FileNotFoundError:
+            pass
+        self._hashers.pop(upload_id, None)
+
+# ---- Bulk Upload Helpers ----
+def is_archive(filename: str) -> bool:
+    return (filename or '').lower().endswith(ARCHIVE_SUFFIXES)
+
+def _entry_name(path: str) -> Optional[str]:
+    """Plain file name of an archive member; None for directories, dotfiles and OS metadata"""
+    path = path.replace('\\', '/')
+    name = posixpath.basename(path)
+    if not name or name.startswith('.') or '__MACOSX/' in path:
+        return None
+    return name
+
+def iter_archive_entries(fileobj: BinaryIO, filename: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """Yield (name, reader) for every regular file in a zip or tar archive, one at a time"""
+    if filename.lower().endswith('.zip'):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                name = None if info.is_dir() else _entry_name(info.filename)
+                if name:
+                    with archive.open(info) as member:
+                        yield name, member
+    else:
+        # Stream mode: members are read sequentially, the archive is never seeked or buffered
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for member in archive:
+                name = _entry_name(member.name) if member.isfile() else None
+                if name:
+                    yield name, archive.extractfile(member)
+
+def copy_stream(source: BinaryIO, destination: str, max_bytes: int, head: bytes = b'') -> int:
+    """Copy `head` + the rest of `source` to `destination` in blocks; returns the size written"""
+    written = 0
+    try:
+        with open(destination, 'wb') as out:
+            block = head or source.read(COPY_BLOCK_SIZE)
+            while block:
+                written += len(block)
+                if written > max_bytes:
+                    raise UploadError(f"File exceeds the {max_bytes} byte limit", status=413)
+                out.write(block)
+                block = source.read(COPY_BLOCK_SIZE)
+    except BaseException:
+        try:
+            os.remove(destination)
+        except FileNotFoundError:
+            pass
+        raise
+    return written
@@ -0,0 +1,326 @@
+"""
+🔑 Helix User Store - argon2 password hashes, shared role tables, bounded hashing
+Users live in a JSON file of argon2 hashes (`python create_users.py` writes it); without
+one the demo accounts are hashed on first use. Verifying a password is deliberately
+expensive (tens of ms of CPU and `memory_cost` KiB of RAM), so it runs on a small
+HashingPool: a burst of logins queues for a few hashing threads and is turned away
+with HashingPoolBusy once that queue is full, instead of tying up every request thread.
+
+Several processes share the users file: saves lock it, re-read it and merge in only the
+users this process changed, so a worker's hash upgrade never drops a user that
+create_users.py added after the worker loaded the file.
+
+Roles map to one precomputed, read-only permission table each. Tokens carry only the
+role; permissions are looked up from the role when they are needed.
+
+Users file:
+    {"users": [{"username": "admin", "password_hash": "$argon2id$...", "role": "admin",
+                "full_name": "Admin Swiss", "email": "admin@helix.bank"}]}
+"""
+
+import fcntl
+import functools
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+logger = logging.getLogger(__name__)
+
+# ---- Role Permissions ----
+DEFAULT_ROLE = "auditor"
+
+ROLE_PERMISSIONS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    role: MappingProxyType(table) for role, table in {
+        "admin": {
+            "emoji": "👑",
+            "color": "#dc2626",  # Red
+            "can_manage_users": True,
+            "can_upload_files": True,
+            "can_delete_files": True,
+            "can_view_logs": True,
+            "can_modify_settings": True,
+            "can_export_data": True,
+            "dashboard_sections": ("all",)
+        },
+        "dev": {
+            "emoji": "💻",
+            "color": "#2563eb",  # Blue
+            "can_manage_users": False,
+            "can_upload_files": True,
+            "can_delete_files": False,
+            "can_view_logs": True,
+            "can_modify_settings": False,
+            "can_export_data": True,
+            "dashboard_sections": ("upload", "processing", "api_tools", "logs")
+        },
+        "auditor": {
+            "emoji": "📋",
+            "color": "#059669",  # Green
+            "can_manage_users": False,
+            "can_upload_files": False,
+            "can_delete_files": False,
+            "can_view_logs": True,
+            "can_modify_settings": False,
+            "can_export_data": True,
+            "dashboard_sections": ("stats", "logs", "reports", "audit_trail")
+        }
+    }.items()
+})
+
+@functools.lru_cache(maxsize=64)
+def role_permissions(role: Optional[str]) -> Mapping[str, Any]:
+    """Shared permission table for a role (unknown roles get the auditor's)"""
+    return ROLE_PERMISSIONS.get(role, ROLE_PERMISSIONS[DEFAULT_ROLE])
+
+@functools.lru_cache(maxsize=64)
+def permissions_json(role: Optional[str]) -> Dict[str, Any]:
+    """role_permissions() as plain JSON types, built once per role - treat as read-only"""
+    return {key: list(value) if isinstance(value, tuple) else value
+            for key, value in role_permissions(role).items()}
+
+# ---- Users ----
+class UserProfile:
+    def __init__(self, username, password_hash, role, full_name, email=None):
+        self.username = username
+        self.password_hash = password_hash
+        self.role = role if role in ROLE_PERMISSIONS else DEFAULT_ROLE
+        self.full_name = full_name
+        self.email = email or f"{username}@helix.bank"
+        self.created_at = datetime.now(timezone.utc)
+        self.last_login = None
+        self.login_count = 0
+
+    @property
+    def permissions(self) -> Mapping[str, Any]:
+        return role_permissions(self.role)
+
+    def record_login(self):
+        """Record successful login with precise timestamp"""
+        self.last_login = datetime.now(timezone.utc)
+        self.login_count += 1
+        logger.info(f"🔐 User login: {self.username} ({self.role}) at {self.last_login.isoformat()}")
+
+    def to_dict(self):
+        """Convert to dictionary for JSON responses"""
+        return {
+            "username": self.username,
+            "full_name": self.full_name,
+            "email": self.email,
+            "role": self.role,
+            "permissions": permissions_json(self.role),
+            "created_at": self.created_at.isoformat(),
+            "last_login": self.last_login.isoformat() if self.last_login else None,
+            "login_count": self.login_count
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        return {"username": self.username, "password_hash": self.password_hash, "role": self.role,
+                "full_name": self.full_name, "email": self.email}
+
+# Development accounts, used when no users file is configured
+DEMO_USERS = (
+    {"username": "admin", "password": "adminpass", "role": "admin", "full_name": "Admin Swiss"},
+    {"username": "dev", "password": "devpass", "role": "dev", "full_name": "Dev Engineer"},
+    {"username": "auditor", "password": "auditpass", "role": "auditor", "full_name": "Audit Manager"}
+)
+
+# ---- Hashing Pool ----
+def password_hasher_from_env() -> PasswordHasher:
+    """
+    argon2id with ARGON2_TIME_COST / ARGON2_MEMORY_KIB / ARGON2_PARALLELISM - defaults follow
+    RFC 9106 (low-memory profile). Shared by the service and create_users.py.
+    """
+    return PasswordHasher(
+        time_cost=int(os.getenv("ARGON2_TIME_COST", "3")),
+        memory_cost=int(os.getenv("ARGON2_MEMORY_KIB", "65536")),
+        parallelism=int(os.getenv("ARGON2_PARALLELISM", "4"))
+    )
+
+class HashingPoolBusy(Exception):
+    """Every hashing thread is busy and the wait queue is full - retry shortly"""
+
+class HashingPool:
+    """
+    🧮 Runs argon2 on `workers` threads with at most `queue_depth` callers waiting.
+    argon2-cffi releases the GIL while hashing, so request threads keep serving other
+    requests; callers beyond the queue wait up to `wait_seconds` for a slot, then get
+    HashingPoolBusy.
+    """
+
+    def __init__(self, hasher: Optional[PasswordHasher] = None, workers: int = 2,
+                 queue_depth: int = 16, wait_seconds: float = 1.0):
+        self.hasher = hasher or PasswordHasher()
+        self.workers = max(workers, 1)
+        self.queue_depth = max(queue_depth, 0)
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_depth)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="helix-argon2")
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            with self._stats_lock:
+                self._rejected += 1
+            raise HashingPoolBusy(f"{self.workers + self.queue_depth} password checks already in progress")
+        with self._stats_lock:
+            self._in_flight += 1
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            with self._stats_lock:
+                self._in_flight -= 1
+                self._completed += 1
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(self.hasher.hash, password)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(self._verify, password_hash, password)
+
+    def _verify(self, password_hash: str, password: str) -> bool:
+        try:
+            return self.hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue_depth,
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'rejected': self._rejected
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# ---- Store ----
+class UserStore:
+    """
+    👥 Users by name, loaded on first use from `path` (or the demo accounts when empty).
+    authenticate() checks a password on the pool, upgrading hashes made with older
+    argon2 parameters and saving them back to the file.
+    """
+
+    def __init__(self, pool: HashingPool, path: str = "", demo_users: Iterable[Dict[str, str]] = DEMO_USERS):
+        self.pool = pool
+        self.path = path
+        self.demo_users = tuple(demo_users)
+        self._users: Optional[Dict[str, UserProfile]] = None
+        self._dummy_hash: Optional[str] = None
+        # username -> hash it replaced (None: replace whatever the file holds) until the next save
+        self._changed: Dict[str, Optional[str]] = {}
+        self._lock = threading.RLock()
+
+    def _loaded(self) -> Dict[str, UserProfile]:
+        if self._users is None:
+            with self._lock:
+                if self._users is None:
+                    self._users = self._load()
+        return self._users
+
+    def _read_records(self):
+        """User records currently in the file, or None when there is no file"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('users', [])
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> Dict[str, UserProfile]:
+        if self.path:
+            records = self._read_records()
+            if records is None:
+                logger.warning(f"⚠️ Users file {self.path} does not exist - nobody can log in")
+                records = []
+            users = {record['username']: UserProfile(**record) for record in records}
+            logger.info(f"👥 Loaded {len(users)} users from {self.path}")
+        else:
+            logger.warning("⚠️ No USERS_FILE configured - using the demo accounts")
+            users = {demo['username']: UserProfile(demo['username'], self.pool.hash(demo['password']),
+                                                   demo['role'], demo['full_name'])
+                     for demo in self.demo_users}
+        # Unknown users are checked against this, so they take as long as a wrong password
+        self._dummy_hash = self.pool.hash(os.urandom(16).hex())
+        return users
+
+    def get(self, username: Optional[str]) -> Optional[UserProfile]:
+        return self._loaded().get(username)
+
+    def authenticate(self, username: Optional[str], password: Optional[str]) -> Optional[UserProfile]:
+        """The user if the password matches, else None; raises HashingPoolBusy under load"""
+        user = self.get(username)
+        password_hash = user.password_hash if user else self._dummy_hash
+        if not self.pool.verify(password_hash, password or ''):
+            return None
+        if user is None:
+            return None
+        old_hash = user.password_hash
+        if self.pool.hasher.check_needs_rehash(old_hash):
+            try:
+                new_hash = self.pool.hash(password)
+            except HashingPoolBusy:
+                return user   # the login stands; the upgrade waits for a quieter login
+            with self._lock:
+                user.password_hash = new_hash
+                self._changed.setdefault(username, old_hash)
+            logger.info(f"🔑 Upgraded the password hash of {username}")
+            if self.path:
+                self.save()
+        return user
+
+    def set_user(self, username: str, password: str, role: str, full_name: str, email: Optional[str] = None):
+        """Add or replace a user (the caller saves)"""
+        user = UserProfile(username, self.pool.hash(password), role, full_name, email)
+        with self._lock:
+            self._loaded()[username] = user
+            self._changed[username] = None
+        return user
+
+    def save(self):
+        """Merge this process's changed users into the file as it is now, under an flock"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path + '.lock', 'a') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                users = self._loaded()
+                records = {record['username']: record for record in self._read_records() or []}
+                for username, replaced_hash in self._changed.items():
+                    on_disk = records.get(username)
+                    # A hash upgrade yields to a password set (or a user removed) since we loaded the file
+                    if replaced_hash is None or (on_disk and on_disk['password_hash'] == replaced_hash):
+                        records[username] = users[username].to_record()
+                    elif on_disk:
+                        users[username] = UserProfile(**on_disk)
+                    else:
+                        users.pop(username, None)
+                for username, record in records.items():
+                    if username not in users:
+                        users[username] = UserProfile(**record)
+
+                tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'users': list(records.values())}, f, indent=2)
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, self.path)
+                self._changed.clear()
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return len(self._loaded())
@@ -0,0 +1,717 @@
+"""
+📬 Helix Work Queue - Processing tasks shared by every helix-core node
+Pollers and uploads enqueue tasks; any node's workers lease them, so throughput
+grows with the number of nodes running the background services.
+
+- Leases: a leased task is invisible to other nodes until its visibility timeout;
+  the holder extends the lease while it works, a crashed node's tasks reappear
+- Acknowledgement: ack() finishes a task (kept as 'done' for `done_retention` seconds
+  so pollers can see it finished); nack() makes it visible again after a back-off
+- Dead letters: a task leased more than `max_attempts` times is moved aside for an
+  operator (requeue_dead()) instead of crashing node after node
+- Ordering: lowest sort key first (the scheduler's aged priority / cut-off key)
+- Department limits: lease() skips departments at their concurrency or rate limit, counted
+  over every node sharing the queue, so a blocked department never takes a worker's slot
+- Idempotent enqueue: a task id is accepted once until its record expires
+
+Backends:
+- SQLiteWorkQueue: one SQLite file (WAL) for the processes of a single host and for tests
+- RedisWorkQueue: any Redis-compatible server (redis-py client) for several hosts
+
+A queue's `scope` says how far its tasks travel ('process', 'host' or 'cluster'); the
+job state its tasks refer to must be reachable at least that far.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+STATES = ('pending', 'leased', 'done', 'dead')
+SCOPES = ('process', 'host', 'cluster')  # narrowest first
+
+@dataclass
+class Lease:
+    """A task held by one worker until it is acked, nacked or the lease runs out"""
+    task_id: str
+    token: str
+    payload: Dict[str, Any]
+    department: Optional[str]
+    priority: str
+    attempts: int
+    enqueued_at: float
+    expires_at: float
+
+class DepartmentLimit(NamedTuple):
+    """
+    Cluster-wide limits of one department (a routing department's 'quota'): at most
+    `max_concurrent` tasks leased at once, and at most `burst` leases started in any
+    `burst * 60 / rate_per_minute` seconds
+    """
+    max_concurrent: Optional[int] = None
+    rate_per_minute: Optional[float] = None
+    burst: int = 1
+
+    @property
+    def window(self) -> float:
+        return max(self.burst, 1) * 60.0 / self.rate_per_minute
+
+    def headroom(self, in_flight: int, started: int) -> Optional[int]:
+        """Leases that may still start with `in_flight` leased and `started` in the window (None: no limit)"""
+        rooms = []
+        if self.max_concurrent is not None:
+            rooms.append(self.max_concurrent - in_flight)
+        if self.rate_per_minute:
+            rooms.append(max(self.burst, 1) - started)
+        return min(rooms) if rooms else None
+
+class NewTask(NamedTuple):
+    """Arguments of one enqueue(), for enqueue_many()"""
+    task_id: str
+    payload: Dict[str, Any]
+    department: Optional[str] = None
+    priority: str = 'normal'
+    sort_key: Optional[float] = None
+
+DeadLetterCallback = Callable[[str, Dict[str, Any], str], None]
+DepartmentLimits = Mapping[str, DepartmentLimit]
+
+class WorkQueue(ABC):
+    """Base class for all work queue backends"""
+
+    scope = 'host'
+
+    def __init__(self, visibility_timeout: float = 120.0, max_attempts: int = 5,
+                 done_retention: float = 7 * 86400.0, on_dead_letter: Optional[DeadLetterCallback] = None):
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.done_retention = done_retention
+        self.on_dead_letter = on_dead_letter
+
+    @abstractmethod
+    def enqueue(self, task_id: str, payload: Dict[str, Any], department: Optional[str] = None,
+                priority: str = 'normal', sort_key: Optional[float] = None) -> bool:
+        """Add a task; False if a task with this id already exists"""
+
+    def enqueue_many(self, tasks: Iterable[NewTask]) -> List[bool]:
+        """enqueue() several tasks in one round trip where the backend allows it"""
+        return [self.enqueue(*task) for task in tasks]
+
+    @abstractmethod
+    def lease(self, owner: str, limit: int = 1, limits: Optional[DepartmentLimits] = None) -> List[Lease]:
+        """Lease up to `limit` visible tasks, lowest sort key first, of departments within `limits`"""
+
+    @abstractmethod
+    def extend(self, lease: Lease) -> bool:
+        """Push the lease's expiry out by another visibility timeout; False if it was lost"""
+
+    @abstractmethod
+    def ack(self, lease: Lease):
+        """The task is finished"""
+
+    @abstractmethod
+    def nack(self, lease: Lease, error: str = '', delay: float = 0.0):
+        """The attempt failed: retry after `delay`, or dead-letter once attempts are used up"""
+
+    @abstractmethod
+    def dead_letter(self, lease: Lease, error: str):
+        """Give up on the task now"""
+
+    @abstractmethod
+    def state(self, task_id: str) -> Optional[str]:
+        """'pending' | 'leased' | 'done' | 'dead', or None for unknown (or expired) tasks"""
+
+    @abstractmethod
+    def requeue_dead(self, task_id: str) -> bool:
+        """Give a dead-lettered task a fresh set of attempts"""
+
+    @abstractmethod
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Dead-lettered tasks, most recent first"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Task counts by state"""
+
+    def close(self):
+        """Release connections"""
+
+    def _dead_lettered(self, task_id: str, payload: Dict[str, Any], error: str):
+        logger.error("☠️ Dead-lettered task %s after %d attempts: %s", task_id, self.max_attempts, error,
+                     extra={'task_id': task_id, 'job_id': payload.get('job_id'), 'file': payload.get('filename')})
+        if self.on_dead_letter is not None:
+            try:
+                self.on_dead_letter(task_id, payload, error)
+            except Exception as e:
+                logger.error(f"💥 Dead-letter callback failed for {task_id}: {e}")
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    💾 Work queue in one SQLite table. Leasing is a single IMMEDIATE transaction, so any
+    number of processes on the host (or threads) can share the file; ':memory:' gives a
+    private in-process queue.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.scope = 'process' if path == ':memory:' else 'host'
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        if path != ':memory:':
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS work_queue (
+                task_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                sort_key REAL NOT NULL,
+                visible_at REAL NOT NULL,
+                department TEXT,
+                priority TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_token TEXT,
+                leased_by TEXT,
+                error TEXT,
+                enqueued_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_work_queue_ready ON work_queue(state, sort_key);
+            CREATE INDEX IF NOT EXISTS idx_work_queue_updated ON work_queue(state, updated_at);
+            CREATE TABLE IF NOT EXISTS lease_starts (
+                department TEXT NOT NULL,
+                leased_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lease_starts ON lease_starts(department, leased_at);
+        """)
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def enqueue(self, task_id, payload, department=None, priority='normal', sort_key=None) -> bool:
+        return self.enqueue_many([NewTask(task_id, payload, department, priority, sort_key)])[0]
+
+    def enqueue_many(self, tasks: Iterable[NewTask]) -> List[bool]:
+        now = time.time()
+        def insert(db):
+            return [db.execute(
+                "INSERT OR IGNORE INTO work_queue (task_id, state, sort_key, visible_at, department, priority, "
+                "payload, enqueued_at, updated_at) VALUES (?, 'pending', ?, ?, ?, ?, ?, ?, ?)",
+                (task.task_id, now if task.sort_key is None else task.sort_key, now, task.department,
+                 task.priority, json.dumps(task.payload), now, now)
+            ).rowcount == 1 for task in tasks]
+        return self._transaction(insert)
+
+    def _headroom(self, db, limits: DepartmentLimits, now: float) -> Dict[str, int]:
+        """Leases each limited department may still start right now"""
+        in_flight = dict(db.execute(
+            "SELECT department, COUNT(*) FROM work_queue WHERE state = 'leased' AND visible_at > ? "
+            "GROUP BY department", (now,)
+        ).fetchall())
+        headroom = {}
+        for department, limit in limits.items():
+            started = 0
+            if limit.rate_per_minute:
+                db.execute("DELETE FROM lease_starts WHERE department = ? AND leased_at <= ?",
+                           (department, now - limit.window))
+                started = db.execute("SELECT COUNT(*) FROM lease_starts WHERE department = ?",
+                                     (department,)).fetchone()[0]
+            room = limit.headroom(in_flight.get(department, 0), started)
+            if room is not None:
+                headroom[department] = room
+        return headroom
+
+    def lease(self, owner: str, limit: int = 1, limits: Optional[DepartmentLimits] = None) -> List[Lease]:
+        now = time.time()
+        expires_at = now + self.visibility_timeout
+        limits = limits or {}
+        exhausted = []
+        def claim(db):
+            leases = []
+            headroom = self._headroom(db, limits, now)
+            while len(leases) < limit:
+                blocked = [department for department, room in headroom.items() if room <= 0]
+                skip = ("AND (department IS NULL OR department NOT IN (%s)) " % ', '.join('?' * len(blocked))
+                        if blocked else "")
+                # pending tasks whose delay has passed, and leased tasks whose holder went quiet
+                rows = db.execute(
+                    "SELECT task_id, payload, department, priority, attempts, enqueued_at FROM work_queue "
+                    "WHERE state IN ('pending', 'leased') AND visible_at <= ? " + skip +
+                    "ORDER BY sort_key LIMIT ?",
+                    (now, *blocked, limit - len(leases))
+                ).fetchall()
+                if not rows:
+                    break
+                for task_id, payload, department, priority, attempts, enqueued_at in rows:
+                    if headroom.get(department, 1) <= 0:
+                        continue   # filled up by an earlier row of this batch
+                    if attempts >= self.max_attempts:
+                        db.execute("UPDATE work_queue SET state = 'dead', lease_token = NULL, updated_at = ?, "
+                                   "error = COALESCE(error, 'lease expired') WHERE task_id = ?", (now, task_id))
+                        exhausted.append((task_id, json.loads(payload), 'lease expired'))
+                        continue
+                    token = uuid.uuid4().hex
+                    db.execute(
+                        "UPDATE work_queue SET state = 'leased', visible_at = ?, attempts = attempts + 1, "
+                        "lease_token = ?, leased_by = ?, updated_at = ? WHERE task_id = ?",
+                        (expires_at, token, owner, now, task_id)
+                    )
+                    if department in headroom:
+                        headroom[department] -= 1
+                        if limits[department].rate_per_minute:
+                            db.execute("INSERT INTO lease_starts (department, leased_at) VALUES (?, ?)",
+                                       (department, now))
+                    leases.append(Lease(task_id, token, json.loads(payload), department, priority,
+                                        attempts + 1, enqueued_at, expires_at))
+            return leases
+        leases = self._transaction(claim)
+        for task_id, payload, error in exhausted:
+            self._dead_lettered(task_id, payload, error)
+        if now - self._last_purge > 60:
+            self._purge(now)
+        return leases
+
+    def _update_leased(self, lease: Lease, sql: str, *params) -> bool:
+        """Run `sql` (ending in WHERE task_id = ? AND lease_token = ?) for a lease we still hold"""
+        return self._transaction(
+            lambda db: db.execute(sql, params + (lease.task_id, lease.token)).rowcount == 1
+        )
+
+    def extend(self, lease: Lease) -> bool:
+        now = time.time()
+        held = self._update_leased(
+            lease, "UPDATE work_queue SET visible_at = ?, updated_at = ? "
+                   "WHERE state = 'leased' AND task_id = ? AND lease_token = ?",
+            now + self.visibility_timeout, now
+        )
+        if held:
+            lease.expires_at = now + self.visibility_timeout
+        return held
+
+    def ack(self, lease: Lease):
+        self._update_leased(
+            lease, "UPDATE work_queue SET state = 'done', lease_token = NULL, updated_at = ? "
+                   "WHERE task_id = ? AND lease_token = ?",
+            time.time()
+        )
+
+    def nack(self, lease: Lease, error: str = '', delay: float = 0.0):
+        if lease.attempts >= self.max_attempts:
+            self.dead_letter(lease, error)
+            return
+        now = time.time()
+        self._update_leased(
+            lease, "UPDATE work_queue SET state = 'pending', visible_at = ?, lease_token = NULL, error = ?, "
+                   "updated_at = ? WHERE task_id = ? AND lease_token = ?",
+            now + delay, error, now
+        )
+
+    def dead_letter(self, lease: Lease, error: str):
+        if self._update_leased(
+            lease, "UPDATE work_queue SET state = 'dead', lease_token = NULL, error = ?, updated_at = ? "
+                   "WHERE task_id = ? AND lease_token = ?",
+            error, time.time()
+        ):
+            self._dead_lettered(lease.task_id, lease.payload, error)
+
+    def state(self, task_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT state FROM work_queue WHERE task_id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def requeue_dead(self, task_id: str) -> bool:
+        now = time.time()
+        return self._transaction(lambda db: db.execute(
+            "UPDATE work_queue SET state = 'pending', attempts = 0, visible_at = ?, updated_at = ? "
+            "WHERE task_id = ? AND state = 'dead'", (now, now, task_id)
+        ).rowcount == 1)
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT task_id, payload, department, attempts, error, updated_at FROM work_queue "
+                "WHERE state = 'dead' ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {'task_id': task_id, 'payload': json.loads(payload), 'department': department,
+             'attempts': attempts, 'error': error, 'dead_since': updated_at}
+            for task_id, payload, department, attempts, error, updated_at in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT state, COUNT(*) FROM work_queue GROUP BY state").fetchall())
+        return {'backend': 'sqlite', 'path': self.path, 'states': {state: counts.get(state, 0) for state in STATES},
+                'visibility_timeout': self.visibility_timeout, 'max_attempts': self.max_attempts}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _purge(self, now: float):
+        """Forget finished tasks past their retention"""
+        self._last_purge = now
+        self._transaction(lambda db: db.execute(
+            "DELETE FROM work_queue WHERE state = 'done' AND updated_at < ?", (now - self.done_retention,)
+        ))
+
+class RedisWorkQueue(WorkQueue):
+    """
+    🟥 Work queue on a Redis-compatible server, using plain commands only (no Lua):
+
+    - `<ns>:task:<id>`      immutable task record (JSON), created with SET NX - the enqueue claim
+    - `<ns>:meta:<id>`      hash: state, attempts, error, leased_by, updated_at
+    - `<ns>:departments`    set of the departments tasks were queued for ('' for none)
+    - `<ns>:ready:<dept>`   zset of the department's visible task ids by sort key
+    - `<ns>:leased:<dept>`  zset of the department's leased task ids by lease expiry
+    - `<ns>:started:<dept>` zset of lease tokens by lease time, for rate-limited departments
+    - `<ns>:delayed`        zset of nacked task ids by the time they become visible again
+    - `<ns>:lease:<id>`     the lease token: SET NX PX <visibility timeout> - whoever sets it
+      owns the task, and it expires by itself when the holder dies
+    - `<ns>:dead`           zset of dead-lettered task ids by time
+
+    Tasks without a department use `<ns>:ready` and `<ns>:leased`. A lease reads the heads
+    of the departments with headroom and claims each task in one MULTI (add to `leased`,
+    remove from `ready`, count the department's leases), undoing a claim that went over
+    the department's limit - so leasing costs O(limit + departments) however many tasks
+    are in flight. Expired leases go back to `ready` at the next lease. An unfinished task
+    is always in a `ready`, `leased` or `delayed` set, so a node dying at any point can at
+    worst cause a redelivery, never a lost task.
+    """
+
+    scope = 'cluster'
+
+    def __init__(self, client, namespace: str = 'helix:queue', **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.ns = namespace
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisWorkQueue':
+        import redis  # only needed when a Redis queue is configured
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, kind: str, task_id: str = '') -> str:
+        return f"{self.ns}:{kind}:{task_id}" if task_id else f"{self.ns}:{kind}"
+
+    def _queued(self, pipe, task_id: str, record: Dict[str, Any], now: float):
+        pipe.hset(self._key('meta', task_id), mapping={'state': 'pending', 'attempts': 0, 'updated_at': now})
+        pipe.sadd(self._key('departments'), record['department'] or '')
+        pipe.zadd(self._key('ready', record['department']), {task_id: record['sort_key']}, nx=True)
+
+    def enqueue(self, task_id, payload, department=None, priority='normal', sort_key=None) -> bool:
+        now = time.time()
+        record = {'payload': payload, 'department': department, 'priority': priority,
+                  'sort_key': now if sort_key is None else sort_key, 'enqueued_at': now}
+        created = self.client.set(self._key('task', task_id), json.dumps(record), nx=True)
+        if not created:
+            if self.client.exists(self._key('meta', task_id)):
+                return False
+            record = json.loads(self.client.get(self._key('task', task_id)) or 'null') or record
+        # A crash between the claim above and this write is repaired by the next enqueue
+        with self.client.pipeline(transaction=True) as pipe:
+            self._queued(pipe, task_id, record, now)
+            pipe.execute()
+        return True
+
+    def enqueue_many(self, tasks: Iterable[NewTask]) -> List[bool]:
+        """Claim every task in one pipeline and make the new ones ready in a second"""
+        tasks = list(tasks)
+        now = time.time()
+        records = [{'payload': task.payload, 'department': task.department, 'priority': task.priority,
+                    'sort_key': now if task.sort_key is None else task.sort_key, 'enqueued_at': now}
+                   for task in tasks]
+        with self.client.pipeline(transaction=False) as pipe:
+            for task, record in zip(tasks, records):
+                pipe.set(self._key('task', task.task_id), json.dumps(record), nx=True)
+            created = pipe.execute()
+        with self.client.pipeline(transaction=True) as pipe:
+            for task, record, claimed in zip(tasks, records, created):
+                if claimed:
+                    self._queued(pipe, task.task_id, record, now)
+            pipe.execute()
+        # Ids that were already claimed go through enqueue(), which repairs half-written tasks
+        return [bool(claimed) or self.enqueue(*task) for task, claimed in zip(tasks, created)]
+
+    def _promote_delayed(self, now: float):
+        """Move nacked tasks whose back-off has passed back into their ready set"""
+        for task_id in self.client.zrangebyscore(self._key('delayed'), '-inf', now):
+            record = self._record(task_id)
+            if record is not None:
+                self.client.zadd(self._key('ready', record['department']), {task_id: record['sort_key']}, nx=True)
+            self.client.zrem(self._key('delayed'), task_id)
+
+    def _record(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._key('task', task_id))
+        return json.loads(raw) if raw else None
+
+    def _reclaim_expired(self, departments: List[str], now: float):
+        """Return tasks whose holder stopped extending its lease to their ready set"""
+        with self.client.pipeline(transaction=False) as pipe:
+            for department in departments:
+                pipe.zrangebyscore(self._key('leased', department), '-inf', now)
+            expired = pipe.execute()
+        for department, task_ids in zip(departments, expired):
+            for task_id in task_ids:
+                if self.client.exists(self._key('lease', task_id)):
+                    continue   # extended a moment ago; extend() moves its score as well
+                record = self._record(task_id)
+                with self.client.pipeline(transaction=True) as pipe:
+                    pipe.zrem(self._key('leased', department), task_id)
+                    if record is not None:
+                        pipe.zadd(self._key('ready', department), {task_id: record['sort_key']}, nx=True)
+                    pipe.execute()
+
+    def _headroom(self, departments: List[str], limits: DepartmentLimits, now: float) -> Dict[str, int]:
+        """Leases each limited department may still start right now"""
+        limited = [department for department in departments if department in limits]
+        with self.client.pipeline(transaction=False) as pipe:
+            for department in limited:
+                pipe.zcard(self._key('leased', department))
+                if limits[department].rate_per_minute:
+                    pipe.zremrangebyscore(self._key('started', department), '-inf', now - limits[department].window)
+                    pipe.zcard(self._key('started', department))
+            counts = iter(pipe.execute())
+        headroom = {}
+        for department in limited:
+            limit = limits[department]
+            in_flight, started = next(counts), 0
+            if limit.rate_per_minute:
+                next(counts)   # the expired starts just removed
+                started = next(counts)
+            room = limit.headroom(in_flight, started)
+            if room is not None:
+                headroom[department] = room
+        return headroom
+
+    def lease(self, owner: str, limit: int = 1, limits: Optional[DepartmentLimits] = None) -> List[Lease]:
+        now = time.time()
+        limits = limits or {}
+        self._promote_delayed(now)
+        departments = sorted(self.client.smembers(self._key('departments')))
+        self._reclaim_expired(departments, now)
+        headroom = self._headroom(departments, limits, now)
+        expires_at = now + self.visibility_timeout
+        leases = []
+        while len(leases) < limit:
+            wanted = {department: min(limit - len(leases), headroom.get(department, limit))
+                      for department in departments if headroom.get(department, limit) > 0}
+            with self.client.pipeline(transaction=False) as pipe:
+                for department, count in wanted.items():
+                    pipe.zrange(self._key('ready', department), 0, count - 1, withscores=True)
+                heads = pipe.execute() if wanted else []
+            candidates = sorted((sort_key, task_id, department)
+                                for department, head in zip(wanted, heads) for task_id, sort_key in head)
+            if not candidates:
+                break
+            # Every candidate leaves `ready` below (claimed here or elsewhere) or blocks its department
+            for sort_key, task_id, department in candidates[:limit - len(leases)]:
+                if headroom.get(department, 1) <= 0:
+                    continue
+                lease, over_limit = self._claim(task_id, department, sort_key, owner, now, expires_at,
+                                                limits.get(department))
+                if over_limit:
+                    headroom[department] = 0
+                elif lease is not None:
+                    leases.append(lease)
+                    if department in headroom:
+                        headroom[department] -= 1
+        return leases
+
+    def _claim(self, task_id: str, department: str, sort_key: float, owner: str, now: float,
+               expires_at: float, limit: Optional[DepartmentLimit]):
+        """(Lease or None, whether the claim was undone for the department's limit)"""
+        token = uuid.uuid4().hex
+        rate_limited = limit is not None and bool(limit.rate_per_minute)
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._key('leased', department), {task_id: expires_at}, nx=True)
+            pipe.zrem(self._key('ready', department), task_id)
+            pipe.zcard(self._key('leased', department))
+            if rate_limited:
+                pipe.zadd(self._key('started', department), {token: now})
+                pipe.zcard(self._key('started', department))
+            added, removed, in_flight, *started = pipe.execute()
+        claimed = bool(added and removed)
+        over_limit = claimed and limit is not None and limit.headroom(in_flight, started[-1] if started else 0) < 0
+        if not claimed or over_limit:
+            with self.client.pipeline(transaction=True) as pipe:
+                if added:   # finished since we read `ready`, or over the limit
+                    pipe.zrem(self._key('leased', department), task_id)
+                if over_limit:
+                    pipe.zadd(self._key('ready', department), {task_id: sort_key})
+                if rate_limited:
+                    pipe.zrem(self._key('started', department), token)
+                pipe.execute()
+            return None, over_limit  # another node claimed it first, or the department is full
+        if not self.client.set(self._key('lease', task_id), token, nx=True, px=int(self.visibility_timeout * 1000)):
+            # A live holder whose entry an overlapping reclaim moved: keep it leased under its own expiry
+            remaining = self.client.pttl(self._key('lease', task_id))
+            self.client.zadd(self._key('leased', department), {task_id: now + max(remaining, 0) / 1000})
+            return None, False
+        return self._claimed(task_id, department, token, owner, now), False
+
+    def _claimed(self, task_id: str, department: str, token: str, owner: str, now: float) -> Optional[Lease]:
+        record = self._record(task_id)
+        meta = self.client.hgetall(self._key('meta', task_id))
+        if record is None or meta.get('state') not in ('pending', 'leased'):
+            # Finished or expired meanwhile
+            with self.client.pipeline(transaction=True) as pipe:
+                pipe.zrem(self._key('leased', department), task_id)
+                pipe.delete(self._key('lease', task_id))
+                pipe.execute()
+            return None
+        attempts = int(meta.get('attempts', 0))
+        lease = Lease(task_id, token, record['payload'], record['department'], record['priority'],
+                      attempts + 1, record['enqueued_at'], now + self.visibility_timeout)
+        if attempts >= self.max_attempts:
+            self._bury(lease, meta.get('error') or 'lease expired')
+            return None
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(self._key('meta', task_id), 'attempts', 1)
+            pipe.hset(self._key('meta', task_id), mapping={'state': 'leased', 'leased_by': owner, 'updated_at': now})
+            pipe.execute()
+        return lease
+
+    def _holds(self, lease: Lease) -> bool:
+        return self.client.get(self._key('lease', lease.task_id)) == lease.token
+
+    def extend(self, lease: Lease) -> bool:
+        if not self._holds(lease):
+            return False
+        expires_at = time.time() + self.visibility_timeout
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.pexpire(self._key('lease', lease.task_id), int(self.visibility_timeout * 1000))
+            pipe.zadd(self._key('leased', lease.department), {lease.task_id: expires_at})
+            pipe.execute()
+        lease.expires_at = expires_at
+        return True
+
+    def ack(self, lease: Lease):
+        if not self._holds(lease):
+            return
+        retention = max(int(self.done_retention), 1)
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._key('leased', lease.department), lease.task_id)
+            pipe.hset(self._key('meta', lease.task_id), mapping={'state': 'done', 'updated_at': time.time()})
+            pipe.expire(self._key('meta', lease.task_id), retention)
+            pipe.expire(self._key('task', lease.task_id), retention)
+            pipe.delete(self._key('lease', lease.task_id))
+            pipe.execute()
+
+    def nack(self, lease: Lease, error: str = '', delay: float = 0.0):
+        if lease.attempts >= self.max_attempts:
+            self.dead_letter(lease, error)
+            return
+        if not self._holds(lease):
+            return
+        now = time.time()
+        record = self._record(lease.task_id)
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key('meta', lease.task_id), mapping={'state': 'pending', 'error': error, 'updated_at': now})
+            pipe.zrem(self._key('leased', lease.department), lease.task_id)
+            if delay > 0:
+                pipe.zadd(self._key('delayed'), {lease.task_id: now + delay})
+            elif record is not None:
+                pipe.zadd(self._key('ready', lease.department), {lease.task_id: record['sort_key']})
+            pipe.delete(self._key('lease', lease.task_id))
+            pipe.execute()
+
+    def dead_letter(self, lease: Lease, error: str):
+        if self._holds(lease):
+            self._bury(lease, error)
+
+    def _bury(self, lease: Lease, error: str):
+        now = time.time()
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._key('leased', lease.department), lease.task_id)
+            pipe.zrem(self._key('ready', lease.department), lease.task_id)
+            pipe.zadd(self._key('dead'), {lease.task_id: now})
+            pipe.hset(self._key('meta', lease.task_id), mapping={'state': 'dead', 'error': error, 'updated_at': now})
+            pipe.delete(self._key('lease', lease.task_id))
+            pipe.execute()
+        self._dead_lettered(lease.task_id, lease.payload, error)
+
+    def state(self, task_id: str) -> Optional[str]:
+        return self.client.hget(self._key('meta', task_id), 'state')
+
+    def requeue_dead(self, task_id: str) -> bool:
+        record = self._record(task_id)
+        if record is None or self.state(task_id) != 'dead':
+            return False
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._key('dead'), task_id)
+            pipe.hset(self._key('meta', task_id), mapping={'state': 'pending', 'attempts': 0, 'updated_at': time.time()})
+            pipe.sadd(self._key('departments'), record['department'] or '')
+            pipe.zadd(self._key('ready', record['department']), {task_id: record['sort_key']})
+            pipe.execute()
+        return True
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        letters = []
+        for task_id in self.client.zrevrange(self._key('dead'), 0, limit - 1):
+            record = self._record(task_id) or {}
+            meta = self.client.hgetall(self._key('meta', task_id))
+            letters.append({
+                'task_id': task_id, 'payload': record.get('payload'), 'department': record.get('department'),
+                'attempts': int(meta.get('attempts', 0)), 'error': meta.get('error'),
+                'dead_since': float(meta.get('updated_at', 0))
+            })
+        return letters
+
+    def stats(self) -> Dict[str, Any]:
+        departments = sorted(self.client.smembers(self._key('departments')))
+        with self.client.pipeline(transaction=False) as pipe:
+            for department in departments:
+                pipe.zcard(self._key('ready', department))
+                pipe.zcard(self._key('leased', department))
+            pipe.zcard(self._key('delayed'))
+            pipe.zcard(self._key('dead'))
+            *counts, delayed, dead = pipe.execute()
+        return {
+            'backend': 'redis', 'namespace': self.ns,
+            'states': {'pending': sum(counts[0::2]) + delayed, 'leased': sum(counts[1::2]), 'dead': dead},
+            'visibility_timeout': self.visibility_timeout, 'max_attempts': self.max_attempts
+        }
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+def queue_from_url(url: str, **kwargs) -> WorkQueue:
+    """
+    Work queue from configuration: '' / 'memory' (private to this process),
+    'sqlite:<path>', or a 'redis://' / 'rediss://' URL
+    """
+    url = (url or '').strip()
+    if url in ('', 'memory'):
+        return SQLiteWorkQueue(':memory:', **kwargs)
+    if url.startswith('sqlite:'):
+        path = url[len('sqlite:'):]
+        return SQLiteWorkQueue(path[2:] if path.startswith('//') else path, **kwargs)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisWorkQueue.from_url(url, **kwargs)
+    raise ValueError(f"Unsupported work queue {url!r} (expected sqlite:<path> or redis://...)")